@@ -32,6 +32,11 @@ import logging
 from typing import List, Dict, Optional
 from pathlib import Path
 
+# Motor de reintentos compartido con proyecto_youtube (sólo stdlib)
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'proyecto_youtube' / 'utils'))
+from retry_engine import ENGINE_PRESETS, RetryEngine, classify_error
+from scoring_config import get_scoring_config, points_at_least, points_at_most
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -68,6 +73,8 @@ class WebNicheAnalyzer:
         self.request_delay = request_delay
         self.max_retries = max_retries
         self.retry_count = 0
+        self.retry_engine = RetryEngine(max_retries=max_retries, base_delay=request_delay,
+                                        max_delay=ENGINE_PRESETS['trends']['max_delay'])
 
         # Configurar PyTrends (Google Trends)
         try:
@@ -132,96 +139,70 @@ class WebNicheAnalyzer:
                 'trend_error': 'PyTrends not available'
             }
 
-        # Sistema de reintentos con backoff exponencial
-        for attempt in range(self.max_retries + 1):
-            try:
-                logger.info(f"📊 Consultando Google Trends para '{keyword}' (intento {attempt + 1}/{self.max_retries + 1})")
-                
-                # Obtener interés a lo largo del tiempo (últimos 12 meses)
-                self.pytrends.build_payload([keyword], timeframe='today 12-m', geo='ES')
-
-                # Obtener datos de interés
-                interest_data = self.pytrends.interest_over_time()
-
-                if interest_data.empty or keyword not in interest_data.columns:
-                    logger.warning(f"⚠️  No hay datos de tendencias para '{keyword}'")
-                    return {
-                        'trend_score': 0.0,
-                        'trend_direction': 'no_data',
-                        'relative_interest': 0,
-                        'trend_error': None
-                    }
-
-                # Calcular métricas
-                values = interest_data[keyword].values
-                relative_interest = int(values.mean()) if len(values) > 0 else 0
-
-                if len(values) < 2:
-                    trend_score = 0.0
-                    direction = 'stable'
-                else:
-                    # Comparar último trimestre vs anterior
-                    recent_avg = values[-3:].mean() if len(values) >= 3 else values[-1]
-                    older_avg = values[:-3].mean() if len(values) > 3 else values[0]
-                    
-                    if older_avg > 0:
-                        trend_score = (recent_avg - older_avg) / older_avg
-                    else:
-                        trend_score = 0.0
-
-                    # Determinar dirección de la tendencia
-                    if trend_score > 0.15:
-                        direction = 'up'
-                    elif trend_score < -0.15:
-                        direction = 'down'
-                    else:
-                        direction = 'stable'
-
-                logger.info(f"✅ Datos obtenidos exitosamente para '{keyword}'")
-                return {
-                    'trend_score': round(trend_score, 3),
-                    'trend_direction': direction,
-                    'relative_interest': relative_interest,
-                    'trend_error': None
-                }
+        # Reintentos con backoff + jitter, Retry-After y circuito (utils/retry_engine.py de proyecto_youtube)
+        try:
+            logger.info(f"📊 Consultando Google Trends para '{keyword}'")
+            interest_data = self.retry_engine.call('trends.interest_over_time', self._fetch_interest, keyword)
+        except Exception as e:
+            error_msg = f"{type(e).__name__}: {e}"
+            if classify_error(e).kind == 'rate':
+                logger.error(f"❌ Rate limit persistente para '{keyword}' después de {self.max_retries + 1} intentos")
+            else:
+                logger.warning(f"⚠️  Error obteniendo trends para '{keyword}': {error_msg}")
+            return {
+                'trend_score': 0.0,
+                'trend_direction': 'error',
+                'relative_interest': 0,
+                'trend_error': error_msg
+            }
 
-            except Exception as e:
-                error_msg = str(e)
-                
-                # Si es error 429 (rate limit), aplicar backoff exponencial
-                if "429" in error_msg or "TooManyRequestsError" in error_msg:
-                    if attempt < self.max_retries:
-                        wait_time = self.request_delay * (2 ** attempt)  # Backoff exponencial
-                        logger.warning(f"⚠️  Rate limit alcanzado. Esperando {wait_time:.1f}s antes del siguiente intento...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        logger.error(f"❌ Rate limit persistente para '{keyword}' después de {self.max_retries + 1} intentos")
-                else:
-                    logger.warning(f"⚠️  Error obteniendo trends para '{keyword}': {error_msg}")
-                
-                # Si no es el último intento, esperar antes del siguiente
-                if attempt < self.max_retries:
-                    wait_time = self.request_delay
-                    logger.info(f"⏱️  Esperando {wait_time}s antes del siguiente intento...")
-                    time.sleep(wait_time)
-                else:
-                    # Último intento fallido
-                    return {
-                        'trend_score': 0.0,
-                        'trend_direction': 'error',
-                        'relative_interest': 0,
-                        'trend_error': error_msg
-                    }
-
-        # Este código nunca debería alcanzarse, pero por si acaso
+        if interest_data.empty or keyword not in interest_data.columns:
+            logger.warning(f"⚠️  No hay datos de tendencias para '{keyword}'")
+            return {
+                'trend_score': 0.0,
+                'trend_direction': 'no_data',
+                'relative_interest': 0,
+                'trend_error': None
+            }
+
+        # Calcular métricas
+        values = interest_data[keyword].values
+        relative_interest = int(values.mean()) if len(values) > 0 else 0
+
+        if len(values) < 2:
+            trend_score = 0.0
+            direction = 'stable'
+        else:
+            # Comparar último trimestre vs anterior
+            recent_avg = values[-3:].mean() if len(values) >= 3 else values[-1]
+            older_avg = values[:-3].mean() if len(values) > 3 else values[0]
+
+            if older_avg > 0:
+                trend_score = (recent_avg - older_avg) / older_avg
+            else:
+                trend_score = 0.0
+
+            # Determinar dirección de la tendencia
+            if trend_score > 0.15:
+                direction = 'up'
+            elif trend_score < -0.15:
+                direction = 'down'
+            else:
+                direction = 'stable'
+
+        logger.info(f"✅ Datos obtenidos exitosamente para '{keyword}'")
         return {
-            'trend_score': 0.0,
-            'trend_direction': 'error',
-            'relative_interest': 0,
-            'trend_error': 'Maximum retries exceeded'
+            'trend_score': round(trend_score, 3),
+            'trend_direction': direction,
+            'relative_interest': relative_interest,
+            'trend_error': None
         }
 
+    def _fetch_interest(self, keyword: str):
+        """Un intento: payload + interés de los últimos 12 meses en España."""
+        self.pytrends.build_payload([keyword], timeframe='today 12-m', geo='ES')
+        return self.pytrends.interest_over_time()
+
     def get_ads_data(self, keyword: str) -> Dict:
         """
         Obtiene datos de Google Ads Keyword Planner (STUB - implementar cuando esté disponible)
@@ -323,53 +304,27 @@ class WebNicheAnalyzer:
         cpc = ads_data['cpc']
         competition = ads_data['competition_index']
         trend_direction = trends_data['trend_direction']
-        trend_score = trends_data['trend_score']
 
-        # Lógica de decisión para nichos web
+        # Lógica de decisión para nichos web: tramos de config/scoring (sección web_decision)
+        cfg = get_scoring_config().web_decision
         score = 0
-        
+
         # Puntuación por volumen (peso: 40%)
-        if volume >= 10000:
-            score += 40
-        elif volume >= 5000:
-            score += 30
-        elif volume >= 1000:
-            score += 20
-        else:
-            score += 10
-            
+        score += points_at_least(volume, cfg['volume_tiers'], cfg['volume_floor'])
+
         # Puntuación por CPC (peso: 25%)
-        if cpc <= 0.5:
-            score += 25
-        elif cpc <= 1.0:
-            score += 20
-        elif cpc <= 2.0:
-            score += 15
-        else:
-            score += 5
-            
+        score += points_at_most(cpc, cfg['cpc_tiers'], cfg['cpc_ceiling'])
+
         # Puntuación por competencia (peso: 25%)
-        if competition <= 0.3:
-            score += 25
-        elif competition <= 0.5:
-            score += 20
-        elif competition <= 0.7:
-            score += 15
-        else:
-            score += 5
-            
+        score += points_at_most(competition, cfg['competition_tiers'], cfg['competition_ceiling'])
+
         # Puntuación por tendencia (peso: 10%)
-        if trend_direction == 'up':
-            score += 10
-        elif trend_direction == 'stable':
-            score += 7
-        else:
-            score += 3
+        score += cfg['trend_scores'].get(trend_direction, cfg['trend_default'])
 
         # Decisión final
-        if score >= 75:
+        if score >= cfg['recommended_min']:
             return "RECOMENDADO"
-        elif score >= 50:
+        elif score >= cfg['evaluate_min']:
             return "EVALUAR"
         else:
             return "DESCARTAR"
@@ -18,6 +18,12 @@ from googleapiclient.errors import HttpError
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "credentials"))
 from config import YOUTUBE_API_KEY, DEFAULT_LANGUAGE, DEFAULT_COUNTRY
 
+# Léxico compartido de señales (proyecto_youtube/utils/lexicon.py + config/lexicon/*.json)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             "proyecto_youtube", "utils"))
+from lexicon import LEXICON_API_VERSION, get_lexicon
+from metric_normalizer import get_metric_normalizer
+
 
 class NicheAnalyzerEnhanced:
     """
@@ -34,6 +40,9 @@ class NicheAnalyzerEnhanced:
         self.daily_youtube_requests = 0
         self.max_youtube_per_day = 100  # Límite conservador
 
+        # Normalización contra referencias acumuladas entre ejecuciones (metric_normalizer)
+        self.normalizer = get_metric_normalizer('enhanced')
+
         # Fecha límite para contenido reciente (últimos 12 meses)
         self.date_limit = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%dT%H:%M:%SZ')
 
@@ -64,24 +73,12 @@ class NicheAnalyzerEnhanced:
             "estudiar desde casa", "desarrollo personal"
         ]
 
-        # Categorías de monetización por nicho
-        self.monetization_categories = {
-            # Muy Alto Potencial
-            "finanzas": "Muy Alto", "cripto": "Muy Alto", "invertir": "Muy Alto",
-            "trading": "Muy Alto", "forex": "Muy Alto", "bolsa": "Muy Alto",
-
-            # Alto Potencial
-            "programación": "Alto", "python": "Alto", "desarrollo": "Alto",
-            "tecnología": "Alto", "marketing": "Alto", "negocios": "Alto",
-
-            # Medio Potencial
-            "salud": "Medio", "fitness": "Medio", "educación": "Medio",
-            "aprendizaje": "Medio", "productividad": "Medio",
-
-            # Bajo Potencial
-            "vlogs": "Bajo", "gaming": "Bajo", "entretenimiento": "Bajo",
-            "música": "Bajo", "viajes": "Bajo"
-        }
+        # Diccionarios de monetización y automatización (léxico compartido, compilados una vez)
+        lexicon = get_lexicon(LEXICON_API_VERSION)
+        self.monetization_matcher = lexicon.matcher('keyword_monetization_cpm')
+        self.automatizable_matcher = lexicon.matcher('keyword_automatizable')
+        # Categorías de monetización por nicho (niveles de Muy Alto a Bajo)
+        self.monetization_potential_matcher = lexicon.matcher('monetization_potential')
 
     def clasificar_monetizacion(self, keyword):
         """
@@ -89,29 +86,10 @@ class NicheAnalyzerEnhanced:
         Detecta el modelo de monetización más efectivo por keyword
         Prioriza anuncios (CPM alto) sobre afiliación
         """
-        keyword_lower = keyword.lower()
-        
-        # 🔗 Palabras clave para AFILIACIÓN (productos físicos, comparativas)
-        afiliacion = [
-            "comprar", "mejores", "review", "productos", "comparativa", "guía",
-            "precio", "barato", "amazon", "oferta", "ranking", "pienso", 
-            "juguetes", "accesorios", "snacks", "alimentación", "recomendación", 
-            "top", "análisis", "prueba", "características", "modelos"
-        ]
-        
-        # 💰 Palabras clave para ANUNCIOS (CPM alto, servicios financieros amplios)
-        anuncios = [
-            "finanzas", "financiero", "financiera", "financieros", "invertir", 
-            "inversión", "trading", "seguros", "banca", "abogado", "consultoría", 
-            "marketing", "coaching", "educación", "psicología", "cuenta", "cuentas", 
-            "remunerada", "remuneradas", "interés", "ahorros", "cuenta bancaria", 
-            "cuenta sin comisiones", "forex", "bolsa", "préstamos", "tarjetas", 
-            "banco", "cripto", "criptomonedas", "emprendimiento"
-        ]
-        
-        # Detectar presencia de cada tipo
-        tiene_afiliacion = any(word in keyword_lower for word in afiliacion)
-        tiene_anuncios = any(word in keyword_lower for word in anuncios)
+        # 🔗 AFILIACIÓN (productos físicos, comparativas) / 💰 ANUNCIOS (CPM alto)
+        categorias = self.monetization_matcher.categories_in(keyword)
+        tiene_afiliacion = 'afiliacion' in categorias
+        tiene_anuncios = 'anuncios' in categorias
         
         # 🎯 Clasificar según combinación (prioriza anuncios por CPM más alto)
         if tiene_afiliacion and tiene_anuncios:
@@ -128,30 +106,16 @@ class NicheAnalyzerEnhanced:
         🔥 MEJORA: Detectar si un nicho es automatizable con IA
         Lista ampliada con nichos de productos y contenido estructurado
         """
-        # 🤖 Combinación de keywords actuales + propuestas mejoradas
-        automatizable_keywords = [
-            # Keywords originales (contenido estructurado)
-            "review", "top", "mejores", "comparativa", "tutorial", "guía",
-            "ranking", "vs", "versus", "cómo", "paso a paso", "tips",
-            "trucos", "mejor", "peor", "comparar", "análisis",
-            
-            # 🔥 MEJORA: Nuevas keywords para productos y contenido automatizable
-            "productos", "recomendados", "precio", "barato", "características",
-            "modelos", "accesorios", "snacks", "pienso", "comida", "alimentación",
-            "oferta", "amazon", "comprar", "juguetes"
-        ]
-
-        keyword_lower = keyword.lower()
-        return any(word in keyword_lower for word in automatizable_keywords)
+        # 🤖 Keywords de contenido estructurado y de productos (léxico: keyword_automatizable)
+        return self.automatizable_matcher.any(keyword)
 
     def get_monetization_potential(self, keyword):
         """
         Estimar potencial de monetización basado en categoría
         """
-        keyword_lower = keyword.lower()
-
-        for category, potential in self.monetization_categories.items():
-            if category in keyword_lower:
+        found = self.monetization_potential_matcher.categories_in(keyword)
+        for potential in self.monetization_potential_matcher.categories:
+            if potential in found:
                 return potential
 
         return "Medio"  # Default
@@ -159,27 +123,13 @@ class NicheAnalyzerEnhanced:
     def normalize_metrics(self, niches_data):
         """
         Normalizar métricas para comparación justa
+        Contra las referencias acumuladas de ejecuciones anteriores: un nicho
+        analizado solo ya no sale siempre con 1.0.
         """
-        if not niches_data:
-            return niches_data
-
-        # Extraer valores para normalización
-        views_values = [niche['avg_views'] for niche in niches_data]
-        likes_values = [niche['total_likes'] for niche in niches_data]
-        comments_values = [niche['total_comments'] for niche in niches_data]
-
-        # Calcular máximos para normalización
-        max_views = max(views_values) if views_values else 1
-        max_likes = max(likes_values) if likes_values else 1
-        max_comments = max(comments_values) if comments_values else 1
-
-        # Normalizar cada nicho
         for niche in niches_data:
-            niche['views_norm'] = niche['avg_views'] / max_views
-            niche['likes_norm'] = niche['total_likes'] / max_likes
-            niche['comments_norm'] = niche['total_comments'] / max_comments
-            niche['engagement_norm'] = (niche['likes_norm'] + niche['comments_norm']) / 2
-
+            self.normalizer.observe(niche)
+        self.normalizer.renormalize(niches_data)
+        self.normalizer.save()
         return niches_data
 
     def analyze_youtube_potential(self, keywords, max_keywords=10):
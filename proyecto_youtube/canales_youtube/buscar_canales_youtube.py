@@ -13,7 +13,6 @@ from typing import List, Dict, Any, Optional
 import random
 
 try:
-    from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
 except Exception:
     print("Error: googleapiclient is required. Install google-api-python-client.")
@@ -53,9 +52,22 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 OUT_DIR = PROJECT_ROOT / 'out'
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Cliente de YouTube compartido (utils/youtube_client.py)
+sys.path.append(str(PROJECT_ROOT / 'utils'))
+from youtube_client import get_youtube_client, configure_cache, etag_summary
+from channel_cache import get_channel_cache
+from youtube_batch import BatchLookup
+from batch_classifier import flag_texts
+from field_masks import field_mask
+from recent_stats_store import get_recent_stats_store
+from quantile_sketch import KLLSketch
+from response_cache import CACHE_MODES, DEFAULT_CACHE_MODE
+from quota_scheduler import QuotaExceeded, get_quota_scheduler, print_key_summary
+from retry_engine import CircuitOpen, print_retry_summary
+
 
 def build_youtube(api_key: str):
-    return build('youtube', 'v3', developerKey=api_key)
+    return get_youtube_client(api_key)
 
 
 def search_videos_get_channels(youtube, keyword: str, max_results: int = 50) -> List[str]:
@@ -75,7 +87,8 @@ def search_videos_get_channels(youtube, keyword: str, max_results: int = 50) ->
 
         while pages_remaining > 0 and len(seen) < max_results:
             req = youtube.search().list(
-                part='snippet', q=keyword, type='video', maxResults=50, order='relevance', pageToken=page_token
+                part='snippet', q=keyword, type='video', maxResults=50, order='relevance', pageToken=page_token,
+                fields=field_mask('search.channel_ids')
             )
             resp = req.execute()
 
@@ -95,7 +108,7 @@ def search_videos_get_channels(youtube, keyword: str, max_results: int = 50) ->
             time.sleep(0.2)
 
         return channel_ids[:max_results]
-    except HttpError as e:
+    except (HttpError, QuotaExceeded, CircuitOpen) as e:
         print(f"YouTube API error searching '{keyword}': {e}")
         return []
 
@@ -105,62 +118,132 @@ def get_channels_info(youtube, channel_ids: List[str]) -> Dict[str, Dict[str, An
     if not channel_ids:
         return {}
 
+    # Served from the process-wide channel cache (memory + channels table); only
+    # missing/stale ids go to channels.list, packed 50 per call in one batch round-trip
+    try:
+        infos = get_channel_cache().get_many(youtube, channel_ids)
+    except (HttpError, QuotaExceeded, CircuitOpen) as e:
+        print(f"YouTube API error fetching channels: {e}")
+        return {}
+    return {cid: dict(info) for cid, info in infos.items()}
+
+
+RECENT_METHODS = ('uploads', 'search')
+EMPTY_RECENT = {'recent_count': 0, 'avg_views': None, 'median_views': None}
+# Campos que sólo van al snapshot/BD (el sketch serializado no pinta nada en CSV/parquet)
+SNAPSHOT_ONLY_FIELDS = ('views_sketch',)
+
+
+def _recent_stats_from_items(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute avg/median views and collect titles/descriptions from videos.list items."""
+    views = []
+    titles = []
+    descriptions = []
+    for v in items:
+        s = v.get('statistics', {})
+        views.append(int(s.get('viewCount', 0)))
+        titles.append(v.get('snippet', {}).get('title', ''))
+        descriptions.append(v.get('snippet', {}).get('description', ''))
+
+    # Sketch de cuantiles: mediana exacta con pocos videos, memoria acotada con muchos;
+    # se guarda con el snapshot para poder fusionar días
+    sketch = KLLSketch.of(views)
+    avg_v = sketch.total / sketch.n if views else None
+    med_v = sketch.quantile(0.5) if views else None
+    return {'recent_count': len(views), 'avg_views': avg_v, 'median_views': med_v, 'titles': titles, 'descriptions': descriptions,
+            'views_sketch': sketch.to_json()}
+
+
+def get_recent_videos_stats_many(youtube, channel_ids: List[str], max_videos: int = 5) -> Dict[str, Dict[str, Any]]:
+    """Recent-video stats for many channels through their uploads playlists.
+
+    channels.list(contentDetails) -> playlistItems.list per channel -> videos.list,
+    every step at 1 unit per call and grouped in batch round-trips (the videos.list
+    stats are shared across channels, 50 ids per call). search.list by channelId
+    costs 100 units per channel for the same data.
+    """
+    channel_ids = list(dict.fromkeys(cid for cid in channel_ids if cid))
+    if not channel_ids or max_videos <= 0:
+        return {cid: dict(EMPTY_RECENT) for cid in channel_ids}
+
+    lookup = BatchLookup(youtube)
+    try:
+        channel_items = lookup.fetch_channels(channel_ids, part='contentDetails', fields=field_mask('channels.uploads'))
+        uploads = {
+            cid: item.get('contentDetails', {}).get('relatedPlaylists', {}).get('uploads')
+            for cid, item in channel_items.items()
+        }
+        with_uploads = [cid for cid in channel_ids if uploads.get(cid)]
+        requests = [
+            youtube.playlistItems().list(part='contentDetails', playlistId=uploads[cid], maxResults=min(max_videos, 50),
+                                         fields=field_mask('playlistItems.video_ids'))
+            for cid in with_uploads
+        ]
+        video_ids_by_channel = {}
+        for cid, resp in zip(with_uploads, lookup.execute_all('playlistItems', requests)):
+            video_ids_by_channel[cid] = [
+                item['contentDetails']['videoId'] for item in (resp or {}).get('items', [])
+                if item.get('contentDetails', {}).get('videoId')
+            ][:max_videos]
+
+        video_items = lookup.fetch_videos(
+            [vid for ids in video_ids_by_channel.values() for vid in ids], part='statistics,snippet',
+            fields=field_mask('videos.recent')
+        )
+    except (HttpError, QuotaExceeded, CircuitOpen) as e:
+        print(f"YouTube API error fetching recent videos (uploads playlists): {e}")
+        return {cid: dict(EMPTY_RECENT) for cid in channel_ids}
+
     results = {}
-    # channels.list accepts up to 50 ids per call
-    for i in range(0, len(channel_ids), 50):
-        batch = channel_ids[i:i+50]
-        try:
-            req = youtube.channels().list(part='snippet,statistics', id=','.join(batch))
-            resp = req.execute()
-            for item in resp.get('items', []):
-                cid = item['id']
-                stats = item.get('statistics', {})
-                snippet = item.get('snippet', {})
-                results[cid] = {
-                    'channelId': cid,
-                    'title': snippet.get('title', ''),
-                    'description': snippet.get('description', ''),
-                    'publishedAt': snippet.get('publishedAt', ''),
-                    'subscriberCount': int(stats.get('subscriberCount', 0)) if stats.get('subscriberCount') else None,
-                    'videoCount': int(stats.get('videoCount', 0)) if stats.get('videoCount') else None,
-                    'viewCount': int(stats.get('viewCount', 0)) if stats.get('viewCount') else None,
-                }
-        except HttpError as e:
-            print(f"YouTube API error fetching channels: {e}")
+    for cid in channel_ids:
+        ids = video_ids_by_channel.get(cid, [])
+        items = [video_items[vid] for vid in ids if vid in video_items]
+        results[cid] = _recent_stats_from_items(items) if items else dict(EMPTY_RECENT)
     return results
 
 
-def get_recent_videos_stats(youtube, channel_id: str, max_videos: int = 5) -> Dict[str, Any]:
-    """Optional: fetch recent videos for a channel and compute avg/median views and basic signals."""
+def fetch_recent_stats(youtube, channel_ids: List[str], max_videos: int = 5, method: str = 'uploads') -> Dict[str, Dict[str, Any]]:
+    """Recent-video stats by channelId using the selected method (uploads are batched across channels).
+
+    Results are memoized per run and stored as same-day snapshots, so a channel seen in
+    several keywords (and again in the aggregated report) is only fetched once.
+    """
+    def _fetch(missing: List[str]) -> Dict[str, Dict[str, Any]]:
+        if method == 'uploads':
+            return get_recent_videos_stats_many(youtube, missing, max_videos=max_videos)
+        return {cid: get_recent_videos_stats(youtube, cid, max_videos=max_videos, method=method)
+                for cid in missing}
+
+    return get_recent_stats_store().get_many(channel_ids, max_videos, _fetch)
+
+
+def get_recent_videos_stats(youtube, channel_id: str, max_videos: int = 5, method: str = 'uploads') -> Dict[str, Any]:
+    """Optional: fetch recent videos for a channel and compute avg/median views and basic signals.
+
+    method='uploads' (default) reads the uploads playlist (~3 units);
+    method='search' uses search.list by channelId (~101 units).
+    """
+    if method == 'uploads':
+        return get_recent_videos_stats_many(youtube, [channel_id], max_videos=max_videos)[channel_id]
     try:
         # search by channelId ordered by date
-        req = youtube.search().list(part='id', channelId=channel_id, type='video', order='date', maxResults=max_videos)
+        req = youtube.search().list(part='id', channelId=channel_id, type='video', order='date', maxResults=max_videos,
+                                    fields=field_mask('search.video_ids'))
         resp = req.execute()
         video_ids = [item['id']['videoId'] for item in resp.get('items', []) if item.get('id', {}).get('videoId')]
         if not video_ids:
             return {'recent_count': 0, 'avg_views': None, 'median_views': None}
 
-        stats_req = youtube.videos().list(part='statistics,snippet', id=','.join(video_ids))
+        stats_req = youtube.videos().list(part='statistics,snippet', id=','.join(video_ids), fields=field_mask('videos.recent'))
         stats_resp = stats_req.execute()
-        views = []
-        titles = []
-        descriptions = []
-        for v in stats_resp.get('items', []):
-            s = v.get('statistics', {})
-            views.append(int(s.get('viewCount', 0)))
-            titles.append(v.get('snippet', {}).get('title', ''))
-            descriptions.append(v.get('snippet', {}).get('description', ''))
-
-        import statistics
-        avg_v = statistics.mean(views) if views else None
-        med_v = statistics.median(views) if views else None
-        return {'recent_count': len(views), 'avg_views': avg_v, 'median_views': med_v, 'titles': titles, 'descriptions': descriptions}
-    except HttpError as e:
+        return _recent_stats_from_items(stats_resp.get('items', []))
+    except (HttpError, QuotaExceeded, CircuitOpen) as e:
         print(f"YouTube API error fetching recent videos for {channel_id}: {e}")
         return {'recent_count': 0, 'avg_views': None, 'median_views': None}
 
 
 def export_outputs(rows: List[Dict[str, Any]], prefix: str):
+    rows = [{k: v for k, v in r.items() if k not in SNAPSHOT_ONLY_FIELDS} for r in rows]
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     csv_path = OUT_DIR / f"{prefix}_{timestamp}.csv"
     md_path = OUT_DIR / f"{prefix}_{timestamp}.md"
@@ -248,10 +331,13 @@ def main():
     parser.add_argument('--api-key', help='YouTube API key (o ENV YOUTUBE_API_KEY)')
     parser.add_argument('--max-results', help='Videos a buscar por keyword (search.list maxResults)', type=int, default=50)
     parser.add_argument('--recent', help='Analizar N videos recientes por canal (opcional)', type=int, default=0)
+    parser.add_argument('--recent-method', help='Cómo obtener los videos recientes: uploads (playlist, ~3 unidades/canal) | search (~101 unidades/canal)', choices=RECENT_METHODS, default='uploads')
     parser.add_argument('--sort-by', help='Ordenar ranking por: subs|views (default subs)', choices=['subs','views'], default='subs')
     parser.add_argument('--output-prefix', help='Prefijo para archivos de salida', default='buscar_canales')
+    parser.add_argument('--cache-mode', help='Caché de respuestas de la API: off | read-write | offline', choices=CACHE_MODES, default=DEFAULT_CACHE_MODE)
 
     args = parser.parse_args()
+    configure_cache(args.cache_mode)
 
     api_key = args.api_key or os.environ.get('YOUTUBE_API_KEY')
     if not api_key:
@@ -267,6 +353,7 @@ def main():
             keywords = [l.strip() for l in f if l.strip()]
 
     youtube = build_youtube(api_key)
+    print(f"🔢 Cuota restante hoy: {get_quota_scheduler().remaining():,} unidades")
 
     # Try to initialize DB if available
     try:
@@ -280,7 +367,10 @@ def main():
 
     aggregated_channels = {}
 
-    # For each keyword produce a separate output with up to --max-results channels
+    # Phase 1: search.list per keyword. Channel stats are requested afterwards in a
+    # single batched channels.list for all keywords (channels repeated across
+    # keywords are only looked up once)
+    ids_by_keyword = {}
     for kw in keywords:
         rich_print(f"\n🔎 Buscando canales para: {kw}", style="bold blue")
         rich_print(f"  → Modo seleccionado: {args.mode}", style="cyan")
@@ -288,10 +378,6 @@ def main():
         channel_ids = search_videos_get_channels(youtube, kw, max_results=args.max_results)
         print(f"  → Canales únicos encontrados (pre-selección): {len(channel_ids)}")
 
-        # Selection logic per mode (this yields the list of channelIds/info for this keyword)
-        ids_for_stats = []
-        channels_info = {}
-
         if args.mode in ('relevance', 'random'):
             ids_for_stats = list(channel_ids)
             if args.mode == 'random':
@@ -299,39 +385,47 @@ def main():
             # limit to max_results before fetching stats to save API units
             ids_for_stats = ids_for_stats[:args.max_results]
             print(f"  → Canales a consultar (limitados por max-results): {len(ids_for_stats)}")
-            channels_info = get_channels_info(youtube, ids_for_stats)
+        else:  # mode == 'top'
+            # Need stats for all found channel_ids to select top by subscribers
+            ids_for_stats = list(channel_ids)
+        ids_by_keyword[kw] = ids_for_stats
+
+    # Phase 2: one batched channels.list for every keyword
+    all_ids = [cid for ids in ids_by_keyword.values() for cid in ids]
+    channels_info = get_channels_info(youtube, all_ids)
+    print(f"\n📦 channels.list agrupado: {len(set(all_ids))} canales únicos de {len(all_ids)} encontrados")
 
+    # For each keyword produce a separate output with up to --max-results channels
+    for kw in keywords:
+        ids_for_stats = ids_by_keyword[kw]
+        if args.mode in ('relevance', 'random'):
             # preserve requested order (ids_for_stats) when building per-keyword rows
             per_kw_infos = [channels_info[cid] for cid in ids_for_stats if cid in channels_info]
-
         else:  # mode == 'top'
-            # Need stats for all found channel_ids to select top by subscribers
-            channels_info_all = get_channels_info(youtube, channel_ids)
+            channels_info_all = [channels_info[cid] for cid in ids_for_stats if cid in channels_info]
             sorted_channels = sorted(
-                channels_info_all.values(),
+                channels_info_all,
                 key=lambda x: (x.get('subscriberCount') or 0),
                 reverse=True
             )
             top_n = sorted_channels[:args.max_results]
-            print(f"  → Canales consultados: {len(channels_info_all)} | Seleccionando top {len(top_n)} por subs")
+            print(f"  → [{kw}] Canales consultados: {len(channels_info_all)} | Seleccionando top {len(top_n)} por subs")
             per_kw_infos = top_n
 
-        # Small delay to be polite
-        time.sleep(1)
-
         # For this keyword, prepare rows (and optionally fetch recent stats)
         rows_kw = []
-        # detection keywords
-        signals_es = ["cuento","cuentos","historia","historias","niños","infantil","interactivo","elige tu propia aventura"]
-        signals_en = ["story","stories","interactive","choose your own adventure","kids","bedtime","fairy tale"]
 
+        # fetch recent titles/descriptions to classify (if requested), for all channels of the keyword at once
+        recent_by_channel = {}
+        if args.recent and args.recent > 0:
+            recent_by_channel = fetch_recent_stats(youtube, [info.get('channelId') for info in per_kw_infos],
+                                                   max_videos=args.recent, method=args.recent_method)
+
+        corpora = []
         for info in per_kw_infos:
             row = dict(info)
-            # fetch recent titles/descriptions to classify (if requested)
-            recent = {}
-            if args.recent and args.recent > 0:
-                recent = get_recent_videos_stats(youtube, row.get('channelId'), max_videos=args.recent)
-                row.update(recent)
+            if row.get('channelId') in recent_by_channel:
+                row.update(recent_by_channel[row.get('channelId')])
 
             # Build text corpus from recent titles and descriptions if available, else use channel description
             corpus = ''
@@ -341,16 +435,15 @@ def main():
                 corpus += ' ' + ' '.join(row.get('descriptions', []))
             if not corpus:
                 corpus = (row.get('description') or '')
-
-            corpus_l = corpus.lower()
-            competencia_tipo = 'Indirecta'
-            # simple detection: if any ES or EN signal appears -> Directa
-            if any(s in corpus_l for s in signals_es) or any(s in corpus_l for s in signals_en):
-                competencia_tipo = 'Directa'
-
-            row['competencia_tipo'] = competencia_tipo
+            corpora.append(corpus)
             rows_kw.append(row)
 
+        # Detection (ES/EN signals from the shared lexicon): one vectorized pass over every corpus of the keyword
+        directas = flag_texts(corpora, 'channel_direct_competition')
+        for row, directa in zip(rows_kw, directas):
+            row['competencia_tipo'] = 'Directa' if directa else 'Indirecta'
+
+        for row in rows_kw:
             # Add to aggregated collection as well (track recurrence count and origin keywords)
             cid = row.get('channelId')
             if cid:
@@ -384,6 +477,10 @@ def main():
         export_outputs(rows_kw, prefix)
 
     # After all keywords processed export aggregated results as before
+    recent_by_channel = {}
+    if args.recent and args.recent > 0:
+        recent_by_channel = fetch_recent_stats(youtube, list(aggregated_channels.keys()),
+                                               max_videos=args.recent, method=args.recent_method)
     rows = []
     for cid, info in aggregated_channels.items():
         row = dict(info)
@@ -401,9 +498,8 @@ def main():
         else:
             row['origin_keywords'] = ok or ''
 
-        if args.recent and args.recent > 0:
-            recent = get_recent_videos_stats(youtube, cid, max_videos=args.recent)
-            row.update(recent)
+        if cid in recent_by_channel:
+            row.update(recent_by_channel[cid])
         rows.append(row)
 
     # Ranking
@@ -418,6 +514,12 @@ def main():
         print(f"{i}. {r.get('title','-')} | subs: {r.get('subscriberCount') or 'N/A'} | views: {r.get('viewCount') or 'N/A'} | videos: {r.get('videoCount') or 'N/A'}")
 
     export_outputs(rows_sorted, args.output_prefix)
+    print(get_channel_cache().summary())
+    if args.recent and args.recent > 0:
+        print(get_recent_stats_store().summary())
+    print(etag_summary())
+    print_retry_summary()
+    print_key_summary()
 
 
 if __name__ == '__main__':
@@ -3,6 +3,7 @@
 # Fecha: 28/08/2025
 
 import os
+import re
 import sys
 from pathlib import Path
 
@@ -43,6 +44,12 @@ if not YOUTUBE_API_KEY:
     except Exception as e:
         print(f"⚠️  No se pudo cargar API key desde local_config: {e}")
 
+# Pool de varias API keys (proyectos distintos), separadas por comas; opcionalmente
+# con cuota propia: "key1, key2:50000". El reparto lo hace quota_scheduler.CredentialPool
+YOUTUBE_API_KEYS = [token.split(':')[0] for token in re.split(r'[\s,;]+', os.environ.get('YOUTUBE_API_KEYS', '')) if token]
+if not YOUTUBE_API_KEY and YOUTUBE_API_KEYS:
+    YOUTUBE_API_KEY = YOUTUBE_API_KEYS[0]
+
 # Google Ads API (se carga desde google-ads.yaml)
 # Este archivo complementa las credenciales YAML
 
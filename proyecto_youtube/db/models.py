@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .session import Base
 import datetime
@@ -34,6 +34,53 @@ class NicheResult(Base):
     keyword = relationship('NicheKeyword', back_populates='resultados')
 
 
+class NicheVideoSet(Base):
+    """IDs de videos que devolvió search.list para una keyword (base del modo refresh)"""
+    __tablename__ = 'niche_video_sets'
+    __table_args__ = (UniqueConstraint('keyword_id', 'region'),)
+    id = Column(Integer, primary_key=True)
+    keyword_id = Column(Integer, ForeignKey('niche_keywords.id'), nullable=False)
+    region = Column(String(8), nullable=False, default='')
+    max_results = Column(Integer)
+    # Lista de video IDs en el orden de search.list, como JSON
+    video_ids = Column(Text)
+    searched_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    keyword = relationship('NicheKeyword')
+
+
+class NicheViewSketch(Base):
+    """Distribución de views de una keyword (sketch KLL) por día, semana o mes"""
+    __tablename__ = 'niche_view_sketches'
+    __table_args__ = (UniqueConstraint('keyword_id', 'region', 'period', 'period_start'),)
+    id = Column(Integer, primary_key=True)
+    keyword_id = Column(Integer, ForeignKey('niche_keywords.id'), nullable=False)
+    region = Column(String(8), nullable=False, default='')
+    # 'day' | 'week' | 'month'; period_start es el primer día (YYYY-MM-DD)
+    period = Column(String(8), nullable=False)
+    period_start = Column(String(10), index=True, nullable=False)
+    video_count = Column(Integer)
+    # Sketch serializado (utils/quantile_sketch.py, to_json)
+    sketch = Column(Text)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    keyword = relationship('NicheKeyword')
+
+
+class NormalizationReference(Base):
+    """Distribución acumulada de una métrica de nichos (referencia de normalización entre ejecuciones)"""
+    __tablename__ = 'normalization_references'
+    __table_args__ = (UniqueConstraint('scope', 'metric'),)
+    id = Column(Integer, primary_key=True)
+    # Analizador que la usa ('ultimate', 'enhanced', ...) y métrica ('avg_views', ...)
+    scope = Column(String(32), nullable=False)
+    metric = Column(String(32), nullable=False)
+    sample_count = Column(Integer)
+    # Sketch serializado (utils/quantile_sketch.py, to_json)
+    sketch = Column(Text)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
 # ===== MÓDULO CANALES =====
 class ChannelKeyword(Base):
     __tablename__ = 'channel_keywords'
@@ -52,6 +99,9 @@ class Channel(Base):
     view_count = Column(Integer)
     video_count = Column(Integer)
     description = Column(Text)
+    published_at = Column(DateTime)
+    # Última vez que se refrescaron las estadísticas desde channels.list (caché de canales)
+    updated_at = Column(DateTime)
     resultados = relationship('ChannelResult', back_populates='canal')
 
 
@@ -73,6 +123,22 @@ class ChannelResult(Base):
     canal = relationship('Channel', back_populates='resultados')
 
 
+class ChannelRecentSnapshot(Base):
+    """Estadísticas de videos recientes de un canal, una por día (reutilizable en el mismo día)"""
+    __tablename__ = 'channel_recent_snapshots'
+    __table_args__ = (UniqueConstraint('channel_id', 'day', 'max_videos'),)
+    id = Column(Integer, primary_key=True)
+    channel_id = Column(String(64), index=True, nullable=False)
+    day = Column(String(10), index=True, nullable=False)
+    max_videos = Column(Integer, nullable=False)
+    recent_count = Column(Integer)
+    avg_views = Column(Integer)
+    median_views = Column(Integer)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # Resultado completo (incluye titles/descriptions) como JSON
+    raw_result = Column(Text)
+
+
 # ===== TABLAS COMPARTIDAS =====
 class Video(Base):
     __tablename__ = 'videos'
@@ -81,6 +147,23 @@ class Video(Base):
     title = Column(String(255))
     description = Column(Text)
     published_at = Column(DateTime)
+    channel_id = Column(String(64))
+    channel_title = Column(String(255))
+    # Lista de tags como JSON
+    tags = Column(Text)
+    duration = Column(String(32))
+    stats_updated_at = Column(DateTime)
+
+
+class VideoStatsSnapshot(Base):
+    """Estadísticas de un video en un momento dado (una fila por consulta a videos.list)"""
+    __tablename__ = 'video_stats_snapshots'
+    id = Column(Integer, primary_key=True)
+    video_id = Column(String(64), index=True, nullable=False)
+    fetched_at = Column(DateTime, index=True, nullable=False)
+    view_count = Column(Integer)
+    like_count = Column(Integer)
+    comment_count = Column(Integer)
 
 
 # ===== LEGACY TABLES (para migración) =====
@@ -1,16 +1,38 @@
 from .session import SessionLocal, engine, Base
 from .models import (
     # Nuevos modelos separados por módulo
-    NicheKeyword, NicheResult,
-    ChannelKeyword, Channel, ChannelResult,
+    NicheKeyword, NicheResult, NicheVideoSet, NicheViewSketch, NormalizationReference,
+    ChannelKeyword, Channel, ChannelResult, ChannelRecentSnapshot,
+    # Tablas compartidas
+    Video, VideoStatsSnapshot,
     # Legacy models para compatibilidad
     Keyword, Canal, Resultado
 )
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session
+import datetime
+import json
+
+# Columnas añadidas después de crear la BD: create_all no altera tablas existentes
+_ADDED_COLUMNS = {
+    'channels': {'published_at': 'DATETIME', 'updated_at': 'DATETIME'},
+    'videos': {'channel_id': 'VARCHAR(64)', 'channel_title': 'VARCHAR(255)', 'tags': 'TEXT',
+               'duration': 'VARCHAR(32)', 'stats_updated_at': 'DATETIME'},
+}
+
+
+def _ensure_columns():
+    with engine.begin() as conn:
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info('{table}')"))}
+            for name, sql_type in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}"))
 
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _ensure_columns()
 
 
 # ===== FUNCIONES PARA NICHOS =====
@@ -23,7 +45,6 @@ def save_niche_result(session: Session, niche_data: dict):
         session.add(kw)
         session.commit()
 
-    import json
     res = NicheResult(
         keyword_id=kw.id,
         video_count=niche_data.get('video_count'),
@@ -42,6 +63,137 @@ def save_niche_result(session: Session, niche_data: dict):
     return res
 
 
+def load_niche_results(session: Session, limit: int = None) -> list:
+    """Resultados de nichos guardados (raw_result como dict), del más reciente al más antiguo"""
+    query = session.query(NicheResult, NicheKeyword.text).join(
+        NicheKeyword, NicheResult.keyword_id == NicheKeyword.id
+    ).order_by(NicheResult.created_at.desc(), NicheResult.id.desc())
+    if limit:
+        query = query.limit(limit)
+    results = []
+    for row, keyword_text in query.all():
+        data = json.loads(row.raw_result) if row.raw_result else {}
+        data.setdefault('keyword', keyword_text)
+        for column in ('avg_views', 'median_views', 'pct75_views', 'max_views'):
+            data.setdefault(column, getattr(row, column))
+        data['created_at'] = row.created_at.isoformat() if row.created_at else None
+        results.append(data)
+    return results
+
+
+def load_video_sets(session: Session, keywords: list, region: str) -> dict:
+    """Conjuntos de IDs guardados -> {keyword: (video_ids, max_results, searched_at)}"""
+    if not keywords:
+        return {}
+    rows = session.query(NicheVideoSet, NicheKeyword.text).join(
+        NicheKeyword, NicheVideoSet.keyword_id == NicheKeyword.id
+    ).filter(NicheKeyword.text.in_(list(keywords)), NicheVideoSet.region == (region or '')).all()
+    return {keyword_text: (json.loads(row.video_ids or '[]'), row.max_results, row.searched_at)
+            for row, keyword_text in rows}
+
+
+def save_video_sets(session: Session, video_sets: dict, region: str, max_results: int, searched_at=None):
+    """Guardar (o sustituir) los IDs {keyword: [video_id, ...]} de una búsqueda"""
+    if not video_sets:
+        return
+    searched_at = searched_at or datetime.datetime.utcnow()
+    region = region or ''
+    keywords = {kw.text: kw for kw in session.query(NicheKeyword).filter(NicheKeyword.text.in_(list(video_sets))).all()}
+    for keyword_text in video_sets:
+        if keyword_text not in keywords:
+            keywords[keyword_text] = NicheKeyword(text=keyword_text)
+            session.add(keywords[keyword_text])
+    session.flush()
+    existing = {row.keyword_id: row for row in session.query(NicheVideoSet).filter(
+        NicheVideoSet.keyword_id.in_([kw.id for kw in keywords.values()]),
+        NicheVideoSet.region == region
+    ).all()}
+    for keyword_text, video_ids in video_sets.items():
+        keyword_id = keywords[keyword_text].id
+        row = existing.get(keyword_id)
+        if row is None:
+            row = NicheVideoSet(keyword_id=keyword_id, region=region)
+            session.add(row)
+        row.max_results = max_results
+        row.video_ids = json.dumps(list(video_ids))
+        row.searched_at = searched_at
+    session.commit()
+
+
+def load_view_sketches(session: Session, keywords: list, region: str, period: str,
+                       start: str, end: str = None) -> dict:
+    """Sketches guardados con period_start en [start, end) -> {keyword: {period_start: sketch_json}}
+
+    Sin `end` sólo el periodo que empieza en `start`.
+    """
+    if not keywords:
+        return {}
+    query = session.query(NicheViewSketch, NicheKeyword.text).join(
+        NicheKeyword, NicheViewSketch.keyword_id == NicheKeyword.id
+    ).filter(NicheKeyword.text.in_(list(keywords)), NicheViewSketch.region == (region or ''),
+             NicheViewSketch.period == period)
+    if end is None:
+        query = query.filter(NicheViewSketch.period_start == start)
+    else:
+        query = query.filter(NicheViewSketch.period_start >= start, NicheViewSketch.period_start < end)
+    sketches = {}
+    for row, keyword_text in query.all():
+        sketches.setdefault(keyword_text, {})[row.period_start] = row.sketch
+    return sketches
+
+
+def save_view_sketches(session: Session, sketches: dict, region: str, period: str, start: str):
+    """Guardar (o sustituir) los sketches {keyword: (video_count, sketch_json)} de un periodo"""
+    if not sketches:
+        return
+    region = region or ''
+    keywords = {kw.text: kw for kw in session.query(NicheKeyword).filter(NicheKeyword.text.in_(list(sketches))).all()}
+    for keyword_text in sketches:
+        if keyword_text not in keywords:
+            keywords[keyword_text] = NicheKeyword(text=keyword_text)
+            session.add(keywords[keyword_text])
+    session.flush()
+    existing = {row.keyword_id: row for row in session.query(NicheViewSketch).filter(
+        NicheViewSketch.keyword_id.in_([kw.id for kw in keywords.values()]),
+        NicheViewSketch.region == region, NicheViewSketch.period == period,
+        NicheViewSketch.period_start == start
+    ).all()}
+    for keyword_text, (video_count, sketch) in sketches.items():
+        keyword_id = keywords[keyword_text].id
+        row = existing.get(keyword_id)
+        if row is None:
+            row = NicheViewSketch(keyword_id=keyword_id, region=region, period=period, period_start=start)
+            session.add(row)
+        row.video_count = video_count
+        row.sketch = sketch
+        row.updated_at = datetime.datetime.utcnow()
+    session.commit()
+
+
+def load_normalization_references(session: Session, scope: str) -> dict:
+    """Referencias de normalización guardadas -> {metric: sketch_json}"""
+    rows = session.query(NormalizationReference).filter(NormalizationReference.scope == scope).all()
+    return {row.metric: row.sketch for row in rows}
+
+
+def save_normalization_references(session: Session, scope: str, references: dict):
+    """Guardar (o sustituir) las referencias {metric: (sample_count, sketch_json)} de un analizador"""
+    if not references:
+        return
+    existing = {row.metric: row for row in session.query(NormalizationReference).filter(
+        NormalizationReference.scope == scope, NormalizationReference.metric.in_(list(references))
+    ).all()}
+    for metric, (sample_count, sketch) in references.items():
+        row = existing.get(metric)
+        if row is None:
+            row = NormalizationReference(scope=scope, metric=metric)
+            session.add(row)
+        row.sample_count = sample_count
+        row.sketch = sketch
+        row.updated_at = datetime.datetime.utcnow()
+    session.commit()
+
+
 # ===== FUNCIONES PARA CANALES =====
 def save_channel_result(session: Session, keyword_text: str, canal_data: dict):
     """Guardar resultado de búsqueda de canales en tabla dedicada"""
@@ -66,7 +218,6 @@ def save_channel_result(session: Session, keyword_text: str, canal_data: dict):
         session.add(ch)
         session.commit()
 
-    import json
     # Add resultado
     res = ChannelResult(
         keyword_id=kw.id,
@@ -83,6 +234,147 @@ def save_channel_result(session: Session, keyword_text: str, canal_data: dict):
     return res
 
 
+def _parse_api_datetime(value):
+    """'2020-01-31T10:00:00Z' (formato de la API) -> datetime naive UTC"""
+    if not value:
+        return None
+    try:
+        return datetime.datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+    except ValueError:
+        return None
+
+
+def load_channels(session: Session, channel_ids: list) -> list:
+    """Canales guardados para `channel_ids` (los que no existan se omiten)"""
+    if not channel_ids:
+        return []
+    return session.query(Channel).filter(Channel.channel_id.in_(list(channel_ids))).all()
+
+
+def upsert_channels(session: Session, channels: list, updated_at=None):
+    """Insertar o actualizar estadísticas de canales (dicts con claves de la API: channelId, subscriberCount...)"""
+    updated_at = updated_at or datetime.datetime.utcnow()
+    existing = {ch.channel_id: ch for ch in load_channels(session, [c.get('channelId') for c in channels])}
+    for data in channels:
+        ch = existing.get(data.get('channelId'))
+        if ch is None:
+            ch = Channel(channel_id=data.get('channelId'))
+            session.add(ch)
+        ch.title = data.get('title')
+        ch.description = data.get('description')
+        ch.subscriber_count = data.get('subscriberCount')
+        ch.view_count = data.get('viewCount')
+        ch.video_count = data.get('videoCount')
+        ch.published_at = _parse_api_datetime(data.get('publishedAt'))
+        ch.updated_at = updated_at
+    session.commit()
+
+
+def load_recent_snapshots(session: Session, channel_ids: list, day: str, max_videos: int) -> dict:
+    """Snapshots de videos recientes del día `day` -> {channel_id: dict del resultado}"""
+    if not channel_ids:
+        return {}
+    rows = session.query(ChannelRecentSnapshot).filter(
+        ChannelRecentSnapshot.channel_id.in_(list(channel_ids)),
+        ChannelRecentSnapshot.day == day,
+        ChannelRecentSnapshot.max_videos == max_videos
+    ).all()
+    return {row.channel_id: json.loads(row.raw_result) for row in rows}
+
+
+def save_recent_snapshots(session: Session, snapshots: dict, day: str, max_videos: int):
+    """Guardar (o sustituir) los snapshots {channel_id: resultado} del día `day`"""
+    if not snapshots:
+        return
+    existing = {row.channel_id: row for row in session.query(ChannelRecentSnapshot).filter(
+        ChannelRecentSnapshot.channel_id.in_(list(snapshots)),
+        ChannelRecentSnapshot.day == day,
+        ChannelRecentSnapshot.max_videos == max_videos
+    ).all()}
+    for channel_id, data in snapshots.items():
+        row = existing.get(channel_id)
+        if row is None:
+            row = ChannelRecentSnapshot(channel_id=channel_id, day=day, max_videos=max_videos)
+            session.add(row)
+        row.recent_count = data.get('recent_count')
+        row.avg_views = int(data['avg_views']) if data.get('avg_views') is not None else None
+        row.median_views = int(data['median_views']) if data.get('median_views') is not None else None
+        row.raw_result = json.dumps(data, ensure_ascii=False)
+    session.commit()
+
+
+# ===== FUNCIONES PARA VIDEOS (compartidas) =====
+def _to_int(value):
+    return int(value) if value not in (None, '') else None
+
+
+def load_videos(session: Session, video_ids: list) -> dict:
+    """Videos guardados con su último snapshot -> {video_id: (item como videos.list, fetched_at)}"""
+    if not video_ids:
+        return {}
+    latest = session.query(
+        VideoStatsSnapshot.video_id, func.max(VideoStatsSnapshot.fetched_at).label('fetched_at')
+    ).filter(VideoStatsSnapshot.video_id.in_(list(video_ids))).group_by(VideoStatsSnapshot.video_id).subquery()
+    rows = session.query(Video, VideoStatsSnapshot).join(
+        VideoStatsSnapshot, VideoStatsSnapshot.video_id == Video.video_id
+    ).join(
+        latest, (latest.c.video_id == VideoStatsSnapshot.video_id) & (latest.c.fetched_at == VideoStatsSnapshot.fetched_at)
+    ).all()
+    videos = {}
+    for video, snap in rows:
+        statistics = {name: str(value) for name, value in (
+            ('viewCount', snap.view_count), ('likeCount', snap.like_count), ('commentCount', snap.comment_count)
+        ) if value is not None}
+        item = {
+            'id': video.video_id,
+            'snippet': {
+                'title': video.title or '',
+                'description': video.description or '',
+                'channelTitle': video.channel_title or '',
+                'channelId': video.channel_id or '',
+                'publishedAt': video.published_at.strftime('%Y-%m-%dT%H:%M:%SZ') if video.published_at else '',
+                'tags': json.loads(video.tags) if video.tags else [],
+            },
+            'statistics': statistics,
+            'contentDetails': {'duration': video.duration or ''},
+        }
+        videos[video.video_id] = (item, snap.fetched_at)
+    return videos
+
+
+def upsert_videos(session: Session, items: list, fetched_at=None):
+    """Guardar items de videos.list: metadatos en `videos` y un snapshot de estadísticas por item"""
+    if not items:
+        return
+    fetched_at = fetched_at or datetime.datetime.utcnow()
+    existing = {v.video_id: v for v in session.query(Video).filter(
+        Video.video_id.in_([item['id'] for item in items])
+    ).all()}
+    for item in items:
+        snippet = item.get('snippet', {})
+        stats = item.get('statistics', {})
+        video = existing.get(item['id'])
+        if video is None:
+            video = Video(video_id=item['id'])
+            session.add(video)
+            existing[item['id']] = video
+        video.title = snippet.get('title')
+        video.description = snippet.get('description')
+        video.channel_id = snippet.get('channelId')
+        video.channel_title = snippet.get('channelTitle')
+        video.published_at = _parse_api_datetime(snippet.get('publishedAt'))
+        video.tags = json.dumps(snippet.get('tags', []), ensure_ascii=False)
+        video.duration = item.get('contentDetails', {}).get('duration')
+        video.stats_updated_at = fetched_at
+        session.add(VideoStatsSnapshot(
+            video_id=item['id'], fetched_at=fetched_at,
+            view_count=_to_int(stats.get('viewCount')),
+            like_count=_to_int(stats.get('likeCount')),
+            comment_count=_to_int(stats.get('commentCount')),
+        ))
+    session.commit()
+
+
 # ===== FUNCIONES LEGACY (para compatibilidad) =====
 def save_result(session: Session, keyword_text: str, canal_data: dict):
     """Función legacy - usa save_channel_result en su lugar"""
@@ -29,14 +29,14 @@ import csv
 import json
 import time
 import argparse
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
-import statistics
 import random
 
 # Imports de APIs
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 try:
 	import pandas as pd
@@ -85,11 +85,25 @@ except ImportError:
 	rich_print("❌ Error: No se pudo importar YOUTUBE_API_KEY desde config.py", style="bold red")
 	sys.exit(1)
 
+from youtube_client import get_youtube_client, configure_cache, etag_summary
+from video_store import get_video_store
+from field_masks import field_mask
+from channel_cache import get_channel_cache
+from quota_scheduler import QuotaExceeded, get_quota_scheduler, print_key_summary
+from response_cache import CACHE_MODES, DEFAULT_CACHE_MODE
+from retry_engine import CircuitOpen, print_retry_summary
+from lexicon import LEXICON_API_VERSION, get_lexicon
+from text_normalizer import get_text_cache, normalize_video
+from view_metrics import metrics_by_keyword, videos_views, view_metrics
+from view_velocity import VELOCITY_METRICS, velocity_by_keyword, video_velocity
+from view_sketch_store import PERIODS, get_view_sketch_store
+from scoring_config import competition_key, get_scoring_config
+
 # Optional DB persistence: try to import helpers from proyecto_youtube.db
 db_enabled = False
 _SessionLocal = None
 try:
-	from proyecto_youtube.db.utils import save_niche_result, init_db
+	from proyecto_youtube.db.utils import save_niche_result, init_db, load_video_sets, save_video_sets
 	from proyecto_youtube.db.session import SessionLocal
 	try:
 		init_db()
@@ -101,43 +115,24 @@ try:
 except Exception:
 	db_enabled = False
 
-# Crear tracker simple ya que el original puede no existir
+# Días que se reutilizan los IDs de search.list de una keyword en modo --refresh
+DEFAULT_VIDEO_SET_MAX_AGE_DAYS = float(os.environ.get('NICHE_VIDEO_SET_MAX_AGE_DAYS', 7))
+
 class SimpleAPIUsageTracker:
+	"""Fachada sobre el planificador de cuota compartido.
+
+	Las unidades ya no se suman a mano en cada llamada: el transporte del cliente
+	compartido las reserva en utils/quota_scheduler.py (común a todos los CLIs y
+	a la web) y sólo cuenta las llamadas que llegan a la red.
+	"""
 	def __init__(self):
-		self.usage_file = PROJECT_ROOT / 'utils' / 'api_usage.json'
-		self.usage_file.parent.mkdir(exist_ok=True)
-    
-	def track_usage(self, operation: str, units: int):
-		"""Track API usage simple"""
-		try:
-			today = datetime.now().strftime("%Y-%m-%d")
-			if self.usage_file.exists():
-				with open(self.usage_file, 'r') as f:
-					data = json.load(f)
-			else:
-				data = {}
-            
-			if today not in data:
-				data[today] = 0
-			data[today] += units
-            
-			with open(self.usage_file, 'w') as f:
-				json.dump(data, f)
-                
-			print(f"📊 API Usage: +{units} units ({operation})")
-		except Exception as e:
-			print(f"⚠️ Warning tracking usage: {e}")
-    
+		self.scheduler = get_quota_scheduler()
+
 	def get_daily_usage(self):
-		try:
-			today = datetime.now().strftime("%Y-%m-%d")
-			if self.usage_file.exists():
-				with open(self.usage_file, 'r') as f:
-					data = json.load(f)
-				return data.get(today, 0)
-			return 0
-		except:
-			return 0
+		return self.scheduler.used()
+
+	def get_remaining(self):
+		return self.scheduler.remaining()
 
 class NicheAnalyzerYouTubeUnificado:
 	"""
@@ -148,12 +143,16 @@ class NicheAnalyzerYouTubeUnificado:
     
 	def __init__(self, api_key: str):
 		self.api_key = api_key
-		self.youtube = build('youtube', 'v3', developerKey=api_key)
+		self.youtube = get_youtube_client(api_key)
 		self.usage_tracker = SimpleAPIUsageTracker()
+		# Evita que los bloques de resultados de keywords paralelas se mezclen en consola
+		self._print_lock = threading.Lock()
         
-		# Configuración de thresholds (originales)
-		self.median_min = int(os.environ.get('MEDIAN_VIEWS_THRESHOLD', 5000))
-		self.p75_min = int(os.environ.get('P75_VIEWS_THRESHOLD', 20000))
+		# Pesos y umbrales de scoring/decisión (config/scoring; MEDIAN_VIEWS_THRESHOLD y
+		# P75_VIEWS_THRESHOLD del entorno siguen mandando)
+		self.scoring = get_scoring_config()
+		self.median_min = self.scoring.median_min
+		self.p75_min = self.scoring.p75_min
 		# Default de número de videos a analizar (se puede sobreescribir vía --max-results)
 		# Incrementamos la muestra por defecto a 50 para mayor representatividad.
 		self.default_max_results = int(os.environ.get('MAX_RESULTS', 50))
@@ -165,98 +164,111 @@ class NicheAnalyzerYouTubeUnificado:
 		#   ≈ 100 (search) + 1 (videos.list) + 1 (channels.list) = ~102 units
 		# Esto mantiene el uso eficiente de la API en comparación con llamar por cada video.
 
-		# Diccionarios de señales de automatización (NUEVO)
-		self.automation_signals_es = [
-			"top", "mejores", "ranking", "listado", "comparación", "vs", "versus",
-			"cómo hacer", "tutorial", "paso a paso", "fácil", "rápido", "simple",
-			"trucos", "tips", "consejos", "guía", "completa", "definitiva",
-			"2024", "2025", "actualizado", "último", "nuevo", "tendencia",
-			"ganar dinero", "sin experiencia", "desde casa", "automático",
-			"compilación", "recopilación", "los más", "trending", "viral"
-		]
-        
-		self.automation_signals_en = [
-			"top", "best", "ranking", "list", "comparison", "vs", "versus",
-			"how to", "tutorial", "step by step", "easy", "quick", "simple",
-			"tricks", "tips", "advice", "guide", "complete", "ultimate",
-			"2024", "2025", "updated", "latest", "new", "trending",
-			"make money", "no experience", "from home", "automatic",
-			"compilation", "collection", "most", "viral", "trending"
-		]
-        
-		# Diccionarios de monetización (originales)
-		self.monetization_keywords = {
-			"afiliacion": [
-				"mejor", "mejores", "top", "ranking", "review", "reseña", "análisis",
-				"comparación", "vs", "versus", "comprar", "precio", "oferta", "descuento",
-				"amazon", "link", "descripción", "recomiendo", "producto", "marca",
-				"calidad", "barato", "caro", "vale la pena", "unboxing", "test"
-			],
-			"anuncios": [
-				"tutorial", "como", "cómo", "hacer", "paso a paso", "guía", "tips",
-				"consejos", "trucos", "secretos", "método", "técnica", "estrategia",
-				"aprender", "enseñar", "explicar", "mostrar", "demostrar"
-			],
-			"dificil": [
-				"historia", "biografía", "documental", "noticias", "política", 
-				"filosofía", "reflexión", "opinión personal", "experiencia", 
-				"vida", "story", "storytime", "reacción", "react"
-			]
+		# Diccionarios de señales (léxico compartido, config/lexicon): automatización ES/EN
+		# y monetización (afiliacion/anuncios/dificil), compilados una vez por proceso.
+		# Se buscan palabras completas sin acentos sobre el texto normalizado del video;
+		# las señales de automatización, sólo en el léxico del idioma detectado del video
+		lexicon = get_lexicon(LEXICON_API_VERSION)
+		self.automation_matcher = lexicon.phrase_matcher('video_automation_signals')
+		self.automation_matchers = {lang: lexicon.phrase_matcher('video_automation_signals', lang)
+									for lang in lexicon.languages}
+		self.monetization_matcher = lexicon.phrase_matcher('video_monetization_signals')
+
+	def search_video_ids(self, keyword: str, max_results: int = 50,
+						 region_code: str = None, relevance_language: str = None) -> List[str]:
+		"""search.list para una keyword; devuelve sólo los IDs (las stats se piden aparte)"""
+		request = self.youtube.search().list(
+			part="snippet",
+			q=keyword,
+			type="video",
+			maxResults=max_results,
+			order="relevance",
+			regionCode=region_code,
+			relevanceLanguage=relevance_language,
+			videoDuration="medium",  # Filtrar videos de duración media
+			fields=field_mask('search.video_ids')
+		)
+		response = request.execute()
+		return [item['id']['videoId'] for item in response.get('items', [])]
+
+	def load_video_sets(self, keywords: List[str], region_code: str = None, max_results: int = 50,
+						max_age_days: float = DEFAULT_VIDEO_SET_MAX_AGE_DAYS) -> Dict[str, List[str]]:
+		"""IDs guardados de búsquedas anteriores que siguen vigentes -> {keyword: [video_id, ...]}
+
+		Un conjunto vale si tiene menos de `max_age_days` y se buscó con al menos
+		`max_results` resultados; si no, la keyword vuelve a pasar por search.list.
+		"""
+		if not db_enabled or _SessionLocal is None:
+			return {}
+		session = _SessionLocal()
+		try:
+			stored = load_video_sets(session, keywords, region_code)
+		except Exception as e:
+			print(f"⚠️  No se pudieron leer los IDs guardados: {e}")
+			return {}
+		finally:
+			session.close()
+		limit = datetime.utcnow() - timedelta(days=max_age_days)
+		return {
+			keyword: video_ids[:max_results]
+			for keyword, (video_ids, stored_max, searched_at) in stored.items()
+			if video_ids and searched_at and searched_at >= limit and (stored_max or 0) >= max_results
 		}
 
+	def save_video_sets(self, video_sets: Dict[str, List[str]], region_code: str = None, max_results: int = 50):
+		"""Guarda los IDs de search.list por keyword para refrescos posteriores."""
+		if not video_sets or not db_enabled or _SessionLocal is None:
+			return
+		session = _SessionLocal()
+		try:
+			save_video_sets(session, video_sets, region_code, max_results)
+		except Exception as e:
+			session.rollback()
+			print(f"⚠️  No se pudieron guardar los IDs de búsqueda: {e}")
+		finally:
+			session.close()
+
+	def _build_video_records(self, items: List[Dict]) -> List[Dict]:
+		"""Convierte items de videos.list en los dicts de video del analizador"""
+		videos = []
+		for item in items:
+			stats = item.get('statistics', {})
+			snippet = item.get('snippet', {})
+			content_details = item.get('contentDetails', {})
+            
+			# Solo incluir videos con estadísticas de views
+			if 'viewCount' in stats:
+				video_data = {
+					'id': item['id'],
+					'title': snippet.get('title', ''),
+					'description': snippet.get('description', ''),
+					'channelTitle': snippet.get('channelTitle', ''),
+					'channelId': snippet.get('channelId', ''),
+					'publishedAt': snippet.get('publishedAt', ''),
+					'tags': snippet.get('tags', []),
+					'viewCount': int(stats.get('viewCount', 0)),
+					'likeCount': int(stats.get('likeCount', 0)),
+					'commentCount': int(stats.get('commentCount', 0)),
+					'duration': content_details.get('duration', '')
+				}
+				videos.append(video_data)
+		return videos
+
 	def search_videos(self, keyword: str, max_results: int = 50, 
 					 region_code: str = None, relevance_language: str = None) -> List[Dict]:
 		"""Buscar videos con tracking de API usage"""
 		try:
-			request = self.youtube.search().list(
-				part="snippet",
-				q=keyword,
-				type="video",
-				maxResults=max_results,
-				order="relevance",
-				regionCode=region_code,
-				relevanceLanguage=relevance_language,
-				videoDuration="medium"  # Filtrar videos de duración media
-			)
-            
-			response = request.execute()
-			self.usage_tracker.track_usage("search", 100)  # Search cuesta 100 units
-            
-			# Obtener estadísticas de videos
-			video_ids = [item['id']['videoId'] for item in response['items']]
+			video_ids = self.search_video_ids(keyword, max_results=max_results,
+											  region_code=region_code,
+											  relevance_language=relevance_language)
             
-			stats_request = self.youtube.videos().list(
-				part="statistics,snippet,contentDetails",
-				id=','.join(video_ids)
-			)
-            
-			stats_response = stats_request.execute()
-			self.usage_tracker.track_usage("videos", 1)  # Videos list cuesta 1 unit
-            
-			# Combinar datos
-			videos = []
-			for item in stats_response['items']:
-				stats = item.get('statistics', {})
-				snippet = item.get('snippet', {})
-                
-				# Solo incluir videos con estadísticas de views
-				if 'viewCount' in stats:
-					video_data = {
-						'id': item['id'],
-						'title': snippet.get('title', ''),
-						'description': snippet.get('description', ''),
-						'channelTitle': snippet.get('channelTitle', ''),
-						'channelId': snippet.get('channelId', ''),
-						'publishedAt': snippet.get('publishedAt', ''),
-						'tags': snippet.get('tags', []),
-						'viewCount': int(stats.get('viewCount', 0)),
-						'likeCount': int(stats.get('likeCount', 0)),
-						'commentCount': int(stats.get('commentCount', 0))
-					}
-					videos.append(video_data)
-            
-			return videos
+			# Estadísticas de videos (los ya vistos en otras keywords se sirven en local)
+			video_items = get_video_store().get_many(self.youtube, video_ids, keyword=keyword)
+			return self._build_video_records([video_items[vid] for vid in video_ids if vid in video_items])
             
+		except (QuotaExceeded, CircuitOpen) as e:
+			print(f"❌ {e}")
+			return []
 		except HttpError as e:
 			print(f"❌ Error de API de YouTube: {e}")
 			return []
@@ -270,30 +282,22 @@ class NicheAnalyzerYouTubeUnificado:
 			if not channel_ids:
 				return {}
                 
-			request = self.youtube.channels().list(
-				part="statistics,snippet",
-				id=','.join(list(set(channel_ids)))  # Remove duplicates
-			)
-            
-			response = request.execute()
-			self.usage_tracker.track_usage("channels", 1)
+			# Caché de canales del proceso (memoria + BD): sólo los IDs que faltan
+			# o están caducados salen a channels.list
+			infos = get_channel_cache().get_many(self.youtube, channel_ids)
             
 			channels_info = {}
-			for item in response['items']:
-				channel_id = item['id']
-				stats = item.get('statistics', {})
-				snippet = item.get('snippet', {})
-                
+			for channel_id, info in infos.items():
 				channels_info[channel_id] = {
-					'title': snippet.get('title', ''),
-					'subscriber_count': int(stats.get('subscriberCount', 0)),
-					'video_count': int(stats.get('videoCount', 0)),
-					'view_count': int(stats.get('viewCount', 0))
+					'title': info['title'],
+					'subscriber_count': info['subscriberCount'] or 0,
+					'video_count': info['videoCount'] or 0,
+					'view_count': info['viewCount'] or 0
 				}
             
 			return channels_info
             
-		except HttpError as e:
+		except Exception as e:
 			print(f"⚠️  Error obteniendo info de canales: {e}")
 			return {}
 
@@ -314,27 +318,14 @@ class NicheAnalyzerYouTubeUnificado:
 		detected_signals = set()
 
 		for video in videos:
-			title = video.get('title', '').lower()
-			description = video.get('description', '').lower()
-			tags = [tag.lower() for tag in video.get('tags', [])]
-
-			# Buscar señales en título, descripción y tags
-			content_to_check = [title, description] + tags
-
-			for content in content_to_check:
-				if not content:
-					continue
-				# Señales en español
-				for signal in self.automation_signals_es:
-					if signal in content:
-						detected_signals.add(signal)
-						total_signals += 1
-
-				# Señales en inglés
-				for signal in self.automation_signals_en:
-					if signal in content:
-						detected_signals.add(signal)
-						total_signals += 1
+			# Buscar señales del idioma del video (ES y EN si no está claro) en título, descripción
+			# y tags (cada campo cuenta por separado); el texto y el idioma se calculan una vez
+			# por videoId y los reutilizan todas las keywords
+			normalized = normalize_video(video)
+			matcher = self.automation_matchers.get(normalized.language, self.automation_matcher)
+			count, signals = matcher.count_fields(normalized.fields())
+			total_signals += count
+			detected_signals.update(signals)
 
 		# Calcular score de automatización
 		automation_score = min(100.0, (total_signals / len(videos)) * 20) if len(videos) > 0 else 0.0
@@ -349,9 +340,11 @@ class NicheAnalyzerYouTubeUnificado:
 			'analysis_detail': f"Detectadas {len(signals_list)} señales únicas en {len(videos)} videos"
 		}
 
-	def analyze_channel_sizes(self, videos: List[Dict]) -> Dict[str, Any]:
+	def analyze_channel_sizes(self, videos: List[Dict],
+							  channels_info: Optional[Dict[str, Dict]] = None) -> Dict[str, Any]:
 		"""
 		NUEVO: Análisis de distribución de tamaños de canales
+		`channels_info` permite pasar canales ya resueltos (lote de analyze_many)
 		"""
 		if not videos:
 			return {
@@ -361,8 +354,9 @@ class NicheAnalyzerYouTubeUnificado:
 			}
         
 		# Obtener información de canales
-		channel_ids = [video['channelId'] for video in videos if 'channelId' in video]
-		channels_info = self.get_channel_info(channel_ids)
+		if channels_info is None:
+			channel_ids = [video['channelId'] for video in videos if 'channelId' in video]
+			channels_info = self.get_channel_info(channel_ids)
         
 		small_count = 0
 		medium_count = 0
@@ -404,15 +398,11 @@ class NicheAnalyzerYouTubeUnificado:
 		"""
 		ORIGINAL: Clasificación de monetización preservada del sistema anterior
 		"""
-		keyword_lower = keyword.lower()
-        
-		# Contar matches por categoría
-		afiliacion_count = sum(1 for word in self.monetization_keywords["afiliacion"] 
-							  if word in keyword_lower)
-		anuncios_count = sum(1 for word in self.monetization_keywords["anuncios"] 
-							if word in keyword_lower)
-		dificil_count = sum(1 for word in self.monetization_keywords["dificil"] 
-						   if word in keyword_lower)
+		# Contar matches por categoría (una sola pasada sobre la keyword)
+		signal_counts = self.monetization_matcher.counts(keyword)
+		afiliacion_count = signal_counts["afiliacion"]
+		anuncios_count = signal_counts["anuncios"]
+		dificil_count = signal_counts["dificil"]
         
 		# Determinar tipo principal de monetización
 		if afiliacion_count > 0 and anuncios_count > 0:
@@ -447,9 +437,11 @@ class NicheAnalyzerYouTubeUnificado:
 			}
 		}
 
-	def analyze_video_monetization(self, videos: List[Dict]) -> Dict[str, Any]:
+	def analyze_video_monetization(self, videos: List[Dict],
+								   view_stats: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
 		"""
 		ORIGINAL: Análisis de monetización de videos preservado
+		Monetizable = más de 10k views (view_metrics.MONETIZABLE_MIN_VIEWS).
 		"""
 		if not videos:
 			return {
@@ -458,13 +450,8 @@ class NicheAnalyzerYouTubeUnificado:
 				'analysis_detail': 'No hay videos para analizar'
 			}
         
-		monetizable_count = 0
-        
-		for video in videos:
-			views = video.get('viewCount', 0)
-			# Considerar monetizable si tiene más de 10k views
-			if views > 10000:
-				monetizable_count += 1
+		stats = view_stats or view_metrics(videos_views(videos))
+		monetizable_count = stats['monetizable_count']
         
 		monetizable_ratio = (monetizable_count / len(videos)) * 100
         
@@ -475,9 +462,11 @@ class NicheAnalyzerYouTubeUnificado:
 			'analysis_detail': f"{monetizable_count}/{len(videos)} videos con >10K views"
 		}
 
-	def calculate_saturation_risk(self, videos: List[Dict]) -> Dict[str, Any]:
+	def calculate_saturation_risk(self, videos: List[Dict],
+								  view_stats: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
 		"""
 		ORIGINAL: Cálculo de riesgo de saturación preservado
+		Ratio de saturación = views promedio / views máximas (de view_metrics).
 		"""
 		if not videos:
 			return {
@@ -486,12 +475,10 @@ class NicheAnalyzerYouTubeUnificado:
 				'analysis_detail': 'No hay videos para analizar'
 			}
         
-		views_list = [video['viewCount'] for video in videos]
-		avg_views = statistics.mean(views_list)
-		max_views = max(views_list)
-        
-		# Calcular ratio de saturación
-		saturation_ratio = avg_views / max_views if max_views > 0 else 0
+		stats = view_stats or view_metrics(videos_views(videos))
+		avg_views = stats['mean']
+		max_views = stats['max']
+		saturation_ratio = stats['saturation_ratio']
         
 		# Clasificar riesgo
 		if saturation_ratio >= 0.8:
@@ -516,40 +503,45 @@ class NicheAnalyzerYouTubeUnificado:
 	def calculate_opportunity_score(self, niche_data: Dict[str, Any]) -> Dict[str, Any]:
 		"""
 		ORIGINAL: Cálculo de opportunity score preservado del sistema anterior
+		Pesos y referencias: sección 'opportunity' de config/scoring (batch_scoring.opportunity
+		hace lo mismo para una tabla entera).
 		"""
+		cfg = self.scoring.opportunity
 		# Views score normalizado (de 0 a 1)
 		avg_views = niche_data.get('avg_views', 0)
-		views_score = min(1.0, avg_views / 100000)  # Normalizar con 100k como referencia
+		views_score = min(1.0, avg_views / cfg['views_reference'])
         
 		# Engagement score básico (de 0 a 1)
 		likes = niche_data.get('total_likes', 0)
 		total_views = niche_data.get('total_views', 1)
-		engagement_score = min(1.0, (likes / total_views) * 1000) if total_views > 0 else 0.5
+		engagement_score = min(1.0, (likes / total_views) * cfg['engagement_factor']) if total_views > 0 else cfg['engagement_default']
         
 		# Competition score (inverso a la competencia)
-		competition_scores = {"low": 1.0, "medium": 0.7, "high": 0.4, "very_high": 0.1}
-		competition_score = competition_scores.get(
-			niche_data.get('competition_level', 'medium'), 0.5
+		competition_score = cfg['competition_scores'].get(
+			competition_key(niche_data.get('competition_level', 'medium')), cfg['competition_default']
 		)
         
 		# Bonus por automatización (NUEVO)
-		automation_bonus = 0.2 if niche_data.get('is_automatizable', False) else 0.0
+		automation_bonus = cfg['automation_bonus'] if niche_data.get('is_automatizable', False) else 0.0
         
 		# Factor de monetización
-		monetization_multipliers = {
-			"Muy Alto": 1.2, "Alto": 1.0, "Medio": 0.8, "Bajo": 0.6
-		}
-		monetization_multiplier = monetization_multipliers.get(
-			niche_data.get('monetization_potential', 'Medio'), 0.8
+		monetization_multiplier = cfg['monetization_multipliers'].get(
+			niche_data.get('monetization_potential', 'Medio'), cfg['monetization_default']
 		)
         
-		# Pesos optimizados (ORIGINAL)
+		# Velocidad: mediana de views/día respecto a la referencia (peso 0 salvo que la config lo active)
+		velocity_reference = cfg.get('velocity_reference', 0)
+		velocity_score = min(1.0, niche_data.get('median_views_per_day', 0) / velocity_reference) if velocity_reference else 0.0
+        
+		# Pesos (views: demanda, competition: facilidad de entrada, automation: escalabilidad)
+		weights = cfg['weights']
 		final_score = (
-			0.35 * views_score +           # 35% views (demanda del mercado)
-			0.25 * competition_score +     # 25% competencia (facilidad entrada)
-			0.20 * automation_bonus +      # 20% automatización (escalabilidad) - NUEVO
-			0.15 * (monetization_multiplier - 0.8) +  # 15% monetización
-			0.05 * engagement_score        # 5% engagement
+			weights['views'] * views_score +
+			weights['competition'] * competition_score +
+			weights['automation'] * automation_bonus +
+			weights['monetization'] * (monetization_multiplier - cfg['monetization_baseline']) +
+			weights['engagement'] * engagement_score +
+			weights.get('velocity', 0) * velocity_score
 		)
         
 		# Asegurar que el score esté entre 0 y 1
@@ -561,13 +553,16 @@ class NicheAnalyzerYouTubeUnificado:
 			'competition_score': round(competition_score, 3),
 			'engagement_score': round(engagement_score, 3),
 			'automation_bonus': round(automation_bonus, 3),
-			'monetization_multiplier': round(monetization_multiplier, 3)
+			'monetization_multiplier': round(monetization_multiplier, 3),
+			'velocity_score': round(velocity_score, 3)
 		}
 
 	def decide_niche_soft(self, median_views: float, pct75_views: float) -> Tuple[str, str, float]:
 		"""
 		ORIGINAL: Lógica de decisión preservada del sistema anterior
+		EVALUAR con un umbral cumplido o ambos por encima de partial_ratio (config/scoring).
 		"""
+		partial = self.scoring.soft_decision['partial_ratio']
 		# Ratios recortados [0,1]
 		r_med = max(0.0, min(1.0, median_views / float(self.median_min)))
 		r_p75 = max(0.0, min(1.0, pct75_views / float(self.p75_min)))
@@ -577,27 +572,34 @@ class NicheAnalyzerYouTubeUnificado:
 			decision = "RECOMENDADO"
 			reason = f"Mediana {median_views:,.0f} ≥ {self.median_min} y P75 {pct75_views:,.0f} ≥ {self.p75_min}"
 		elif (median_views >= self.median_min or pct75_views >= self.p75_min) or \
-			 (median_views >= 0.6*self.median_min and pct75_views >= 0.6*self.p75_min):
+			 (median_views >= partial*self.median_min and pct75_views >= partial*self.p75_min):
 			decision = "EVALUAR"
 			reason = f"Parcial: Mediana {median_views:,.0f} vs {self.median_min}, P75 {pct75_views:,.0f} vs {self.p75_min}"
 		else:
 			decision = "DESCARTAR"
-			reason = f"Por debajo: Mediana {median_views:,.0f} < {int(0.6*self.median_min)}, P75 {pct75_views:,.0f} < {int(0.6*self.p75_min)}"
+			reason = f"Por debajo: Mediana {median_views:,.0f} < {int(partial*self.median_min)}, P75 {pct75_views:,.0f} < {int(partial*self.p75_min)}"
         
 		return decision, reason, score
 
 	def analyze_niche(self, keyword: str, region_code: str = None, 
-					 relevance_language: str = None, max_results: int = 50) -> Dict[str, Any]:
+					 relevance_language: str = None, max_results: int = 50,
+					 videos: Optional[List[Dict]] = None,
+					 channels_info: Optional[Dict[str, Dict]] = None,
+					 view_stats: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
 		"""
 		UNIFICADO: Análisis completo que combina métricas originales + nuevas
+		Si se pasan `videos`/`channels_info` (ya resueltos en lote) no se llama a la API.
+		`view_stats` son las métricas de views (y de velocidad) ya calculadas para
+		todo el lote (view_metrics / view_velocity); si no, se calculan aquí.
 		"""
 		rich_print(f"\n🔍 Analizando nicho: '{keyword}'", style="bold blue")
 		rich_print("=" * 60, style="cyan")
 
 		# 1. Buscar videos (usar max_results para controlar el tamaño de la muestra)
-		videos = self.search_videos(keyword, max_results=max_results,
-									region_code=region_code,
-									relevance_language=relevance_language)
+		if videos is None:
+			videos = self.search_videos(keyword, max_results=max_results,
+										region_code=region_code,
+										relevance_language=relevance_language)
 
 		if not videos:
 			return {
@@ -606,32 +608,34 @@ class NicheAnalyzerYouTubeUnificado:
 				'success': False
 			}
 
-		# 2. Calcular métricas básicas de views (ORIGINAL)
-		views_list = [video['viewCount'] for video in videos]
-		total_views = sum(views_list)
-		avg_views = total_views / len(videos)
-		median_views = statistics.median(views_list)
-
-		# Calcular percentil 75
-		sorted_views = sorted(views_list)
-		p75_index = int(0.75 * len(sorted_views))
-		pct75_views = sorted_views[p75_index] if p75_index < len(sorted_views) else sorted_views[-1]
-
-		max_views = max(views_list)
-		min_views = min(views_list)
+		# 2. Métricas básicas de views (P75 con interpolación lineal, como youtube_search)
+		views_list = videos_views(videos)
+		if view_stats is None:
+			view_stats = view_metrics(views_list)
+		if 'median_views_per_day' not in view_stats:
+			view_stats = {**view_stats, **video_velocity(videos)}
+		velocity = {name: view_stats[name] for name in VELOCITY_METRICS}
+		# Sketch de cuantiles de la keyword: se guarda como distribución del día
+		get_view_sketch_store().add(keyword, views_list)
+		total_views = view_stats['total']
+		avg_views = view_stats['mean']
+		median_views = view_stats['median']
+		pct75_views = view_stats['pct']
+		max_views = view_stats['max']
+		min_views = view_stats['min']
 
 		# 3. Análisis de monetización (ORIGINAL)
 		monetization_analysis = self.classify_monetization(keyword)
-		video_monetization = self.analyze_video_monetization(videos)
+		video_monetization = self.analyze_video_monetization(videos, view_stats)
 
 		# 4. Análisis de competencia y saturación (ORIGINAL)
-		saturation_analysis = self.calculate_saturation_risk(videos)
+		saturation_analysis = self.calculate_saturation_risk(videos, view_stats)
 
 		# 5. NUEVO: Análisis de automatización
 		automation_analysis = self.analyze_automation_potential(videos)
 
 		# 6. NUEVO: Análisis de canales
-		channel_analysis = self.analyze_channel_sizes(videos)
+		channel_analysis = self.analyze_channel_sizes(videos, channels_info)
 
 		# 7. Decisión y scoring (ORIGINAL + NUEVO)
 		decision, reason, base_score = self.decide_niche_soft(median_views, pct75_views)
@@ -641,6 +645,7 @@ class NicheAnalyzerYouTubeUnificado:
 			'avg_views': avg_views,
 			'total_views': total_views,
 			'total_likes': sum(video.get('likeCount', 0) for video in videos),
+			'median_views_per_day': velocity['median_views_per_day'],
 			'competition_level': saturation_analysis['competition_level'],
 			'is_automatizable': automation_analysis['is_automatizable'],
 			'monetization_potential': monetization_analysis['monetization_potential']
@@ -659,12 +664,16 @@ class NicheAnalyzerYouTubeUnificado:
 			# Métricas de videos (ORIGINAL)
 			'video_count': len(videos),
 			'total_views': int(total_views),
+			'total_likes': int(niche_data_for_scoring['total_likes']),
 			'avg_views': int(avg_views),
 			'median_views': int(median_views),
 			'pct75_views': int(pct75_views),
 			'max_views': int(max_views),
 			'min_views': int(min_views),
 
+			# Velocidad: views/día desde publishedAt, likes/view, mediana por recencia (NUEVO)
+			**velocity,
+
 			# Decisión y scoring (ORIGINAL)
 			'decision': decision,
 			'reason': reason,
@@ -720,10 +729,139 @@ class NicheAnalyzerYouTubeUnificado:
 		}
 
 		# 10. Mostrar resultados en consola
-		self._print_analysis_results(result)
+		with self._print_lock:
+			self._print_analysis_results(result)
 
 		return result
 
+	def analyze_many(self, keywords: List[str], region_code: str = None,
+					 relevance_language: str = None, max_results: int = 50,
+					 concurrency: int = 1, batch: bool = True, refresh: bool = False,
+					 max_age_days: float = DEFAULT_VIDEO_SET_MAX_AGE_DAYS) -> List[Dict[str, Any]]:
+		"""
+		Analiza varias keywords con un pool de hilos.
+		El ritmo de llamadas lo controla el limitador compartido del cliente
+		(no hay sleeps fijos). Devuelve los resultados en el orden de entrada y
+		un fallo en una keyword no afecta al resto.
+
+		Con `batch` (y más de una keyword) se hace en fases: primero todos los
+		search.list, después un único videos.list/channels.list agrupado para
+		todas las keywords (llamadas llenas de 50 IDs en un POST batch) y por
+		último el análisis, que ya no toca la API. Los IDs de cada búsqueda se
+		guardan en la BD (niche_video_sets).
+
+		Con `refresh` las keywords con IDs guardados de hace menos de
+		`max_age_days` no repiten search.list (100 unidades): sólo se vuelven a
+		pedir sus estadísticas en videos.list (1 unidad por cada 50 IDs) y se
+		recalculan mediana, P75 y scores. Las estadísticas se piden de nuevo aunque
+		el almacén de videos tenga un snapshot dentro de VIDEO_STATS_MAX_AGE_HOURS.
+		"""
+		started_at = datetime.utcnow()
+		workers = max(1, min(int(concurrency or 1), len(keywords) or 1))
+
+		def _map(fn, items):
+			if workers == 1:
+				return [fn(item) for item in items]
+			with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='nicho') as pool:
+				return list(pool.map(fn, items))
+
+		if not refresh and (not batch or len(keywords) < 2):
+			def _analyze(keyword: str) -> Dict[str, Any]:
+				try:
+					return self.analyze_niche(
+						keyword=keyword,
+						region_code=region_code,
+						relevance_language=relevance_language,
+						max_results=max_results
+					)
+				except Exception as e:
+					return {'keyword': keyword, 'error': str(e), 'success': False}
+
+			return _map(_analyze, keywords)
+
+		# Fase 1: search.list por keyword (o IDs guardados en modo refresh)
+		stored = self.load_video_sets(keywords, region_code, max_results, max_age_days) if refresh else {}
+
+		def _search(keyword: str):
+			if keyword in stored:
+				return stored[keyword]
+			try:
+				return self.search_video_ids(keyword, max_results=max_results,
+											 region_code=region_code,
+											 relevance_language=relevance_language)
+			except Exception as e:
+				# Sólo esta keyword queda como error; el resto sigue
+				print(f"❌ Error buscando '{keyword}': {e}")
+				return e
+
+		searched = _map(_search, keywords)
+		self.save_video_sets({keyword: ids for keyword, ids in zip(keywords, searched)
+							  if isinstance(ids, list) and ids and keyword not in stored},
+							 region_code, max_results)
+		if refresh:
+			reused = len(set(stored) & set(keywords))
+			print(f"♻️  Refresh: {reused}/{len(set(keywords))} keywords con IDs guardados "
+				  f"(<{max_age_days:g} días) sin search.list, {reused * 100} unidades ahorradas; "
+				  f"{len(set(keywords)) - reused} búsquedas completas")
+
+		# Fase 2: videos.list y channels.list agrupados para todas las keywords
+		# (el almacén de videos sólo pide los IDs que no tenga con stats recientes)
+		video_store = get_video_store()
+		fresh_since = started_at if refresh else None
+		try:
+			video_items = video_store.get_for_keywords(self.youtube, {
+				keyword: ids for keyword, ids in zip(keywords, searched) if isinstance(ids, list)
+			}, fresh_since=fresh_since)
+		except Exception as e:
+			# Si falla el lote, keyword a keyword: un fallo sólo afecta a la suya
+			print(f"❌ Error obteniendo estadísticas de videos en lote: {e}; reintentando por keyword")
+			video_items = {}
+			for index, (keyword, ids) in enumerate(zip(keywords, searched)):
+				if not isinstance(ids, list):
+					continue
+				try:
+					video_items.update(video_store.get_many(self.youtube, ids, keyword=keyword,
+															fresh_since=fresh_since))
+				except Exception as keyword_error:
+					print(f"❌ Error obteniendo estadísticas de '{keyword}': {keyword_error}")
+					searched[index] = keyword_error
+		videos_by_keyword = [
+			self._build_video_records([video_items[vid] for vid in ids if vid in video_items])
+			if isinstance(ids, list) else ids
+			for ids in searched
+		]
+		all_channel_ids = [v['channelId'] for videos in videos_by_keyword if isinstance(videos, list)
+						   for v in videos if v.get('channelId')]
+		channels_info = self.get_channel_info(all_channel_ids)
+
+		print(video_store.summary())
+
+		# Fase 3: análisis (sin llamadas a la API); las métricas de views y de
+		# velocidad de todas las keywords salen de una sola pasada
+		prefetched = {i: videos for i, videos in enumerate(videos_by_keyword) if isinstance(videos, list)}
+		stats_by_index = metrics_by_keyword({i: videos_views(videos) for i, videos in prefetched.items()})
+		for index, velocity in velocity_by_keyword(prefetched).items():
+			stats_by_index[index].update(velocity)
+
+		def _analyze_prefetched(index: int) -> Dict[str, Any]:
+			keyword, videos = keywords[index], videos_by_keyword[index]
+			if isinstance(videos, Exception):
+				return {'keyword': keyword, 'error': str(videos), 'success': False}
+			try:
+				return self.analyze_niche(
+					keyword=keyword,
+					region_code=region_code,
+					relevance_language=relevance_language,
+					max_results=max_results,
+					videos=videos,
+					channels_info=channels_info,
+					view_stats=stats_by_index.get(index)
+				)
+			except Exception as e:
+				return {'keyword': keyword, 'error': str(e), 'success': False}
+
+		return [_analyze_prefetched(i) for i in range(len(keywords))]
+
 	def _print_analysis_results(self, result: Dict[str, Any]):
 		"""Mostrar resultados formateados en consola"""
 		print(f"\n📊 RESULTADOS PARA '{result['keyword']}'")
@@ -735,6 +873,9 @@ class NicheAnalyzerYouTubeUnificado:
 		print(f"📈 Mediana views: {result['median_views']:,}")
 		print(f"📊 Percentil 75: {result['pct75_views']:,}")
 		print(f"🎯 Views máximas: {result['max_views']:,}")
+		print(f"🚀 Views/día (mediana): {result['median_views_per_day']:,.1f} | "
+			  f"Mediana por recencia: {result['recency_weighted_median_views']:,} | "
+			  f"Likes/view: {result['likes_per_view']:.2%}")
 
 		# Decisión y scores
 		print(f"\n🎯 DECISIÓN: {result['decision']}")
@@ -784,7 +925,10 @@ class NicheAnalyzerYouTubeUnificado:
 			'keyword', 'region', 'timestamp', 'video_count',
             
 			# Views (ORIGINAL)
-			'avg_views', 'median_views', 'pct75_views', 'max_views', 'min_views', 'total_views',
+			'avg_views', 'median_views', 'pct75_views', 'max_views', 'min_views', 'total_views', 'total_likes',
+
+			# Velocidad (NUEVO)
+			*VELOCITY_METRICS,
             
 			# Decisión (ORIGINAL)
 			'decision', 'reason', 'base_score', 'opportunity_score',
@@ -932,8 +1076,17 @@ def main():
 	parser.add_argument('--language', default='es', help='Idioma de relevancia (default: es)')
 	parser.add_argument('--output', default='nichos_analysis', help='Prefijo de archivos de salida')
 	parser.add_argument('--max-results', type=int, default=50, help='Número máximo de videos a analizar por keyword (default: 50)')
+	parser.add_argument('--cache-mode', choices=CACHE_MODES, default=DEFAULT_CACHE_MODE, help='Caché de respuestas de la API: off | read-write | offline')
+	parser.add_argument('--concurrency', type=int, default=1, help='Keywords a analizar en paralelo (default: 1)')
+	parser.add_argument('--no-batch', action='store_true', help='No agrupar videos.list/channels.list entre keywords')
+	parser.add_argument('--distribution', choices=[p for p in PERIODS if p != 'day'],
+						help='Mostrar mediana/P75 de la semana o el mes (fusión de los sketches diarios guardados)')
+	parser.add_argument('--refresh', action='store_true', help='Reutilizar los IDs guardados y refrescar sólo sus estadísticas (sin search.list; las estadísticas siempre se vuelven a pedir)')
+	parser.add_argument('--max-set-age-days', type=float, default=DEFAULT_VIDEO_SET_MAX_AGE_DAYS,
+						help=f'Antigüedad máxima de los IDs guardados antes de volver a buscar (default: {DEFAULT_VIDEO_SET_MAX_AGE_DAYS:g})')
     
 	args = parser.parse_args()
+	configure_cache(args.cache_mode)
     
 	# Inicializar analizador
 	try:
@@ -947,41 +1100,45 @@ def main():
 	print(f"📍 Región: {args.region}")
 	print(f"🌍 Idioma: {args.language}")
 	print(f"🔍 Keywords: {', '.join(args.keywords)}")
+	# Presupuesto restante (compartido con otros procesos): ~102 unidades por keyword
+	remaining = analyzer.usage_tracker.get_remaining()
+	affordable = remaining // 102
+	print(f"🔢 Cuota restante hoy: {remaining:,} unidades (~{affordable} keywords sin caché)")
+	if args.refresh:
+		print(f"♻️  Modo refresh: las keywords con IDs de menos de {args.max_set_age_days:g} días cuestan ~1 unidad cada 50 videos")
+	if affordable < len(args.keywords):
+		print(f"⚠️  La cuota no alcanza para {len(args.keywords)} keywords; las que no quepan saldrán de la caché o fallarán")
 	print("=" * 50)
     
-	# Analizar keywords
+	# Analizar keywords (en paralelo si --concurrency > 1; resultados en orden de entrada)
 	results = []
-    
-	for i, keyword in enumerate(args.keywords, 1):
-		print(f"\n[{i}/{len(args.keywords)}] Procesando: {keyword}")
-        
-		try:
-			result = analyzer.analyze_niche(
-				keyword=keyword,
-				region_code=args.region,
-				relevance_language=args.language,
-				max_results=args.max_results
-			)
-            
-			if result.get('success', False):
-				results.append(result)
-				# Persist niche-level result to DB if available
-				if db_enabled and _SessionLocal is not None:
-					try:
-						session = _SessionLocal()
-						save_niche_result(session, result)
-						session.close()
-					except Exception:
-						pass
-			else:
-				print(f"⚠️  Error analizando '{keyword}': {result.get('error', 'Unknown error')}")
-                
-		except Exception as e:
-			print(f"❌ Error inesperado analizando '{keyword}': {e}")
-        
-		# Pausa entre requests para evitar rate limiting
-		if i < len(args.keywords):
-			time.sleep(1)
+	if args.concurrency > 1:
+		print(f"⚡ Concurrencia: {args.concurrency} keywords en paralelo")
+
+	analyzed = analyzer.analyze_many(
+		args.keywords,
+		region_code=args.region,
+		relevance_language=args.language,
+		max_results=args.max_results,
+		concurrency=args.concurrency,
+		batch=not args.no_batch,
+		refresh=args.refresh,
+		max_age_days=args.max_set_age_days
+	)
+
+	for i, (keyword, result) in enumerate(zip(args.keywords, analyzed), 1):
+		if result.get('success', False):
+			results.append(result)
+			# Persist niche-level result to DB if available
+			if db_enabled and _SessionLocal is not None:
+				try:
+					session = _SessionLocal()
+					save_niche_result(session, result)
+					session.close()
+				except Exception:
+					pass
+		else:
+			print(f"⚠️  [{i}/{len(args.keywords)}] Error analizando '{keyword}': {result.get('error', 'Unknown error')}")
     
 	# Exportar resultados
 	if results:
@@ -1022,6 +1179,23 @@ def main():
 			except Exception:
 				pass
 
+		# Distribución de views del día (sketch por keyword) y, si se pide, la de la semana/mes
+		sketch_store = get_view_sketch_store()
+		saved = sketch_store.save(args.region)
+		if saved:
+			print(f"📐 Distribuciones de views guardadas: {saved} keywords (sketch del día)")
+		if args.distribution:
+			keywords = [r['keyword'] for r in results]
+			distribution = sketch_store.distribution(keywords, args.region, args.distribution)
+			print(f"\n📐 Views por {'semana' if args.distribution == 'week' else 'mes'} (sketches diarios fusionados):")
+			for keyword in keywords:
+				sketch = distribution.get(keyword)
+				if sketch is None:
+					continue
+				summary = sketch.summary()
+				print(f"   • {keyword}: {summary['count']:,} views | mediana {summary['median']:,.0f} | "
+					  f"P75 {summary['pct']:,.0f}{'' if sketch.exact else ' (aprox. ±1.65% de rango)'}")
+
 		print(f"\n✅ ANÁLISIS COMPLETADO")
 		print(f"📊 {len(results)} nichos analizados exitosamente")
 		print(f"💾 Archivos generados:")
@@ -1029,6 +1203,12 @@ def main():
 		print(f"   - MD: {md_file}")
 	else:
 		print("\n❌ No se pudieron analizar nichos")
+	print(get_channel_cache().summary())
+	print(get_video_store().summary())
+	print(etag_summary())
+	print(get_text_cache().summary())
+	print_retry_summary()
+	print_key_summary()
 
 if __name__ == "__main__":
 	main()
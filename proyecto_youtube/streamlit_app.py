@@ -41,7 +41,7 @@ sys.path.append(str(ROOT))
 try:
     from nichos_youtube.nichos_youtube import NicheAnalyzerYouTubeUnificado
     from canales_youtube.buscar_canales_youtube import get_channels_info, search_videos_get_channels
-    from db.utils import init_db, save_niche_result, save_channel_result
+    from db.utils import init_db, save_niche_result, save_channel_result, load_niche_results
     from db.session import SessionLocal
     from config import YOUTUBE_API_KEY
     db_enabled = True
@@ -49,6 +49,15 @@ except ImportError as e:
     st.error(f"Error importando módulos: {e}")
     db_enabled = False
 
+# Scoring por lotes para las simulaciones what-if (necesita NumPy)
+sys.path.append(str(ROOT / 'utils'))
+try:
+    from batch_scoring import decision_counts, rescore
+    from scoring_config import get_scoring_config
+    scoring_enabled = True
+except ImportError:
+    scoring_enabled = False
+
 # Inicializar DB si está disponible
 if db_enabled:
     try:
@@ -328,5 +337,53 @@ def show_data_dashboard():
     fig = px.line(x=dates, y=niche_counts, title='Nichos Analizados por Día')
     st.plotly_chart(fig, use_container_width=True)
 
+    show_what_if_scoring()
+
+
+def show_what_if_scoring():
+    """Re-puntuar los nichos guardados con otros pesos y umbrales (sin volver a llamar a la API)"""
+    st.markdown("### 🧪 Simulación What-If de Scoring")
+    if not db_enabled or not scoring_enabled:
+        st.info("Necesita la base de datos y NumPy")
+        return
+
+    session = SessionLocal()
+    try:
+        results = load_niche_results(session, limit=st.number_input("Resultados a cargar", 100, 200000, 10000, 1000))
+    finally:
+        session.close()
+    if not results:
+        st.info("Todavía no hay nichos guardados en la base de datos")
+        return
+
+    config = get_scoring_config()
+    soft, weights = config.soft_decision, config.opportunity['weights']
+    col1, col2 = st.columns(2)
+    with col1:
+        median_min = st.slider("Umbral de mediana", 0, 50000, int(soft['median_min']), 500)
+        p75_min = st.slider("Umbral de P75", 0, 200000, int(soft['p75_min']), 1000)
+        partial_ratio = st.slider("Zona parcial (fracción del umbral)", 0.0, 1.0, float(soft['partial_ratio']), 0.05)
+    with col2:
+        new_weights = {name: st.slider(f"Peso {name}", 0.0, 1.0, float(value), 0.05)
+                       for name, value in weights.items()}
+
+    overrides = {'soft_decision.median_min': median_min, 'soft_decision.p75_min': p75_min,
+                 'soft_decision.partial_ratio': partial_ratio}
+    overrides.update({f'opportunity.weights.{name}': value for name, value in new_weights.items()})
+
+    frame = pd.DataFrame(results)
+    current = decision_counts(rescore(frame, config))
+    what_if = rescore(frame, config.with_overrides(overrides))
+    counts = decision_counts(what_if)
+
+    cols = st.columns(len(counts))
+    for col, (decision, count) in zip(cols, counts.items()):
+        col.metric(decision, count, count - current[decision])
+
+    columns = [c for c in ('keyword', 'decision', 'base_score', 'opportunity_score',
+                           'median_views', 'pct75_views', 'avg_views') if c in what_if.columns]
+    st.dataframe(what_if[columns].sort_values('opportunity_score' if 'opportunity_score' in columns else 'base_score',
+                                              ascending=False), use_container_width=True)
+
 if __name__ == "__main__":
     main()
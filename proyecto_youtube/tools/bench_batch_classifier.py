@@ -0,0 +1,101 @@
+"""
+Benchmark: clasificación por video (bucles de youtube_search) frente a la
+clasificación por lotes de utils/batch_classifier.py sobre una tabla.
+Genera --count videos (100.000 por defecto, como un backfill) repartidos en
+keywords de --group videos, los clasifica con analizar_titulos_monetizacion +
+is_automatizable (top 5 por views) + competencia directa en Python por cada
+keyword, y después con classify_videos en cada backend disponible, comprobando
+que los resúmenes por keyword son idénticos.
+
+Uso: python proyecto_youtube/tools/bench_batch_classifier.py [--count 100000] [--group 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT / 'utils'))
+sys.path.append(str(PROJECT_ROOT / 'config'))
+
+# Cuota y caché temporales: importar youtube_search no debe tocar los ficheros reales
+os.environ.setdefault('YOUTUBE_QUOTA_DB', str(Path(tempfile.mkdtemp()) / 'quota.db'))
+os.environ.setdefault('YOUTUBE_CACHE_PATH', str(Path(tempfile.mkdtemp()) / 'cache.db'))
+
+import batch_classifier
+import text_normalizer
+from lexicon import get_lexicon
+
+# Vocabulario de títulos: señales de monetización/automatización, contenido personal y relleno
+TITLE_WORDS = (
+    "top mejores review tutorial guía ranking vs trucos tips consejos paso a paso cómo hacer "
+    "finanzas dinero inversión curso amazon precio oferta comprar barato análisis opinión "
+    "best how to guide easy quick money business crypto trading vlog gameplay rutina mi día "
+    "laptop stopwatch desktop nuevo viral 2025 receta cocina casa familia perro cuento niños "
+    "story kids gato viaje música canal"
+).split()
+
+
+def synthetic_videos(count, group, seed=201):
+    rng = random.Random(seed)
+    words = lambda n: ' '.join(rng.choice(TITLE_WORDS) for _ in range(n))
+    videos_by_keyword = {}
+    for i in range(count):
+        videos_by_keyword.setdefault(f'keyword {i // group}', []).append({
+            'video_id': f'v{i}', 'title': words(rng.randint(4, 12)).capitalize(),
+            'description': words(rng.randint(10, 40)), 'viewCount': rng.randint(0, 2_000_000)})
+    return videos_by_keyword
+
+
+def per_video_loops(videos_by_keyword, top_n=batch_classifier.DEFAULT_TOP_N):
+    """Resumen por keyword con los clasificadores por video de youtube_search."""
+    import youtube_search as ys
+    competencia = get_lexicon().phrase_matcher('channel_direct_competition')
+    summary = []
+    for keyword, videos in videos_by_keyword.items():
+        analisis = ys.analizar_titulos_monetizacion(videos)
+        top = sorted(videos, key=lambda v: v['viewCount'], reverse=True)[:top_n]
+        row = {'keyword': keyword, 'videos': len(videos)}
+        row.update(analisis)
+        row['automatizable_count'] = sum(ys.is_automatizable(text_normalizer.normalize_video(v).title) for v in top)
+        row['competencia_directa'] = sum(
+            competencia.any(v['title']) or competencia.any(v['description']) for v in videos)
+        summary.append(row)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la clasificación por lotes')
+    parser.add_argument('--count', type=int, default=100000, help='Videos a clasificar')
+    parser.add_argument('--group', type=int, default=50, help='Videos por keyword')
+    args = parser.parse_args()
+
+    videos_by_keyword = synthetic_videos(args.count, args.group)
+    print(f"📊 Clasificación: {args.count:,} videos en {len(videos_by_keyword):,} keywords")
+
+    # Caché de textos vacía y suficiente para todos: los bucles pagan la normalización una vez
+    text_normalizer._text_cache = text_normalizer.VideoTextCache(args.count)
+    start = time.perf_counter()
+    expected = per_video_loops(videos_by_keyword)
+    t_loops = time.perf_counter() - start
+    print(f"   {'bucles por video':<22} {t_loops * 1e3:9.1f} ms")
+
+    available = [b for b in batch_classifier.BACKENDS
+                 if b == 'python' or getattr(batch_classifier, {'polars': 'pl', 'pandas': 'pd'}[b]) is not None]
+    for backend in available:
+        start = time.perf_counter()
+        summary = batch_classifier.classify_videos(videos_by_keyword, backend=backend)
+        elapsed = time.perf_counter() - start
+        assert [{k: row[k] for k in expected[0]} for row in summary] == expected, f'{backend}: resumen distinto'
+        print(f"   {'lotes (' + backend + ')':<22} {elapsed * 1e3:9.1f} ms (x{t_loops / elapsed:.1f}) ✅ idénticos")
+    missing = [b for b in batch_classifier.BACKENDS if b not in available]
+    if missing:
+        print(f"   (sin {', '.join(missing)} instalado)")
+
+
+if __name__ == '__main__':
+    main()
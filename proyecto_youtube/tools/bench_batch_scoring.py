@@ -0,0 +1,94 @@
+"""
+Benchmark: re-puntuar una tabla de resultados de nichos fila a fila (las
+funciones escalares de youtube_search) frente a por lotes sobre columnas
+(utils/batch_scoring.py), y una batería de simulaciones what-if con otros
+umbrales y pesos sobre la misma tabla.
+Genera --rows resultados sintéticos, calcula decision/base_score y
+potencial_total_refinado de las dos formas y comprueba que coinciden.
+
+Uso: python proyecto_youtube/tools/bench_batch_scoring.py [--rows 100000] [--what-if 10]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT / 'utils'))
+
+import batch_scoring
+from scoring_config import get_scoring_config
+from youtube_search import calcular_potencial_total_refinado, decide_niche_soft
+
+MONETIZATION = ('Afiliación + Anuncios', 'Solo Anuncios', 'Solo Afiliación', 'Difícil Monetizar')
+COMPETITION = ('Low', 'Medium', 'High', 'Very High')
+
+
+def synthetic_results(n):
+    rng = random.Random(201)
+    rows = []
+    for i in range(n):
+        median = int(rng.paretovariate(1.1) * 1500)
+        views = int(median * rng.uniform(1, 4))
+        rows.append({'keyword': f'kw{i}', 'median_views': median, 'pct75_views': int(median * rng.uniform(1, 6)),
+                     'avg_views': views, 'total_views': views * 20, 'total_likes': int(views * rng.uniform(0, 0.04)),
+                     'competition_level': rng.choice(COMPETITION), 'is_automatizable': rng.random() < 0.5,
+                     'monetization_potential': rng.choice(('Muy Alto', 'Alto', 'Medio', 'Bajo')),
+                     'monetizacion': rng.choice(MONETIZATION), 'automatizable': rng.random() < 0.5,
+                     'monetizable_ratio_pct': rng.uniform(0, 100)})
+    return rows
+
+
+def per_row(rows, config):
+    soft = config.soft_decision
+    return [(decide_niche_soft(row['median_views'], row['pct75_views'], soft['median_min'], soft['p75_min']),
+             calcular_potencial_total_refinado(row['avg_views'], row['monetizacion'], row['automatizable'],
+                                               row['monetizable_ratio_pct']))
+            for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del scoring por lotes')
+    parser.add_argument('--rows', type=int, default=100000, help='Resultados de nichos en la tabla')
+    parser.add_argument('--what-if', type=int, default=10, help='Configuraciones what-if a simular')
+    args = parser.parse_args()
+
+    config = get_scoring_config()
+    rows = synthetic_results(args.rows)
+    if batch_scoring.pl is not None:
+        frame, backend = batch_scoring.pl.DataFrame(rows), 'Polars'
+    elif batch_scoring.pd is not None:
+        frame, backend = batch_scoring.pd.DataFrame(rows), 'pandas'
+    else:
+        frame, backend = rows, 'lista de dicts'
+    print(f"📊 Scoring: {args.rows:,} resultados ({backend})")
+
+    start = time.perf_counter()
+    expected = per_row(rows, config)
+    t_rows = time.perf_counter() - start
+    print(f"   {'fila a fila':<16} {t_rows * 1e3:9.1f} ms")
+
+    start = time.perf_counter()
+    scored = batch_scoring.rescore(frame, config, ['soft_decision', 'refined_potential'])
+    elapsed = time.perf_counter() - start
+    decisions, bases, potentials = (list(scored[name]) if backend != 'lista de dicts' else [r[name] for r in scored]
+                                    for name in ('decision', 'base_score', 'potencial_total_refinado'))
+    for i, ((decision, _, base), potential) in enumerate(expected):
+        assert decisions[i] == decision and abs(bases[i] - base) <= 0.1 + 1e-9 and potentials[i] == potential, i
+    print(f"   {'por lotes':<16} {elapsed * 1e3:9.1f} ms (x{t_rows / elapsed:.1f}) ✅ idénticas")
+
+    # What-if: umbrales y pesos distintos sobre la misma tabla (los cuatro scorings aplicables)
+    start = time.perf_counter()
+    for i in range(args.what_if):
+        scenario = config.with_overrides({'soft_decision.median_min': 2000 + 1000 * i,
+                                          'opportunity.weights.views': 0.2 + 0.05 * i})
+        counts = batch_scoring.decision_counts(batch_scoring.rescore(frame, scenario))
+    elapsed = time.perf_counter() - start
+    print(f"   {args.what_if} what-if  {elapsed * 1e3:9.1f} ms ({elapsed / max(1, args.what_if) * 1e3:.1f} ms c/u), "
+          f"último: {counts}")
+
+
+if __name__ == '__main__':
+    main()
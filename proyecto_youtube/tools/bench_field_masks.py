@@ -0,0 +1,125 @@
+"""
+Benchmark: tamaño de respuesta y tiempo de parseo con y sin máscara `fields=`.
+Toma respuestas completas grabadas (ficheros .json de --responses-dir o las
+entradas sin máscara de la caché de respuestas) y les aplica localmente la
+máscara que usa cada llamada (utils/field_masks.py), que es lo mismo que
+devuelve la API con `fields=`. Si no hay grabaciones genera respuestas
+sintéticas con la forma completa de la API (thumbnails, localized, etc.).
+
+Uso: python proyecto_youtube/tools/bench_field_masks.py [--responses-dir DIR] [--repeat 200]
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'utils'))
+
+from field_masks import FIELD_MASKS, apply_field_mask
+from response_cache import DEFAULT_CACHE_PATH
+
+# Máscara representativa por tipo de respuesta
+MASK_BY_KIND = {
+    'youtube#searchListResponse': 'search.video_ids',
+    'youtube#videoListResponse': 'videos.analysis',
+    'youtube#channelListResponse': 'channels.stats',
+    'youtube#playlistItemListResponse': 'playlistItems.video_ids',
+}
+
+
+def _thumbnails(url):
+    return {size: {'url': f'{url}/{size}.jpg', 'width': w, 'height': h}
+            for size, w, h in (('default', 120, 90), ('medium', 320, 180), ('high', 480, 360),
+                               ('standard', 640, 480), ('maxres', 1280, 720))}
+
+
+def synthetic_responses(n_items: int = 50):
+    """Respuestas con la forma completa que devuelve la API para los `part` que pedimos."""
+    description = 'Descripción de ejemplo con enlaces y afiliados https://amzn.to/xyz ' * 12
+    videos = {'kind': 'youtube#videoListResponse', 'etag': 'e', 'pageInfo': {'totalResults': n_items, 'resultsPerPage': n_items},
+              'items': [{
+                  'kind': 'youtube#video', 'etag': f'etag{i}', 'id': f'vid{i:08d}',
+                  'snippet': {'publishedAt': '2025-01-01T10:00:00Z', 'channelId': f'UC{i:022d}', 'title': f'Top 10 trucos {i}',
+                              'description': description, 'thumbnails': _thumbnails(f'https://i.ytimg.com/vi/vid{i}'),
+                              'channelTitle': f'Canal {i}', 'tags': ['tutorial', 'tips', 'guía', '2025'], 'categoryId': '27',
+                              'liveBroadcastContent': 'none', 'defaultLanguage': 'es', 'defaultAudioLanguage': 'es',
+                              'localized': {'title': f'Top 10 trucos {i}', 'description': description}},
+                  'contentDetails': {'duration': 'PT8M12S', 'dimension': '2d', 'definition': 'hd', 'caption': 'false',
+                                     'licensedContent': True, 'contentRating': {}, 'projection': 'rectangular'},
+                  'statistics': {'viewCount': str(1000 * i), 'likeCount': str(10 * i), 'favoriteCount': '0', 'commentCount': str(i)},
+              } for i in range(n_items)]}
+    search = {'kind': 'youtube#searchListResponse', 'etag': 'e', 'nextPageToken': 'CDIQAA', 'regionCode': 'ES',
+              'pageInfo': {'totalResults': 1000000, 'resultsPerPage': n_items},
+              'items': [{'kind': 'youtube#searchResult', 'etag': f'etag{i}', 'id': {'kind': 'youtube#video', 'videoId': f'vid{i:08d}'},
+                         'snippet': {k: v for k, v in videos['items'][i]['snippet'].items() if k in
+                                     ('publishedAt', 'channelId', 'title', 'description', 'thumbnails', 'channelTitle', 'liveBroadcastContent')}}
+                        for i in range(n_items)]}
+    channels = {'kind': 'youtube#channelListResponse', 'etag': 'e', 'pageInfo': {'totalResults': n_items, 'resultsPerPage': n_items},
+                'items': [{'kind': 'youtube#channel', 'etag': f'etag{i}', 'id': f'UC{i:022d}',
+                           'snippet': {'title': f'Canal {i}', 'description': description, 'customUrl': f'@canal{i}',
+                                       'publishedAt': '2015-05-01T10:00:00Z', 'thumbnails': _thumbnails(f'https://yt3.ggpht.com/c{i}'),
+                                       'localized': {'title': f'Canal {i}', 'description': description}, 'country': 'ES'},
+                           'statistics': {'viewCount': str(10 ** 6 * i), 'subscriberCount': str(1000 * i),
+                                          'hiddenSubscriberCount': False, 'videoCount': str(i)}}
+                          for i in range(n_items)]}
+    return [('sintético', videos), ('sintético', search), ('sintético', channels)]
+
+
+def recorded_responses(responses_dir):
+    """Respuestas completas grabadas: ficheros JSON o entradas sin máscara de la caché."""
+    found = []
+    if responses_dir:
+        for path in sorted(Path(responses_dir).glob('*.json')):
+            found.append((path.name, json.loads(path.read_text(encoding='utf-8'))))
+        return found
+    if Path(DEFAULT_CACHE_PATH).exists():
+        conn = sqlite3.connect(DEFAULT_CACHE_PATH)
+        for endpoint, params, content in conn.execute('SELECT endpoint, params, content FROM responses'):
+            if 'fields' not in json.loads(params):
+                found.append((f'caché:{endpoint}', json.loads(content)))
+        conn.close()
+    return found
+
+
+def _parse_time(raw: bytes, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(raw)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de máscaras fields= (respuesta parcial)')
+    parser.add_argument('--responses-dir', help='Directorio con respuestas completas grabadas (*.json)')
+    parser.add_argument('--repeat', type=int, default=200, help='Repeticiones de json.loads por respuesta')
+    args = parser.parse_args()
+
+    responses = [(src, r) for src, r in recorded_responses(args.responses_dir) if r.get('kind') in MASK_BY_KIND]
+    if not responses:
+        print('ℹ️  Sin respuestas grabadas: usando respuestas sintéticas con la forma completa de la API')
+        responses = synthetic_responses()
+
+    print(f"📊 Máscaras fields= ({len(responses)} respuestas, {args.repeat} parseos cada una)")
+    total_full = total_masked = t_full = t_masked = 0.0
+    for source, response in responses:
+        mask_name = MASK_BY_KIND[response['kind']]
+        full = json.dumps(response).encode('utf-8')
+        masked = json.dumps(apply_field_mask(response, FIELD_MASKS[mask_name])).encode('utf-8')
+        tf, tm = _parse_time(full, args.repeat), _parse_time(masked, args.repeat)
+        total_full += len(full)
+        total_masked += len(masked)
+        t_full += tf
+        t_masked += tm
+        print(f"   {source:>12} {mask_name:<24} {len(full):>8,} B -> {len(masked):>7,} B "
+              f"({len(masked) / len(full) * 100:5.1f}%) | parseo {tf * 1e6:8.1f} µs -> {tm * 1e6:7.1f} µs")
+
+    if total_full:
+        print(f"   🚀 Total: {total_full:,.0f} B -> {total_masked:,.0f} B (x{total_full / total_masked:.1f} menos) | "
+              f"parseo x{t_full / t_masked:.1f} más rápido")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Benchmark offline de los pipelines completos (nichos, tracking y canales).
+1) Grabar una vez con la API real (gasta cuota):
+     python proyecto_youtube/tools/bench_pipeline.py --mode record --keywords "recetas faciles" "cuentos infantiles"
+2) Reproducir sin red tantas veces como haga falta (no gasta cuota):
+     python proyecto_youtube/tools/bench_pipeline.py --mode replay --latency-ms 120 --concurrency 4
+
+Con los mismos parámetros (keywords, --max-results, --recent) el replay es
+determinista. Informa keywords/s, p50/p95 por etapa y pico de memoria
+(tracemalloc) de cada pipeline, para comparar versiones y ajustar la
+concurrencia sin red. La BD del proyecto, la cuota (en replay) y la caché de
+respuestas se sustituyen por ficheros temporales.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_KEYWORDS = ['recetas faciles', 'finanzas personales', 'cuentos infantiles']
+PIPELINES = ('nichos', 'tracking', 'canales')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark offline de pipelines con fixtures grabados')
+    parser.add_argument('--mode', choices=['record', 'replay'], default='replay')
+    parser.add_argument('--keywords', nargs='+', default=DEFAULT_KEYWORDS)
+    parser.add_argument('--pipelines', nargs='+', choices=PIPELINES, default=list(PIPELINES))
+    parser.add_argument('--fixtures-dir', help='Almacén de fixtures (default: YOUTUBE_FIXTURES_DIR)')
+    parser.add_argument('--latency-ms', type=float, default=100, help='Latencia simulada por round-trip (replay)')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Variación ± de la latencia (replay, semilla fija)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Concurrencia de analyze_many (nichos)')
+    parser.add_argument('--max-results', type=int, default=50)
+    parser.add_argument('--recent', type=int, default=5, help='Videos recientes por canal (canales; 0 = no)')
+    parser.add_argument('--repeat', type=int, default=1, help='Repeticiones de cada pipeline (replay)')
+    return parser.parse_args()
+
+
+def prepare_environment(args):
+    """Ficheros temporales para todo lo que el pipeline persiste (antes de importar módulos)."""
+    tmp = Path(tempfile.mkdtemp(prefix='bench_pipeline_'))
+    os.environ['YOUTUBE_DB_PATH'] = str(tmp / 'youtube_nichos.db')
+    os.environ['YOUTUBE_CACHE_MODE'] = 'off'
+    os.environ['YOUTUBE_CACHE_PATH'] = str(tmp / 'api_cache.db')
+    os.environ['YOUTUBE_TRANSPORT'] = args.mode
+    if args.fixtures_dir:
+        os.environ['YOUTUBE_FIXTURES_DIR'] = args.fixtures_dir
+    if args.mode == 'replay':
+        os.environ['YOUTUBE_QUOTA_DB'] = str(tmp / 'api_quota.db')
+        os.environ.setdefault('YOUTUBE_MAX_RPS', '0')
+    # Delante del directorio del script: tools/ tiene copias antiguas de algunos módulos
+    for sub in ('utils', 'config', 'credentials', 'nichos_youtube', 'canales_youtube'):
+        sys.path.insert(0, str(PROJECT_ROOT / sub))
+    sys.path.append(str(PROJECT_ROOT.parent))
+
+
+class StageTimer:
+    """Envuelve funciones/métodos y acumula su duración por etapa."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, owner, name: str, stage: str):
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+
+        setattr(owner, name, timed)
+        return original
+
+    @staticmethod
+    def percentile(values, pct):
+        vals = sorted(values)
+        k = (len(vals) - 1) * pct / 100.0
+        f = int(k)
+        c = min(f + 1, len(vals) - 1)
+        return vals[f] + (vals[c] - vals[f]) * (k - f)
+
+
+def reset_run_state():
+    """Cachés de proceso vacías para que cada repetición mida lo mismo."""
+    import channel_cache
+    import recent_stats_store
+    import text_normalizer
+    import video_store
+    import view_sketch_store
+    channel_cache._channel_cache = None
+    recent_stats_store._recent_store = None
+    text_normalizer._text_cache = None
+    text_normalizer.normalize_text.cache_clear()
+    video_store._video_store = None
+    view_sketch_store._sketch_store = None
+
+
+def run_nichos(args, timer, api_key):
+    import nichos_youtube
+    import youtube_batch
+    analyzer = nichos_youtube.NicheAnalyzerYouTubeUnificado(api_key)
+    timer.wrap(analyzer, 'search_video_ids', 'search.list')
+    timer.wrap(analyzer, 'search_videos', 'search+videos')
+    timer.wrap(analyzer, 'get_channel_info', 'channels')
+    timer.wrap(analyzer, 'analyze_niche', 'analyze_niche')
+    original = timer.wrap(youtube_batch.BatchLookup, 'fetch', 'batch lookup')
+    try:
+        results = analyzer.analyze_many(args.keywords, region_code='ES', relevance_language='es',
+                                        max_results=args.max_results, concurrency=args.concurrency)
+    finally:
+        youtube_batch.BatchLookup.fetch = original
+    return sum(1 for r in results if r.get('success'))
+
+
+def run_tracking(args, timer, api_key):
+    import youtube_search
+    search = timer.wrap(youtube_search, 'search_videos', 'search_videos')
+    original = timer.wrap(youtube_search, 'analyze_niche_with_tracking', 'analyze_niche_with_tracking')
+    ok = 0
+    try:
+        descartados = []
+        for keyword in args.keywords:
+            result = youtube_search.analyze_niche_with_tracking(keyword, descartados, region_code='ES',
+                                                                relevance_language='es')
+            ok += 1 if result.get('results_count') else 0
+    finally:
+        youtube_search.search_videos, youtube_search.analyze_niche_with_tracking = search, original
+    return ok
+
+
+def run_canales(args, timer, api_key):
+    import buscar_canales_youtube as canales
+    youtube = canales.build_youtube(api_key)
+    search = timer.wrap(canales, 'search_videos_get_channels', 'search.list')
+    channels = timer.wrap(canales, 'get_channels_info', 'channels')
+    recent = timer.wrap(canales, 'fetch_recent_stats', 'recent uploads')
+    try:
+        ids_by_keyword = {kw: canales.search_videos_get_channels(youtube, kw, max_results=args.max_results)
+                          for kw in args.keywords}
+        infos = canales.get_channels_info(youtube, [cid for ids in ids_by_keyword.values() for cid in ids])
+        if args.recent > 0:
+            for kw, ids in ids_by_keyword.items():
+                canales.fetch_recent_stats(youtube, [cid for cid in ids if cid in infos], max_videos=args.recent)
+    finally:
+        canales.search_videos_get_channels, canales.get_channels_info, canales.fetch_recent_stats = search, channels, recent
+    return sum(1 for ids in ids_by_keyword.values() if ids)
+
+
+RUNNERS = {'nichos': run_nichos, 'tracking': run_tracking, 'canales': run_canales}
+
+
+def main():
+    args = parse_args()
+    prepare_environment(args)
+
+    from youtube_client import configure_transport, get_replay_http
+    configure_transport(args.mode, fixtures_dir=args.fixtures_dir, latency_ms=args.latency_ms,
+                        jitter_ms=args.jitter_ms)
+    api_key = os.environ.get('YOUTUBE_API_KEY', 'replay-key')
+    if args.mode == 'record':
+        try:
+            from config import YOUTUBE_API_KEY
+            api_key = YOUTUBE_API_KEY or api_key
+        except ImportError:
+            pass
+
+    repeat = 1 if args.mode == 'record' else max(1, args.repeat)
+    print(f"🧪 Pipelines en modo {args.mode} | {len(args.keywords)} keywords | "
+          f"latencia {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms | concurrencia {args.concurrency}")
+
+    for name in args.pipelines:
+        timer = StageTimer()
+        walls, peaks, ok = [], [], 0
+        error = None
+        for _ in range(repeat):
+            reset_run_state()
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ok = RUNNERS[name](args, timer, api_key)
+            except Exception as e:
+                error = e
+            walls.append(time.perf_counter() - start)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            if error:
+                break
+
+        print(f"\n📦 {name}")
+        if error:
+            print(f"   ❌ {type(error).__name__}: {error}")
+            continue
+        wall = statistics.median(walls)
+        print(f"   {len(args.keywords) / wall:8.2f} keywords/s | {wall:.3f}s por ejecución | "
+              f"{ok}/{len(args.keywords)} keywords con datos | pico memoria {max(peaks) / 1024 / 1024:.1f} MB")
+        for stage, samples in timer.samples.items():
+            print(f"   {stage:<28} n={len(samples):<4} p50 {timer.percentile(samples, 50) * 1000:8.1f} ms | "
+                  f"p95 {timer.percentile(samples, 95) * 1000:8.1f} ms")
+
+    replay = get_replay_http()
+    if replay is not None:
+        print(f"\n🔁 Round-trips servidos desde fixtures: {replay.round_trips}")
+
+
+if __name__ == '__main__':
+    main()
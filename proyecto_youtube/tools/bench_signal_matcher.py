@@ -0,0 +1,280 @@
+"""
+Benchmark: clasificadores de señales con bucles `palabra in texto` frente a los
+diccionarios compilados de utils/signal_matcher.py.
+Toma snippets de video grabados (fixtures de replay y caché de respuestas),
+los repite hasta --count (10.000 por defecto) y ejecuta cada clasificador con
+la implementación anterior (bucles, copiados aquí como referencia) y con la
+actual, e informa de cuántos resultados cambian: los clasificadores con
+PhraseMatcher buscan palabras completas sin acentos y los de video eligen el
+léxico por el idioma detectado de cada video, no por la región. Antes mide el rendimiento de la
+normalización de texto (text_normalizer) sobre las descripciones largas, en
+frío y reutilizada por videoId. Sin grabaciones usa snippets sintéticos con
+descripciones largas.
+
+Uso: python proyecto_youtube/tools/bench_signal_matcher.py [--fixtures-dir DIR] [--count 10000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT / 'utils'))
+sys.path.append(str(PROJECT_ROOT / 'nichos_youtube'))
+sys.path.append(str(PROJECT_ROOT / 'config'))
+
+# Cuota y caché temporales: instanciar los analizadores no debe tocar los ficheros reales
+os.environ.setdefault('YOUTUBE_QUOTA_DB', str(Path(tempfile.mkdtemp()) / 'quota.db'))
+os.environ.setdefault('YOUTUBE_CACHE_PATH', str(Path(tempfile.mkdtemp()) / 'cache.db'))
+
+import text_normalizer
+from lexicon import get_lexicon
+from replay_transport import DEFAULT_FIXTURES_DIR
+from response_cache import DEFAULT_CACHE_PATH
+
+# Vocabulario de los snippets sintéticos por idioma: señales, falsos amigos ("laptop") y relleno
+SYNTHETIC_WORDS = {
+    'es': ("top mejores review tutorial guía ranking vs trucos tips consejos paso a paso cómo hacer "
+           "finanzas dinero inversión curso amazon precio oferta comprar barato análisis opinión "
+           "laptop desktop nuevo viral 2025 receta cocina casa familia perro gato viaje música canal "
+           "suscríbete comenta comparte enlace descripción vídeo hoy de la el en que los para con una "
+           "por del las mi te es lo").split(),
+    'en': ("top best review tutorial guide ranking vs tricks tips how to step by step easy quick "
+           "money business crypto trading course amazon price deal buy cheap analysis opinion "
+           "laptop stopwatch desktop new viral 2025 recipe kitchen home family dog cat trip music "
+           "channel subscribe comment share link description video today the and of to in is for "
+           "with my this you it").split(),
+}
+
+
+def _snippets_from_response(response):
+    for item in response.get('items') or []:
+        snippet = item.get('snippet') or {}
+        video_id = item.get('id')
+        if isinstance(video_id, dict):
+            video_id = video_id.get('videoId')
+        if snippet.get('title') or snippet.get('description'):
+            yield {'video_id': video_id, 'title': snippet.get('title') or '',
+                   'description': snippet.get('description') or '', 'tags': list(snippet.get('tags') or [])}
+
+
+def recorded_snippets(fixtures_dir):
+    """Snippets de videos grabados: fixtures de replay y entradas de la caché de respuestas."""
+    found = []
+    for path in sorted(Path(fixtures_dir).glob('*.json')) if Path(fixtures_dir).is_dir() else []:
+        fixture = json.loads(path.read_text(encoding='utf-8'))
+        if fixture.get('endpoint') in ('videos', 'search') and fixture.get('status') == 200:
+            found.extend(_snippets_from_response(json.loads(fixture['body'])))
+    if Path(DEFAULT_CACHE_PATH).exists():
+        conn = sqlite3.connect(DEFAULT_CACHE_PATH)
+        try:
+            for endpoint, content in conn.execute('SELECT endpoint, content FROM responses'):
+                if endpoint in ('videos', 'search'):
+                    found.extend(_snippets_from_response(json.loads(content)))
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+    return found
+
+
+def synthetic_snippets(count, seed=201):
+    """Snippets en español o en inglés (uno de cada diez mezcla los dos)."""
+    rng = random.Random(seed)
+    mixed = SYNTHETIC_WORDS['es'] + SYNTHETIC_WORDS['en']
+    snippets = []
+    for i in range(count):
+        vocabulary = mixed if i % 10 == 9 else SYNTHETIC_WORDS[rng.choice(('es', 'en'))]
+        words = lambda n: ' '.join(rng.choice(vocabulary) for _ in range(n))
+        snippets.append({'video_id': f'synthetic{i}', 'title': words(rng.randint(4, 12)).capitalize(),
+                         'description': words(rng.randint(40, 400)),
+                         'tags': [words(rng.randint(1, 3)) for _ in range(rng.randint(0, 12))]})
+    return snippets
+
+
+def load_snippets(fixtures_dir, count):
+    snippets = recorded_snippets(fixtures_dir)
+    if not snippets:
+        print('ℹ️  Sin snippets grabados: usando snippets sintéticos')
+        return synthetic_snippets(count), 'sintéticos'
+    # Los grabados se repiten hasta `count`
+    return [snippets[i % len(snippets)] for i in range(count)], f'grabados ({len(snippets)} únicos)'
+
+
+# ---------------- Implementaciones anteriores (referencia) ----------------
+
+def legacy_automation_count(signals_es, signals_en, videos):
+    total_signals = 0
+    detected_signals = set()
+    for video in videos:
+        title = video.get('title', '').lower()
+        description = video.get('description', '').lower()
+        tags = [tag.lower() for tag in video.get('tags', [])]
+        for content in [title, description] + tags:
+            if not content:
+                continue
+            for signal in signals_es:
+                if signal in content:
+                    detected_signals.add(signal)
+                    total_signals += 1
+            for signal in signals_en:
+                if signal in content:
+                    detected_signals.add(signal)
+                    total_signals += 1
+    return total_signals, detected_signals
+
+
+def legacy_classify_counts(monetization_keywords, keyword):
+    keyword_lower = keyword.lower()
+    return {category: sum(1 for word in words if word in keyword_lower)
+            for category, words in monetization_keywords.items()}
+
+
+def legacy_is_automatizable(title):
+    lexicon = get_lexicon()
+    title_lower = title.lower()
+    if any(kw in title_lower for kw in lexicon.words('title_manual')):
+        return False
+    return any(kw in title_lower for kw in lexicon.words('title_automatizable'))
+
+
+def legacy_clasificar_monetizacion(keyword):
+    words = get_lexicon().words('keyword_monetization')
+    keyword_lower = keyword.lower()
+    afiliable = any(p in keyword_lower for p in words['afiliacion'])
+    anunciable = any(p in keyword_lower for p in words['anuncios'])
+    if afiliable and anunciable:
+        return "Afiliación + Anuncios"
+    elif afiliable:
+        return "Solo Afiliación"
+    elif anunciable:
+        return "Solo Anuncios"
+    return "Difícil Monetizar"
+
+
+def legacy_ultimate_signals(signals, videos):
+    detected, with_signals = set(), 0
+    for video in videos[:5]:
+        corpus = ' '.join([video['title'].lower(), video['description'].lower(),
+                           ' '.join(t.lower() for t in video['tags'])])
+        found = {s for s in signals if s in corpus}
+        detected |= found
+        with_signals += bool(found)
+    return with_signals, sorted(detected)
+
+
+def _time(fn, items):
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return time.perf_counter() - start, results
+
+
+def reset_text_cache(size=text_normalizer.DEFAULT_TEXT_CACHE_SIZE):
+    text_normalizer._text_cache = text_normalizer.VideoTextCache(size)
+    text_normalizer.normalize_text.cache_clear()
+
+
+def bench_normalization(snippets):
+    """Normalización (minúsculas, sin acentos, tokens) de los videos con descripción larga."""
+    long_ones = [s for s in snippets if len(s['description']) >= 500]
+    label = 'videos ≥500 car.'
+    if not long_ones:
+        long_ones, label = snippets, 'videos'
+    chars = sum(len(s['title']) + len(s['description']) + sum(map(len, s['tags'])) for s in long_ones)
+
+    def normalize(video):
+        normalized = text_normalizer.normalize_video(video)
+        for field in normalized.fields():
+            field.words, field.has_phrase('paso a paso')
+        return normalized
+
+    reset_text_cache(len(long_ones))
+    t_cold, _ = _time(normalize, long_ones)
+    t_cached, _ = _time(normalize, long_ones)
+    print(f"   {'text_normalizer.normalize_video':<42} {len(long_ones):>6,} {label} | "
+          f"frío {chars / t_cold / 1e6:6.1f} M car/s ({t_cold * 1e3:.1f} ms) | "
+          f"por videoId {t_cached * 1e3:.1f} ms")
+    print(f"      {text_normalizer.get_text_cache().summary()}")
+    languages = Counter(text_normalizer.normalize_video(video).language for video in long_ones)
+    print('      🌐 Idioma detectado: ' + ' | '.join(
+        f"{lang or 'sin decidir'} {n:,}" for lang, n in languages.most_common()))
+    reset_text_cache(len(snippets))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de los diccionarios de señales compilados')
+    parser.add_argument('--fixtures-dir', default=DEFAULT_FIXTURES_DIR, help='Fixtures de replay grabados')
+    parser.add_argument('--count', type=int, default=10000, help='Snippets a clasificar')
+    parser.add_argument('--group', type=int, default=50, help='Videos por keyword (análisis por grupo)')
+    args = parser.parse_args()
+
+    snippets, source = load_snippets(args.fixtures_dir, args.count)
+    groups = [snippets[i:i + args.group] for i in range(0, len(snippets), args.group)]
+    titles = [s['title'] for s in snippets]
+    chars = sum(len(s['title']) + len(s['description']) + sum(map(len, s['tags'])) for s in snippets)
+    print(f"📊 Señales: {len(snippets):,} snippets {source}, {chars / 1e6:.1f} M caracteres, "
+          f"grupos de {args.group}")
+
+    import youtube_search as ys
+    from nichos_youtube import NicheAnalyzerYouTubeUnificado
+    nichos = NicheAnalyzerYouTubeUnificado('bench-signal-matcher')
+    lexicon = get_lexicon()
+
+    cases = [
+        ('nichos.analyze_automation_potential', groups,
+         lambda g: legacy_automation_count(lexicon.words('video_automation_signals', 'es'),
+                                           lexicon.words('video_automation_signals', 'en'), g),
+         lambda g: (lambda r: (r['signal_count'], r['signals_detected'], r['automation_score']))(
+             nichos.analyze_automation_potential(g)),
+         lambda old, g: (len(old[1]), sorted(old[1]), round(min(100.0, old[0] / len(g) * 20), 1))),
+        ('nichos.classify_monetization', titles,
+         lambda t: legacy_classify_counts(lexicon.words('video_monetization_signals'), t),
+         lambda t: nichos.classify_monetization(t)['keyword_signals'], None),
+        ('youtube_search.is_automatizable', titles, legacy_is_automatizable, ys.is_automatizable, None),
+        ('youtube_search.clasificar_monetizacion', titles, legacy_clasificar_monetizacion,
+         ys.clasificar_monetizacion, None),
+    ]
+    try:
+        import niche_analyzer_ultimate as ultimate
+    except ImportError as e:
+        print(f"   (NicheAnalyzerUltimate omitido: {e})")
+    else:
+        analyzer = ultimate.NicheAnalyzerUltimate.__new__(ultimate.NicheAnalyzerUltimate)
+        as_items = lambda g: [{'id': v['video_id'], 'snippet': v} for v in g]
+        cases.append(('ultimate.analyze_automatizable_advanced', groups,
+                      lambda g: legacy_ultimate_signals(lexicon.words('video_automatizable_signals', 'es'), g),
+                      lambda g: (lambda r: (r['videos_with_signals'], r['automatizable_signals']))(
+                          analyzer.analyze_automatizable_advanced(as_items(g), geo_region='ES')), None))
+
+    # La caché de textos cubre todos los videos del benchmark (en un análisis real, los de la sesión)
+    reset_text_cache(len(snippets))
+    bench_normalization(snippets)
+
+    total_old = total_new = total_warm = 0.0
+    for name, items, old_fn, new_fn, adapt in cases:
+        t_old, old = _time(old_fn, items)
+        # En frío el clasificador paga la normalización; después la reutiliza (otras keywords y clasificadores)
+        reset_text_cache(len(snippets))
+        t_new, new = _time(new_fn, items)
+        t_warm, _ = _time(new_fn, items)
+        expected = [adapt(o, i) for o, i in zip(old, items)] if adapt else old
+        changed = sum(1 for n, e in zip(new, expected) if n != e)
+        total_old += t_old
+        total_new += t_new
+        total_warm += t_warm
+        status = '✅ idénticos' if not changed else f'🔤 {changed:,} cambian'
+        print(f"   {name:<42} {len(items):>6,} llamadas | bucles {t_old * 1e3:8.1f} ms -> "
+              f"frío {t_new * 1e3:8.1f} ms (x{t_old / t_new:.1f}) | normalizado {t_warm * 1e3:7.1f} ms "
+              f"(x{t_old / t_warm:.1f}) {status}")
+    print(f"   🚀 Total: {total_old * 1e3:.1f} ms -> {total_new * 1e3:.1f} ms en frío (x{total_old / total_new:.1f}), "
+          f"{total_warm * 1e3:.1f} ms con texto normalizado (x{total_old / total_warm:.1f})")
+
+if __name__ == '__main__':
+    main()
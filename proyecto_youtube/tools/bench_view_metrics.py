@@ -0,0 +1,71 @@
+"""
+Benchmark: métricas de views keyword a keyword (listas de Python, como hacían
+analyze_niche y calculate_saturation_risk) frente a una sola pasada sobre el
+array de views de toda la ejecución (utils/view_metrics.py).
+Genera --keywords keywords de hasta --videos videos, calcula media, mediana,
+P75, máximo, mínimo, ratio de saturación y monetizables de las dos formas y
+comprueba que coinciden.
+
+Uso: python proyecto_youtube/tools/bench_view_metrics.py [--keywords 20000] [--videos 50]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT / 'utils'))
+
+import view_metrics
+
+
+def per_keyword_lists(groups):
+    """Una lista ordenada y varios recorridos por keyword."""
+    rows = []
+    for views in groups:
+        ordered = sorted(views)
+        mean = statistics.mean(views)
+        rows.append({
+            'mean': mean,
+            'median': statistics.median(views),
+            'pct': view_metrics.percentile(ordered, 75),
+            'max': max(views),
+            'min': min(views),
+            'saturation_ratio': mean / max(views) if max(views) > 0 else 0,
+            'monetizable_count': sum(1 for v in views if v > view_metrics.MONETIZABLE_MIN_VIEWS),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las métricas de views por lotes')
+    parser.add_argument('--keywords', type=int, default=20000, help='Keywords de la ejecución')
+    parser.add_argument('--videos', type=int, default=50, help='Videos máximos por keyword')
+    args = parser.parse_args()
+
+    rng = random.Random(201)
+    groups = [[int(rng.paretovariate(1.2) * 1000) for _ in range(rng.randint(1, args.videos))]
+              for _ in range(args.keywords)]
+    print(f"📊 Métricas de views: {sum(map(len, groups)):,} videos en {args.keywords:,} keywords "
+          f"({'NumPy' if view_metrics.np is not None else 'sin NumPy'})")
+
+    start = time.perf_counter()
+    expected = per_keyword_lists(groups)
+    t_lists = time.perf_counter() - start
+    print(f"   {'por keyword':<16} {t_lists * 1e3:9.1f} ms")
+
+    start = time.perf_counter()
+    values, offsets = view_metrics.pack(groups)
+    columns = view_metrics.compute(values, offsets)
+    elapsed = time.perf_counter() - start
+    for i, row in enumerate(expected):
+        for name, value in row.items():
+            assert abs(columns[name][i] - value) <= 1e-9 * max(1, abs(value)), (i, name)
+    print(f"   {'una pasada':<16} {elapsed * 1e3:9.1f} ms (x{t_lists / elapsed:.1f}) ✅ idénticas")
+
+
+if __name__ == '__main__':
+    main()
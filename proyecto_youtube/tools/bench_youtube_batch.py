@@ -0,0 +1,138 @@
+"""
+Benchmark: lookups de videos/canales por keyword vs agrupados en lote.
+Simula N keywords que comparten parte de sus videos y canales (como pasa con
+keywords parecidas) y compara unidades de cuota y latencia de:
+  - por keyword: 1 videos.list + 1 channels.list por keyword (comportamiento antiguo)
+  - agrupado: IDs de todas las keywords deduplicados en llamadas de 50 y
+    enviados en un único POST batch por endpoint (utils/youtube_batch.py)
+No hace requests reales: un transporte simulado responde GETs y POSTs batch
+con una latencia fija por round-trip. La cuota se reserva en una BD temporal.
+
+Uso: python proyecto_youtube/tools/bench_youtube_batch.py [--keywords 10] [--latency-ms 120]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from email.parser import Parser
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'utils'))
+
+import httplib2
+from googleapiclient.discovery import build_from_document
+from quota_scheduler import QuotaScheduler
+from youtube_batch import BatchLookup
+from youtube_client import _get_discovery_doc, configure_cache
+
+
+class SimulatedYouTubeHttp:
+    """Transporte falso: responde videos.list/channels.list (GET o dentro de un batch)."""
+
+    def __init__(self, latency: float, channel_of):
+        self.latency = latency
+        self.channel_of = channel_of
+        self.round_trips = 0
+
+    def _answer(self, path_and_query: str) -> dict:
+        url = urlparse(path_and_query)
+        ids = parse_qs(url.query).get('id', [''])[0].split(',')
+        if url.path.endswith('/videos'):
+            items = [{'id': vid, 'snippet': {'title': f'video {vid}', 'channelId': self.channel_of(vid)},
+                      'statistics': {'viewCount': str(len(vid) * 1000)}} for vid in ids if vid]
+        else:
+            items = [{'id': cid, 'snippet': {'title': f'canal {cid}'},
+                      'statistics': {'subscriberCount': '1000', 'videoCount': '10', 'viewCount': '5000'}}
+                     for cid in ids if cid]
+        return {'items': items}
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        self.round_trips += 1
+        time.sleep(self.latency)
+        if method == 'GET':
+            content = json.dumps(self._answer(uri)).encode('utf-8')
+            return httplib2.Response({'status': '200', 'content-type': 'application/json'}), content
+
+        # POST batch: multipart/mixed con una request HTTP embebida por parte
+        boundary = 'batch_bench_boundary'
+        message = Parser().parsestr(f"content-type: {headers['content-type']}\r\n\r\n{body}")
+        parts = []
+        for part in message.get_payload():
+            request_line = part.get_payload().splitlines()[0]
+            payload = json.dumps(self._answer(request_line.split(' ')[1]))
+            content_id = part['Content-ID'].replace('<', '<response-', 1)
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: {content_id}\r\n\r\n"
+                f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{payload}\r\n"
+            )
+        content = (''.join(parts) + f"--{boundary}--").encode('utf-8')
+        return httplib2.Response({'status': '200', 'content-type': f'multipart/mixed; boundary={boundary}'}), content
+
+    def close(self):
+        pass
+
+
+def make_keywords(count: int, per_keyword: int, pool: int, seed: int = 7):
+    rng = random.Random(seed)
+    videos = [f'v{i:05d}' for i in range(pool)]
+    return [rng.sample(videos, per_keyword) for _ in range(count)]
+
+
+def bench_per_keyword(youtube, keyword_ids, channel_of):
+    start = time.perf_counter()
+    calls = 0
+    for ids in keyword_ids:
+        youtube.videos().list(part='statistics,snippet', id=','.join(ids)).execute()
+        channels = list(dict.fromkeys(channel_of(v) for v in ids))
+        youtube.channels().list(part='statistics,snippet', id=','.join(channels)).execute()
+        calls += 2
+    return calls, time.perf_counter() - start
+
+
+def bench_batched(youtube, keyword_ids, scheduler):
+    start = time.perf_counter()
+    lookup = BatchLookup(youtube, scheduler=scheduler)
+    items = lookup.fetch_videos([v for ids in keyword_ids for v in ids], part='statistics,snippet')
+    lookup.fetch_channels([item['snippet']['channelId'] for item in items.values()])
+    return lookup.stats['calls'], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de lookups agrupados en lote')
+    parser.add_argument('--keywords', type=int, default=10, help='Keywords simuladas')
+    parser.add_argument('--per-keyword', type=int, default=50, help='Videos por keyword (máx. 50)')
+    parser.add_argument('--pool', type=int, default=300, help='Videos distintos en total (controla el solape)')
+    parser.add_argument('--channels', type=int, default=120, help='Canales distintos en total')
+    parser.add_argument('--latency-ms', type=float, default=120, help='Latencia simulada por round-trip')
+    args = parser.parse_args()
+
+    configure_cache('off')
+    channel_of = lambda vid: f'UC{int(vid[1:]) % args.channels:04d}'
+    keyword_ids = make_keywords(args.keywords, min(args.per_keyword, 50), max(args.pool, args.per_keyword))
+    doc = _get_discovery_doc()
+
+    http_a = SimulatedYouTubeHttp(args.latency_ms / 1000, channel_of)
+    calls_a, t_a = bench_per_keyword(build_from_document(doc, developerKey='bench', http=http_a),
+                                     keyword_ids, channel_of)
+
+    http_b = SimulatedYouTubeHttp(args.latency_ms / 1000, channel_of)
+    scheduler = QuotaScheduler(db_path=str(Path(tempfile.mkdtemp()) / 'quota.db'))
+    calls_b, t_b = bench_batched(build_from_document(doc, developerKey='bench', http=http_b),
+                                 keyword_ids, scheduler)
+
+    print(f"📊 Lookups videos.list + channels.list ({args.keywords} keywords x {args.per_keyword} videos, "
+          f"latencia {args.latency_ms:.0f} ms)")
+    print(f"   por keyword : {calls_a:4d} unidades | {http_a.round_trips:4d} round-trips | {t_a:7.3f}s")
+    print(f"   agrupado    : {calls_b:4d} unidades | {http_b.round_trips:4d} round-trips | {t_b:7.3f}s "
+          f"(cuota reservada: {scheduler.used()})")
+    if calls_b and t_b > 0:
+        print(f"   🚀 Unidades x{calls_a / calls_b:.1f} menos | Latencia x{t_a / t_b:.1f} más rápida")
+
+
+if __name__ == '__main__':
+    main()
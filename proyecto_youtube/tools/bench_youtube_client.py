@@ -0,0 +1,57 @@
+"""
+Benchmark: coste de preparar el cliente de YouTube por llamada.
+Compara `build()` en cada llamada (comportamiento antiguo de search_videos)
+con el cliente compartido de utils/youtube_client.py. No hace requests reales.
+
+Uso: python proyecto_youtube/tools/bench_youtube_client.py [--calls 50]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'utils'))
+
+from googleapiclient.discovery import build
+from youtube_client import get_youtube_client, reset_clients
+
+
+def _prepare_request(youtube):
+    # Lo mismo que hace search_videos antes de ejecutar
+    return youtube.search().list(q='bench', part='snippet', type='video', maxResults=10)
+
+
+def bench_build_per_call(calls: int, api_key: str) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        _prepare_request(build('youtube', 'v3', developerKey=api_key))
+    return time.perf_counter() - start
+
+
+def bench_shared_client(calls: int, api_key: str) -> float:
+    reset_clients()
+    start = time.perf_counter()
+    for _ in range(calls):
+        _prepare_request(get_youtube_client(api_key))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del cliente compartido de YouTube')
+    parser.add_argument('--calls', type=int, default=50, help='Número de llamadas simuladas')
+    args = parser.parse_args()
+
+    api_key = 'bench-key'
+    t_build = bench_build_per_call(args.calls, api_key)
+    t_shared = bench_shared_client(args.calls, api_key)
+
+    print(f"📊 Preparación de cliente + request ({args.calls} llamadas)")
+    print(f"   build() por llamada : {t_build:8.3f}s total | {t_build / args.calls * 1000:8.2f} ms/llamada")
+    print(f"   cliente compartido  : {t_shared:8.3f}s total | {t_shared / args.calls * 1000:8.2f} ms/llamada")
+    if t_shared > 0:
+        print(f"   🚀 Speedup: x{t_build / t_shared:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,19 +3,36 @@ Sistema de tracking de consumo de API en tiempo real
 Se resetea automáticamente cada día a las 00:00
 """
 
+import atexit
 import json
 import os
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List
 from pathlib import Path
 
+# Coste en unidades de cada endpoint de YouTube Data API v3
+ENDPOINT_COSTS = {
+    "search": 100,
+    "videos": 1,
+    "channels": 1,
+    "playlistItems": 1,
+}
+
+# Eventos de caché acumulados en memoria antes de reescribir el log (también se
+# guardan con cada request real, al mostrar el estado y al salir)
+DEFAULT_CACHE_FLUSH_EVERY = int(os.environ.get('API_USAGE_CACHE_FLUSH_EVERY', 200))
+
 class APIUsageTracker:
     """Tracker para monitorear el consumo de API en tiempo real"""
     
     def __init__(self, data_file="api_usage_log.json"):
         # Guardar el archivo de tracking local dentro de la carpeta utils de este proyecto
         self.data_file = str(Path(__file__).resolve().parents[1] / 'utils' / data_file)
-        self.daily_quota = 10000
+        self.daily_quota = int(os.environ.get('YOUTUBE_DAILY_QUOTA', 10000))
+        self._lock = threading.RLock()
+        self.cache_flush_every = DEFAULT_CACHE_FLUSH_EVERY
+        self._pending_cache_events = 0
         self.load_data()
         self.check_daily_reset()
     
@@ -40,7 +57,10 @@ class APIUsageTracker:
             "daily_usage": {
                 "youtube_units": 0,
                 "trends_requests": 0,
-                "total_requests": 0
+                "total_requests": 0,
+                "cache_hits": 0,
+                "cache_misses": 0,
+                "cache_units_saved": 0
             },
             "daily_log": [],
             "historical": {}
@@ -63,14 +83,18 @@ class APIUsageTracker:
             self.data["daily_usage"] = {
                 "youtube_units": 0,
                 "trends_requests": 0,
-                "total_requests": 0
+                "total_requests": 0,
+                "cache_hits": 0,
+                "cache_misses": 0,
+                "cache_units_saved": 0
             }
             self.data["daily_log"] = []
             self.save_data()
             print(f"📅 Nuevo día detectado: {today} - Contadores reseteados")
     
-    def log_youtube_request(self, operation: str, units: int, keyword: str = "", details: str = ""):
-        """Registrar un request de YouTube API"""
+    def log_youtube_request(self, operation: str, units: int, keyword: str = "", details: str = "",
+                            api_key: str = ""):
+        """Registrar un request de YouTube API (api_key: etiqueta enmascarada de la key del pool)"""
         timestamp = datetime.now().isoformat()
         
         log_entry = {
@@ -81,12 +105,17 @@ class APIUsageTracker:
             "keyword": keyword,
             "details": details
         }
+        if api_key:
+            log_entry["api_key"] = api_key
         
-        self.data["daily_log"].append(log_entry)
-        self.data["daily_usage"]["youtube_units"] += units
-        self.data["daily_usage"]["total_requests"] += 1
-        
-        self.save_data()
+        with self._lock:
+            self.data["daily_log"].append(log_entry)
+            self.data["daily_usage"]["youtube_units"] += units
+            self.data["daily_usage"]["total_requests"] += 1
+            if api_key:
+                by_key = self.data["daily_usage"].setdefault("youtube_units_by_key", {})
+                by_key[api_key] = by_key.get(api_key, 0) + units
+            self.save_data()
         
         # Mostrar información en tiempo real
         remaining = self.daily_quota - self.data["daily_usage"]["youtube_units"]
@@ -112,31 +141,90 @@ class APIUsageTracker:
             "details": details
         }
         
-        self.data["daily_log"].append(log_entry)
-        self.data["daily_usage"]["trends_requests"] += 1
-        self.data["daily_usage"]["total_requests"] += 1
-        
-        self.save_data()
+        with self._lock:
+            self.data["daily_log"].append(log_entry)
+            self.data["daily_usage"]["trends_requests"] += 1
+            self.data["daily_usage"]["total_requests"] += 1
+            self.save_data()
         print(f"📈 Trends API: {keyword} (GRATIS) | Total requests: {self.data['daily_usage']['trends_requests']}")
     
+    def log_cache_event(self, endpoint: str, hit: bool, revalidated: bool = False, bytes_saved: int = 0):
+        """Registrar un acierto/fallo de la caché de respuestas (sin log por request)
+
+        revalidated: acierto por 304 (If-None-Match); la request llegó a la API,
+        así que ahorra descarga y parseo pero no unidades.
+        Los contadores se quedan en memoria y se escriben cada cache_flush_every
+        eventos (o en el siguiente guardado): un acierto no reescribe el JSON.
+        """
+        with self._lock:
+            usage = self.data["daily_usage"]
+            if hit and revalidated:
+                usage["cache_hits"] = usage.get("cache_hits", 0) + 1
+                usage["cache_revalidated"] = usage.get("cache_revalidated", 0) + 1
+                usage["cache_bytes_saved"] = usage.get("cache_bytes_saved", 0) + bytes_saved
+            elif hit:
+                usage["cache_hits"] = usage.get("cache_hits", 0) + 1
+                usage["cache_units_saved"] = usage.get("cache_units_saved", 0) + ENDPOINT_COSTS.get(endpoint, 1)
+            else:
+                usage["cache_misses"] = usage.get("cache_misses", 0) + 1
+            self._pending_cache_events += 1
+            if self._pending_cache_events >= self.cache_flush_every:
+                self.save_data()
+
+    def flush(self):
+        """Guardar los contadores de caché pendientes (si los hay)"""
+        with self._lock:
+            if self._pending_cache_events:
+                self.save_data()
+
+    def log_units_saved(self, source: str, units: int):
+        """Registrar unidades que no se gastaron gracias a datos locales (p. ej. video_store)"""
+        if units <= 0:
+            return
+        with self._lock:
+            saved = self.data["daily_usage"].setdefault("units_saved_by_source", {})
+            saved[source] = saved.get(source, 0) + units
+            self.save_data()
+
     def get_current_status(self):
         """Obtener estado actual del consumo"""
         usage = self.data["daily_usage"]
-        remaining = self.daily_quota - usage["youtube_units"]
-        percentage = (usage["youtube_units"] / self.daily_quota) * 100
+        units_used = usage["youtube_units"]
+        daily_quota = self.daily_quota
+        by_key = {}
+        try:
+            # Fuente de verdad: el planificador de cuota compartido entre procesos
+            from quota_scheduler import get_quota_scheduler
+            scheduler = get_quota_scheduler()
+            units_used = scheduler.used()
+            daily_quota = scheduler.daily_quota
+            if len(scheduler.keys) > 1:
+                by_key = scheduler.usage_by_key()
+        except Exception:
+            pass
+        remaining = daily_quota - units_used
+        percentage = (units_used / daily_quota) * 100
         
         return {
             "date": self.data["current_date"],
-            "youtube_units_used": usage["youtube_units"],
+            "youtube_units_used": units_used,
             "youtube_units_remaining": remaining,
             "percentage_used": percentage,
             "trends_requests": usage["trends_requests"],
             "total_requests": usage["total_requests"],
-            "daily_quota": self.daily_quota
+            "daily_quota": daily_quota,
+            "youtube_units_by_key": by_key,
+            "cache_hits": usage.get("cache_hits", 0),
+            "cache_misses": usage.get("cache_misses", 0),
+            "cache_units_saved": usage.get("cache_units_saved", 0),
+            "cache_revalidated": usage.get("cache_revalidated", 0),
+            "cache_bytes_saved": usage.get("cache_bytes_saved", 0),
+            "units_saved_by_source": usage.get("units_saved_by_source", {})
         }
     
     def show_status(self):
         """Mostrar estado actual detallado"""
+        self.flush()
         status = self.get_current_status()
         
         print(f"\n🎯 ESTADO ACTUAL - {status['date']}")
@@ -145,8 +233,16 @@ class APIUsageTracker:
         print(f"   • Usado: {status['youtube_units_used']:,}/{status['daily_quota']:,} unidades")
         print(f"   • Porcentaje: {status['percentage_used']:.2f}%")
         print(f"   • Restante: {status['youtube_units_remaining']:,} unidades")
+        for label, key_usage in status['youtube_units_by_key'].items():
+            print(f"   • Key {label}: {key_usage['used']:,}/{key_usage['daily_quota']:,} unidades")
         print(f"📈 Trends API: {status['trends_requests']} requests (GRATIS)")
         print(f"📱 Total requests: {status['total_requests']}")
+        if status['cache_hits'] or status['cache_misses']:
+            print(f"💾 Caché: {status['cache_hits']} aciertos / {status['cache_misses']} fallos | Unidades ahorradas: {status['cache_units_saved']:,}")
+        if status['cache_revalidated']:
+            print(f"🏷️  ETag: {status['cache_revalidated']} respuestas 304 | {status['cache_bytes_saved'] / 1024:,.1f} KB sin descargar")
+        for source, units in status['units_saved_by_source'].items():
+            print(f"♻️  Ahorro {source}: {units:,} unidades")
         
         # Estimación de análisis restantes
         if len(self.data["daily_log"]) > 0:
@@ -189,13 +285,15 @@ class APIUsageTracker:
     def save_data(self):
         """Guardar datos en archivo"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
+            with self._lock, open(self.data_file, 'w', encoding='utf-8') as f:
                 json.dump(self.data, f, indent=2, ensure_ascii=False)
+                self._pending_cache_events = 0
         except Exception as e:
             print(f"Error guardando datos: {e}")
 
 # Instancia global del tracker
 tracker = APIUsageTracker()
+atexit.register(tracker.flush)
 
 def track_youtube_search(keyword: str):
     """Wrapper para trackear búsquedas de YouTube"""
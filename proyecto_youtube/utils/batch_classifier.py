@@ -0,0 +1,262 @@
+"""
+Clasificación por lotes sobre una tabla columnar de títulos y descripciones
+Para backfills y ejecuciones con muchas keywords: todos los videos de la
+ejecución van a un DataFrame (keyword, video_id, title, description,
+viewCount) y cada señal se calcula para la columna entera con una sola
+expresión regular compilada del léxico (PhraseMatcher.pattern: trie de
+palabras completas, sin acentos). Después se agrega por keyword con un
+group-by que reproduce analizar_titulos_monetizacion + is_automatizable de
+youtube_search.
+Backends: Polars (preferido) o pandas si están instalados; si no, o para
+lotes pequeños, el mismo cálculo fila a fila con PhraseMatcher, con
+resultados idénticos.
+Proyecto 201 digital
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from lexicon import LEXICON_API_VERSION, get_lexicon
+from text_normalizer import COMBINING_MARKS, fold
+
+# Backends columnares opcionales
+try:
+    import polars as pl
+except Exception:
+    pl = None
+
+try:
+    import pandas as pd
+except Exception:
+    pd = None
+
+BACKENDS = ('polars', 'pandas', 'python')
+
+# Por debajo de estas filas construir la tabla cuesta más que clasificar fila a fila
+DEFAULT_COLUMNAR_MIN_ROWS = int(os.environ.get('BATCH_COLUMNAR_MIN_ROWS', 200))
+
+# Videos por keyword (los más vistos) sobre los que se cuenta automatizable_count
+DEFAULT_TOP_N = 5
+
+# Letras latinas con diacrítico ya plegadas (á->a, ñ->n): se sustituyen de una vez y
+# sólo las filas que siguen teniendo caracteres no ASCII pasan por NFKD, que es lo caro
+_LATIN_FOLD = {char: fold(char) for char in map(chr, range(0xC0, 0x250))
+               if char == char.lower() and fold(char) != char and fold(char).isascii()}
+_NON_ASCII = r'[^\x00-\x7f]'
+
+# columna -> (diccionario del léxico, categoría, campos donde se busca)
+VIDEO_SIGNALS: Dict[str, Tuple[str, Optional[str], Tuple[str, ...]]] = {
+    'manual': ('title_manual', None, ('title',)),
+    'automatizable_signal': ('title_automatizable', None, ('title',)),
+    'afiliacion': ('title_monetization', 'afiliacion', ('title',)),
+    'anuncios': ('title_monetization', 'anuncios', ('title',)),
+    'competencia_directa': ('channel_direct_competition', None, ('title', 'description')),
+}
+
+
+def default_backend(rows: Optional[int] = None) -> str:
+    """Polars si está instalado, si no pandas, si no Python puro (también para lotes pequeños)."""
+    if rows is not None and rows < DEFAULT_COLUMNAR_MIN_ROWS:
+        return 'python'
+    if pl is not None:
+        return 'polars'
+    if pd is not None:
+        return 'pandas'
+    return 'python'
+
+
+def _backend_of(frame) -> str:
+    if pl is not None and isinstance(frame, pl.DataFrame):
+        return 'polars'
+    if pd is not None and isinstance(frame, pd.DataFrame):
+        return 'pandas'
+    return 'python'
+
+
+def video_rows(videos_by_keyword: Dict[str, Iterable[Dict]]) -> List[Dict]:
+    """Filas (keyword, video_id, title, description, viewCount) de los videos de cada keyword.
+
+    Acepta los dicts de video de youtube_search / nichos_youtube.
+    """
+    rows = []
+    for keyword, videos in videos_by_keyword.items():
+        for video in videos:
+            rows.append({
+                'keyword': keyword,
+                'video_id': video.get('video_id') or video.get('id') or '',
+                'title': video.get('title') or '',
+                'description': video.get('description') or '',
+                'viewCount': int(video.get('viewCount') or 0),
+            })
+    return rows
+
+
+def to_frame(rows: List[Dict], backend: Optional[str] = None):
+    """Tabla del backend pedido (por defecto el mejor para ese número de filas)."""
+    backend = backend or default_backend(len(rows))
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    if backend == 'polars':
+        if pl is None:
+            raise ImportError('polars no está instalado')
+        return pl.DataFrame(rows)
+    if backend == 'pandas':
+        if pd is None:
+            raise ImportError('pandas no está instalado')
+        return pd.DataFrame(rows)
+    return [dict(row) for row in rows]
+
+
+def _fold_polars(series):
+    """fold() de una columna de Polars."""
+    folded = series.fill_null('').str.to_lowercase().str.replace_many(
+        list(_LATIN_FOLD), list(_LATIN_FOLD.values()))
+    pending = folded.str.contains(_NON_ASCII)
+    if pending.any():
+        rest = folded.filter(pending).str.normalize('NFKD').str.replace_all(COMBINING_MARKS, '')
+        folded = folded.scatter(pending.arg_true(), rest)
+    return folded
+
+
+def _signal_patterns(signals) -> Dict[str, str]:
+    lexicon = get_lexicon(LEXICON_API_VERSION)
+    return {column: lexicon.phrase_matcher(name).pattern(category)
+            for column, (name, category, _) in signals.items()}
+
+
+def classify_frame(frame, signals: Dict = VIDEO_SIGNALS):
+    """Añade una columna booleana por señal (y `automatizable` si están sus dos señales).
+
+    Cada campo de texto se pliega una vez (minúsculas, sin diacríticos, como
+    fold()) y cada señal es un único `contains` con la expresión del léxico.
+    """
+    fields = sorted({field for _, _, field_names in signals.values() for field in field_names})
+    backend = _backend_of(frame)
+    derive = 'manual' in signals and 'automatizable_signal' in signals
+
+    if backend == 'python':
+        lexicon = get_lexicon(LEXICON_API_VERSION)
+        matchers = {column: (lexicon.phrase_matcher(name), category, field_names)
+                    for column, (name, category, field_names) in signals.items()}
+        for row in frame:
+            for column, (matcher, category, field_names) in matchers.items():
+                row[column] = any(
+                    (category in matcher.categories_in(row.get(f) or '')) if category is not None
+                    else matcher.any(row.get(f) or '') for f in field_names)
+            if derive:
+                row['automatizable'] = row['automatizable_signal'] and not row['manual']
+        return frame
+
+    patterns = _signal_patterns(signals)
+    if backend == 'polars':
+        folded = frame.with_columns([_fold_polars(frame[f]).alias(f'_fold_{f}') for f in fields])
+        exprs = []
+        for column, (_, _, field_names) in signals.items():
+            hits = [pl.col(f'_fold_{f}').str.contains(patterns[column]) for f in field_names]
+            exprs.append(pl.any_horizontal(hits).alias(column))
+        result = folded.with_columns(exprs).drop([f'_fold_{f}' for f in fields])
+        if derive:
+            result = result.with_columns(
+                (pl.col('automatizable_signal') & ~pl.col('manual')).alias('automatizable'))
+        return result
+
+    result = frame.copy()
+    folded = {f: result[f].fillna('').astype(str).map(fold) for f in fields}
+    for column, (_, _, field_names) in signals.items():
+        hits = folded[field_names[0]].str.contains(patterns[column], regex=True)
+        for f in field_names[1:]:
+            hits = hits | folded[f].str.contains(patterns[column], regex=True)
+        result[column] = hits.astype(bool)
+    if derive:
+        result['automatizable'] = result['automatizable_signal'] & ~result['manual']
+    return result
+
+
+def _summary_row(keyword: str, videos: int, afiliacion: int, anuncios: int,
+                 automatizable_count: int, competencia_directa: int) -> Dict:
+    # Misma cuenta que analizar_titulos_monetizacion (monetizables acotados al total)
+    monetizables = min(afiliacion + anuncios, videos)
+    pct = lambda n: round((n / max(1, videos)) * 100, 1)
+    return {
+        'keyword': keyword,
+        'videos': videos,
+        'videos_afiliacion': afiliacion,
+        'videos_anuncios': anuncios,
+        'videos_monetizables': monetizables,
+        'porcentaje_afiliacion': pct(afiliacion),
+        'porcentaje_anuncios': pct(anuncios),
+        'porcentaje_monetizables': pct(monetizables),
+        'automatizable_count': automatizable_count,
+        'competencia_directa': competencia_directa,
+    }
+
+
+def summarize_by_keyword(frame, top_n: int = DEFAULT_TOP_N) -> List[Dict]:
+    """Agregados por keyword (en orden de aparición) de una tabla ya clasificada.
+
+    automatizable_count cuenta sólo los top_n videos más vistos de cada
+    keyword, como analyze_niche.
+    """
+    backend = _backend_of(frame)
+    if backend == 'polars':
+        grouped = frame.group_by('keyword', maintain_order=True).agg(
+            pl.len().alias('videos'),
+            pl.col('afiliacion').sum().alias('afiliacion'),
+            pl.col('anuncios').sum().alias('anuncios'),
+            pl.col('automatizable').sort_by('viewCount', descending=True, maintain_order=True)
+            .head(top_n).sum().alias('automatizable_count'),
+            pl.col('competencia_directa').sum().alias('competencia_directa'),
+        )
+        return [_summary_row(r['keyword'], r['videos'], r['afiliacion'], r['anuncios'],
+                             r['automatizable_count'], r['competencia_directa'])
+                for r in grouped.iter_rows(named=True)]
+
+    if backend == 'pandas':
+        by_keyword = frame.groupby('keyword', sort=False)
+        totals = by_keyword.agg(videos=('video_id', 'size'), afiliacion=('afiliacion', 'sum'),
+                                anuncios=('anuncios', 'sum'), competencia_directa=('competencia_directa', 'sum'))
+        top = (frame.sort_values('viewCount', ascending=False, kind='stable')
+               .groupby('keyword', sort=False).head(top_n)
+               .groupby('keyword', sort=False)['automatizable'].sum())
+        return [_summary_row(keyword, int(r.videos), int(r.afiliacion), int(r.anuncios),
+                             int(top.get(keyword, 0)), int(r.competencia_directa))
+                for keyword, r in totals.iterrows()]
+
+    rows_by_keyword: Dict[str, List[Dict]] = {}
+    for row in frame:
+        rows_by_keyword.setdefault(row['keyword'], []).append(row)
+    summary = []
+    for keyword, rows in rows_by_keyword.items():
+        top = sorted(rows, key=lambda r: r['viewCount'], reverse=True)[:top_n]
+        summary.append(_summary_row(keyword, len(rows), sum(r['afiliacion'] for r in rows),
+                                    sum(r['anuncios'] for r in rows), sum(r['automatizable'] for r in top),
+                                    sum(r['competencia_directa'] for r in rows)))
+    return summary
+
+
+def classify_videos(videos_by_keyword: Dict[str, Iterable[Dict]], backend: Optional[str] = None,
+                    top_n: int = DEFAULT_TOP_N) -> List[Dict]:
+    """Clasifica todos los videos de la ejecución de una vez y devuelve el resumen por keyword."""
+    rows = video_rows(videos_by_keyword)
+    if not rows:
+        return []
+    frame = to_frame(rows, backend)
+    return summarize_by_keyword(classify_frame(frame), top_n=top_n)
+
+
+def flag_texts(texts: Sequence[str], dictionary: str, category: Optional[str] = None,
+               backend: Optional[str] = None) -> List[bool]:
+    """¿Contiene cada texto alguna señal del diccionario? (una columna, una expresión)."""
+    if not texts:
+        return []
+    frame = to_frame([{'text': text or ''} for text in texts], backend)
+    flagged = classify_frame(frame, {'flag': (dictionary, category, ('text',))})
+    backend = _backend_of(flagged)
+    if backend == 'polars':
+        return flagged['flag'].to_list()
+    if backend == 'pandas':
+        return [bool(flag) for flag in flagged['flag']]
+    return [row['flag'] for row in flagged]
@@ -0,0 +1,223 @@
+"""
+Scoring y decisión por lotes sobre una tabla de resultados de nichos
+Recalcula de una vez, con operaciones de NumPy sobre columnas, lo que los
+scorings hacen dict a dict:
+- soft_decision      -> base_score, decision            (decide_niche_soft)
+- opportunity        -> opportunity_score (0-100)        (calculate_opportunity_score x 100)
+- refined_potential  -> potencial_total_refinado        (calcular_potencial_total_refinado)
+- web_decision       -> web_score, decision              (WebNicheAnalyzer.make_decision)
+con los pesos y umbrales de un ScoringConfig (utils/scoring_config.py): para
+un what-if basta con rescore(tabla, config.with_overrides({...})).
+
+La tabla puede ser un DataFrame de pandas o Polars, o una lista de dicts
+(resultados de los analizadores o de la BD, db.utils.load_niche_results);
+se devuelve del mismo tipo con las columnas añadidas o sustituidas.
+Proyecto 201 digital
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from scoring_config import ScoringConfig, competition_key, get_scoring_config
+
+# NumPy (viene con pandas) y backends de tabla opcionales
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    import polars as pl
+except Exception:
+    pl = None
+
+try:
+    import pandas as pd
+except Exception:
+    pd = None
+
+DECISIONS = ('RECOMENDADO', 'EVALUAR', 'DESCARTAR')
+
+# Columnas imprescindibles de cada scoring (rescore aplica los que tengan todas;
+# el resto de entradas toman el mismo valor por defecto que el scoring escalar)
+INPUTS = {
+    'soft_decision': ('median_views', 'pct75_views'),
+    'opportunity': ('avg_views', 'competition_level'),
+    'refined_potential': ('avg_views', 'monetizacion', 'automatizable', 'monetizable_ratio_pct'),
+    'web_decision': ('search_volume', 'cpc', 'competition_index', 'trend_direction'),
+}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('numpy no está instalado (necesario para el scoring por lotes)')
+
+
+def _columns_of(frame) -> List[str]:
+    if isinstance(frame, list):
+        return list(frame[0]) if frame else []
+    return list(frame.columns)
+
+
+def _column(frame, name: str, default=None, dtype=None):
+    """Columna como array de NumPy (default si la tabla no la tiene)."""
+    if name not in _columns_of(frame):
+        if default is None:
+            raise KeyError(f"La tabla no tiene la columna '{name}'")
+        return np.full(len(frame), default, dtype=dtype)
+    if isinstance(frame, list):
+        values = np.array([row.get(name) for row in frame], dtype=object)
+    else:
+        values = frame[name].to_numpy()
+    if dtype is not None and values.dtype != object:
+        return values.astype(dtype, copy=False)
+    if dtype is float:
+        return np.asarray(np.where(values == None, 0, values), dtype=float)  # noqa: E711
+    if dtype is bool:
+        return np.asarray(np.where(values == None, False, values), dtype=bool)  # noqa: E711
+    return values
+
+
+def _with_columns(frame, columns: Dict[str, 'np.ndarray']):
+    if pl is not None and isinstance(frame, pl.DataFrame):
+        return frame.with_columns([pl.Series(name, values) for name, values in columns.items()])
+    if pd is not None and isinstance(frame, pd.DataFrame):
+        result = frame.copy()
+        for name, values in columns.items():
+            result[name] = values
+        return result
+    lists = {name: values.tolist() for name, values in columns.items()}
+    return [dict(row, **{name: values[i] for name, values in lists.items()}) for i, row in enumerate(frame)]
+
+
+def _lookup(labels, mapping: Dict, default: float, key=str) -> 'np.ndarray':
+    """mapping[label] de cada fila (una búsqueda por etiqueta distinta, no por fila)."""
+    if pd is not None:
+        inverse, unique = pd.factorize(labels)  # hash: sin ordenar las cadenas
+        unique = [str(label) for label in unique]
+    else:
+        unique, inverse = np.unique(labels.astype(str), return_inverse=True)
+    return np.array([mapping.get(key(label), default) for label in unique], dtype=float)[inverse]
+
+
+def _at_least(values, tiers: Sequence[Sequence[float]], floor: float):
+    return np.select([values >= threshold for threshold, _ in tiers], [points for _, points in tiers], floor)
+
+
+def _at_most(values, tiers: Sequence[Sequence[float]], ceiling: float):
+    return np.select([values <= threshold for threshold, _ in tiers], [points for _, points in tiers], ceiling)
+
+
+def _decide(recommended, evaluate):
+    return np.select([recommended, evaluate], DECISIONS[:2], DECISIONS[2]).astype(object)
+
+
+def soft_decision(frame, config: Optional[ScoringConfig] = None):
+    """base_score (0-100) y decision a partir de median_views y pct75_views."""
+    _require_numpy()
+    cfg = (config or get_scoring_config()).soft_decision
+    median_min, p75_min, partial = cfg['median_min'], cfg['p75_min'], cfg['partial_ratio']
+    median = _column(frame, 'median_views', dtype=float)
+    p75 = _column(frame, 'pct75_views', dtype=float)
+    r_med = np.clip(median / float(median_min or 1), 0.0, 1.0)
+    r_p75 = np.clip(p75 / float(p75_min or 1), 0.0, 1.0)
+    recommended = (median >= median_min) & (p75 >= p75_min)
+    evaluate = (median >= median_min) | (p75 >= p75_min) | \
+               ((median >= partial * median_min) & (p75 >= partial * p75_min))
+    return _with_columns(frame, {'base_score': np.round((r_med + r_p75) / 2 * 100, 1),
+                                 'decision': _decide(recommended, evaluate)})
+
+
+def opportunity(frame, config: Optional[ScoringConfig] = None):
+    """opportunity_score (0-100, como en los resultados de nichos_youtube).
+
+    El engagement sale de total_likes/total_views; en resultados antiguos sin
+    total_likes se reutiliza su engagement_score. La velocidad, de
+    median_views_per_day (0 si la tabla no la tiene).
+    """
+    _require_numpy()
+    cfg = (config or get_scoring_config()).opportunity
+    columns = _columns_of(frame)
+    views_score = np.minimum(1.0, _column(frame, 'avg_views', dtype=float) / cfg['views_reference'])
+    if 'total_likes' in columns and 'total_views' in columns:
+        likes = _column(frame, 'total_likes', dtype=float)
+        total_views = _column(frame, 'total_views', dtype=float)
+        ratio = np.divide(likes, total_views, out=np.zeros_like(likes), where=total_views > 0)
+        engagement = np.where(total_views > 0, np.minimum(1.0, ratio * cfg['engagement_factor']),
+                              cfg['engagement_default'])
+    else:
+        engagement = _column(frame, 'engagement_score', cfg['engagement_default'], dtype=float)
+    competition = _lookup(_column(frame, 'competition_level', 'medium'), cfg['competition_scores'],
+                          cfg['competition_default'], key=competition_key)
+    automation = np.where(_column(frame, 'is_automatizable', False, dtype=bool), cfg['automation_bonus'], 0.0)
+    multiplier = _lookup(_column(frame, 'monetization_potential', 'Medio'), cfg['monetization_multipliers'],
+                         cfg['monetization_default'])
+    velocity_reference = cfg.get('velocity_reference', 0)
+    velocity = (np.minimum(1.0, _column(frame, 'median_views_per_day', 0.0, dtype=float) / velocity_reference)
+                if velocity_reference else 0.0)
+    weights = cfg['weights']
+    score = (weights['views'] * views_score + weights['competition'] * competition +
+             weights['automation'] * automation +
+             weights['monetization'] * (multiplier - cfg['monetization_baseline']) +
+             weights['engagement'] * engagement + weights.get('velocity', 0) * velocity)
+    score = np.round(np.clip(score, 0.0, 1.0), 3)
+    return _with_columns(frame, {'opportunity_score': np.round(score * 100, 1)})
+
+
+def refined_potential(frame, config: Optional[ScoringConfig] = None):
+    """potencial_total_refinado (0-100) de los resultados de youtube_search."""
+    _require_numpy()
+    cfg = (config or get_scoring_config()).refined_potential
+    views_score = _at_least(_column(frame, 'avg_views', dtype=float), cfg['views_tiers'], cfg['views_floor'])
+    monetization = _lookup(_column(frame, 'monetizacion', ''), cfg['monetization_scores'], cfg['monetization_default'])
+    automation = np.where(_column(frame, 'automatizable', False, dtype=bool), cfg['automation_yes'], cfg['automation_no'])
+    pct = _column(frame, 'monetizable_ratio_pct', dtype=float)
+    low, neutral, high = cfg['monetizables_modifiers']
+    modifier = np.select([pct < cfg['monetizables_low_pct'], pct <= cfg['monetizables_high_pct']], [low, neutral], high)
+    monetizables = np.maximum(0, cfg['monetizables_base'] + modifier)
+    total = np.clip(views_score + monetization + automation + monetizables, 0, 100)
+    return _with_columns(frame, {'potencial_total_refinado': total})
+
+
+def web_decision(frame, config: Optional[ScoringConfig] = None):
+    """web_score y decision de keywords web (search_volume, cpc, competition_index, trend_direction)."""
+    _require_numpy()
+    cfg = (config or get_scoring_config()).web_decision
+    score = (_at_least(_column(frame, 'search_volume', dtype=float), cfg['volume_tiers'], cfg['volume_floor']) +
+             _at_most(_column(frame, 'cpc', dtype=float), cfg['cpc_tiers'], cfg['cpc_ceiling']) +
+             _at_most(_column(frame, 'competition_index', dtype=float), cfg['competition_tiers'],
+                      cfg['competition_ceiling']) +
+             _lookup(_column(frame, 'trend_direction', ''), cfg['trend_scores'], cfg['trend_default']))
+    return _with_columns(frame, {'web_score': score,
+                                 'decision': _decide(score >= cfg['recommended_min'], score >= cfg['evaluate_min'])})
+
+
+SCORERS = {
+    'soft_decision': soft_decision,
+    'opportunity': opportunity,
+    'refined_potential': refined_potential,
+    'web_decision': web_decision,
+}
+
+
+def rescore(frame, config: Optional[ScoringConfig] = None, scorers: Optional[Sequence[str]] = None):
+    """Aplica a la tabla los scorings pedidos (por defecto, todos los que tengan sus columnas)."""
+    if len(frame) == 0:
+        return frame
+    config = config or get_scoring_config()
+    columns = set(_columns_of(frame))
+    names = scorers or [name for name, inputs in INPUTS.items() if set(inputs) <= columns]
+    for name in names:
+        frame = SCORERS[name](frame, config)
+    return frame
+
+
+def decision_counts(frame) -> Dict[str, int]:
+    """{decision: número de filas} en el orden RECOMENDADO, EVALUAR, DESCARTAR."""
+    counts = dict.fromkeys(DECISIONS, 0)
+    if len(frame) and 'decision' in _columns_of(frame):
+        labels, totals = np.unique(_column(frame, 'decision').astype(str), return_counts=True)
+        counts.update((label, int(total)) for label, total in zip(labels, totals) if label in counts)
+    return counts
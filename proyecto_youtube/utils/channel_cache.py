@@ -0,0 +1,192 @@
+"""
+Caché de estadísticas de canales compartida por todo el proceso
+Los mismos canales grandes aparecen en muchas keywords relacionadas. Sus
+estadísticas (suscriptores, views, nº de videos) cambian despacio, así que se
+guardan en memoria y en la tabla `channels` de la BD con su fecha de
+refresco. Sólo los IDs que faltan o están caducados salen a channels.list.
+Proyecto 201 digital
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from field_masks import field_mask
+from youtube_batch import BatchLookup
+
+# Ventana de frescura de las estadísticas de canal (horas)
+DEFAULT_MAX_AGE_HOURS = float(os.environ.get('CHANNEL_STATS_MAX_AGE_HOURS', 72))
+
+# Persistencia opcional en la BD del proyecto (tabla channels)
+try:
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from proyecto_youtube.db.session import SessionLocal
+    from proyecto_youtube.db.utils import init_db, load_channels, upsert_channels
+except Exception:
+    SessionLocal = None
+
+
+def _to_int(value) -> Optional[int]:
+    return int(value) if value else None
+
+
+def channel_info_from_item(item: Dict) -> Dict:
+    """Item de channels.list -> dict de canal (mismas claves que get_channels_info)."""
+    stats = item.get('statistics', {})
+    snippet = item.get('snippet', {})
+    return {
+        'channelId': item['id'],
+        'title': snippet.get('title', ''),
+        'description': snippet.get('description', ''),
+        'publishedAt': snippet.get('publishedAt', ''),
+        'subscriberCount': _to_int(stats.get('subscriberCount')),
+        'videoCount': _to_int(stats.get('videoCount')),
+        'viewCount': _to_int(stats.get('viewCount')),
+    }
+
+
+def _channel_info_from_row(row) -> Dict:
+    return {
+        'channelId': row.channel_id,
+        'title': row.title or '',
+        'description': row.description or '',
+        'publishedAt': row.published_at.strftime('%Y-%m-%dT%H:%M:%SZ') if row.published_at else '',
+        'subscriberCount': row.subscriber_count,
+        'videoCount': row.video_count,
+        'viewCount': row.view_count,
+    }
+
+
+class ChannelStatsCache:
+    """Memoria -> BD -> channels.list (agrupado), en ese orden."""
+
+    def __init__(self, max_age_hours: float = DEFAULT_MAX_AGE_HOURS, use_db: bool = True):
+        self.max_age = timedelta(hours=max_age_hours)
+        self.use_db = use_db and SessionLocal is not None
+        self._memory: Dict[str, tuple] = {}  # channelId -> (info, refreshed_at UTC)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db_ready = False
+        self.stats = {'requested': 0, 'memory_hits': 0, 'db_hits': 0, 'fetched': 0}
+
+    def _is_fresh(self, refreshed_at: Optional[datetime]) -> bool:
+        return refreshed_at is not None and datetime.utcnow() - refreshed_at <= self.max_age
+
+    def _load_from_db(self, channel_ids) -> Dict[str, tuple]:
+        if not self.use_db or not channel_ids:
+            return {}
+        with self._db_lock:
+            session = SessionLocal()
+            try:
+                if not self._db_ready:
+                    init_db()
+                    self._db_ready = True
+                return {row.channel_id: (_channel_info_from_row(row), row.updated_at)
+                        for row in load_channels(session, channel_ids)}
+            except Exception as e:
+                print(f"⚠️  Caché de canales: no se pudo leer la BD ({e})")
+                return {}
+            finally:
+                session.close()
+
+    def _save_to_db(self, infos, refreshed_at: datetime):
+        if not self.use_db or not infos:
+            return
+        with self._db_lock:
+            session = SessionLocal()
+            try:
+                upsert_channels(session, infos, updated_at=refreshed_at)
+            except Exception as e:
+                session.rollback()
+                print(f"⚠️  Caché de canales: no se pudo guardar en la BD ({e})")
+            finally:
+                session.close()
+
+    def get_many(self, youtube, channel_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Devuelve {channelId: info} pidiendo a la API sólo los faltantes o caducados.
+
+        Si la API falla (entera o para algunos ids), se sirven las entradas
+        caducadas que haya antes que nada.
+        """
+        ids = list(dict.fromkeys(cid for cid in channel_ids if cid))
+        result: Dict[str, Dict] = {}
+        stale: Dict[str, Dict] = {}
+
+        with self._lock:
+            self.stats['requested'] += len(ids)
+            pending = []
+            for cid in ids:
+                entry = self._memory.get(cid)
+                if entry and self._is_fresh(entry[1]):
+                    result[cid] = entry[0]
+                    self.stats['memory_hits'] += 1
+                else:
+                    pending.append(cid)
+
+        stored = self._load_from_db(pending)
+        to_fetch = []
+        for cid in pending:
+            entry = stored.get(cid)
+            if entry and self._is_fresh(entry[1]):
+                result[cid] = entry[0]
+                with self._lock:
+                    self._memory[cid] = entry
+                    self.stats['db_hits'] += 1
+            else:
+                if entry:
+                    stale[cid] = entry[0]
+                to_fetch.append(cid)
+
+        if to_fetch:
+            try:
+                items = BatchLookup(youtube).fetch_channels(to_fetch, part='snippet,statistics',
+                                                            fields=field_mask('channels.stats'))
+            except Exception as e:
+                if not stale:
+                    raise
+                print(f"⚠️  channels.list falló ({e}); usando {len(stale)} canales caducados de la caché")
+                result.update(stale)
+                return result
+            refreshed_at = datetime.utcnow()
+            fetched = [channel_info_from_item(item) for item in items.values()]
+            with self._lock:
+                for info in fetched:
+                    self._memory[info['channelId']] = (info, refreshed_at)
+                self.stats['fetched'] += len(items)
+            self._save_to_db(fetched, refreshed_at)
+            for info in fetched:
+                result[info['channelId']] = info
+            # Sub-requests fallidas o ids que no volvieron: mejor la entrada caducada que nada
+            missing = [cid for cid in to_fetch if cid not in items and cid in stale]
+            if missing:
+                print(f"⚠️  channels.list no devolvió {len(missing)} canales; usando su entrada caducada de la caché")
+                result.update((cid, stale[cid]) for cid in missing)
+
+        return result
+
+    def avoided(self) -> int:
+        """Lookups de canal servidos sin llamar a la API."""
+        return self.stats['memory_hits'] + self.stats['db_hits']
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"🗂️  Caché de canales: {s['requested']} lookups | {self.avoided()} evitados "
+                f"({s['memory_hits']} memoria, {s['db_hits']} BD) | {s['fetched']} traídos de channels.list")
+
+
+_channel_cache = None
+_channel_cache_lock = threading.Lock()
+
+
+def get_channel_cache() -> ChannelStatsCache:
+    """Caché única del proceso."""
+    global _channel_cache
+    if _channel_cache is None:
+        with _channel_cache_lock:
+            if _channel_cache is None:
+                _channel_cache = ChannelStatsCache()
+    return _channel_cache
@@ -0,0 +1,101 @@
+"""
+Máscaras de campos (partial response) para YouTube Data API v3
+Los `part` piden bloques enteros (snippet con thumbnails y localized,
+statistics, contentDetails...) pero los analizadores sólo leen una docena de
+campos. Cada llamada pasa aquí su máscara `fields=` por nombre, de modo que
+la selección de campos está en un único sitio y se puede desactivar con
+YOUTUBE_FIELD_MASKS=off. No cambia la cuota, sólo bytes y tiempo de parseo.
+Proyecto 201 digital
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+FIELD_MASKS_ENABLED = os.environ.get('YOUTUBE_FIELD_MASKS', 'on').lower() not in ('off', '0', 'false')
+
+FIELD_MASKS = {
+    # search.list
+    'search.video_ids': 'items/id/videoId',
+    'search.video_snippets': 'items(id/videoId,snippet(title,description,channelTitle,publishedAt))',
+    'search.channel_ids': 'nextPageToken,items/snippet/channelId',
+    # videos.list / channels.list (el etag de la respuesta permite revalidar con If-None-Match)
+    'videos.analysis': ('etag,items(id,snippet(title,description,channelTitle,channelId,publishedAt,tags),'
+                        'statistics(viewCount,likeCount,commentCount),contentDetails/duration)'),
+    'videos.potential': ('etag,items(id,snippet(title,description,tags,publishedAt),'
+                         'statistics(viewCount,likeCount,commentCount),contentDetails/duration)'),
+    'videos.stats_duration': 'etag,items(id,statistics(viewCount,likeCount,commentCount),contentDetails/duration)',
+    'videos.recent': 'etag,items(id,snippet(title,description),statistics/viewCount)',
+    'channels.stats': ('etag,items(id,snippet(title,description,publishedAt),'
+                       'statistics(subscriberCount,videoCount,viewCount))'),
+    'channels.uploads': 'etag,items(id,contentDetails/relatedPlaylists/uploads)',
+    # playlistItems.list
+    'playlistItems.video_ids': 'nextPageToken,items/contentDetails/videoId',
+}
+
+
+def field_mask(name: str) -> Optional[str]:
+    """Máscara `fields=` registrada para `name` (None si están desactivadas)."""
+    if not FIELD_MASKS_ENABLED:
+        return None
+    return FIELD_MASKS[name]
+
+
+def _merge(tree: Dict, path, sub: Optional[Dict]):
+    node = tree
+    for key in path[:-1]:
+        if key in node and node[key] is None:
+            return  # el padre ya se pide entero
+        node = node.setdefault(key, {})
+    last = path[-1]
+    if sub is None or node.get(last, {}) is None:
+        node[last] = None
+        return
+    target = node.setdefault(last, {})
+    for key, value in sub.items():
+        _merge(target, [key], value)
+
+
+def parse_field_mask(mask: str) -> Dict[str, Any]:
+    """'items(id,snippet(title))' -> {'items': {'id': None, 'snippet': {'title': None}}}
+
+    None significa "el campo completo". Soporta rutas con '/' y sub-selecciones
+    con paréntesis, que es lo que usan las máscaras de FIELD_MASKS.
+    """
+    pos = 0
+
+    def parse_list() -> Dict[str, Any]:
+        nonlocal pos
+        tree: Dict[str, Any] = {}
+        while pos < len(mask):
+            start = pos
+            while pos < len(mask) and mask[pos] not in ',()':
+                pos += 1
+            path = [p.strip() for p in mask[start:pos].split('/') if p.strip()]
+            sub = None
+            if pos < len(mask) and mask[pos] == '(':
+                pos += 1
+                sub = parse_list()
+                pos += 1  # ')'
+            if path:
+                _merge(tree, path, sub)
+            if pos < len(mask) and mask[pos] == ',':
+                pos += 1
+                continue
+            break
+        return tree
+
+    return parse_list()
+
+
+def apply_field_mask(data: Any, mask: str) -> Any:
+    """Aplica localmente una máscara a una respuesta completa (benchmarks y tests)."""
+    def _filter(value, tree):
+        if tree is None:
+            return value
+        if isinstance(value, list):
+            return [_filter(v, tree) for v in value]
+        if isinstance(value, dict):
+            return {k: _filter(value[k], sub) for k, sub in tree.items() if k in value}
+        return value
+
+    return _filter(data, parse_field_mask(mask))
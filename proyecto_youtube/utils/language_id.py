@@ -0,0 +1,115 @@
+"""
+Identificación de idioma por n-gramas de caracteres (sin red ni modelos)
+Cada idioma tiene un texto de muestra en config/language/<idioma>.txt (títulos
+y descripciones típicos de YouTube). Al cargar se calcula su perfil: los
+trigramas de caracteres más frecuentes ordenados por frecuencia (Cavnar y
+Trenkle). Un texto se puntúa contra cada perfil sumando sus trigramas que
+aparecen en él, con más peso cuanto más arriba están, y gana el idioma con
+mejor puntuación si supera al segundo con margen. Con poco texto o sin margen
+claro (videos mezclados) devuelve None y el llamador usa todos los idiomas.
+Sólo se mira el principio del texto (DEFAULT_SAMPLE_CHARS): basta para el
+idioma y el coste no crece con descripciones largas.
+Proyecto 201 digital
+"""
+
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LANGUAGE_DIR = os.environ.get(
+    'YOUTUBE_LANGUAGE_DIR', str(Path(__file__).resolve().parents[1] / 'config' / 'language')
+)
+
+# Trigramas por perfil de idioma
+DEFAULT_PROFILE_SIZE = 300
+# Caracteres del texto que se analizan
+DEFAULT_SAMPLE_CHARS = 400
+# Mínimo de trigramas del texto para decidir
+MIN_TRIGRAMS = 8
+# El ganador debe superar al segundo en esta proporción
+MIN_MARGIN = 1.3
+# Palabras distintas cuya puntuación se guarda (se vacía al llenarse)
+MAX_CACHED_WORDS = 100000
+
+# Letras (con tildes) separadas por cualquier otra cosa; los dígitos no dicen nada del idioma
+_WORD_RE = re.compile(r'[^\W\d_]+')
+
+
+def _word_trigrams(word: str) -> List[str]:
+    padded = f' {word} '
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def trigrams(text: str) -> Counter:
+    """Trigramas de caracteres de cada palabra, con un espacio de borde (' de', 'de ')."""
+    grams: Counter = Counter()
+    for word in _WORD_RE.findall(text.lower()):
+        grams.update(_word_trigrams(word))
+    return grams
+
+
+class LanguageIdentifier:
+    """Perfiles de trigramas por idioma y detección sobre textos cortos."""
+
+    def __init__(self, directory: str = DEFAULT_LANGUAGE_DIR, profile_size: int = DEFAULT_PROFILE_SIZE):
+        self.directory = Path(directory)
+        # idioma -> {trigrama: peso}, de profile_size (el más frecuente) a 1
+        self.profiles: Dict[str, Dict[str, int]] = {}
+        for path in sorted(self.directory.glob('*.txt')):
+            ranked = [gram for gram, _ in trigrams(path.read_text(encoding='utf-8')).most_common(profile_size)]
+            self.profiles[path.stem] = {gram: profile_size - rank for rank, gram in enumerate(ranked)}
+        self.languages: Tuple[str, ...] = tuple(self.profiles)
+        # palabra -> (trigramas, puntuación por idioma): las palabras se repiten mucho entre videos
+        self._words: Dict[str, Tuple[int, Tuple[int, ...]]] = {}
+
+    def _word_score(self, word: str) -> Tuple[int, Tuple[int, ...]]:
+        cached = self._words.get(word)
+        if cached is None:
+            grams = _word_trigrams(word)
+            cached = (len(grams), tuple(sum(profile.get(gram, 0) for gram in grams)
+                                        for profile in self.profiles.values()))
+            if len(self._words) >= MAX_CACHED_WORDS:
+                self._words.clear()
+            self._words[word] = cached
+        return cached
+
+    def scores(self, text: str, sample_chars: int = DEFAULT_SAMPLE_CHARS) -> Dict[str, float]:
+        """Puntuación de cada idioma (0 si el texto no tiene trigramas suficientes)."""
+        total = 0
+        sums = [0] * len(self.languages)
+        for word in _WORD_RE.findall(text[:sample_chars].lower()):
+            n, word_scores = self._word_score(word)
+            total += n
+            for i, score in enumerate(word_scores):
+                sums[i] += score
+        if total < MIN_TRIGRAMS:
+            return {lang: 0.0 for lang in self.languages}
+        return {lang: score / total for lang, score in zip(self.languages, sums)}
+
+    def detect(self, text: str, sample_chars: int = DEFAULT_SAMPLE_CHARS) -> Optional[str]:
+        """Idioma del texto, o None si hay poco texto o no hay un ganador claro."""
+        ranked: List[Tuple[float, str]] = sorted(
+            ((score, lang) for lang, score in self.scores(text, sample_chars).items()), reverse=True)
+        if not ranked or ranked[0][0] <= 0:
+            return None
+        if len(ranked) > 1 and ranked[0][0] < ranked[1][0] * MIN_MARGIN:
+            return None
+        return ranked[0][1]
+
+
+_identifier = None
+_identifier_lock = threading.Lock()
+
+
+def get_language_identifier() -> LanguageIdentifier:
+    """Identificador único del proceso (los perfiles se calculan una vez)."""
+    global _identifier
+    if _identifier is None:
+        with _identifier_lock:
+            if _identifier is None:
+                _identifier = LanguageIdentifier()
+    return _identifier
+
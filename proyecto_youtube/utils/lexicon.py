@@ -0,0 +1,129 @@
+"""
+Léxico compartido de señales de monetización y automatización
+Los diccionarios viven en un fichero JSON por idioma (config/lexicon/es.json,
+en.json) y se cargan una vez por proceso. Cada diccionario tiene un nombre y
+es una lista de palabras o un {categoría: [palabras]}; los analizadores los
+piden por nombre y reciben un matcher compilado (y cacheado): SignalMatcher
+(subcadenas) o PhraseMatcher (palabras y frases completas sin acentos), así
+que cambiar un clasificador es editar una sola lista del fichero.
+
+Diccionarios (uso):
+- video_automation_signals       nichos_youtube.analyze_automation_potential (idioma del video; es+en si no está claro)
+- video_monetization_signals     nichos_youtube.classify_monetization (afiliacion/anuncios/dificil)
+- keyword_monetization           youtube_search.clasificar_monetizacion (es+en)
+- title_monetization             youtube_search.analizar_titulos_monetizacion (es+en)
+- title_automatizable            youtube_search.is_automatizable
+- title_manual                   youtube_search.is_automatizable (contenido personal que descarta)
+- keyword_monetization_cpm       NicheAnalyzerUltimate / niche_analyzer_basic .clasificar_monetizacion
+- video_automatizable_signals    NicheAnalyzerUltimate.analyze_automatizable_advanced (idioma del video, o región)
+- keyword_automatizable          NicheAnalyzerUltimate / niche_analyzer_basic .is_automatizable
+- monetization_potential         .get_monetization_potential (categorías en orden de prioridad)
+- channel_direct_competition     buscar_canales_youtube: competencia_tipo Directa (es+en)
+
+API versionada: cada fichero declara "version" y get_lexicon(api_version)
+sólo acepta ficheros de esa versión. Un cambio de formato sube la versión y
+los llamadores antiguos fallan con un error claro en lugar de clasificar mal.
+Proyecto 201 digital
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from signal_matcher import PhraseMatcher, SignalMatcher
+
+# Versión del formato de los ficheros de léxico que entiende esta API
+LEXICON_API_VERSION = 1
+
+DEFAULT_LEXICON_DIR = os.environ.get(
+    'YOUTUBE_LEXICON_DIR', str(Path(__file__).resolve().parents[1] / 'config' / 'lexicon')
+)
+
+# Orden de combinación de idiomas (el resto de ficheros van detrás, por nombre)
+DEFAULT_LANGUAGES = ('es', 'en')
+
+Words = Union[List[str], Dict[str, List[str]]]
+
+
+class LexiconError(ValueError):
+    """Fichero de léxico ausente, con otra versión o diccionario inexistente."""
+
+
+class Lexicon:
+    """Diccionarios por idioma cargados de DEFAULT_LEXICON_DIR."""
+
+    def __init__(self, directory: str = DEFAULT_LEXICON_DIR, api_version: int = LEXICON_API_VERSION):
+        self.directory = Path(directory)
+        self.version = api_version
+        self._dictionaries: Dict[str, Dict[str, Words]] = {}
+        paths = sorted(self.directory.glob('*.json'))
+        if not paths:
+            raise LexiconError(f"No hay ficheros de léxico en {self.directory}")
+        for path in paths:
+            data = json.loads(path.read_text(encoding='utf-8'))
+            if data.get('version') != api_version:
+                raise LexiconError(f"{path.name}: léxico versión {data.get('version')}, "
+                                   f"se esperaba la {api_version}")
+            self._dictionaries[data.get('language') or path.stem] = data.get('dictionaries') or {}
+        self.languages: Tuple[str, ...] = tuple(
+            [lang for lang in DEFAULT_LANGUAGES if lang in self._dictionaries] +
+            sorted(lang for lang in self._dictionaries if lang not in DEFAULT_LANGUAGES))
+        self._matchers: Dict[Tuple[type, str, Tuple[str, ...]], object] = {}
+        self._lock = threading.Lock()
+
+    def _languages(self, languages: Optional[Sequence[str]]) -> Tuple[str, ...]:
+        if languages is None:
+            return self.languages
+        return tuple(lang.lower() for lang in ([languages] if isinstance(languages, str) else languages))
+
+    def words(self, name: str, languages: Optional[Sequence[str]] = None) -> Words:
+        """Palabras de un diccionario, concatenando los idiomas pedidos (todos por defecto).
+
+        Los idiomas que no definen el diccionario se ignoran.
+        """
+        combined: Optional[Words] = None
+        for lang in self._languages(languages):
+            entry = self._dictionaries.get(lang, {}).get(name)
+            if entry is None:
+                continue
+            if isinstance(entry, dict):
+                combined = combined if isinstance(combined, dict) else {}
+                for category, words in entry.items():
+                    combined.setdefault(category, []).extend(words)
+            else:
+                combined = (combined or []) + list(entry)
+        if combined is None:
+            raise LexiconError(f"Diccionario '{name}' no definido para {', '.join(self._languages(languages))}")
+        return combined
+
+    def _compiled(self, kind, name: str, languages: Optional[Sequence[str]]):
+        key = (kind, name, self._languages(languages))
+        with self._lock:
+            if key not in self._matchers:
+                self._matchers[key] = kind(self.words(name, key[2]))
+            return self._matchers[key]
+
+    def matcher(self, name: str, languages: Optional[Sequence[str]] = None) -> SignalMatcher:
+        """SignalMatcher (subcadenas) del diccionario, compilado una vez por nombre e idiomas."""
+        return self._compiled(SignalMatcher, name, languages)
+
+    def phrase_matcher(self, name: str, languages: Optional[Sequence[str]] = None) -> PhraseMatcher:
+        """PhraseMatcher (palabras/frases completas sin acentos) del diccionario."""
+        return self._compiled(PhraseMatcher, name, languages)
+
+
+_lexicons: Dict[Tuple[str, int], Lexicon] = {}
+_lexicons_lock = threading.Lock()
+
+
+def get_lexicon(api_version: int = LEXICON_API_VERSION, directory: str = DEFAULT_LEXICON_DIR) -> Lexicon:
+    """Léxico único del proceso para una versión de la API."""
+    key = (str(directory), api_version)
+    with _lexicons_lock:
+        if key not in _lexicons:
+            _lexicons[key] = Lexicon(directory, api_version)
+        return _lexicons[key]
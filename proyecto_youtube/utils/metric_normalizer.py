@@ -0,0 +1,155 @@
+"""
+Normalización incremental de métricas de nichos con referencias persistentes
+normalize_metrics dividía cada métrica por el máximo de los nichos de la
+ejecución: no había score hasta tener todos los nichos en memoria, un nicho
+solo salía siempre con 1.0 y los scores de ejecuciones distintas no eran
+comparables. Aquí cada métrica (avg_views, total_likes, total_comments) tiene
+una distribución acumulada entre ejecuciones (sketch KLL de
+utils/quantile_sketch.py, en la tabla normalization_references) y se
+normaliza contra un cuantil robusto de esa distribución (P95 por defecto,
+NORMALIZATION_QUANTILE), recortado a [0, 1]:
+- add(nicho)          lo incorpora a la referencia y lo normaliza al llegar
+- renormalize(nichos) pasada final opcional con la referencia ya completa
+- save()              suma lo visto en la ejecución a la referencia guardada
+Proyecto 201 digital
+"""
+
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from quantile_sketch import KLLSketch
+
+# Persistencia opcional en la BD del proyecto (tabla normalization_references)
+try:
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from proyecto_youtube.db.session import SessionLocal
+    from proyecto_youtube.db.utils import init_db, load_normalization_references, save_normalization_references
+except Exception:
+    SessionLocal = None
+
+# Cuantil de la distribución acumulada que vale 1.0 (el máximo es muy sensible a virales)
+DEFAULT_REFERENCE_QUANTILE = float(os.environ.get('NORMALIZATION_QUANTILE', 0.95))
+
+# Métrica del nicho -> campo normalizado (los mismos que escribía normalize_metrics)
+METRICS = {
+    'avg_views': 'views_norm',
+    'total_likes': 'likes_norm',
+    'total_comments': 'comments_norm',
+}
+
+
+class MetricNormalizer:
+    """Referencias de normalización de un analizador (`scope`), acumuladas entre ejecuciones."""
+
+    def __init__(self, scope: str, quantile: float = DEFAULT_REFERENCE_QUANTILE, use_db: bool = True):
+        self.scope = scope
+        self.quantile = quantile
+        self.use_db = use_db and SessionLocal is not None
+        self._reference: Dict[str, KLLSketch] = {metric: KLLSketch() for metric in METRICS}  # histórico + ejecución
+        self._run: Dict[str, KLLSketch] = {metric: KLLSketch() for metric in METRICS}  # sólo esta ejecución
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _stored(self) -> Dict[str, KLLSketch]:
+        session = SessionLocal()
+        try:
+            init_db()
+            return {metric: KLLSketch.from_json(text)
+                    for metric, text in load_normalization_references(session, self.scope).items()
+                    if metric in METRICS and text}
+        finally:
+            session.close()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.use_db:
+            return
+        try:
+            stored = {metric: sketch.merge(self._run[metric]) for metric, sketch in self._stored().items()}
+        except Exception as e:
+            print(f"⚠️  Normalización: no se pudieron leer las referencias de la BD ({e})")
+            return
+        self._reference.update(stored)
+
+    def reference(self, metric: str) -> float:
+        """Valor de `metric` que normaliza a 1.0 (0 si todavía no hay datos)."""
+        with self._lock:
+            self._ensure_loaded()
+            sketch = self._reference[metric]
+            return float(sketch.quantile(self.quantile)) if sketch.n else 0.0
+
+    def references(self) -> Dict[str, float]:
+        return {metric: self.reference(metric) for metric in METRICS}
+
+    def observe(self, niche: Dict) -> None:
+        """Suma las métricas del nicho a la referencia (sin normalizarlo)."""
+        with self._lock:
+            self._ensure_loaded()
+            for metric in METRICS:
+                value = float(niche.get(metric) or 0)
+                self._reference[metric].update(value)
+                self._run[metric].update(value)
+
+    def normalize(self, niche: Dict) -> Dict:
+        """Escribe views_norm, likes_norm, comments_norm y engagement_norm con la referencia actual."""
+        for metric, field in METRICS.items():
+            reference = self.reference(metric)
+            value = float(niche.get(metric) or 0)
+            niche[field] = max(0.0, min(1.0, value / reference)) if reference > 0 else 0.0
+        niche['engagement_norm'] = (niche['likes_norm'] + niche['comments_norm']) / 2
+        return niche
+
+    def add(self, niche: Dict) -> Dict:
+        """Incorpora el nicho a la referencia y lo normaliza (score disponible al momento)."""
+        self.observe(niche)
+        return self.normalize(niche)
+
+    def renormalize(self, niches: List[Dict]) -> List[Dict]:
+        """Pasada final: todos los nichos de la ejecución contra la misma referencia."""
+        for niche in niches:
+            self.normalize(niche)
+        return niches
+
+    def save(self) -> int:
+        """Suma lo visto en esta ejecución a las referencias guardadas; devuelve cuántas métricas."""
+        with self._lock:
+            run = {metric: sketch for metric, sketch in self._run.items() if sketch.n}
+            if not self.use_db or not run:
+                return 0
+            session = None
+            try:
+                # Releer antes de fusionar: otra ejecución puede haber guardado mientras tanto
+                stored = self._stored()
+                merged = {metric: stored.get(metric, KLLSketch()).merge(sketch) for metric, sketch in run.items()}
+                session = SessionLocal()
+                save_normalization_references(session, self.scope,
+                                              {metric: (s.n, s.to_json()) for metric, s in merged.items()})
+            except Exception as e:
+                if session is not None:
+                    session.rollback()
+                print(f"⚠️  Normalización: no se pudieron guardar las referencias en la BD ({e})")
+                return 0
+            finally:
+                if session is not None:
+                    session.close()
+            self._reference.update(merged)
+            self._run = {metric: KLLSketch() for metric in METRICS}
+            return len(merged)
+
+
+_normalizers: Dict[str, MetricNormalizer] = {}
+_normalizers_lock = threading.Lock()
+
+
+def get_metric_normalizer(scope: str) -> MetricNormalizer:
+    """Normalizador único del proceso para `scope`."""
+    with _normalizers_lock:
+        if scope not in _normalizers:
+            _normalizers[scope] = MetricNormalizer(scope)
+        return _normalizers[scope]
@@ -13,7 +13,6 @@ import csv
 from datetime import datetime, timedelta
 from pathlib import Path
 from pytrends.request import TrendReq
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import argparse
 
@@ -22,7 +21,24 @@ sys.path.append(str(Path(__file__).resolve().parents[1] / 'credentials'))
 from config import YOUTUBE_API_KEY, DEFAULT_LANGUAGE, DEFAULT_COUNTRY
 
 # Importar el sistema de tracking
-from api_usage_tracker import tracker, track_youtube_search, track_youtube_videos, track_trends_query
+from api_usage_tracker import tracker, track_trends_query
+from quota_scheduler import QuotaExceeded, get_quota_scheduler
+from youtube_client import get_youtube_client
+from field_masks import field_mask
+from retry_engine import CircuitOpen, call_with_retries
+from lexicon import LEXICON_API_VERSION, get_lexicon
+from text_normalizer import normalize_video
+from metric_normalizer import get_metric_normalizer
+from view_velocity import video_velocity
+
+
+# Diccionarios de señales: léxico compartido (config/lexicon/*.json), compilado una vez
+LEXICON = get_lexicon(LEXICON_API_VERSION)
+MONETIZACION_MATCHER = LEXICON.matcher('keyword_monetization_cpm')
+AUTOMATIZABLE_SIGNALS_MATCHERS = {region: LEXICON.matcher('video_automatizable_signals', region)
+                                  for region in ('ES', 'EN')}
+AUTOMATIZABLE_KEYWORDS_MATCHER = LEXICON.matcher('keyword_automatizable')
+MONETIZATION_POTENTIAL_MATCHER = LEXICON.matcher('monetization_potential')
 
 
 class NicheAnalyzerUltimate:
@@ -41,7 +57,7 @@ class NicheAnalyzerUltimate:
             self.trends_available = False
             print(f"⚠️  Google Trends no disponible: {e}")
             
-        self.youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+        self.youtube = get_youtube_client(YOUTUBE_API_KEY)
 
         # Configuración para límites de API - MODO TESTING
         self.daily_youtube_requests = 0
@@ -57,6 +73,11 @@ class NicheAnalyzerUltimate:
         # cuando ultra_testing=True: maxResults=1 y hacemos batching de videos.list (1 request por análisis)
         self.ultra_max_results = 1
 
+        # Normalización contra referencias acumuladas entre ejecuciones (utils/metric_normalizer.py);
+        # con final_renormalize=False se quedan los scores calculados al llegar cada nicho
+        self.normalizer = get_metric_normalizer('ultimate')
+        self.final_renormalize = True
+
         # Fecha límite para contenido reciente (últimos 12 meses)
         self.date_limit = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%dT%H:%M:%SZ')
 
@@ -86,7 +107,8 @@ class NicheAnalyzerUltimate:
                 # 🔥 TRACKING: Registrar request de Trends
                 track_trends_query("trending_searches_spain")
                 
-                trending_searches = self.pytrends.trending_searches(pn='spain')
+                trending_searches = call_with_retries('trends.trending_searches', self.pytrends.trending_searches,
+                                                      pn='spain', engine='trends')
                 trending_keywords.extend(trending_searches[0].head(2).tolist())  # Solo 2
                 self.daily_trends_requests += 1
                 print(f"   ✅ {len(trending_keywords)} tendencias obtenidas")
@@ -97,8 +119,10 @@ class NicheAnalyzerUltimate:
                     # 🔥 TRACKING: Registrar request de Trends
                     track_trends_query("related_queries_finanzas")
                     
-                    self.pytrends.build_payload(['finanzas'], timeframe='now 1-m')
-                    related = self.pytrends.related_queries()
+                    call_with_retries('trends.build_payload', self.pytrends.build_payload,
+                                      ['finanzas'], timeframe='now 1-m', engine='trends')
+                    related = call_with_retries('trends.related_queries', self.pytrends.related_queries,
+                                                engine='trends')
                     
                     if 'finanzas' in related and related['finanzas']['rising'] is not None:
                         rising_queries = related['finanzas']['rising']['query'].head(1).tolist()  # Solo 1
@@ -141,15 +165,18 @@ class NicheAnalyzerUltimate:
             track_trends_query(f"youtube_trend_{keyword}")
             
             # 1. Usar build_payload con especificaciones exactas
-            self.pytrends.build_payload(
+            call_with_retries(
+                'trends.build_payload', self.pytrends.build_payload,
                 [keyword], 
                 timeframe="today 12-m",  # Últimos 12 meses
                 geo=geo,                 # Región según parámetro --geo
-                gprop="youtube"          # Específico para YouTube Search
+                gprop="youtube",         # Específico para YouTube Search
+                engine='trends'
             )
             
             # Obtener datos de interés a lo largo del tiempo
-            interest_data = self.pytrends.interest_over_time()
+            interest_data = call_with_retries('trends.interest_over_time', self.pytrends.interest_over_time,
+                                              engine='trends')
             
             if interest_data.empty or keyword not in interest_data.columns:
                 print(f"   ⚠️  Sin datos de tendencia para '{keyword}' - trend_status: UNKNOWN")
@@ -198,28 +225,10 @@ class NicheAnalyzerUltimate:
         """
         🔥 MEJORA: Clasificación avanzada del tipo de monetización
         """
-        keyword_lower = keyword.lower()
-        
-        # 🔗 Palabras clave para AFILIACIÓN
-        afiliacion = [
-            "comprar", "mejores", "review", "productos", "comparativa", "guía",
-            "precio", "barato", "amazon", "oferta", "ranking", "pienso", 
-            "juguetes", "accesorios", "snacks", "alimentación", "recomendación", 
-            "top", "análisis", "prueba", "características", "modelos"
-        ]
-        
-        # 💰 Palabras clave para ANUNCIOS (CPM alto)
-        anuncios = [
-            "finanzas", "financiero", "financiera", "financieros", "invertir", 
-            "inversión", "trading", "seguros", "banca", "abogado", "consultoría", 
-            "marketing", "coaching", "educación", "psicología", "cuenta", "cuentas", 
-            "remunerada", "remuneradas", "interés", "ahorros", "cuenta bancaria", 
-            "cuenta sin comisiones", "forex", "bolsa", "préstamos", "tarjetas", 
-            "banco", "cripto", "criptomonedas", "emprendimiento"
-        ]
-        
-        tiene_afiliacion = any(word in keyword_lower for word in afiliacion)
-        tiene_anuncios = any(word in keyword_lower for word in anuncios)
+        # Una pasada sobre la keyword para las dos categorías
+        categorias = MONETIZACION_MATCHER.categories_in(keyword)
+        tiene_afiliacion = 'afiliacion' in categorias
+        tiene_anuncios = 'anuncios' in categorias
         
         if tiene_afiliacion and tiene_anuncios:
             return "Afiliación + Anuncios"
@@ -240,25 +249,9 @@ class NicheAnalyzerUltimate:
         4. Clasificación: YES (>=2), PARTIAL (==1), NO (==0)
         5. Calcular automatizable_ratio = count_signals / 5 * 100
         """
-        # 1. Diccionarios de señales ampliados según especificaciones (ES/EN)
-        signals_es = set([
-            "tutorial", "plantilla", "guion", "script", "herramienta", "automatización",
-            "paso a paso", "explicado fácil", "ejemplo", "review", "top", "mejores",
-            "comparativa", "guía", "ranking", "vs", "versus", "cómo", "tips", "trucos",
-            "mejor", "peor", "comparar", "análisis", "productos", "recomendados",
-            "precio", "barato", "características", "modelos", "accesorios", "manual"
-        ])
-
-        signals_en = set([
-            "tutorial", "template", "script", "tool", "automation", "ai",
-            "step by step", "explained", "example", "review", "top", "best",
-            "comparison", "guide", "ranking", "vs", "versus", "how to", "tips",
-            "tricks", "better", "worse", "compare", "analysis", "products",
-            "recommended", "price", "cheap", "features", "models", "accessories"
-        ])
-
-        # 2. Elegir diccionario según región (si no ES asumimos EN)
-        signals_lookup = signals_es if geo_region == 'ES' else signals_en
+        # 1-2. Diccionario compilado (ES/EN) según el idioma detectado de cada video;
+        # si no está claro, según región (si no ES asumimos EN)
+        region_matcher = AUTOMATIZABLE_SIGNALS_MATCHERS['ES' if geo_region == 'ES' else 'EN']
 
         # 3. Analizar títulos, descripciones y tags (normalizado a minúsculas)
         total_videos_analyzed = min(len(video_data_list), 5)  # Top-5 máximo
@@ -283,14 +276,15 @@ class NicheAnalyzerUltimate:
 
             text_corpus = ' '.join([title, description, ' '.join(tags)])
 
-            found_in_video = False
-            # Buscar señales (substring) en el corpus usando el diccionario seleccionado
-            for s in signals_lookup:
-                if s in text_corpus:
-                    detected_signals.add(s)
-                    found_in_video = True
+            # Idioma del video (calculado una vez por videoId) -> diccionario de ese idioma
+            language = normalize_video(video_data).language if isinstance(video_data, dict) else None
+            signals_matcher = AUTOMATIZABLE_SIGNALS_MATCHERS.get((language or '').upper(), region_matcher)
 
-            if found_in_video:
+            # Buscar señales (substring) en el corpus con una sola pasada
+            found = signals_matcher.present(text_corpus)
+            detected_signals.update(found)
+
+            if found:
                 videos_with_signals += 1
 
         # 4. Calcular ratio y clasificar
@@ -319,43 +313,16 @@ class NicheAnalyzerUltimate:
         🔥 FUNCIÓN LEGACY: Mantener para compatibilidad con análisis básico
         Detectar si un nicho es automatizable con IA (análisis básico por keyword)
         """
-        automatizable_keywords = [
-            # Keywords estructuradas
-            "review", "top", "mejores", "comparativa", "tutorial", "guía",
-            "ranking", "vs", "versus", "cómo", "paso a paso", "tips",
-            "trucos", "mejor", "peor", "comparar", "análisis",
-            # Keywords de productos
-            "productos", "recomendados", "precio", "barato", "características",
-            "modelos", "accesorios", "snacks", "pienso", "comida", "alimentación",
-            "oferta", "amazon", "comprar", "juguetes"
-        ]
-        
-        keyword_lower = keyword.lower()
-        return any(word in keyword_lower for word in automatizable_keywords)
+        return AUTOMATIZABLE_KEYWORDS_MATCHER.any(keyword)
 
     def get_monetization_potential(self, keyword):
         """
         Estimar potencial de monetización basado en categoría
         """
-        keyword_lower = keyword.lower()
-        
-        monetization_categories = {
-            # Muy Alto Potencial
-            "finanzas": "Muy Alto", "cripto": "Muy Alto", "invertir": "Muy Alto",
-            "trading": "Muy Alto", "forex": "Muy Alto", "bolsa": "Muy Alto",
-            # Alto Potencial
-            "programación": "Alto", "python": "Alto", "desarrollo": "Alto",
-            "tecnología": "Alto", "marketing": "Alto", "negocios": "Alto",
-            # Medio Potencial
-            "salud": "Medio", "fitness": "Medio", "educación": "Medio",
-            "aprendizaje": "Medio", "productividad": "Medio",
-            # Bajo Potencial
-            "vlogs": "Bajo", "gaming": "Bajo", "entretenimiento": "Bajo",
-            "música": "Bajo", "viajes": "Bajo"
-        }
-
-        for category, potential in monetization_categories.items():
-            if category in keyword_lower:
+        # Primer nivel (de Muy Alto a Bajo, orden del léxico) con alguna palabra en la keyword
+        found = MONETIZATION_POTENTIAL_MATCHER.categories_in(keyword)
+        for potential in MONETIZATION_POTENTIAL_MATCHER.categories:
+            if potential in found:
                 return potential
 
         return "Medio"
@@ -363,32 +330,21 @@ class NicheAnalyzerUltimate:
     def normalize_metrics(self, niches_data):
         """
         Normalizar métricas para comparación justa
+        Contra las referencias acumuladas del normalizador (no el máximo de la ejecución):
+        los nichos que aún no se han visto se incorporan y, si final_renormalize,
+        todos se re-normalizan con la referencia final.
         """
-        if not niches_data:
-            return niches_data
-
-        # Extraer valores para normalización
-        views_values = [niche['avg_views'] for niche in niches_data]
-        likes_values = [niche['total_likes'] for niche in niches_data]
-        comments_values = [niche['total_comments'] for niche in niches_data]
-
-        # Calcular máximos para normalización
-        max_views = max(views_values) if views_values else 1
-        max_likes = max(likes_values) if likes_values else 1
-        max_comments = max(comments_values) if comments_values else 1
-
-        # Normalizar cada nicho
         for niche in niches_data:
-            niche['views_norm'] = niche['avg_views'] / max_views
-            niche['likes_norm'] = niche['total_likes'] / max_likes
-            niche['comments_norm'] = niche['total_comments'] / max_comments
-            niche['engagement_norm'] = (niche['likes_norm'] + niche['comments_norm']) / 2
-
+            if 'views_norm' not in niche:
+                self.normalizer.add(niche)
+        if self.final_renormalize:
+            self.normalizer.renormalize(niches_data)
         return niches_data
 
-    def analyze_youtube_potential(self, keywords, max_keywords=3):  # 🔥 REDUCIDO: Antes 10, ahora 3
+    def analyze_youtube_potential(self, keywords, max_keywords=3, on_result=None):  # 🔥 REDUCIDO: Antes 10, ahora 3
         """
         Validar keywords con YouTube Data API - MODO TESTING OPTIMIZADO
+        Cada nicho se normaliza y puntúa al llegar; `on_result(nicho_con_scores)` lo recibe en ese momento.
         """
         validated_niches = []
         keywords_to_analyze = keywords[:max_keywords]  # Máximo 3 keywords
@@ -397,13 +353,15 @@ class NicheAnalyzerUltimate:
             if self.daily_youtube_requests >= self.max_youtube_per_day:
                 print("⚠️  Límite diario de YouTube API alcanzado")
                 break
+            # search (100) + videos (1): cuota compartida con el resto de procesos
+            if not get_quota_scheduler().can_afford(101):
+                print("⚠️  Cuota diaria de YouTube API insuficiente para otra keyword")
+                break
 
             try:
                 print(f"📊 Analizando '{keyword}' en YouTube... (Testing)")
 
-                # 🔥 TRACKING: Registrar request de búsqueda
-                track_youtube_search(keyword)
-
+                # 🔥 TRACKING: las unidades las registra el transporte del cliente compartido
                 # 🔥 MODO ULTRA_TESTING: reducir maxResults a 1 para gastar el mínimo
                 max_results = self.ultra_max_results if self.ultra_testing else 10
                 search_request = self.youtube.search().list(
@@ -412,9 +370,12 @@ class NicheAnalyzerUltimate:
                     type="video",
                     maxResults=max_results,
                     order="relevance",
-                    publishedAfter=self.date_limit
+                    publishedAfter=self.date_limit,
+                    fields=field_mask('search.video_ids')
                 )
                 search_response = search_request.execute()
+                # Con máscara `fields` la API omite `items` si no hay resultados
+                search_response.setdefault('items', [])
 
                 if not search_response['items']:
                     continue
@@ -423,16 +384,16 @@ class NicheAnalyzerUltimate:
                 video_ids = [item['id']['videoId'] for item in search_response['items']]
                 
                 # 🔥 Modo Ultra: batchear videos.list para 1 request por análisis
-                # Registrar videos.list como 1 request
-                track_youtube_videos(keyword, len(video_ids))
-                
                 # En ultra_testing hacemos una única llamada con todos los ids (ya es así)
                 # Pedir estadísticas y snippet para poder analizar títulos, descripciones y tags
+                # (contentDetails para la duración; mismo coste de 1 unidad)
                 stats_request = self.youtube.videos().list(
-                    part="statistics,snippet",
-                    id=",".join(video_ids)
+                    part="statistics,snippet,contentDetails",
+                    id=",".join(video_ids),
+                    fields=field_mask('videos.potential')
                 )
                 stats_response = stats_request.execute()
+                stats_response.setdefault('items', [])
 
                 # Calcular métricas
                 total_views = sum(int(item['statistics'].get('viewCount', 0))
@@ -470,13 +431,27 @@ class NicheAnalyzerUltimate:
                     'monetization_potential': self.get_monetization_potential(keyword),
                     'tipo_monetizacion': self.clasificar_monetizacion(keyword),
                     'trend_status': trend_status,  # 🔥 NUEVO: Estado de tendencia YouTube
+                    # Velocidad: views/día desde publishedAt (mismo videos.list, sin cuota extra)
+                    **video_velocity([{**item['statistics'], 'publishedAt': item.get('snippet', {}).get('publishedAt'),
+                                       'duration': item.get('contentDetails', {}).get('duration')}
+                                      for item in stats_response['items']]),
                     'youtube_requests': 2
                 }
 
+                # Score provisional al momento (referencias acumuladas, sin esperar al resto)
+                self.normalizer.add(niche_data)
+                scores = self.calculate_opportunity_score(niche_data)
+                print(f"   🎯 Opportunity Score provisional: {scores['final_score']:.3f}")
+                if on_result:
+                    on_result({**niche_data, **scores})
+
                 validated_niches.append(niche_data)
                 self.daily_youtube_requests += 2
                 time.sleep(random.uniform(1, 2))
 
+            except (QuotaExceeded, CircuitOpen) as e:
+                print(f"❌ {e}")
+                break
             except HttpError as e:
                 if e.resp.status == 403:
                     print("❌ Cuota de YouTube API excedida")
@@ -537,9 +512,10 @@ class NicheAnalyzerUltimate:
             'monetization_multiplier': round(monetization_multiplier, 3)
         }
 
-    def run_complete_analysis(self, input_keywords=None, keywords_file=None):
+    def run_complete_analysis(self, input_keywords=None, keywords_file=None, on_result=None):
         """
         🔥 ANÁLISIS COMPLETO MODO TESTING: Solo 3 keywords = 6 requests YouTube máximo
+        `on_result` recibe cada nicho puntuado en cuanto se analiza.
         """
         print("🧪 INICIANDO ANÁLISIS COMPLETO - MODO TESTING")
         print("💡 Máximo 3 keywords = 6 requests YouTube (ahorro de cuota)")
@@ -585,15 +561,16 @@ class NicheAnalyzerUltimate:
 
         # PASO 2: Validar con YouTube (máximo 3 keywords = 6 requests)
         print(f"\n📺 Validando en YouTube (máximo {len(trending_keywords) * 2} requests)...")
-        validated_niches = self.analyze_youtube_potential(trending_keywords, max_keywords=3)
+        validated_niches = self.analyze_youtube_potential(trending_keywords, max_keywords=3, on_result=on_result)
 
         if not validated_niches:
             print("❌ No se pudieron validar nichos")
             return []
 
-        # PASO 3: Normalizar métricas
+        # PASO 3: Normalizar métricas (re-normalización final con la referencia completa)
         print("🔄 Normalizando métricas...")
         validated_niches = self.normalize_metrics(validated_niches)
+        self.normalizer.save()
 
         # PASO 4: Calcular scores finales
         final_results = []
@@ -622,6 +599,7 @@ class NicheAnalyzerUltimate:
 
         # Normalizar y calcular scores
         validated = self.normalize_metrics(validated)
+        self.normalizer.save()
         final = []
         for niche in validated:
             scores = self.calculate_opportunity_score(niche)
@@ -894,9 +872,12 @@ def main():
     parser.add_argument('--keywords', type=str, help="Keywords separadas por '||' (ej: 'k1||k2||k3')")
     parser.add_argument('--keywords-file', type=str, help='Ruta a un archivo de keywords (una por línea)')
     parser.add_argument('--geo', type=str, default='ES', help='Región para Google Trends (ej: ES, US, MX) - Default: ES')
+    parser.add_argument('--no-renormalize', action='store_true',
+                        help='Mantener los scores calculados al llegar cada nicho (sin re-normalización final)')
     args = parser.parse_args()
 
     analyzer = NicheAnalyzerUltimate()
+    analyzer.final_renormalize = not args.no_renormalize
     
     # 🔥 NUEVO: Configurar región para PyTrends según parámetro --geo
     analyzer.geo_region = args.geo
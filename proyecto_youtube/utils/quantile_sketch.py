@@ -0,0 +1,208 @@
+"""
+Sketch de cuantiles KLL (Karnin, Lang y Liberty) para distribuciones de views
+Resume un flujo de views en memoria acotada y se puede fusionar: los sketches
+de cada día de una keyword se combinan en su distribución semanal o mensual
+sin volver a leer los videos. Se guarda como JSON (to_json/from_json).
+
+Estructura: niveles de compactadores; un valor del nivel h pesa 2^h. Cuando
+un nivel se llena se ordena y la mitad de sus valores (pares o impares, al
+azar) sube al nivel siguiente con el doble de peso. El nivel más alto guarda
+k valores y cada nivel inferior 2/3 de los del anterior (mínimo 2), así que
+el sketch retiene como mucho ~3k valores más 2 por nivel, es decir
+O(k + log(n/k)) para n views.
+
+Error: el rango de cualquier cuantil tiene un error normalizado de ~1.65%
+con k=200 (99% de confianza; el error es O(1/k)). Mientras no se ha
+compactado nada (n < k) el sketch es exacto y los cuantiles usan la misma
+interpolación lineal que view_metrics. count, suma, mínimo y máximo son
+siempre exactos.
+Proyecto 201 digital
+"""
+
+import json
+import math
+import os
+import random
+import sys
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from view_metrics import percentile
+
+# Tamaño del nivel superior: error ~1.65% con 200
+DEFAULT_K = int(os.environ.get('QUANTILE_SKETCH_K', 200))
+
+# Cada nivel guarda esta fracción de los valores del nivel superior
+_CAPACITY_DECAY = 2 / 3
+
+
+class KLLSketch:
+    """Sketch KLL de cuantiles, fusionable y serializable."""
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        if k < 8:
+            raise ValueError(f"k demasiado pequeño para el sketch: {k} (mínimo 8)")
+        self.k = k
+        self.n = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.levels: List[List[float]] = [[]]
+        self._size = 0
+        self._limit = self._max_size()
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def retained(self) -> int:
+        """Valores guardados (la memoria del sketch)."""
+        return self._size
+
+    @property
+    def exact(self) -> bool:
+        """True mientras no se ha compactado ningún valor."""
+        return len(self.levels) == 1
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        for h in range(len(self.levels)):
+            if len(self.levels[h]) < self._capacity(h):
+                continue
+            if h + 1 == len(self.levels):
+                self.levels.append([])
+                self._limit = self._max_size()
+            items = sorted(self.levels[h])
+            # Con un número impar de valores el último se queda en su nivel
+            kept = [items.pop()] if len(items) % 2 else []
+            self.levels[h + 1].extend(items[self._rng.randint(0, 1)::2])
+            self.levels[h] = kept
+            self._size = sum(len(level) for level in self.levels)
+            if self._size < self._limit:
+                break
+
+    def update(self, value: float):
+        """Añade un valor."""
+        self.extend((value,))
+
+    def extend(self, values: Iterable[float]):
+        """Añade valores (en bloques hasta llenar el sketch, luego compacta)."""
+        values = iter(values)
+        while True:
+            chunk = list(islice(values, max(1, self._limit - self._size)))
+            if not chunk:
+                return
+            self.levels[0].extend(chunk)
+            self.n += len(chunk)
+            self.total += sum(chunk)
+            low, high = min(chunk), max(chunk)
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+            self._size += len(chunk)
+            if self._size >= self._limit:
+                self._compress()
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Añade los valores resumidos en `other` (mismo k) y devuelve self."""
+        if other.k != self.k:
+            raise ValueError(f"No se pueden fusionar sketches con k distinto ({self.k} y {other.k})")
+        if not other.n:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        self._limit = self._max_size()
+        for h, level in enumerate(other.levels):
+            self.levels[h].extend(level)
+        self.n += other.n
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._size = sum(len(level) for level in self.levels)
+        while self._size >= self._limit:
+            size = self._size
+            self._compress()
+            if self._size == size:
+                break
+        return self
+
+    def _weighted(self):
+        return sorted((value, 1 << h) for h, level in enumerate(self.levels) for value in level)
+
+    def quantile(self, q: float) -> float:
+        """Cuantil q (0-1): exacto e interpolado sin compactar, por rango ponderado si no."""
+        if not self.n:
+            return 0
+        if self.exact:
+            return percentile(sorted(self.levels[0]), q * 100)
+        target = q * self.n
+        cumulative = 0
+        for value, weight in self._weighted():
+            cumulative += weight
+            if cumulative >= target:
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def rank(self, value: float) -> float:
+        """Fracción (0-1) de los valores resumidos que son <= value."""
+        if not self.n:
+            return 0.0
+        below = sum(1 << h for h, level in enumerate(self.levels) for v in level if v <= value)
+        return below / self.n
+
+    def summary(self, p: float = 75) -> Dict[str, float]:
+        """count, media, mediana, percentil p, mínimo y máximo."""
+        return {
+            'count': self.n,
+            'mean': self.total / self.n if self.n else 0,
+            'median': self.quantile(0.5),
+            'pct': self.quantile(p / 100.0),
+            'min': self.min or 0,
+            'max': self.max or 0,
+        }
+
+    def to_dict(self) -> Dict:
+        return {'k': self.k, 'n': self.n, 'total': self.total, 'min': self.min, 'max': self.max,
+                'levels': self.levels}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(',', ':'))
+
+    @classmethod
+    def from_dict(cls, data: Dict, seed: Optional[int] = None) -> 'KLLSketch':
+        sketch = cls(int(data.get('k', DEFAULT_K)), seed=seed)
+        sketch.n = int(data.get('n', 0))
+        sketch.total = data.get('total', 0)
+        sketch.min = data.get('min')
+        sketch.max = data.get('max')
+        sketch.levels = [list(level) for level in data.get('levels') or [[]]]
+        sketch._size = sum(len(level) for level in sketch.levels)
+        sketch._limit = sketch._max_size()
+        return sketch
+
+    @classmethod
+    def from_json(cls, text: str, seed: Optional[int] = None) -> 'KLLSketch':
+        return cls.from_dict(json.loads(text), seed=seed)
+
+    @classmethod
+    def of(cls, values: Iterable[float], k: int = DEFAULT_K, seed: Optional[int] = None) -> 'KLLSketch':
+        """Sketch de una lista de valores."""
+        sketch = cls(k, seed=seed)
+        sketch.extend(values)
+        return sketch
+
+
+def merge_all(sketches: Iterable[KLLSketch], k: int = DEFAULT_K) -> KLLSketch:
+    """Fusión de varios sketches en uno nuevo (no modifica los originales)."""
+    merged = KLLSketch(k)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
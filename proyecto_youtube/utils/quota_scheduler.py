@@ -0,0 +1,322 @@
+"""
+Planificador de cuota de YouTube Data API compartido entre procesos
+Todas las llamadas reales a la API reservan sus unidades aquí antes de salir
+a la red. El contador vive en SQLite, así que varios CLIs y la app web que
+corran a la vez comparten el mismo presupuesto diario. Con varias API keys
+(YOUTUBE_API_KEYS) cada una lleva su contador y CredentialPool reparte las
+llamadas entre ellas.
+Proyecto 201 digital
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+    # La cuota de YouTube se resetea a medianoche hora del Pacífico
+    QUOTA_TZ = ZoneInfo('America/Los_Angeles')
+except Exception:
+    QUOTA_TZ = None
+
+from api_usage_tracker import ENDPOINT_COSTS
+
+DEFAULT_DAILY_QUOTA = int(os.environ.get('YOUTUBE_DAILY_QUOTA', 10000))
+DEFAULT_QUOTA_DB = os.environ.get(
+    'YOUTUBE_QUOTA_DB', str(Path(__file__).resolve().parents[1] / 'db' / 'api_quota.db')
+)
+# 'reject' lanza QuotaExceeded; 'block' espera al reset diario
+DEFAULT_POLICY = os.environ.get('YOUTUBE_QUOTA_POLICY', 'reject')
+
+
+class QuotaExceeded(Exception):
+    """No queda presupuesto diario para la llamada pedida."""
+
+
+def endpoint_cost(endpoint: str) -> int:
+    return ENDPOINT_COSTS.get(endpoint, 1)
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    now = now or datetime.now(QUOTA_TZ)
+    return now.strftime('%Y-%m-%d')
+
+
+def seconds_until_reset() -> float:
+    now = datetime.now(QUOTA_TZ)
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1.0, (tomorrow - now).total_seconds())
+
+
+class QuotaScheduler:
+    """Reserva unidades por endpoint contra el presupuesto diario de una API key.
+
+    `key_id` separa los contadores de cada key en la misma BD; '' es el
+    contador de siempre (una sola key, sin pool).
+    """
+
+    def __init__(self, db_path: str = DEFAULT_QUOTA_DB, daily_quota: int = DEFAULT_DAILY_QUOTA,
+                 policy: str = DEFAULT_POLICY, key_id: str = ''):
+        self.db_path = db_path
+        self.daily_quota = daily_quota
+        self.policy = policy
+        self.key_id = key_id
+        self._lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None -> transacciones manuales (BEGIN IMMEDIATE entre procesos)
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._migrate()
+
+    def _migrate(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS quota_usage_keys ("
+                " day TEXT NOT NULL, key_id TEXT NOT NULL DEFAULT '',"
+                " units INTEGER NOT NULL DEFAULT 0, requests INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (day, key_id))"
+            )
+            legacy = self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'quota_usage'"
+            ).fetchone()
+            if legacy:
+                # BD anterior al pool de keys: su contador pasa a ser el de la key ''
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO quota_usage_keys (day, key_id, units, requests)"
+                    " SELECT day, '', units, requests FROM quota_usage"
+                )
+                self._conn.execute("DROP TABLE quota_usage")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def used(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT units FROM quota_usage_keys WHERE day = ? AND key_id = ?", (quota_day(), self.key_id)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self) -> int:
+        """Unidades que quedan hoy (para que los callers dimensionen su trabajo)."""
+        return max(0, self.daily_quota - self.used())
+
+    def can_afford(self, units: int) -> bool:
+        return self.remaining() >= units
+
+    def current_key(self) -> Optional[str]:
+        """Un planificador suelto no elige key: cada cliente usa su developerKey."""
+        return None
+
+    def _try_reserve(self, units: int) -> bool:
+        day = quota_day()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT units FROM quota_usage_keys WHERE day = ? AND key_id = ?", (day, self.key_id)
+                ).fetchone()
+                used = row[0] if row else 0
+                if used + units > self.daily_quota:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute(
+                    "INSERT INTO quota_usage_keys (day, key_id, units, requests) VALUES (?, ?, ?, 1)"
+                    " ON CONFLICT(day, key_id) DO UPDATE SET units = units + excluded.units,"
+                    " requests = requests + 1",
+                    (day, self.key_id, units)
+                )
+                self._conn.execute("COMMIT")
+                return True
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def reserve(self, endpoint: str, units: Optional[int] = None) -> int:
+        """Reserva las unidades de una llamada. Devuelve las unidades reservadas."""
+        units = endpoint_cost(endpoint) if units is None else units
+        while not self._try_reserve(units):
+            if self.policy != 'block':
+                raise QuotaExceeded(
+                    f"Cuota diaria agotada: {endpoint} necesita {units} unidades y quedan {self.remaining()}"
+                )
+            wait = seconds_until_reset()
+            print(f"⏳ Cuota diaria agotada — esperando {wait / 3600:.1f}h al reset para {endpoint}")
+            time.sleep(wait)
+        return units
+
+    def mark_exhausted(self):
+        """La API ha respondido quotaExceeded: el presupuesto de hoy se da por agotado.
+
+        Así el resto de llamadas (y de procesos) fallan antes de salir a la red
+        en lugar de gastar intentos en errores que no pueden salir bien.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO quota_usage_keys (day, key_id, units, requests) VALUES (?, ?, ?, 0)"
+                " ON CONFLICT(day, key_id) DO UPDATE SET units = MAX(units, excluded.units)",
+                (quota_day(), self.key_id, self.daily_quota)
+            )
+
+    def refund(self, units: int):
+        """Devuelve unidades de una reserva cuya request no llegó a la API."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE quota_usage_keys SET units = MAX(0, units - ?), requests = MAX(0, requests - 1)"
+                " WHERE day = ? AND key_id = ?", (units, quota_day(), self.key_id)
+            )
+
+
+def parse_api_keys(value: str) -> List[Tuple[str, Optional[int]]]:
+    """'k1, k2:50000' -> [('k1', None), ('k2', 50000)] (cuota propia opcional por key)"""
+    keys = []
+    for token in re.split(r'[\s,;]+', value or ''):
+        key, _, quota = token.partition(':')
+        if key:
+            keys.append((key, int(quota) if quota else None))
+    return keys
+
+
+def key_fingerprint(key: str) -> str:
+    """Identificador estable de una key para la BD (nunca se guarda la key en claro)."""
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]
+
+
+def mask_key(key: str) -> str:
+    return f"…{key[-4:]}" if key else 'default'
+
+
+class CredentialPool:
+    """Varias API keys (proyectos de Google Cloud) con presupuesto diario propio.
+
+    Mantiene la interfaz de QuotaScheduler (reserve, refund, used, remaining,
+    can_afford, mark_exhausted) sumando todas las keys. Cada reserva se hace
+    contra la key con más unidades libres y esa key queda como la "actual" del
+    hilo, para que el transporte la ponga en la request. Si una key responde
+    quotaExceeded se marca agotada y las siguientes reservas pasan a otra.
+
+    Con una sola key (o ninguna) usa el contador '' de siempre y no reescribe
+    nada: current_key() devuelve None y cada cliente usa su developerKey.
+    """
+
+    def __init__(self, keys: List[Tuple[str, Optional[int]]], db_path: str = DEFAULT_QUOTA_DB,
+                 daily_quota: int = DEFAULT_DAILY_QUOTA, policy: str = DEFAULT_POLICY):
+        keys = list(dict((key, quota) for key, quota in keys).items())
+        self.policy = policy
+        self._local = threading.local()
+        if len(keys) <= 1:
+            quota = keys[0][1] if keys and keys[0][1] else daily_quota
+            self._schedulers = {None: QuotaScheduler(db_path, quota, policy)}
+        else:
+            self._schedulers = {
+                key: QuotaScheduler(db_path, quota or daily_quota, policy, key_id=key_fingerprint(key))
+                for key, quota in keys
+            }
+
+    @property
+    def keys(self) -> List[str]:
+        return [key for key in self._schedulers if key is not None]
+
+    @property
+    def daily_quota(self) -> int:
+        return sum(s.daily_quota for s in self._schedulers.values())
+
+    def used(self) -> int:
+        return sum(s.used() for s in self._schedulers.values())
+
+    def remaining(self) -> int:
+        return sum(s.remaining() for s in self._schedulers.values())
+
+    def can_afford(self, units: int) -> bool:
+        """Alguna key puede pagar `units` (una llamada nunca se reparte entre keys)."""
+        return any(s.remaining() >= units for s in self._schedulers.values())
+
+    def current_key(self) -> Optional[str]:
+        """Key de la última reserva de este hilo (None si no hay pool)."""
+        return getattr(self._local, 'key', None)
+
+    def _scheduler(self, key: Optional[str]) -> QuotaScheduler:
+        return self._schedulers[key if key is not None else self.current_key()]
+
+    def reserve(self, endpoint: str, units: Optional[int] = None) -> int:
+        """Reserva en la key con más presupuesto libre y la fija como actual del hilo."""
+        units = endpoint_cost(endpoint) if units is None else units
+        while True:
+            by_budget = sorted(self._schedulers.items(), key=lambda item: item[1].remaining(), reverse=True)
+            for key, scheduler in by_budget:
+                # _try_reserve vuelve a comprobar dentro de la transacción (otros procesos)
+                if scheduler._try_reserve(units):
+                    self._local.key = key
+                    return units
+            if self.policy != 'block':
+                raise QuotaExceeded(
+                    f"Cuota diaria agotada en {len(self._schedulers)} key(s): {endpoint} necesita "
+                    f"{units} unidades y quedan {self.remaining()}"
+                )
+            wait = seconds_until_reset()
+            print(f"⏳ Cuota diaria agotada — esperando {wait / 3600:.1f}h al reset para {endpoint}")
+            time.sleep(wait)
+
+    def refund(self, units: int, key: Optional[str] = None):
+        self._scheduler(key).refund(units)
+
+    def mark_exhausted(self, key: Optional[str] = None):
+        """Agota la key que respondió quotaExceeded (por defecto, la actual del hilo)."""
+        self._scheduler(key).mark_exhausted()
+
+    def usage_by_key(self) -> Dict[str, Dict[str, int]]:
+        """{etiqueta enmascarada: {'used', 'remaining', 'daily_quota'}} para informes."""
+        return {
+            mask_key(key): {'used': s.used(), 'remaining': s.remaining(), 'daily_quota': s.daily_quota}
+            for key, s in self._schedulers.items()
+        }
+
+    def summary(self) -> str:
+        lines = [f"🔑 Cuota por API key ({len(self._schedulers)}):"]
+        for label, usage in self.usage_by_key().items():
+            lines.append(f"   • {label:<10} {usage['used']:>6,}/{usage['daily_quota']:,} unidades | "
+                         f"restantes {usage['remaining']:,}")
+        return '\n'.join(lines)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def configured_api_keys() -> List[Tuple[str, Optional[int]]]:
+    """Keys del pool: YOUTUBE_API_KEYS (separadas por comas) más YOUTUBE_API_KEY."""
+    keys = parse_api_keys(os.environ.get('YOUTUBE_API_KEYS', ''))
+    keys += parse_api_keys(os.environ.get('YOUTUBE_API_KEY', ''))
+    return keys
+
+
+def get_quota_scheduler() -> CredentialPool:
+    """Planificador único del proceso (pool de keys; una key = contador clásico)."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = CredentialPool(configured_api_keys())
+    return _scheduler
+
+
+def print_key_summary():
+    """Desglose de cuota por key (solo si hay pool de varias keys)."""
+    pool = get_quota_scheduler()
+    if len(pool.keys) > 1:
+        print(pool.summary())
+
+
+def configure_credential_pool(keys: List[str], daily_quota: int = DEFAULT_DAILY_QUOTA):
+    """Sustituye el pool del proceso por `keys` (app web, tests, benchmarks)."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = CredentialPool([(key, None) for key in keys], daily_quota=daily_quota)
+    return _scheduler
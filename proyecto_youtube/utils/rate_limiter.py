@@ -0,0 +1,57 @@
+"""
+Limitador de ritmo (token bucket) compartido por todos los hilos del proceso
+Sustituye a los time.sleep() fijos entre keywords: cada request real a la API
+consume un token y espera sólo si se supera el ritmo configurado.
+Proyecto 201 digital
+"""
+
+import os
+import threading
+import time
+
+DEFAULT_MAX_RPS = float(os.environ.get('YOUTUBE_MAX_RPS', 5))
+
+
+class RateLimiter:
+    """Token bucket thread-safe: `rate` tokens/segundo con ráfagas de hasta `burst`."""
+
+    def __init__(self, rate: float = DEFAULT_MAX_RPS, burst: int = None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Bloquea hasta disponer de `tokens`. Devuelve los segundos esperados."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Limitador único del proceso (lo usa el transporte del cliente compartido)."""
+    global _shared_limiter
+    if _shared_limiter is None:
+        with _shared_lock:
+            if _shared_limiter is None:
+                _shared_limiter = RateLimiter()
+    return _shared_limiter
@@ -0,0 +1,126 @@
+"""
+Almacén de estadísticas de videos recientes por canal
+Un mismo canal aparece en varias keywords y otra vez en el informe agregado:
+sus videos recientes se piden una sola vez por ejecución (memoria) y se
+guardan como snapshot del día en la BD, de modo que las ejecuciones
+posteriores del mismo día los reutilizan sin gastar cuota.
+Proyecto 201 digital
+"""
+
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from quota_scheduler import quota_day
+
+# Persistencia opcional en la BD del proyecto (tabla channel_recent_snapshots)
+try:
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from proyecto_youtube.db.session import SessionLocal
+    from proyecto_youtube.db.utils import init_db, load_recent_snapshots, save_recent_snapshots
+except Exception:
+    SessionLocal = None
+
+
+class RecentStatsStore:
+    """Memoria de la ejecución -> snapshot del día en BD -> `fetch` (API)."""
+
+    def __init__(self, use_db: bool = True):
+        self.use_db = use_db and SessionLocal is not None
+        self._memory: Dict[tuple, Dict] = {}  # (channelId, max_videos) -> resultado
+        self._lock = threading.Lock()
+        self._db_ready = False
+        self.stats = {'requested': 0, 'memory_hits': 0, 'snapshot_hits': 0, 'fetched': 0}
+
+    def _load_snapshots(self, channel_ids: List[str], max_videos: int) -> Dict[str, Dict]:
+        if not self.use_db or not channel_ids:
+            return {}
+        session = SessionLocal()
+        try:
+            if not self._db_ready:
+                init_db()
+                self._db_ready = True
+            return load_recent_snapshots(session, channel_ids, quota_day(), max_videos)
+        except Exception as e:
+            print(f"⚠️  Snapshots de videos recientes: no se pudo leer la BD ({e})")
+            return {}
+        finally:
+            session.close()
+
+    def _save_snapshots(self, results: Dict[str, Dict], max_videos: int):
+        # Sólo se guardan resultados con videos: un fallo de la API no debe
+        # quedar cacheado como "canal sin videos" el resto del día
+        snapshots = {cid: r for cid, r in results.items() if r.get('recent_count')}
+        if not self.use_db or not snapshots:
+            return
+        session = SessionLocal()
+        try:
+            save_recent_snapshots(session, snapshots, quota_day(), max_videos)
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️  Snapshots de videos recientes: no se pudo guardar en la BD ({e})")
+        finally:
+            session.close()
+
+    def get_many(self, channel_ids: Iterable[str], max_videos: int,
+                 fetch: Callable[[List[str]], Dict[str, Dict]]) -> Dict[str, Dict]:
+        """Devuelve {channelId: stats} llamando a `fetch` sólo con los canales que falten."""
+        ids = list(dict.fromkeys(cid for cid in channel_ids if cid))
+        result: Dict[str, Dict] = {}
+        with self._lock:
+            self.stats['requested'] += len(ids)
+            pending = []
+            for cid in ids:
+                cached = self._memory.get((cid, max_videos))
+                if cached is not None:
+                    result[cid] = cached
+                    self.stats['memory_hits'] += 1
+                else:
+                    pending.append(cid)
+
+        snapshots = self._load_snapshots(pending, max_videos)
+        with self._lock:
+            for cid, data in snapshots.items():
+                self._memory[(cid, max_videos)] = data
+                result[cid] = data
+            self.stats['snapshot_hits'] += len(snapshots)
+        missing = [cid for cid in pending if cid not in snapshots]
+
+        if missing:
+            fetched = fetch(missing)
+            with self._lock:
+                # Igual que en la BD: un fallo (sin videos) se vuelve a pedir la próxima vez
+                for cid, data in fetched.items():
+                    if data.get('recent_count'):
+                        self._memory[(cid, max_videos)] = data
+                self.stats['fetched'] += len(missing)
+            self._save_snapshots(fetched, max_videos)
+            result.update(fetched)
+
+        return {cid: result[cid] for cid in ids if cid in result}
+
+    def skipped(self) -> int:
+        """Canales cuyos videos recientes no hubo que volver a pedir."""
+        return self.stats['memory_hits'] + self.stats['snapshot_hits']
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"🎞️  Videos recientes: {s['requested']} canales pedidos | {self.skipped()} reutilizados "
+                f"({s['memory_hits']} de esta ejecución, {s['snapshot_hits']} de snapshots de hoy) | "
+                f"{s['fetched']} consultados a la API")
+
+
+_recent_store = None
+_recent_store_lock = threading.Lock()
+
+
+def get_recent_stats_store() -> RecentStatsStore:
+    """Almacén único del proceso."""
+    global _recent_store
+    if _recent_store is None:
+        with _recent_store_lock:
+            if _recent_store is None:
+                _recent_store = RecentStatsStore()
+    return _recent_store
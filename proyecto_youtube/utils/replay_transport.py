@@ -0,0 +1,201 @@
+"""
+Transportes de grabación y reproducción para YouTube Data API v3
+RecordingHttp guarda cada respuesta real (también las sub-requests de los
+POST batch) en un almacén de fixtures en disco. ReplayHttp sirve esos
+fixtures sin red, de forma determinista y con una latencia artificial
+configurable, para ejecutar los pipelines completos offline (benchmarks,
+regresiones, ajuste de concurrencia) sin gastar cuota real.
+Proyecto 201 digital
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from email.parser import Parser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httplib2
+
+from response_cache import OfflineCacheMiss, cache_key, endpoint_from_uri, normalize_params
+
+TRANSPORT_MODES = ('live', 'record', 'replay')
+DEFAULT_TRANSPORT_MODE = os.environ.get('YOUTUBE_TRANSPORT', 'live')
+DEFAULT_FIXTURES_DIR = os.environ.get(
+    'YOUTUBE_FIXTURES_DIR', str(Path(__file__).resolve().parents[1] / 'fixtures' / 'api')
+)
+DEFAULT_REPLAY_LATENCY_MS = float(os.environ.get('YOUTUBE_REPLAY_LATENCY_MS', 0))
+
+
+class FixtureMiss(OfflineCacheMiss):
+    """Modo replay y no hay fixture grabado para la request pedida."""
+
+
+class FixtureStore:
+    """Un fichero JSON por request (endpoint + parámetros normalizados)."""
+
+    def __init__(self, directory: str = DEFAULT_FIXTURES_DIR):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def _path(self, endpoint: str, params: Dict[str, str]) -> Path:
+        return self.directory / f"{endpoint}_{cache_key(endpoint, params)[:20]}.json"
+
+    def get(self, uri: str) -> Optional[Dict]:
+        endpoint = endpoint_from_uri(uri)
+        if endpoint is None:
+            return None
+        path = self._path(endpoint, normalize_params(uri))
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    def put(self, uri: str, status: int, content_type: str, body: str):
+        endpoint = endpoint_from_uri(uri)
+        if endpoint is None:
+            return
+        params = normalize_params(uri)
+        fixture = {'endpoint': endpoint, 'params': params, 'status': status,
+                   'content_type': content_type, 'body': body}
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._path(endpoint, params).write_text(
+                json.dumps(fixture, ensure_ascii=False, indent=1), encoding='utf-8'
+            )
+
+    def __len__(self):
+        return len(list(self.directory.glob('*.json'))) if self.directory.exists() else 0
+
+
+# ---------------- multipart/mixed de los POST batch ----------------
+
+def _parse_multipart(content_type: str, body: str):
+    return Parser().parsestr(f"content-type: {content_type}\r\n\r\n{body}").get_payload()
+
+
+def _split_http_message(payload: str) -> Tuple[str, Dict[str, str], str]:
+    """'LINEA\\r\\nCabecera: v\\r\\n\\r\\ncuerpo' -> (línea inicial, cabeceras, cuerpo)"""
+    payload = payload.replace('\r\n', '\n')
+    head, _, body = payload.partition('\n\n')
+    lines = head.split('\n')
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return lines[0], headers, body.strip()
+
+
+def batch_sub_requests(content_type: str, body: str) -> List[Tuple[str, str]]:
+    """Sub-requests de un POST batch -> [(Content-ID, ruta con query)]"""
+    parts = []
+    for part in _parse_multipart(content_type, body):
+        request_line, _, _ = _split_http_message(part.get_payload())
+        parts.append((part['Content-ID'], request_line.split(' ')[1]))
+    return parts
+
+
+def batch_sub_responses(content_type: str, content: str) -> Dict[str, Tuple[int, str, str]]:
+    """Respuesta de un POST batch -> {Content-ID de la request: (status, content-type, cuerpo)}"""
+    responses = {}
+    for part in _parse_multipart(content_type, content):
+        status_line, headers, body = _split_http_message(part.get_payload())
+        content_id = part['Content-ID'].replace('<response-', '<', 1)
+        responses[content_id] = (int(status_line.split(' ')[1]), headers.get('content-type', 'application/json'), body)
+    return responses
+
+
+def build_batch_response(parts: List[Tuple[str, int, str, str]]) -> Tuple[httplib2.Response, bytes]:
+    """[(Content-ID, status, content-type, cuerpo)] -> respuesta multipart como la de la API"""
+    boundary = 'batch_replay_boundary'
+    chunks = []
+    for content_id, status, content_type, body in parts:
+        reason = 'OK' if status == 200 else 'Error'
+        chunks.append(
+            f"--{boundary}\r\nContent-Type: application/http\r\n"
+            f"Content-ID: {content_id.replace('<', '<response-', 1)}\r\n\r\n"
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n\r\n{body}\r\n"
+        )
+    content = (''.join(chunks) + f"--{boundary}--").encode('utf-8')
+    headers = {'status': '200', 'content-type': f'multipart/mixed; boundary={boundary}'}
+    return httplib2.Response(headers), content
+
+
+def _is_batch(uri: str, method: str) -> bool:
+    return method == 'POST' and '/batch' in uri
+
+
+class RecordingHttp:
+    """Pasa las requests a la red y graba cada respuesta en el FixtureStore."""
+
+    def __init__(self, inner, store: FixtureStore):
+        self.inner = inner
+        self.store = store
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        resp, content = self.inner.request(uri, method=method, body=body, headers=headers,
+                                           redirections=redirections, connection_type=connection_type)
+        content_type = resp.get('content-type', 'application/json')
+        if method == 'GET':
+            self.store.put(uri, resp.status, content_type, content.decode('utf-8'))
+        elif _is_batch(uri, method) and resp.status == 200:
+            sub_responses = batch_sub_responses(content_type, content.decode('utf-8'))
+            for content_id, path in batch_sub_requests(headers['content-type'], body):
+                if content_id in sub_responses:
+                    status, sub_type, sub_body = sub_responses[content_id]
+                    self.store.put(path, status, sub_type, sub_body)
+        return resp, content
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayHttp:
+    """Sirve fixtures grabados sin red, con latencia artificial por round-trip.
+
+    La latencia es `latency_ms` ± `jitter_ms` con una semilla fija, así dos
+    ejecuciones con la misma configuración ven exactamente los mismos tiempos
+    simulados. Si falta un fixture se lanza FixtureMiss.
+    """
+
+    def __init__(self, store: FixtureStore, latency_ms: float = DEFAULT_REPLAY_LATENCY_MS,
+                 jitter_ms: float = 0.0, seed: int = 201):
+        self.store = store
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.round_trips = 0
+
+    def _sleep(self):
+        with self._lock:
+            self.round_trips += 1
+            delay = self.latency_ms + (self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _fixture(self, uri: str) -> Dict:
+        fixture = self.store.get(uri)
+        if fixture is None:
+            endpoint = endpoint_from_uri(uri)
+            raise FixtureMiss(f"Sin fixture grabado para {endpoint} {normalize_params(uri)}")
+        return fixture
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        self._sleep()
+        if _is_batch(uri, method):
+            parts = []
+            for content_id, path in batch_sub_requests(headers['content-type'], body):
+                fixture = self._fixture(path)
+                parts.append((content_id, fixture['status'], fixture['content_type'], fixture['body']))
+            return build_batch_response(parts)
+
+        fixture = self._fixture(uri)
+        resp = httplib2.Response({'status': str(fixture['status']), 'content-type': fixture['content_type']})
+        return resp, fixture['body'].encode('utf-8')
+
+    def close(self):
+        pass
@@ -0,0 +1,176 @@
+"""
+Caché persistente de respuestas de YouTube Data API (SQLite)
+Clave = endpoint + parámetros normalizados, TTL por endpoint y expulsión LRU
+cuando la caché supera el tamaño máximo. Compartida entre procesos. Cada
+respuesta guarda su ETag: al caducar se revalida con If-None-Match y un 304
+la renueva sin volver a descargarla.
+Proyecto 201 digital
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+CACHE_MODES = ('off', 'read-write', 'offline')
+DEFAULT_CACHE_MODE = os.environ.get('YOUTUBE_CACHE_MODE', 'read-write')
+DEFAULT_CACHE_PATH = os.environ.get(
+    'YOUTUBE_CACHE_PATH', str(Path(__file__).resolve().parents[1] / 'db' / 'api_cache.db')
+)
+DEFAULT_MAX_BYTES = int(os.environ.get('YOUTUBE_CACHE_MAX_MB', 200)) * 1024 * 1024
+
+# TTL en segundos por endpoint (las búsquedas cambian más despacio que las stats)
+DEFAULT_TTLS = {
+    'search': 12 * 3600,
+    'videos': 6 * 3600,
+    'channels': 24 * 3600,
+    'playlistItems': 6 * 3600,
+}
+DEFAULT_TTL = 6 * 3600
+
+# Parámetros que no cambian la respuesta y no deben formar parte de la clave
+_IGNORED_PARAMS = {'key', 'alt', 'prettyPrint', 'quotaUser'}
+
+
+class OfflineCacheMiss(Exception):
+    """Modo offline y la respuesta pedida no está en la caché."""
+
+
+def endpoint_from_uri(uri: str) -> Optional[str]:
+    """'https://youtube.googleapis.com/youtube/v3/search?...' -> 'search'"""
+    path = urlsplit(uri).path.rstrip('/')
+    if '/youtube/v3/' not in path:
+        return None
+    return path.rsplit('/youtube/v3/', 1)[1] or None
+
+
+def normalize_params(uri: str) -> Dict[str, str]:
+    """Parámetros de la query sin credenciales y con `q` normalizada."""
+    params = {}
+    for name, value in parse_qsl(urlsplit(uri).query, keep_blank_values=True):
+        if name in _IGNORED_PARAMS:
+            continue
+        if name == 'q':
+            value = ' '.join(value.lower().split())
+        params[name] = value
+    return params
+
+
+def cache_key(endpoint: str, params: Dict[str, str]) -> str:
+    payload = json.dumps([endpoint, sorted(params.items())], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Almacén SQLite de respuestas crudas de la API."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttls: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, endpoint TEXT, params TEXT, content BLOB,"
+            " content_type TEXT, size INTEGER, created_at REAL, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        for name, sql_type in (('etag', 'TEXT'), ('parse_ms', 'REAL')):
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE responses ADD COLUMN {name} {sql_type}")
+        self._conn.commit()
+
+    def ttl_for(self, endpoint: str) -> int:
+        return self.ttls.get(endpoint, DEFAULT_TTL)
+
+    def get(self, endpoint: str, params: Dict[str, str], ignore_ttl: bool = False) -> Optional[Tuple[bytes, str]]:
+        """Devuelve (content, content_type) si hay entrada vigente."""
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, content_type, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            content, content_type, created_at = row
+            if not ignore_ttl and now - created_at > self.ttl_for(endpoint):
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return content, content_type
+
+    def get_revalidatable(self, endpoint: str, params: Dict[str, str]) -> Optional[Tuple[bytes, str, str, float]]:
+        """Entrada caducada con ETag -> (content, content_type, etag, parse_ms) para un If-None-Match."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, content_type, etag, parse_ms FROM responses WHERE key = ? AND etag IS NOT NULL",
+                (cache_key(endpoint, params),)
+            ).fetchone()
+        if row is None:
+            return None
+        content, content_type, etag, parse_ms = row
+        return content, content_type, etag, parse_ms or 0.0
+
+    def touch(self, endpoint: str, params: Dict[str, str]):
+        """La API respondió 304: la entrada vuelve a estar vigente un TTL completo."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET created_at = ?, last_access = ? WHERE key = ?",
+                               (now, now, cache_key(endpoint, params)))
+            self._conn.commit()
+
+    def put(self, endpoint: str, params: Dict[str, str], content: bytes,
+            content_type: str = 'application/json', etag: Optional[str] = None,
+            parse_ms: Optional[float] = None):
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, endpoint, params, content, content_type, size, created_at, last_access, etag, parse_ms)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, json.dumps(params, ensure_ascii=False), content,
+                 content_type, len(content), now, now, etag, parse_ms)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Expulsar por LRU hasta quedar por debajo de max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size or 0
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for endpoint, in self._conn.execute("SELECT DISTINCT endpoint FROM responses").fetchall():
+                self._conn.execute(
+                    "DELETE FROM responses WHERE endpoint = ? AND created_at < ?",
+                    (endpoint, now - self.ttl_for(endpoint))
+                )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
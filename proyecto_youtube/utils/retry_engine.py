@@ -0,0 +1,365 @@
+"""
+Motor de reintentos compartido para YouTube Data API y Google Trends
+Clasifica cada error (cuota agotada, rate limit, error de servidor, red o
+definitivo) leyendo el `reason` de la respuesta, reintenta sólo lo
+transitorio con backoff exponencial con jitter (respetando Retry-After),
+abre un circuito por endpoint cuando fallan muchos intentos seguidos para
+fallar rápido durante caídas, y mide la latencia de cada intento.
+Proyecto 201 digital
+"""
+
+import email.utils
+import http.client
+import json
+import os
+import random
+import socket
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+from typing import Callable, Dict, Optional
+
+try:
+    from googleapiclient.errors import HttpError
+except ImportError:
+    HttpError = None
+
+try:
+    from httplib2 import HttpLib2Error
+except ImportError:
+    HttpLib2Error = None
+
+try:
+    from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout as RequestsTimeout
+except ImportError:
+    RequestsConnectionError = RequestsTimeout = None
+
+DEFAULT_MAX_RETRIES = int(os.environ.get('RETRY_MAX_RETRIES', 4))
+DEFAULT_BASE_DELAY = float(os.environ.get('RETRY_BASE_DELAY', 1.0))
+DEFAULT_MAX_DELAY = float(os.environ.get('RETRY_MAX_DELAY', 60))
+DEFAULT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5))
+DEFAULT_RESET_SECONDS = float(os.environ.get('CIRCUIT_RESET_SECONDS', 60))
+
+# Configuración por familia de APIs (Google Trends castiga los 429 durante minutos)
+ENGINE_PRESETS = {
+    'youtube': {},
+    'trends': {'base_delay': 5.0, 'max_delay': 120.0, 'max_retries': 3},
+}
+
+# `reason` de errors[] de la API de Google
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded', 'dailyLimitExceededUnreg'}
+RATE_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded', 'concurrentLimitExceeded',
+                'servingLimitExceeded'}
+
+# quota   -> no reintentar, el presupuesto diario no vuelve hasta el reset
+# rate    -> reintentar con backoff (429 o 403 rateLimitExceeded)
+# server  -> reintentar (5xx)
+# network -> reintentar (timeouts, conexión)
+# fatal   -> no reintentar (400, 404, 403 forbidden/keyInvalid, errores de código)
+RETRYABLE_KINDS = ('rate', 'server', 'network')
+
+ErrorInfo = namedtuple('ErrorInfo', 'kind status reason retry_after')
+
+_NETWORK_ERRORS = tuple(e for e in (socket.timeout, socket.gaierror, TimeoutError, ConnectionError,
+                                    http.client.HTTPException, HttpLib2Error,
+                                    RequestsConnectionError, RequestsTimeout) if e is not None)
+
+
+class CircuitOpen(Exception):
+    """El endpoint ha fallado demasiadas veces seguidas; no se intenta hasta que se enfríe."""
+
+
+class ResponseFailure(Exception):
+    """Respuesta HTTP >= 400 vista en el transporte (antes de que se convierta en HttpError)."""
+
+    def __init__(self, status: int, headers, content: bytes, result=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.result = result
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Cabecera Retry-After (segundos o fecha HTTP) -> segundos a esperar."""
+    if value is None or value == '':
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(str(value))
+        return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _error_reason(content) -> str:
+    """Primer `reason` de un cuerpo de error de Google ({"error": {"errors": [{"reason": ...}]}})."""
+    if not content:
+        return ''
+    try:
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', errors='replace')
+        error = json.loads(content).get('error', {})
+    except (ValueError, AttributeError):
+        return ''
+    if not isinstance(error, dict):
+        return ''
+    for detail in error.get('errors') or []:
+        if detail.get('reason'):
+            return detail['reason']
+    # Formato nuevo: details[].reason (ErrorInfo de google.rpc) o status
+    for detail in error.get('details') or []:
+        if isinstance(detail, dict) and detail.get('reason'):
+            return detail['reason']
+    return error.get('status', '') or ''
+
+
+def _header(headers, name: str):
+    if headers is None:
+        return None
+    getter = getattr(headers, 'get', None)
+    if getter is None:
+        return None
+    return getter(name) or getter(name.title())
+
+
+def classify_response(status: int, headers=None, content=None) -> ErrorInfo:
+    """Clasifica una respuesta HTTP de error por código y `reason`."""
+    reason = _error_reason(content)
+    retry_after = parse_retry_after(_header(headers, 'retry-after'))
+    if reason in QUOTA_REASONS:
+        return ErrorInfo('quota', status, reason, retry_after)
+    if status == 429 or reason in RATE_REASONS:
+        return ErrorInfo('rate', status, reason, retry_after)
+    if status is not None and 500 <= status < 600:
+        return ErrorInfo('server', status, reason, retry_after)
+    return ErrorInfo('fatal', status, reason, retry_after)
+
+
+def classify_error(exc: BaseException) -> ErrorInfo:
+    """Clasifica una excepción de googleapiclient, del transporte, de pytrends o de red."""
+    if isinstance(exc, ResponseFailure):
+        return classify_response(exc.status, exc.headers, exc.content)
+    if HttpError is not None and isinstance(exc, HttpError):
+        try:
+            status = int(exc.resp.status)
+        except (AttributeError, TypeError, ValueError):
+            status = None
+        return classify_response(status, exc.resp, exc.content)
+    # pytrends (TooManyRequestsError, ResponseError) y requests llevan la respuesta adjunta
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None:
+        return classify_response(int(status), getattr(response, 'headers', None), getattr(response, 'text', None))
+    if type(exc).__name__ == 'TooManyRequestsError':
+        return ErrorInfo('rate', 429, '', None)
+    if isinstance(exc, _NETWORK_ERRORS):
+        return ErrorInfo('network', None, type(exc).__name__, None)
+    return ErrorInfo('fatal', None, type(exc).__name__, None)
+
+
+class _Circuit:
+    """closed -> (N fallos seguidos) -> open -> (enfriamiento) -> half-open -> 1 prueba."""
+
+    def __init__(self):
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+
+class RetryEngine:
+    """Ejecuta llamadas con reintentos, circuito por endpoint y métricas por intento."""
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_seconds: float = DEFAULT_RESET_SECONDS, sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic, verbose: bool = True):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.verbose = verbose
+        self._sleep = sleep
+        self._clock = clock
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+        self._circuits: Dict[str, _Circuit] = defaultdict(_Circuit)
+        self.stats: Dict[str, Dict] = defaultdict(lambda: {
+            'calls': 0, 'attempts': 0, 'successes': 0, 'retries': 0, 'failures': 0,
+            'quota_errors': 0, 'rate_limited': 0, 'fast_fails': 0, 'slept': 0.0,
+            'latencies': deque(maxlen=2000),
+        })
+
+    # ---------------- circuito ----------------
+
+    def _before_attempt(self, endpoint: str):
+        with self._lock:
+            circuit = self._circuits[endpoint]
+            if circuit.state == 'open':
+                if self._clock() - circuit.opened_at < self.reset_seconds:
+                    self.stats[endpoint]['fast_fails'] += 1
+                    raise CircuitOpen(f"Circuito abierto para {endpoint} tras {circuit.failures} fallos seguidos")
+                circuit.state = 'half-open'
+            if circuit.state == 'half-open':
+                if circuit.probing:
+                    self.stats[endpoint]['fast_fails'] += 1
+                    raise CircuitOpen(f"Circuito de {endpoint} en prueba; reintenta más tarde")
+                circuit.probing = True
+
+    def _record_success(self, endpoint: str):
+        with self._lock:
+            circuit = self._circuits[endpoint]
+            if circuit.state != 'closed' and self.verbose:
+                print(f"✅ Circuito de {endpoint} cerrado de nuevo")
+            circuit.state, circuit.failures, circuit.probing = 'closed', 0, False
+
+    def _record_failure(self, endpoint: str, transient: bool):
+        with self._lock:
+            circuit = self._circuits[endpoint]
+            circuit.probing = False
+            if not transient:
+                # Un 4xx definitivo demuestra que el servicio responde
+                if circuit.state == 'half-open':
+                    circuit.state = 'closed'
+                circuit.failures = 0
+                return
+            circuit.failures += 1
+            if circuit.state == 'half-open' or circuit.failures >= self.failure_threshold:
+                if circuit.state != 'open' and self.verbose:
+                    print(f"🔌 Circuito abierto para {endpoint}: {circuit.failures} fallos seguidos "
+                          f"(se reintenta en {self.reset_seconds:.0f}s)")
+                circuit.state, circuit.opened_at = 'open', self._clock()
+
+    def circuit_state(self, endpoint: str) -> str:
+        with self._lock:
+            return self._circuits[endpoint].state
+
+    # ---------------- reintentos ----------------
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniforme en [0, min(max_delay, base * 2^intento)]."""
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, endpoint: str, func: Callable, *args, **kwargs):
+        """Ejecuta func(*args, **kwargs) reintentando sólo errores transitorios.
+
+        Lanza CircuitOpen sin llamar si el circuito del endpoint está abierto,
+        y la excepción original en cuanto el error es definitivo, de cuota, o
+        se agotan los reintentos (o el Retry-After pedido supera max_delay).
+        """
+        stats = self.stats[endpoint]
+        with self._lock:
+            stats['calls'] += 1
+        attempt = 0
+        while True:
+            self._before_attempt(endpoint)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as exc:
+                elapsed = time.perf_counter() - start
+                info = classify_error(exc)
+                transient = info.kind in RETRYABLE_KINDS
+                self._record_failure(endpoint, transient)
+                with self._lock:
+                    stats['attempts'] += 1
+                    stats['latencies'].append(elapsed)
+                    stats['quota_errors'] += info.kind == 'quota'
+                    stats['rate_limited'] += info.kind == 'rate'
+                delay = self._retry_delay(info, attempt) if transient else None
+                if delay is None:
+                    with self._lock:
+                        stats['failures'] += 1
+                    raise
+                attempt += 1
+                with self._lock:
+                    stats['retries'] += 1
+                    stats['slept'] += delay
+                if self.verbose:
+                    label = info.reason or (f"HTTP {info.status}" if info.status else info.kind)
+                    print(f"⚠️ {endpoint}: {label} — reintento {attempt}/{self.max_retries} en {delay:.1f}s...")
+                self._sleep(delay)
+                continue
+            elapsed = time.perf_counter() - start
+            self._record_success(endpoint)
+            with self._lock:
+                stats['attempts'] += 1
+                stats['successes'] += 1
+                stats['latencies'].append(elapsed)
+            return result
+
+    def _retry_delay(self, info: ErrorInfo, attempt: int) -> Optional[float]:
+        if attempt >= self.max_retries:
+            return None
+        if info.retry_after is not None:
+            # El servidor sabe cuándo volver; si pide más que max_delay no bloqueamos el proceso
+            return info.retry_after if info.retry_after <= self.max_delay else None
+        return self.backoff(attempt)
+
+    # ---------------- métricas ----------------
+
+    @staticmethod
+    def _percentile(values, pct: float) -> float:
+        vals = sorted(values)
+        if not vals:
+            return 0.0
+        k = (len(vals) - 1) * pct / 100.0
+        f = int(k)
+        c = min(f + 1, len(vals) - 1)
+        return vals[f] + (vals[c] - vals[f]) * (k - f)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Métricas por endpoint (latencias de intento en ms)."""
+        with self._lock:
+            result = {}
+            for endpoint, s in self.stats.items():
+                lat = list(s['latencies'])
+                result[endpoint] = {k: v for k, v in s.items() if k != 'latencies'}
+                result[endpoint].update({
+                    'p50_ms': round(self._percentile(lat, 50) * 1000, 1),
+                    'p95_ms': round(self._percentile(lat, 95) * 1000, 1),
+                    'circuit': self._circuits[endpoint].state,
+                })
+            return result
+
+    def summary(self) -> str:
+        lines = ['🔁 Reintentos por endpoint:']
+        for endpoint, s in sorted(self.snapshot().items()):
+            lines.append(
+                f"   {endpoint:<28} {s['calls']} llamadas | {s['attempts']} intentos | {s['retries']} reintentos "
+                f"({s['slept']:.1f}s) | {s['failures']} fallos | {s['quota_errors']} cuota | "
+                f"{s['fast_fails']} fast-fail | p50 {s['p50_ms']} ms p95 {s['p95_ms']} ms | {s['circuit']}"
+            )
+        return '\n'.join(lines)
+
+
+_engines: Dict[str, RetryEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_retry_engine(name: str = 'youtube') -> RetryEngine:
+    """Motor único del proceso por familia de APIs ('youtube' | 'trends')."""
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = RetryEngine(**ENGINE_PRESETS.get(name, {}))
+    return engine
+
+
+def call_with_retries(endpoint: str, func: Callable, *args, engine: str = 'youtube', **kwargs):
+    """Atajo: get_retry_engine(engine).call(endpoint, func, *args, **kwargs)."""
+    return get_retry_engine(engine).call(endpoint, func, *args, **kwargs)
+
+
+def print_retry_summary():
+    """Imprime las métricas de todos los motores que se han usado en el proceso."""
+    for name, engine in sorted(_engines.items()):
+        if engine.stats:
+            print(engine.summary().replace('Reintentos por endpoint', f'Reintentos por endpoint ({name})', 1))
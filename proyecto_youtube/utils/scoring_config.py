@@ -0,0 +1,140 @@
+"""
+Pesos y umbrales de scoring y decisión, en un fichero de configuración
+Los cuatro scorings del proyecto leen sus pesos y umbrales de aquí:
+- soft_decision      decide_niche_soft (nichos_youtube y youtube_search): RECOMENDADO/EVALUAR/DESCARTAR
+- opportunity        NicheAnalyzerYouTubeUnificado.calculate_opportunity_score
+- refined_potential  youtube_search.calcular_potencial_total_refinado
+- web_decision       WebNicheAnalyzer.make_decision (proyecto_web)
+La configuración por defecto es config/scoring/default.json (o el fichero de
+YOUTUBE_SCORING_CONFIG). Los tramos son listas [umbral, puntos]: en *_tiers
+de volumen/views gana el primer umbral que el valor alcanza (>=), en los de
+CPC/competencia el primero que no supera (<=); si no hay tramo, los puntos de
+*_floor / *_ceiling.
+El peso 'velocity' de opportunity (views/día respecto a velocity_reference,
+utils/view_velocity.py) es 0 por defecto para no mover los scores
+históricos; se activa en el fichero o en una simulación what-if.
+
+with_overrides() devuelve una copia con valores cambiados por ruta con puntos
+('opportunity.weights.views'), para simulaciones what-if sin tocar el fichero.
+API versionada como el léxico: el fichero declara "version".
+Proyecto 201 digital
+"""
+
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Sequence, Tuple
+
+# Versión del formato del fichero que entiende esta API
+SCORING_API_VERSION = 1
+
+DEFAULT_SCORING_PATH = os.environ.get(
+    'YOUTUBE_SCORING_CONFIG', str(Path(__file__).resolve().parents[1] / 'config' / 'scoring' / 'default.json')
+)
+
+SECTIONS = ('soft_decision', 'opportunity', 'refined_potential', 'web_decision')
+
+# Variables de entorno históricas que siguen mandando sobre el fichero
+ENV_OVERRIDES = {
+    'MEDIAN_VIEWS_THRESHOLD': 'soft_decision.median_min',
+    'P75_VIEWS_THRESHOLD': 'soft_decision.p75_min',
+}
+
+
+class ScoringConfigError(ValueError):
+    """Fichero de scoring ausente, con otra versión o ruta de override inexistente."""
+
+
+def points_at_least(value: float, tiers: Sequence[Sequence[float]], floor: float) -> float:
+    """Puntos del primer tramo cuyo umbral alcanza `value` (tramos de mayor a menor)."""
+    for threshold, points in tiers:
+        if value >= threshold:
+            return points
+    return floor
+
+
+def points_at_most(value: float, tiers: Sequence[Sequence[float]], ceiling: float) -> float:
+    """Puntos del primer tramo cuyo umbral no supera `value` (tramos de menor a mayor)."""
+    for threshold, points in tiers:
+        if value <= threshold:
+            return points
+    return ceiling
+
+
+def competition_key(level: Any) -> str:
+    """'Very High' (etiqueta de salida) -> 'very_high' (clave de la configuración)."""
+    return str(level or '').strip().lower().replace(' ', '_')
+
+
+class ScoringConfig:
+    """Secciones de pesos y umbrales (dicts) con acceso por atributo."""
+
+    def __init__(self, data: Dict[str, Any], api_version: int = SCORING_API_VERSION, source: str = '<dict>'):
+        if data.get('version') != api_version:
+            raise ScoringConfigError(f"{source}: scoring versión {data.get('version')}, "
+                                     f"se esperaba la {api_version}")
+        missing = [name for name in SECTIONS if name not in data]
+        if missing:
+            raise ScoringConfigError(f"{source}: faltan secciones {', '.join(missing)}")
+        self.data = copy.deepcopy(data)
+        self.source = source
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_SCORING_PATH, api_version: int = SCORING_API_VERSION) -> 'ScoringConfig':
+        path = Path(path)
+        if not path.exists():
+            raise ScoringConfigError(f"No existe el fichero de scoring {path}")
+        return cls(json.loads(path.read_text(encoding='utf-8')), api_version, path.name)
+
+    def __getattr__(self, name: str) -> Dict[str, Any]:
+        if name in SECTIONS:
+            return self.data[name]
+        raise AttributeError(name)
+
+    @property
+    def median_min(self) -> int:
+        return self.data['soft_decision']['median_min']
+
+    @property
+    def p75_min(self) -> int:
+        return self.data['soft_decision']['p75_min']
+
+    def with_overrides(self, overrides: Dict[str, Any]) -> 'ScoringConfig':
+        """Copia con los valores de `overrides` ({'seccion.clave[.subclave]': valor}) cambiados."""
+        if not overrides:
+            return self
+        data = copy.deepcopy(self.data)
+        for path, value in overrides.items():
+            keys = path.split('.')
+            node = data
+            for key in keys[:-1]:
+                if not isinstance(node.get(key), dict):
+                    raise ScoringConfigError(f"Ruta de scoring desconocida: {path}")
+                node = node[key]
+            if keys[-1] not in node:
+                raise ScoringConfigError(f"Ruta de scoring desconocida: {path}")
+            node[keys[-1]] = value
+        return ScoringConfig(data, self.data['version'], f"{self.source} (what-if)")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return copy.deepcopy(self.data)
+
+
+def _env_overrides() -> Dict[str, Any]:
+    return {path: int(os.environ[name]) for name, path in ENV_OVERRIDES.items() if os.environ.get(name)}
+
+
+_configs: Dict[Tuple[str, int], ScoringConfig] = {}
+_configs_lock = threading.Lock()
+
+
+def get_scoring_config(path: str = DEFAULT_SCORING_PATH,
+                       api_version: int = SCORING_API_VERSION) -> ScoringConfig:
+    """Configuración única del proceso (con MEDIAN_VIEWS_THRESHOLD / P75_VIEWS_THRESHOLD aplicados)."""
+    key = (str(path), api_version)
+    with _configs_lock:
+        if key not in _configs:
+            _configs[key] = ScoringConfig.from_file(path, api_version).with_overrides(_env_overrides())
+        return _configs[key]
@@ -0,0 +1,259 @@
+"""
+Matcher multi-patrón compilado para señales de automatización y monetización
+Cada diccionario (lista plana o {categoría: [palabras]}) se compila una sola
+vez: las palabras forman un trie y el trie se traduce a una única expresión
+regular (un autómata que ejecuta el motor `re` en C). Un texto corto (título,
+keyword, tag) se recorre en una pasada y se obtienen todos los aciertos con su
+posición, incluidos los solapados y los que son prefijo de otro ("top" dentro
+de "top 10"). En textos largos (descripciones) la búsqueda de subcadenas de
+CPython por palabra única es más rápida que cualquier recorrido carácter a
+carácter, así que a partir de SCAN_CHARS_PER_PATTERN caracteres por palabra
+del diccionario se usa esa vía; el resultado es el mismo.
+La semántica es la de los bucles `palabra in texto` que sustituye:
+coincidencia por subcadena sobre el texto en minúsculas, y las palabras
+repetidas en una lista cuentan tantas veces como aparecen.
+PhraseMatcher ofrece la misma interfaz sobre texto normalizado
+(text_normalizer): palabras y frases completas, sin acentos y con su plural
+regular, buscadas en los n-gramas de tokens en lugar de subcadenas ("top" no
+coincide con "laptop", "mejor" sí con "mejores").
+Proyecto 201 digital
+"""
+
+import re
+import sys
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from text_normalizer import NormalizedText, normalize_text, tokenize
+
+# Longitud (en caracteres por palabra del diccionario) a partir de la cual un
+# texto se busca palabra a palabra en lugar de recorrerlo con el autómata
+SCAN_CHARS_PER_PATTERN = 2
+
+Patterns = Union[Iterable[str], Dict[str, Iterable[str]]]
+Text = Union[str, NormalizedText]
+
+
+def _trie_regex(node: Dict) -> str:
+    """Expresión regular equivalente a un nodo del trie (la rama más larga primero)."""
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    # '' marca fin de palabra: el resto es opcional (codicioso -> coincidencia más larga)
+    return f'(?:{body})?' if '' in node else body
+
+
+class _WeightedMatcher(ABC):
+    """Palabras con su peso por categoría; las subclases implementan present()/any()."""
+
+    def __init__(self, patterns: Patterns):
+        groups = patterns.items() if isinstance(patterns, dict) else [(None, patterns)]
+        # palabra -> {categoría: veces que aparece en la lista}
+        self.weights: Dict[str, Dict[Optional[str], int]] = {}
+        self.categories: List[Optional[str]] = []
+        for category, words in groups:
+            self.categories.append(category)
+            for word in words:
+                word = word.lower()
+                if not word:
+                    raise ValueError(f"Señal no válida: {word!r}")
+                by_category = self.weights.setdefault(word, {})
+                by_category[category] = by_category.get(category, 0) + 1
+        self.patterns: Tuple[str, ...] = tuple(self.weights)
+        self._totals = {word: sum(by_category.values()) for word, by_category in self.weights.items()}
+
+    def __len__(self):
+        return len(self.patterns)
+
+    @abstractmethod
+    def present(self, text: Text) -> Set[str]:
+        """Palabras del diccionario que aparecen en el texto."""
+
+    def _weight(self, word: str, category: Optional[str] = None) -> int:
+        return self._totals[word] if category is None else self.weights[word].get(category, 0)
+
+    def count(self, text: Text, category: Optional[str] = None) -> int:
+        """Entradas de la lista (o de una categoría) que aparecen en el texto.
+
+        Equivale a sum(1 for w in lista if w in texto): una palabra repetida
+        en la lista cuenta tantas veces como aparece en ella.
+        """
+        return sum(self._weight(word, category) for word in self.present(text))
+
+    def counts(self, text: Text) -> Dict[Optional[str], int]:
+        """count() de cada categoría con una sola pasada sobre el texto."""
+        totals = {category: 0 for category in self.categories}
+        for word in self.present(text):
+            for category, weight in self.weights[word].items():
+                totals[category] += weight
+        return totals
+
+    def categories_in(self, text: Text) -> Set[Optional[str]]:
+        """Categorías con al menos una señal en el texto."""
+        return {category for word in self.present(text) for category in self.weights[word]}
+
+    def count_fields(self, fields: Sequence[Text]) -> Tuple[int, Set[str]]:
+        """count() sumado sobre varios campos (título, descripción, tags...).
+
+        Devuelve (total, señales detectadas); cada campo cuenta por separado.
+        """
+        total = 0
+        detected: Set[str] = set()
+        for field in fields:
+            if not field:
+                continue
+            found = self.present(field)
+            total += sum(self._totals[word] for word in found)
+            detected |= found
+        return total, detected
+
+
+class SignalMatcher(_WeightedMatcher):
+    """Diccionario de señales compilado en un autómata (subcadenas).
+
+    `patterns` puede ser una lista (categoría None) o un dict
+    {categoría: lista}. Los textos se pasan a minúsculas al buscar.
+    """
+
+    def __init__(self, patterns: Patterns):
+        super().__init__(patterns)
+        self.scan_limit = SCAN_CHARS_PER_PATTERN * len(self.patterns)
+        trie: Dict = {}
+        for word in self.patterns:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self._regex = re.compile(_trie_regex(trie)) if self.patterns else None
+        # Para cada palabra, las señales que empiezan en la misma posición (sus prefijos)
+        self._prefixes = {word: [p for p in self.patterns if word.startswith(p)] for word in self.patterns}
+
+    def _scan(self, text: str):
+        """Genera (inicio, palabra más larga) por cada posición con algún acierto."""
+        if self._regex is None:
+            return
+        search = self._regex.search
+        match = search(text)
+        while match:
+            start = match.start()
+            yield start, match.group()
+            match = search(text, start + 1)
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """Todos los aciertos [(posición, señal)] en orden, solapados incluidos."""
+        return [(start, word) for start, longest in self._scan(text.lower())
+                for word in self._prefixes[longest]]
+
+    def present(self, text: str) -> Set[str]:
+        """Señales distintas que aparecen en el texto."""
+        text = text.lower()
+        if len(text) > self.scan_limit:
+            return {word for word in self.patterns if word in text}
+        found: Set[str] = set()
+        for _, longest in self._scan(text):
+            found.update(self._prefixes[longest])
+        return found
+
+    def any(self, text: str) -> bool:
+        """¿Aparece alguna señal? (equivale a any(w in texto for w in lista))."""
+        text = text.lower()
+        if len(text) > self.scan_limit:
+            return any(word in text for word in self.patterns)
+        return self._regex is not None and self._regex.search(text) is not None
+
+
+class PhraseMatcher(_WeightedMatcher):
+    """Diccionario de palabras/frases completas sobre texto normalizado.
+
+    Acepta str (se normaliza y memoiza por contenido) o NormalizedText (p. ej.
+    los campos de normalize_video). Devuelve las palabras tal como están en
+    el diccionario, aunque el texto las traiga con otras tildes o mayúsculas.
+    """
+
+    def __init__(self, patterns: Patterns):
+        super().__init__(patterns)
+        # Una palabra: {token normalizado: [palabras del diccionario]}
+        self._words: Dict[str, List[str]] = {}
+        # Varias palabras: {frase normalizada: (primer token, [palabras del diccionario])}
+        self._phrases: Dict[str, Tuple[str, List[str]]] = {}
+        for word in self.patterns:
+            tokens = tokenize(word)
+            if not tokens:
+                raise ValueError(f"Señal sin palabras: {word!r}")
+            phrase = ' '.join(tokens)
+            # El plural regular del último token cuenta como la misma señal ("curso" -> "cursos")
+            variants = [phrase] if tokens[-1].isdigit() else [phrase, phrase + 's', phrase + 'es']
+            for variant in variants:
+                if len(tokens) == 1:
+                    self._words.setdefault(variant, []).append(word)
+                else:
+                    self._phrases.setdefault(variant, (tokens[0], []))[1].append(word)
+        self._word_keys = frozenset(self._words)
+        self._heads = frozenset(head for head, _ in self._phrases.values())
+
+    @staticmethod
+    def _normalized(text: Text) -> NormalizedText:
+        return text if isinstance(text, NormalizedText) else normalize_text(text or '')
+
+    def pattern(self, category: Optional[str] = None) -> str:
+        """Expresión regular equivalente a any() (o a una categoría) sobre texto plegado con fold().
+
+        Las variantes se compilan en un trie, las palabras de una frase se
+        separan con \\W+ y el conjunto va entre \\b; la sintaxis es común a
+        `re` (pandas) y al motor de Polars, para clasificar columnas enteras.
+        """
+        trie: Dict = {}
+        variants = [phrase for phrase, words in self._words.items() for word in words
+                    if category is None or category in self.weights[word]]
+        variants += [phrase for phrase, (_, words) in self._phrases.items() for word in words
+                     if category is None or category in self.weights[word]]
+        if not variants:
+            raise ValueError(f"Sin señales para la categoría {category!r}")
+        for phrase in variants:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        return r'\b(?:' + _trie_regex(trie).replace(re.escape(' '), r'\W+') + r')\b'
+
+    def find_all(self, text: Text) -> List[Tuple[int, str]]:
+        """Todos los aciertos [(posición en tokens, señal)] en orden."""
+        tokens = self._normalized(text).tokens
+        hits = []
+        for i, token in enumerate(tokens):
+            hits.extend((i, word) for word in self._words.get(token, ()))
+            if token in self._heads:
+                for phrase, (_, words) in self._phrases.items():
+                    n = phrase.count(' ') + 1
+                    if ' '.join(tokens[i:i + n]) == phrase:
+                        hits.extend((i, word) for word in words)
+        return sorted(hits, key=lambda hit: (hit[0], len(hit[1])))
+
+    def _phrases_in(self, normalized: NormalizedText):
+        """Frases de varias palabras presentes (sólo se buscan si aparece su primer token)."""
+        heads = self._heads.intersection(normalized.words)
+        if not heads:
+            return
+        for phrase, (head, words) in self._phrases.items():
+            if head in heads and normalized.has_phrase(phrase):
+                yield words
+
+    def present(self, text: Text) -> Set[str]:
+        """Señales distintas que aparecen en el texto."""
+        normalized = self._normalized(text)
+        found: Set[str] = set()
+        for token in self._word_keys.intersection(normalized.words):
+            found.update(self._words[token])
+        for words in self._phrases_in(normalized):
+            found.update(words)
+        return found
+
+    def any(self, text: Text) -> bool:
+        """¿Aparece alguna señal?"""
+        normalized = self._normalized(text)
+        if not self._word_keys.isdisjoint(normalized.words):
+            return True
+        return any(True for _ in self._phrases_in(normalized))
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import batch_classifier
+from batch_classifier import BACKENDS, classify_videos, flag_texts
+from text_normalizer import fold
+
+VIDEOS = {
+    'mejores auriculares': [
+        {'video_id': 'a1', 'title': 'TOP 10 Mejores Auriculares 2025 🎧', 'viewCount': 900},
+        {'video_id': 'a2', 'title': 'Review: ¿Valen la pena? | Análisis', 'viewCount': 500},
+        {'video_id': 'a3', 'title': 'Mi día con mis auriculares (vlog)', 'viewCount': 800},
+        {'video_id': 'a4', 'title': 'Laptop vs tablet: comparativa', 'viewCount': 100},
+        {'video_id': 'a5', 'title': 'Cómo ganar dinero con reseñas', 'viewCount': 50},
+        {'video_id': 'a6', 'title': 'Tutorial paso a paso', 'viewCount': 10},
+    ],
+    'cuentos infantiles': [
+        {'video_id': 'c1', 'title': 'Cuento para NIÑOS: el dragón', 'description': 'Historia interactiva',
+         'viewCount': 10},
+        {'video_id': 'c2', 'title': 'Bedtime Stories for Kids', 'viewCount': 20},
+        {'video_id': 'c3', 'title': 'Prehistoria explicada', 'description': None, 'viewCount': 30},
+    ],
+}
+
+
+def _available(backend):
+    module = {'polars': 'pl', 'pandas': 'pd'}.get(backend)
+    return module is None or getattr(batch_classifier, module) is not None
+
+
+def test_summary_by_keyword():
+    summary = classify_videos(VIDEOS, backend='python')
+    auriculares, cuentos = summary
+    assert auriculares['keyword'] == 'mejores auriculares' and auriculares['videos'] == 6
+    # afiliación: top/mejores, review/análisis, vs/comparativa; anuncios: dinero
+    assert (auriculares['videos_afiliacion'], auriculares['videos_anuncios']) == (3, 1)
+    assert auriculares['porcentaje_monetizables'] == round(4 / 6 * 100, 1)
+    # Top 5 por views: el vlog personal no cuenta como automatizable
+    assert auriculares['automatizable_count'] == 3
+    # "Prehistoria" no es "historia" (palabras completas)
+    assert cuentos['competencia_directa'] == 2
+    print('Resumen por keyword OK ✅')
+
+
+def test_backends_agree():
+    expected = classify_videos(VIDEOS, backend='python')
+    texts = ['Ñandú CAFÉ ǅemal ﬁnanzas', 'Historia ínteractiva', 'storytelling', 'Choose your own  adventure!',
+             'Elige-tu-propia-aventura', 'ελληνικά kids', '', None]
+    flags = flag_texts(texts, 'channel_direct_competition', backend='python')
+    assert flags == [False, True, False, True, True, True, False, False]
+    for backend in BACKENDS:
+        if not _available(backend):
+            print(f'   ({backend} no instalado)')
+            continue
+        assert classify_videos(VIDEOS, backend=backend) == expected, backend
+        assert flag_texts(texts, 'channel_direct_competition', backend=backend) == flags, backend
+        if backend == 'polars':
+            import polars as pl
+            folded = batch_classifier._fold_polars(pl.Series([t or '' for t in texts]))
+            assert folded.to_list() == [fold(t or '') for t in texts]
+    assert classify_videos({}) == [] and flag_texts([], 'channel_direct_competition') == []
+    # Lotes pequeños: fila a fila, sin construir la tabla
+    assert batch_classifier.default_backend(10) == 'python'
+    print('Mismos resultados en todos los backends OK ✅')
+
+
+if __name__ == '__main__':
+    test_summary_by_keyword()
+    test_backends_agree()
@@ -0,0 +1,111 @@
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from batch_scoring import decision_counts, rescore
+from scoring_config import ScoringConfigError, get_scoring_config
+import youtube_search
+from nichos_youtube.nichos_youtube import NicheAnalyzerYouTubeUnificado
+from proyecto_web.nichos_web import WebNicheAnalyzer
+
+try:
+    import polars as pl
+except Exception:
+    pl = None
+
+try:
+    import pandas as pd
+except Exception:
+    pd = None
+
+
+def _rows(n, seed=201):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        views = int(rng.paretovariate(1.2) * 800)
+        total_views = rng.choice([0, views * 20])
+        rows.append({
+            'keyword': f'kw{i}',
+            'median_views': rng.choice([0, 2999, 3000, 5000, rng.randint(0, 60000)]),
+            'pct75_views': rng.choice([0, 12000, 20000, rng.randint(0, 200000)]),
+            'avg_views': views,
+            'median_views_per_day': rng.choice([0, rng.uniform(0, 3000)]),
+            'total_views': total_views,
+            'total_likes': int(total_views * rng.random() * 0.002),
+            'competition_level': rng.choice(['Low', 'Medium', 'High', 'Very High', 'rara']),
+            'is_automatizable': rng.random() < 0.5,
+            'monetization_potential': rng.choice(['Muy Alto', 'Alto', 'Medio', 'Bajo']),
+            'monetizacion': rng.choice(['Afiliación + Anuncios', 'Solo Anuncios', 'Solo Afiliación', 'Difícil Monetizar']),
+            'automatizable': rng.random() < 0.5,
+            'monetizable_ratio_pct': rng.choice([9.9, 10, 30, 30.1, rng.uniform(0, 100)]),
+            'search_volume': rng.choice([999, 1000, 5000, 10000, rng.randint(0, 20000)]),
+            'cpc': rng.choice([0.5, 1.0, 2.0, rng.uniform(0, 4)]),
+            'competition_index': rng.choice([0.3, 0.5, 0.7, rng.random()]),
+            'trend_direction': rng.choice(['up', 'stable', 'down']),
+        })
+    return rows
+
+
+def _scalar(row, config):
+    analyzer = SimpleNamespace(scoring=config, median_min=config.median_min, p75_min=config.p75_min)
+    decision, _, base = NicheAnalyzerYouTubeUnificado.decide_niche_soft(analyzer, row['median_views'], row['pct75_views'])
+    opportunity = NicheAnalyzerYouTubeUnificado.calculate_opportunity_score(analyzer, row)['opportunity_score']
+    potential = youtube_search.calcular_potencial_total_refinado(
+        row['avg_views'], row['monetizacion'], row['automatizable'], row['monetizable_ratio_pct'])
+    web = WebNicheAnalyzer.make_decision(None, row, row)
+    return decision, base, round(opportunity * 100, 1), potential, web
+
+
+def test_batch_matches_scalar():
+    # Con peso de velocidad (0 en la configuración por defecto) para cubrir ese término
+    config = get_scoring_config().with_overrides({'opportunity.weights.velocity': 0.1})
+    rows = _rows(2000)
+    scored = rescore(rows, config, ['web_decision', 'refined_potential', 'opportunity', 'soft_decision'])
+    web = rescore(rows, config, ['web_decision'])
+    for row, batch, web_row in zip(rows, scored, web):
+        decision, base, opportunity, potential, web_decision = _scalar(row, config)
+        # np.round y round() pueden diferir en una décima en los empates
+        assert batch['decision'] == decision and abs(batch['base_score'] - base) <= 0.1 + 1e-9, row
+        assert abs(batch['opportunity_score'] - opportunity) <= 0.1 + 1e-9, row
+        assert batch['potencial_total_refinado'] == potential, row
+        assert web_row['decision'] == web_decision, row
+    # El mismo resultado con DataFrames
+    for frame in [f for f in ((pl.DataFrame(rows) if pl else None), (pd.DataFrame(rows) if pd else None)) if f is not None]:
+        result = rescore(frame, config, ['opportunity', 'soft_decision'])
+        assert list(result['decision']) == [r['decision'] for r in scored]
+        assert list(result['opportunity_score']) == [r['opportunity_score'] for r in scored]
+    print('Scoring por lotes = scoring escalar OK ✅')
+
+
+def test_what_if_and_defaults():
+    config = get_scoring_config()
+    rows = [{'median_views': 4000, 'pct75_views': 15000, 'avg_views': 50000, 'competition_level': 'Low'}]
+    # Sólo se aplican los scorings con sus columnas
+    scored = rescore(rows, config)
+    assert set(scored[0]) >= {'decision', 'base_score', 'opportunity_score'}
+    assert 'potencial_total_refinado' not in scored[0] and 'web_score' not in scored[0]
+    assert scored[0]['decision'] == 'EVALUAR'
+    stricter = config.with_overrides({'soft_decision.partial_ratio': 0.9})
+    assert rescore(rows, stricter)[0]['decision'] == 'DESCARTAR'
+    assert config.soft_decision['partial_ratio'] == 0.6  # el original no cambia
+    heavier = rescore(rows, config.with_overrides({'opportunity.weights.views': 0.6}))
+    assert heavier[0]['opportunity_score'] > scored[0]['opportunity_score']
+    assert decision_counts(scored) == {'RECOMENDADO': 0, 'EVALUAR': 1, 'DESCARTAR': 0}
+    assert rescore([], config) == []
+    try:
+        config.with_overrides({'opportunity.weights.inventado': 1})
+        raise AssertionError('ruta desconocida debería fallar')
+    except ScoringConfigError:
+        pass
+    print('What-if y columnas por defecto OK ✅')
+
+
+if __name__ == '__main__':
+    test_batch_matches_scalar()
+    test_what_if_and_defaults()
@@ -0,0 +1,99 @@
+import json
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import httplib2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import youtube_client
+from api_usage_tracker import APIUsageTracker
+from quota_scheduler import CredentialPool, QuotaExceeded, QuotaScheduler, quota_day
+from retry_engine import RetryEngine
+from youtube_client import QuotaHttp, RetryingHttp, _batch_with_api_key
+
+
+def _db():
+    return str(Path(tempfile.mkdtemp()) / 'quota.db')
+
+
+def test_routing_and_failover():
+    pool = CredentialPool([('clave-aaaa', None), ('clave-bbbb', 3)], db_path=_db(), daily_quota=5)
+    assert pool.daily_quota == 8
+
+    # Siempre a la key con más presupuesto libre
+    used_keys = []
+    for _ in range(4):
+        pool.reserve('videos')
+        used_keys.append(pool.current_key())
+    assert used_keys.count('clave-aaaa') == 3 and used_keys.count('clave-bbbb') == 1
+
+    # quotaExceeded en una key: el resto de reservas van a la otra
+    pool.reserve('videos')
+    assert pool.current_key() == 'clave-aaaa'
+    pool.mark_exhausted()
+    pool.reserve('videos')
+    assert pool.current_key() == 'clave-bbbb'
+    assert not pool.can_afford(100)
+    pool.reserve('videos')
+    try:
+        pool.reserve('videos')
+        raise AssertionError('debería lanzar QuotaExceeded')
+    except QuotaExceeded as e:
+        print('Pool agotado:', e)
+    print(pool.summary())
+    print('Reparto entre keys OK ✅')
+
+
+def test_transport_uses_pool_key():
+    class Inner:
+        def __init__(self):
+            self.uris = []
+
+        def request(self, uri, method='GET', **kwargs):
+            self.uris.append(uri)
+            key = parse_qs(urlsplit(uri).query)['key'][0]
+            reason = 'quotaExceeded' if key == 'clave-aaaa' else ''
+            body = json.dumps({'error': {'errors': [{'reason': reason}]}} if reason else {'items': []})
+            return httplib2.Response({'status': '403' if reason else '200'}), body.encode('utf-8')
+
+    pool = CredentialPool([('clave-aaaa', None), ('clave-bbbb', 10)], db_path=_db(), daily_quota=20)
+    inner = Inner()
+    http = RetryingHttp(QuotaHttp(inner, scheduler=pool),
+                        engine=RetryEngine(sleep=lambda s: None, verbose=False), scheduler=pool)
+    uri = 'https://youtube.googleapis.com/youtube/v3/videos?id=a&part=statistics&key=original'
+    # Log de uso temporal: el test no toca utils/api_usage_log.json
+    shared_tracker = youtube_client.tracker
+    youtube_client.tracker = APIUsageTracker(str(Path(tempfile.mkdtemp()) / 'api_usage_log.json'))
+    try:
+        resp, _ = http.request(uri)
+    finally:
+        youtube_client.tracker = shared_tracker
+    assert resp.status == 200
+    assert [parse_qs(urlsplit(u).query)['key'] for u in inner.uris] == [['clave-aaaa'], ['clave-bbbb']]
+    assert pool.usage_by_key()['…aaaa']['remaining'] == 0
+
+    body = 'GET /youtube/v3/videos?id=a&key=original HTTP/1.1\r\nContent-Type: application/json\r\n'
+    assert '&key=clave-bbbb HTTP/1.1\r\n' in _batch_with_api_key(body, 'clave-bbbb')
+    print('Transporte con failover de key OK ✅')
+
+
+def test_legacy_db_migration():
+    db_path = _db()
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE quota_usage (day TEXT PRIMARY KEY, units INTEGER, requests INTEGER)")
+    conn.execute("INSERT INTO quota_usage VALUES (?, 120, 3)", (quota_day(),))
+    conn.commit()
+    conn.close()
+    assert QuotaScheduler(db_path=db_path, daily_quota=500).used() == 120
+    assert CredentialPool([('solo-una-key', None)], db_path=db_path, daily_quota=500).remaining() == 380
+    print('Migración de la BD de cuota OK ✅')
+
+
+if __name__ == '__main__':
+    test_routing_and_failover()
+    test_transport_uses_pool_key()
+    test_legacy_db_migration()
@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from field_masks import FIELD_MASKS, apply_field_mask, parse_field_mask
+
+
+def test_field_masks():
+    assert parse_field_mask('nextPageToken,items/snippet/channelId') == {
+        'nextPageToken': None, 'items': {'snippet': {'channelId': None}}
+    }
+    # Todas las máscaras registradas deben parsear y conservar items/id (lo usa BatchLookup)
+    for name, mask in FIELD_MASKS.items():
+        tree = parse_field_mask(mask)
+        assert 'items' in tree, name
+
+    response = {
+        'kind': 'youtube#videoListResponse', 'etag': 'x',
+        'items': [{'id': 'v1', 'etag': 'y',
+                   'snippet': {'title': 'Top 10', 'thumbnails': {'default': {}}, 'tags': ['a']},
+                   'statistics': {'viewCount': '10', 'favoriteCount': '0'},
+                   'contentDetails': {'duration': 'PT5M', 'definition': 'hd'}}]
+    }
+    masked = apply_field_mask(response, FIELD_MASKS['videos.analysis'])
+    print('Respuesta con máscara:', masked)
+    assert masked == {'etag': 'x', 'items': [{'id': 'v1', 'snippet': {'title': 'Top 10', 'tags': ['a']},
+                                 'statistics': {'viewCount': '10'},
+                                 'contentDetails': {'duration': 'PT5M'}}]}
+    print('Test máscaras fields OK ✅')
+
+
+if __name__ == '__main__':
+    test_field_masks()
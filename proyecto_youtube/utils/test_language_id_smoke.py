@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from language_id import get_language_identifier
+from text_normalizer import VideoTextCache
+
+
+def test_detect_language():
+    identifier = get_language_identifier()
+    assert identifier.languages == ('en', 'es')
+    cases = {
+        'Cómo hacer pan casero sin horno': 'es',
+        'Los 10 mejores trucos para ahorrar dinero este mes': 'es',
+        'Unboxing y primeras impresiones de la PS5': 'es',
+        'How to bake bread at home without an oven': 'en',
+        'iPhone 16 Pro review: is it worth it?': 'en',
+        'What happens if you stop eating sugar for 30 days': 'en',
+    }
+    for text, expected in cases.items():
+        assert identifier.detect(text) == expected, (text, identifier.scores(text))
+    # Poco texto o sin ganador claro: el llamador usa todos los idiomas
+    assert identifier.detect('Top 10 2025') is None
+    assert identifier.detect('') is None
+    print('Idioma por trigramas OK ✅')
+
+
+def test_language_cached_per_video():
+    cache = VideoTextCache()
+    es = cache.get({'id': 'es1', 'snippet': {'title': 'Tutorial de Excel para principiantes',
+                                             'description': 'Aprende las fórmulas básicas paso a paso'}})
+    en = cache.get({'id': 'en1', 'snippet': {'title': 'Excel tutorial for beginners',
+                                             'description': 'Learn the basic formulas step by step'}})
+    assert (es.language, en.language) == ('es', 'en')
+    assert cache.get({'id': 'en1'}).language == 'en' and cache.stats['hits'] == 1
+    print('Idioma memoizado por videoId OK ✅')
+
+
+def test_signals_from_video_language():
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'nichos_youtube'))
+    from nichos_youtube import NicheAnalyzerYouTubeUnificado
+    analyzer = NicheAnalyzerYouTubeUnificado('smoke-test')
+    # Una búsqueda ES con resultados en inglés: cada video usa las señales de su idioma
+    videos = [
+        {'id': 'lang-es', 'title': 'Tutorial paso a paso para crear una plantilla', 'description': '', 'tags': []},
+        {'id': 'lang-en', 'title': 'Step by step tutorial to build a template', 'description': '', 'tags': []},
+    ]
+    result = analyzer.analyze_automation_potential(videos)
+    assert {'paso a paso', 'step by step'} <= set(result['signals_detected'])
+    assert analyzer.automation_matchers['es'].present('step by step') == set()
+    print('Señales por idioma del video OK ✅')
+
+
+if __name__ == '__main__':
+    test_detect_language()
+    test_language_cached_per_video()
+    test_signals_from_video_language()
@@ -0,0 +1,59 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from lexicon import LEXICON_API_VERSION, Lexicon, LexiconError, get_lexicon
+
+
+def test_shared_lexicon():
+    lexicon = get_lexicon(LEXICON_API_VERSION)
+    assert lexicon.languages[:2] == ('es', 'en')
+    for name in ('video_automation_signals', 'video_monetization_signals', 'keyword_monetization',
+                 'title_monetization', 'title_automatizable', 'title_manual', 'keyword_monetization_cpm',
+                 'video_automatizable_signals', 'keyword_automatizable', 'monetization_potential'):
+        assert lexicon.words(name), name
+
+    # ES + EN concatenados; cada idioma por separado
+    both = lexicon.words('video_automation_signals')
+    assert both == lexicon.words('video_automation_signals', 'es') + lexicon.words('video_automation_signals', 'EN')
+    assert set(lexicon.words('keyword_monetization')) == {'afiliacion', 'anuncios'}
+
+    # Un matcher por diccionario e idiomas, compartido entre analizadores
+    assert lexicon.matcher('title_manual') is get_lexicon().matcher('title_manual')
+    assert lexicon.matcher('monetization_potential').categories == ['Muy Alto', 'Alto', 'Medio', 'Bajo']
+    assert lexicon.matcher('keyword_monetization').categories_in('Mejores cursos de Trading') == {'anuncios'}
+    # PhraseMatcher: palabras completas ("test" no está en "contest"), compartido igual
+    assert lexicon.phrase_matcher('title_manual') is get_lexicon().phrase_matcher('title_manual')
+    assert lexicon.matcher('keyword_monetization').categories_in('contest') == {'afiliacion'}
+    assert lexicon.phrase_matcher('keyword_monetization').categories_in('contest') == set()
+    print('Léxico compartido OK ✅')
+
+
+def test_versioned_files():
+    directory = Path(tempfile.mkdtemp())
+    (directory / 'es.json').write_text(json.dumps(
+        {'version': LEXICON_API_VERSION + 1, 'language': 'es', 'dictionaries': {'x': ['a']}}), encoding='utf-8')
+    try:
+        Lexicon(str(directory))
+        raise AssertionError('debería rechazar otra versión del léxico')
+    except LexiconError as e:
+        print('Versión rechazada:', e)
+
+    (directory / 'es.json').write_text(json.dumps(
+        {'version': LEXICON_API_VERSION, 'language': 'es', 'dictionaries': {'x': ['a']}}), encoding='utf-8')
+    lexicon = Lexicon(str(directory))
+    assert lexicon.words('x') == ['a']
+    try:
+        lexicon.words('no_existe')
+        raise AssertionError('debería fallar con un diccionario inexistente')
+    except LexiconError:
+        pass
+    print('Ficheros versionados OK ✅')
+
+
+if __name__ == '__main__':
+    test_shared_lexicon()
+    test_versioned_files()
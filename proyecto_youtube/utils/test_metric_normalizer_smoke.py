@@ -0,0 +1,61 @@
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+# BD temporal antes de importar el normalizador (la sesión se crea al importar)
+os.environ['YOUTUBE_DB_PATH'] = str(Path(tempfile.mkdtemp()) / 'normalization.db')
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from metric_normalizer import MetricNormalizer
+
+
+def _niche(views, likes=None, comments=None):
+    return {'avg_views': views, 'total_likes': views // 50 if likes is None else likes,
+            'total_comments': views // 500 if comments is None else comments}
+
+
+def test_streaming_and_final_pass():
+    normalizer = MetricNormalizer('test-stream', use_db=False)
+    first = normalizer.add(_niche(5000))
+    assert first['views_norm'] == 1.0 and first['engagement_norm'] == 1.0  # sólo se conoce a sí mismo
+    rng = random.Random(201)
+    niches = [first] + [normalizer.add(_niche(rng.randint(100, 20000))) for _ in range(50)]
+    assert all(0.0 <= n['views_norm'] <= 1.0 for n in niches)
+    # La pasada final deja todos los nichos contra la misma referencia: el orden de llegada ya no cuenta
+    normalizer.renormalize(niches)
+    reference = normalizer.reference('avg_views')
+    for niche in niches:
+        assert niche['views_norm'] == min(1.0, niche['avg_views'] / reference)
+    # Un viral no aplasta al resto (con el máximo, todos quedaban cerca de 0)
+    normalizer.add(_niche(10_000_000))
+    assert normalizer.reference('avg_views') < 25000
+    assert normalizer.add(_niche(0, 0, 0))['views_norm'] == 0.0
+    print('Score al llegar + re-normalización final OK ✅')
+
+
+def test_references_persist_across_runs():
+    views = [1000, 3000, 8000, 12000, 20000]
+    run1 = MetricNormalizer('test-runs')
+    assert run1.use_db
+    scored = [run1.add(_niche(v)) for v in views]
+    run1.renormalize(scored)
+    assert run1.save() == 3 and run1.save() == 0  # nada nuevo que guardar
+    # Ejecución siguiente: un nicho solo se puntúa contra el histórico (antes salía 1.0)
+    run2 = MetricNormalizer('test-runs')
+    assert run2.reference('avg_views') == run1.reference('avg_views')
+    alone = run2.normalize(_niche(8000))
+    assert alone['views_norm'] == scored[2]['views_norm'] < 1.0
+    run2.add(_niche(50000))
+    run2.save()
+    run3 = MetricNormalizer('test-runs')
+    assert run3.reference('avg_views') > run1.reference('avg_views')
+    assert run3._reference['avg_views'].n == len(views) + 1  # sin contar dos veces la primera ejecución
+    assert MetricNormalizer('otro-analizador').reference('avg_views') == 0.0
+    print('Referencias persistentes entre ejecuciones OK ✅')
+
+
+if __name__ == '__main__':
+    test_streaming_and_final_pass()
+    test_references_persist_across_runs()
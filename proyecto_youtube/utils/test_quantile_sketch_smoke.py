@@ -0,0 +1,112 @@
+import bisect
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+# BD temporal antes de importar el almacén (la sesión se crea al importar)
+os.environ['YOUTUBE_DB_PATH'] = str(Path(tempfile.mkdtemp()) / 'sketches.db')
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from quantile_sketch import KLLSketch, merge_all
+from view_metrics import view_metrics
+import view_sketch_store
+from view_sketch_store import ViewSketchStore, period_bounds
+
+# Error de rango documentado para k=200
+RANK_ERROR = 0.0165
+
+
+def _rank_error(sketch, ordered, q):
+    value = sketch.quantile(q)
+    low = bisect.bisect_left(ordered, value) / len(ordered)
+    high = bisect.bisect_right(ordered, value) / len(ordered)
+    return 0.0 if low <= q <= high else min(abs(low - q), abs(high - q))
+
+
+def test_exact_for_small_samples():
+    views = [100, 5, 20000, 300, 12000, 7]
+    sketch = KLLSketch.of(views)
+    stats = view_metrics(views)
+    assert sketch.exact and sketch.quantile(0.5) == stats['median'] and sketch.quantile(0.75) == stats['pct']
+    assert (sketch.min, sketch.max, sketch.total) == (5, 20000, sum(views))
+    assert KLLSketch().quantile(0.5) == 0
+    print('Exacto con pocos videos OK ✅')
+
+
+def test_error_bound_memory_and_merge():
+    rng = random.Random(201)
+    views = [int(rng.paretovariate(1.1) * 1000) for _ in range(100000)]
+    ordered = sorted(views)
+    sketch = KLLSketch.of(views, seed=1)
+    assert not sketch.exact and sketch.retained < 3 * sketch.k + 2 * len(sketch.levels)
+    for q in (0.1, 0.5, 0.75, 0.9):
+        assert _rank_error(sketch, ordered, q) <= RANK_ERROR, q
+    # Siete "días" fusionados en una semana: mismo error, misma memoria
+    week = merge_all(KLLSketch.of(views[day::7], seed=day) for day in range(7))
+    assert week.n == len(views) and week.total == sum(views) and week.max == ordered[-1]
+    assert week.retained < 3 * week.k + 2 * len(week.levels)
+    for q in (0.5, 0.75):
+        assert _rank_error(week, ordered, q) <= RANK_ERROR, q
+    restored = KLLSketch.from_json(sketch.to_json())
+    assert restored.quantile(0.75) == sketch.quantile(0.75) and restored.n == sketch.n
+    try:
+        KLLSketch(100).merge(KLLSketch(200))
+        raise AssertionError('k distinto debería fallar')
+    except ValueError:
+        pass
+    print('Error acotado, memoria acotada y fusión OK ✅')
+
+
+def test_daily_sketches_roll_up():
+    assert period_bounds('week', '2025-03-05') == ('2025-03-03', '2025-03-10')
+    assert period_bounds('month', '2025-12-15') == ('2025-12-01', '2026-01-01')
+    # Una ejecución (un almacén) por día
+    runs = {'2025-03-03': {'cocina': [10, 20, 30], 'viajes': [1000]},
+            '2025-03-05': {'cocina': [40, 50]},
+            '2025-03-12': {'cocina': [60, 70]}}  # otra semana
+    for day, views_by_keyword in runs.items():
+        store = ViewSketchStore()
+        assert store.use_db
+        for keyword, views in views_by_keyword.items():
+            store.add(keyword, views)
+        assert store.save('ES', day=day) == len(views_by_keyword)
+    week = store.distribution(['cocina', 'viajes'], 'ES', 'week', day='2025-03-04')
+    assert week['cocina'].n == 5 and week['cocina'].quantile(0.5) == 30
+    assert week['viajes'].n == 1
+    # Semana cerrada: se lee el agregado guardado
+    again = store.distribution(['cocina'], 'ES', 'week', day='2025-03-06')
+    assert again['cocina'].n == 5
+    month = store.distribution(['cocina'], 'ES', 'month', day='2025-03-20')
+    assert month['cocina'].n == 7 and store.distribution(['cocina'], 'FR', 'month', day='2025-03-20') == {}
+    print('Sketches diarios -> semana/mes OK ✅')
+
+
+def test_open_week_is_not_frozen():
+    today = view_sketch_store.quota_day
+    try:
+        # Semana del 2025-04-07 aún abierta: cada consulta fusiona los días que haya
+        view_sketch_store.quota_day = lambda: '2025-04-08'
+        store = ViewSketchStore()
+        store.add('huerto', [1, 2, 3])
+        store.save('ES', day='2025-04-07')
+        assert store.distribution(['huerto'], 'ES', 'week', day='2025-04-07')['huerto'].n == 3
+        store = ViewSketchStore()
+        store.add('huerto', [4, 5, 6, 7])
+        store.save('ES', day='2025-04-08')
+        # Ya cerrada: cuenta los dos días (la consulta con la semana abierta no dejó un agregado),
+        # y desde ahí se lee el agregado guardado
+        view_sketch_store.quota_day = lambda: '2025-04-20'
+        assert store.distribution(['huerto'], 'ES', 'week', day='2025-04-07')['huerto'].n == 7
+        assert store.distribution(['huerto'], 'ES', 'week', day='2025-04-09')['huerto'].n == 7
+    finally:
+        view_sketch_store.quota_day = today
+    print('Semana abierta sin congelar OK ✅')
+
+
+if __name__ == '__main__':
+    test_exact_for_small_samples()
+    test_error_bound_memory_and_merge()
+    test_daily_sketches_roll_up()
+    test_open_week_is_not_frozen()
@@ -0,0 +1,34 @@
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from quota_scheduler import QuotaExceeded, QuotaScheduler
+
+
+def test_quota_scheduler():
+    db_path = str(Path(tempfile.mkdtemp()) / 'quota.db')
+    # Dos instancias sobre el mismo fichero = dos procesos compartiendo presupuesto
+    cli = QuotaScheduler(db_path=db_path, daily_quota=250)
+    web = QuotaScheduler(db_path=db_path, daily_quota=250)
+
+    assert cli.reserve('search') == 100
+    assert web.reserve('search') == 100
+    assert cli.reserve('videos') == 1
+    print('Usado:', cli.used(), '| Restante:', web.remaining())
+    assert web.used() == 201 and cli.remaining() == 49
+
+    try:
+        web.reserve('search')
+        raise AssertionError('debería haber rechazado la búsqueda')
+    except QuotaExceeded as e:
+        print('Rechazado:', e)
+
+    cli.refund(1)
+    assert web.remaining() == 50
+    print('Test planificador de cuota OK ✅')
+
+
+if __name__ == '__main__':
+    test_quota_scheduler()
@@ -0,0 +1,63 @@
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Importar los módulos de utils directamente (como hacen los scripts del proyecto)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from response_cache import ResponseCache, endpoint_from_uri, normalize_params
+
+
+def test_response_cache():
+    tmp = tempfile.mkdtemp()
+    cache = ResponseCache(path=str(Path(tmp) / 'cache.db'), max_bytes=1000, ttls={'videos': 1})
+
+    uri = 'https://youtube.googleapis.com/youtube/v3/search?q=Perros%20%20Baratos&part=snippet&key=SECRETO&alt=json'
+    endpoint = endpoint_from_uri(uri)
+    params = normalize_params(uri)
+    print('Endpoint:', endpoint, '| Params:', params)
+    assert endpoint == 'search'
+    assert params == {'q': 'perros baratos', 'part': 'snippet'}
+
+    # Miss -> put -> hit
+    assert cache.get(endpoint, params) is None
+    cache.put(endpoint, params, b'{"items": []}')
+    assert cache.get(endpoint, params) == (b'{"items": []}', 'application/json')
+
+    # TTL por endpoint (videos = 1s en este test); offline ignora TTL
+    cache.put('videos', {'id': 'a'}, b'{}')
+    time.sleep(1.1)
+    assert cache.get('videos', {'id': 'a'}) is None
+    assert cache.get('videos', {'id': 'a'}, ignore_ttl=True) is not None
+
+    # LRU: al superar max_bytes se expulsa lo menos usado
+    cache.get(endpoint, params)
+    cache.put('channels', {'id': 'big'}, b'x' * 990)
+    assert cache.get('videos', {'id': 'a'}, ignore_ttl=True) is None
+    assert cache.get('channels', {'id': 'big'}) is not None
+    print('Test caché de respuestas OK ✅')
+    cache.close()
+
+
+def test_etag_revalidation():
+    cache = ResponseCache(path=str(Path(tempfile.mkdtemp()) / 'cache.db'), ttls={'videos': 1})
+    cache.put('videos', {'id': 'a'}, b'{"etag": "E1", "items": []}', etag='E1', parse_ms=0.5)
+    cache.put('videos', {'id': 'b'}, b'{"items": []}')
+    time.sleep(1.1)
+
+    # Caducada: no se sirve, pero se puede revalidar con su ETag (sin ETag no)
+    assert cache.get('videos', {'id': 'a'}) is None
+    assert cache.get_revalidatable('videos', {'id': 'a'}) == (b'{"etag": "E1", "items": []}', 'application/json', 'E1', 0.5)
+    assert cache.get_revalidatable('videos', {'id': 'b'}) is None
+
+    # 304 -> la entrada vuelve a estar vigente
+    cache.touch('videos', {'id': 'a'})
+    assert cache.get('videos', {'id': 'a'}) is not None
+    print('Revalidación por ETag OK ✅')
+    cache.close()
+
+
+if __name__ == '__main__':
+    test_response_cache()
+    test_etag_revalidation()
@@ -0,0 +1,135 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import httplib2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from quota_scheduler import QuotaExceeded, QuotaScheduler
+from retry_engine import CircuitOpen, ResponseFailure, RetryEngine, classify_error
+from youtube_client import RetryingHttp
+
+
+def _failure(status, reason='', retry_after=None):
+    headers = httplib2.Response({'status': str(status)})
+    if retry_after is not None:
+        headers['retry-after'] = str(retry_after)
+    body = json.dumps({'error': {'code': status, 'errors': [{'reason': reason}]}}).encode('utf-8')
+    return ResponseFailure(status, headers, body, result=(headers, body))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def __call__(self):
+        return self.now
+
+
+def test_classification():
+    assert classify_error(_failure(403, 'quotaExceeded')).kind == 'quota'
+    assert classify_error(_failure(403, 'rateLimitExceeded')).kind == 'rate'
+    assert classify_error(_failure(403, 'forbidden')).kind == 'fatal'
+    assert classify_error(_failure(429)).kind == 'rate'
+    assert classify_error(_failure(503, retry_after=7)).retry_after == 7
+    assert classify_error(TimeoutError()).kind == 'network'
+    assert classify_error(ValueError()).kind == 'fatal'
+    print('Clasificación de errores OK ✅')
+
+
+def test_retries_and_circuit():
+    clock = FakeClock()
+    engine = RetryEngine(max_retries=3, base_delay=1.0, failure_threshold=4, reset_seconds=30,
+                         sleep=clock.sleep, clock=clock, verbose=False)
+
+    # 429 con Retry-After y luego éxito: espera exactamente lo pedido
+    outcomes = [_failure(429, retry_after=2), 'ok']
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert engine.call('youtube.search', flaky) == 'ok'
+    assert clock.sleeps == [2.0]
+
+    # quotaExceeded no se reintenta
+    def quota():
+        raise _failure(403, 'quotaExceeded')
+
+    try:
+        engine.call('youtube.videos', quota)
+        raise AssertionError('quotaExceeded no debería reintentarse')
+    except ResponseFailure:
+        pass
+    assert engine.stats['youtube.videos']['attempts'] == 1
+
+    # 5xx persistente: 1 + 3 reintentos, el circuito se abre y falla rápido
+    def down():
+        raise _failure(503)
+
+    try:
+        engine.call('youtube.channels', down)
+    except ResponseFailure:
+        pass
+    assert engine.circuit_state('youtube.channels') == 'open'
+    try:
+        engine.call('youtube.channels', lambda: 'ok')
+        raise AssertionError('el circuito debería estar abierto')
+    except CircuitOpen as e:
+        print('Fast-fail:', e)
+
+    # Tras el enfriamiento, una prueba con éxito cierra el circuito
+    clock.now += 31
+    assert engine.call('youtube.channels', lambda: 'ok') == 'ok'
+    assert engine.circuit_state('youtube.channels') == 'closed'
+    print(engine.summary())
+    print('Reintentos y circuito OK ✅')
+
+
+def test_retrying_transport():
+    class Inner:
+        def __init__(self, responses):
+            self.responses = responses
+            self.calls = 0
+
+        def request(self, uri, method='GET', **kwargs):
+            self.calls += 1
+            status, reason = self.responses.pop(0)
+            body = json.dumps({'error': {'errors': [{'reason': reason}]}} if reason else {'items': []})
+            return httplib2.Response({'status': str(status)}), body.encode('utf-8')
+
+    scheduler = QuotaScheduler(db_path=str(Path(tempfile.mkdtemp()) / 'quota.db'), daily_quota=500)
+    engine = RetryEngine(max_retries=2, sleep=lambda s: None, verbose=False)
+    uri = 'https://youtube.googleapis.com/youtube/v3/videos?id=a&part=statistics&key=x'
+
+    inner = Inner([(500, 'backendError'), (200, '')])
+    resp, _ = RetryingHttp(inner, engine=engine, scheduler=scheduler).request(uri)
+    assert resp.status == 200 and inner.calls == 2
+
+    inner = Inner([(404, 'notFound')])
+    resp, _ = RetryingHttp(inner, engine=engine, scheduler=scheduler).request(uri)
+    assert resp.status == 404 and inner.calls == 1
+
+    inner = Inner([(403, 'quotaExceeded')])
+    try:
+        RetryingHttp(inner, engine=engine, scheduler=scheduler).request(uri)
+        raise AssertionError('debería lanzar QuotaExceeded')
+    except QuotaExceeded as e:
+        print('Cuota:', e)
+    assert inner.calls == 1 and scheduler.remaining() == 0
+    print('Transporte con reintentos OK ✅')
+
+
+if __name__ == '__main__':
+    test_classification()
+    test_retries_and_circuit()
+    test_retrying_transport()
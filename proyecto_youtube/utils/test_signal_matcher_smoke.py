@@ -0,0 +1,43 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from signal_matcher import SignalMatcher
+
+
+def test_hits_and_positions():
+    matcher = SignalMatcher(["top", "top 10", "op", "vs", "paso a paso"])
+    assert matcher.find_all("Top 10 laptops vs tablets") == [
+        (0, 'top'), (0, 'top 10'), (1, 'op'), (10, 'top'), (11, 'op'), (15, 'vs')]
+    assert matcher.present("PASO A PASO") == {'paso a paso'}
+    assert matcher.any("laptop") and not matcher.any("receta fácil")
+    print('Aciertos con posiciones OK ✅')
+
+
+def test_same_results_as_substring_loops():
+    signals = ["top", "mejores", "vs", "versus", "tutorial", "top", "trending", "trending", "how to", "to"]
+    categories = {'afiliacion': ["mejor", "review", "top"], 'anuncios': ["curso", "finanzas", "top"]}
+    matcher = SignalMatcher(signals)
+    by_category = SignalMatcher(categories)
+    words = ["top", "laptop", "mejores", "tutoriales", "vs", "reversus", "trending", "how", "to",
+             "review", "curso", "finanzas", "receta", "casa"]
+    rng = random.Random(201)
+    for _ in range(300):
+        # Textos cortos (autómata) y largos (búsqueda por palabra)
+        text = ' '.join(rng.choice(words) for _ in range(rng.choice([1, 3, 8, 60])))
+        lower = text.lower()
+        assert matcher.present(text) == {w for w in signals if w in lower}
+        assert matcher.count(text) == sum(1 for w in signals if w in lower)
+        assert matcher.any(text) == any(w in lower for w in signals)
+        assert by_category.counts(text) == {c: sum(1 for w in ws if w in lower) for c, ws in categories.items()}
+    fields = ["Top 10 trending", "", "how to", "toptop"]
+    assert matcher.count_fields(fields) == (sum(matcher.count(f) for f in fields),
+                                            matcher.present(' | '.join(fields)))
+    print('Mismos resultados que los bucles `in` OK ✅')
+
+
+if __name__ == '__main__':
+    test_hits_and_positions()
+    test_same_results_as_substring_loops()
@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from signal_matcher import PhraseMatcher
+from text_normalizer import VideoTextCache, fold, normalize_text, tokenize
+
+
+def test_folding_and_tokens():
+    assert fold("Cómo Ganar DINERO en España: Guía Fácil") == "como ganar dinero en espana: guia facil"
+    assert tokenize("¡Top-10 trucos (paso a paso)!") == ('top', '10', 'trucos', 'paso', 'a', 'paso')
+    assert tokenize("") == ()
+    text = normalize_text("Reseña: ¿vale la pena?")
+    assert text.words == {'resena', 'vale', 'la', 'pena'}
+    assert text.has_phrase('vale la pena') and not text.has_phrase('la pen')
+    assert normalize_text("Reseña: ¿vale la pena?") is text
+    print('Normalización y tokens OK ✅')
+
+
+def test_phrase_matcher_word_boundaries():
+    matcher = PhraseMatcher({'afiliacion': ["top", "mejor", "review"],
+                             'anuncios': ["cómo", "paso a paso", "vs", "test"]})
+    # Sin coincidencias dentro de otras palabras
+    assert not matcher.any("Laptop en el canvas del contest")
+    # Acentos y mayúsculas no importan; el plural regular cuenta como la señal
+    assert matcher.present("COMO hacer un TOP de los Mejores Reviews") == {'cómo', 'top', 'mejor', 'review'}
+    assert matcher.counts("Receta paso a paso: test de horno") == {'afiliacion': 0, 'anuncios': 2}
+    assert matcher.present("paso rápido a paso") == set()
+    assert matcher.find_all("Top 10 iPhone vs Samsung, paso a paso") == [
+        (0, 'top'), (3, 'vs'), (5, 'paso a paso')]
+    assert matcher.count_fields([normalize_text("Top mejores"), normalize_text(""), "review"]) == (
+        3, {'top', 'mejor', 'review'})
+    print('Palabras y frases completas OK ✅')
+
+
+def test_video_cache_by_id():
+    cache = VideoTextCache(max_size=2)
+    video = {'video_id': 'abc', 'title': 'Guía Fácil', 'description': 'Paso a paso', 'tags': ['Top', 'Review']}
+    first = cache.get(video)
+    assert first.title.tokens == ('guia', 'facil')
+    assert [t.tokens for t in first.tags] == [('top',), ('review',)]
+    # El mismo videoId (item de la API o dict aplanado) reutiliza el texto normalizado
+    assert cache.get({'id': 'abc', 'snippet': {'title': 'otro'}}) is first
+    assert cache.get({'id': {'videoId': 'abc'}}) is first
+    assert cache.stats == {'hits': 2, 'misses': 1}
+    # LRU: al llenarse se descarta el menos usado
+    cache.get({'id': 'x1', 'snippet': {'title': 'a'}})
+    cache.get({'id': 'x2', 'snippet': {'title': 'b'}})
+    assert len(cache) == 2 and cache.get(video) is not first
+    # Sin ID no se guarda
+    cache.get({'title': 'suelto'})
+    assert len(cache) == 2
+    print(cache.summary())
+    print('Caché por videoId OK ✅')
+
+
+if __name__ == '__main__':
+    test_folding_and_tokens()
+    test_phrase_matcher_word_boundaries()
+    test_video_cache_by_id()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# BD temporal antes de importar el almacén (la sesión se crea al importar)
+os.environ['YOUTUBE_DB_PATH'] = str(Path(tempfile.mkdtemp()) / 'videos.db')
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import video_store
+from video_store import VideoStatsStore, keyword_overlap
+
+
+class FakeLookup:
+    calls = []
+
+    def __init__(self, youtube):
+        self.stats = {'calls': 0}
+
+    def fetch_videos(self, video_ids, fields=None):
+        FakeLookup.calls.append(list(video_ids))
+        self.stats['calls'] += 1
+        return {vid: {'id': vid, 'snippet': {'title': f'video {vid}', 'tags': ['a']},
+                      'statistics': {'viewCount': '1200', 'likeCount': '30'},
+                      'contentDetails': {'duration': 'PT4M'}} for vid in video_ids}
+
+
+def test_keyword_overlap():
+    overlap = keyword_overlap({'a': ['v1', 'v2', 'v3'], 'b': ['v2', 'v3', 'v4'], 'c': ['v9']})
+    assert overlap['appearances'] == 7 and overlap['unique'] == 5 and overlap['shared'] == 2
+    assert overlap['pairs'] == [('a', 'b', 2, 0.5)]
+    print('Solapamiento entre keywords OK ✅')
+
+
+def test_store_dedup_and_db():
+    video_store.BatchLookup = FakeLookup
+    store = VideoStatsStore()
+    items = store.get_for_keywords(None, {'mejores auriculares': ['v1', 'v2', 'v3'],
+                                          'auriculares baratos': ['v2', 'v3', 'v4']})
+    assert sorted(items) == ['v1', 'v2', 'v3', 'v4'] and FakeLookup.calls == [['v1', 'v2', 'v3', 'v4']]
+
+    # Misma ejecución: memoria; sólo el ID nuevo sale a la "API"
+    store.get_many(None, ['v3', 'v5'], keyword='auriculares bluetooth')
+    assert FakeLookup.calls[-1] == ['v5'] and store.stats['memory_hits'] == 1
+
+    # Ejecución nueva: snapshot de la BD con las mismas estadísticas
+    fresh = VideoStatsStore()
+    stored = fresh.get_many(None, ['v1', 'v4'])
+    assert len(FakeLookup.calls) == 2 and fresh.stats['db_hits'] == 2
+    assert stored['v1']['statistics'] == {'viewCount': '1200', 'likeCount': '30'}
+    assert stored['v1']['contentDetails']['duration'] == 'PT4M'
+
+    # Snapshot caducado: se vuelve a pedir
+    VideoStatsStore(max_age_hours=0).get_many(None, ['v1'])
+    assert FakeLookup.calls[-1] == ['v1']
+    print(store.summary())
+    print('Almacén de videos OK ✅')
+
+
+class PartialLookup(FakeLookup):
+    def fetch_videos(self, video_ids, fields=None):
+        # La sub-request de 'v2' falla: no vuelve en el lote
+        return {vid: item for vid, item in super().fetch_videos(video_ids, fields).items() if vid != 'v2'}
+
+
+def test_refresh_and_partial_fetch():
+    video_store.BatchLookup = FakeLookup
+    store = VideoStatsStore()
+    store.get_many(None, ['v1', 'v2'])
+    # Refresh: el snapshot reciente cuenta como caducado y se vuelve a pedir
+    calls = len(FakeLookup.calls)
+    store.get_many(None, ['v1', 'v2'], fresh_since=datetime.utcnow())
+    assert len(FakeLookup.calls) == calls + 1 and FakeLookup.calls[-1] == ['v1', 'v2']
+    # Un ID que no vuelve se sirve desde su snapshot caducado
+    video_store.BatchLookup = PartialLookup
+    fetched = store.stats['fetched']
+    items = store.get_many(None, ['v1', 'v2'], fresh_since=datetime.utcnow())
+    assert sorted(items) == ['v1', 'v2'] and store.stats['fetched'] == fetched + 1
+    print('Refresh y lotes parciales OK ✅')
+
+
+if __name__ == '__main__':
+    test_keyword_overlap()
+    test_store_dedup_and_db()
+    test_refresh_and_partial_fetch()
@@ -0,0 +1,65 @@
+import random
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import view_metrics
+from view_metrics import METRICS, compute, metrics_by_keyword, pack, percentile
+
+VIEWS = {
+    'impar': [100, 5, 20000, 300, 12000],
+    'par': [10, 40, 30, 20],
+    'vacia': [],
+    'uno': [7],
+    'ceros': [0, 0, 0],
+}
+
+
+def test_metrics_by_keyword():
+    stats = metrics_by_keyword(VIEWS)
+    impar = stats['impar']
+    assert (impar['count'], impar['total'], impar['max'], impar['min']) == (5, 32405, 20000, 5)
+    assert impar['median'] == 300 and impar['monetizable_count'] == 2
+    # P75 interpolado: k = 4 * 0.75 = 3 -> el cuarto valor ordenado
+    assert impar['pct'] == 12000
+    assert stats['par']['median'] == 25 and stats['par']['pct'] == 32.5
+    assert stats['par']['saturation_ratio'] == 25 / 40
+    assert stats['vacia'] == {name: 0 for name in METRICS}
+    assert stats['uno']['median'] == stats['uno']['pct'] == 7
+    assert stats['ceros']['saturation_ratio'] == 0
+    # Views que no caben en la clave de ordenación empaquetada: mismo resultado
+    big = metrics_by_keyword({'a': [2 ** 62, 1, 3], 'b': [5, 2]})
+    assert big['a']['median'] == 3 and big['a']['max'] == 2 ** 62 and big['b']['pct'] == 4.25
+    print('Métricas por keyword OK ✅')
+
+
+def test_same_as_numpy_and_python():
+    rng = random.Random(201)
+    groups = [[rng.randint(0, 2_000_000) for _ in range(rng.randint(0, 60))] for _ in range(300)]
+    values, offsets = pack(groups)
+    columns = compute(values, offsets)
+    for i, views in enumerate(groups):
+        ordered = sorted(views)
+        if views:
+            assert columns['median'][i] == statistics.median(views)
+            assert columns['pct'][i] == percentile(ordered, 75)
+            assert columns['mean'][i] == sum(views) / len(views)
+    if view_metrics.np is not None:
+        import numpy as np
+        for i, views in enumerate(groups):
+            if views:
+                assert abs(columns['pct'][i] - np.percentile(views, 75)) < 1e-6
+        # Sin NumPy: mismas columnas
+        saved, view_metrics.np = view_metrics.np, None
+        try:
+            assert compute(values, offsets) == columns
+        finally:
+            view_metrics.np = saved
+    print('NumPy y Python puro coinciden OK ✅')
+
+
+if __name__ == '__main__':
+    test_metrics_by_keyword()
+    test_same_as_numpy_and_python()
@@ -0,0 +1,57 @@
+import datetime
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import view_velocity
+from view_velocity import VELOCITY_METRICS, parse_duration, velocity_by_keyword, video_velocity
+
+NOW = datetime.datetime(2025, 6, 1, 12, 0, 0)
+
+
+def _video(views, days_ago, likes=0, duration='PT10M'):
+    published = (NOW - datetime.timedelta(days=days_ago)).strftime('%Y-%m-%dT%H:%M:%SZ') if days_ago is not None else ''
+    return {'viewCount': views, 'likeCount': likes, 'publishedAt': published, 'duration': duration}
+
+
+def test_known_values():
+    assert parse_duration('PT1H2M3S') == 3723 and parse_duration('PT45S') == 45
+    assert parse_duration('P1DT1M') == 86460 and parse_duration('') is None and parse_duration('PT') is None
+    # Viejo con muchas views frente a nuevo con pocas: el nuevo va más rápido
+    videos = [_video(100000, 1000, likes=1000), _video(20000, 10, likes=1000, duration='PT4M'), _video(5000, 0.1)]
+    stats = video_velocity(videos, now=NOW)
+    assert stats['median_views_per_day'] == 2000.0  # 100000/1000, 20000/10, 5000/1 (edad mínima 1 día)
+    assert stats['avg_views_per_day'] == round((100 + 2000 + 5000) / 3, 1)
+    assert stats['likes_per_view'] == round(2000 / 125000, 5)
+    assert stats['recency_weighted_median_views'] == 5000  # el de hace 1000 días casi no pesa
+    assert stats['median_age_days'] == 10.0 and stats['median_duration_seconds'] == 600
+    # Sin fecha: no cuenta en views/día pero sí en likes/view
+    undated = video_velocity([_video(1000, None, likes=10)], now=NOW)
+    assert undated['median_views_per_day'] == 0 and undated['likes_per_view'] == 0.01
+    assert velocity_by_keyword({'vacia': []}, now=NOW)['vacia'] == {name: 0 for name in VELOCITY_METRICS}
+    print('Velocidad: valores conocidos OK ✅')
+
+
+def test_batch_matches_pure_python():
+    rng = random.Random(201)
+    groups = {f'kw{i}': [_video(int(rng.paretovariate(1.2) * 500), rng.choice([None, rng.uniform(0, 2000)]),
+                                rng.randint(0, 500), rng.choice(['PT3M10S', 'PT1H', '', 'PT59S']))
+                         for _ in range(rng.randint(0, 30))]
+              for i in range(300)}
+    batch = velocity_by_keyword(groups, now=NOW)
+    numpy, view_velocity.np = view_velocity.np, None
+    try:
+        plain = velocity_by_keyword(groups, now=NOW)
+    finally:
+        view_velocity.np = numpy
+    for keyword in groups:
+        for name in VELOCITY_METRICS:
+            assert abs(batch[keyword][name] - plain[keyword][name]) <= 0.1, (keyword, name)
+    print('Velocidad por lotes = keyword a keyword OK ✅')
+
+
+if __name__ == '__main__':
+    test_known_values()
+    test_batch_matches_pure_python()
@@ -0,0 +1,171 @@
+"""
+Normalización de texto para los clasificadores de señales
+Una sola vez por video: minúsculas, sin acentos ("cómo" == "como") y tokens
+por límites de palabra. Los clasificadores (PhraseMatcher) buscan palabras en
+el conjunto de tokens y frases de varias palabras (n-gramas) en la secuencia
+de tokens, así que "top" ya no coincide con "laptop" ni "vs" con "canvas".
+También se detecta el idioma del video (language_id) para que cada texto
+vaya sólo al léxico de su idioma.
+El resultado se memoiza por videoId (VideoTextCache, LRU): un video que sale
+en varias keywords o que pasa por varios clasificadores se normaliza una vez.
+Los textos sueltos (keywords, títulos sin ID) se memoizan por contenido.
+Proyecto 201 digital
+"""
+
+import os
+import re
+import sys
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from language_id import get_language_identifier
+
+# Videos normalizados que se guardan en memoria (LRU)
+DEFAULT_TEXT_CACHE_SIZE = int(os.environ.get('TEXT_CACHE_SIZE', 5000))
+
+_TOKEN_RE = re.compile(r'\w+')
+# Diacríticos combinables que deja NFKD (tildes, diéresis, virgulilla de la ñ...).
+# La clase sirve igual para `re`, pandas y Polars (batch_classifier)
+COMBINING_MARKS = '[\u0300-\u036f]'
+_COMBINING_RE = re.compile(COMBINING_MARKS)
+
+
+def fold(text: str) -> str:
+    """Minúsculas y sin diacríticos (á->a, ñ->n, ü->u)."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return _COMBINING_RE.sub('', unicodedata.normalize('NFKD', text))
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """Palabras del texto plegado ("Top-10 Trucos" -> ('top', '10', 'trucos'))."""
+    return tuple(_TOKEN_RE.findall(fold(text)))
+
+
+class NormalizedText:
+    """Tokens de un texto, con su conjunto de palabras y la secuencia unida por
+    espacios para buscar frases ('paso a paso') sólo en límites de palabra.
+    Ambos se calculan bajo demanda y se conservan."""
+
+    __slots__ = ('tokens', '_words', '_joined')
+
+    def __init__(self, tokens: Tuple[str, ...]):
+        self.tokens = tokens
+        self._words: Optional[FrozenSet[str]] = None
+        self._joined: Optional[str] = None
+
+    @property
+    def words(self) -> FrozenSet[str]:
+        """Palabras distintas del texto."""
+        if self._words is None:
+            self._words = frozenset(self.tokens)
+        return self._words
+
+    def has_phrase(self, phrase: str) -> bool:
+        """¿Aparece la frase (tokens normalizados unidos por un espacio) completa?"""
+        if self._joined is None:
+            self._joined = ' ' + ' '.join(self.tokens) + ' '
+        return ' ' + phrase + ' ' in self._joined
+
+    def __bool__(self):
+        return bool(self.tokens)
+
+    def __repr__(self):
+        return f"NormalizedText({' '.join(self.tokens)!r})"
+
+
+@lru_cache(maxsize=20000)
+def normalize_text(text: str) -> NormalizedText:
+    """NormalizedText de un texto suelto (memoizado por contenido)."""
+    return NormalizedText(tokenize(text or ''))
+
+
+class NormalizedVideo(NamedTuple):
+    title: NormalizedText
+    description: NormalizedText
+    tags: Tuple[NormalizedText, ...]
+    # Idioma detectado (language_id) o None si no está claro
+    language: Optional[str] = None
+
+    def fields(self) -> List[NormalizedText]:
+        """Título, descripción y cada tag, en el orden que recorren los clasificadores."""
+        return [self.title, self.description, *self.tags]
+
+
+def _video_fields(video: Dict) -> Tuple[Optional[str], Dict]:
+    """(videoId, campos) de un item de videos.list/search.list o de un dict ya aplanado."""
+    fields = video.get('snippet') if isinstance(video.get('snippet'), dict) else video
+    video_id = video.get('video_id') or video.get('id')
+    if isinstance(video_id, dict):
+        video_id = video_id.get('videoId')
+    return video_id, fields
+
+
+class VideoTextCache:
+    """Textos normalizados por videoId, compartidos por todos los clasificadores."""
+
+    def __init__(self, max_size: int = DEFAULT_TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self._videos: 'OrderedDict[str, NormalizedVideo]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, video: Dict) -> NormalizedVideo:
+        video_id, fields = _video_fields(video)
+        if video_id:
+            with self._lock:
+                cached = self._videos.get(video_id)
+                if cached is not None:
+                    self._videos.move_to_end(video_id)
+                    self.stats['hits'] += 1
+                    return cached
+        title = fields.get('title') or ''
+        description = fields.get('description') or ''
+        normalized = NormalizedVideo(
+            title=NormalizedText(tokenize(title)),
+            description=NormalizedText(tokenize(description)),
+            tags=tuple(normalize_text(tag) for tag in (fields.get('tags') or []) if tag),
+            language=get_language_identifier().detect(f'{title}\n{description}'),
+        )
+        with self._lock:
+            self.stats['misses'] += 1
+            if video_id:
+                self._videos[video_id] = normalized
+                while len(self._videos) > self.max_size:
+                    self._videos.popitem(last=False)
+        return normalized
+
+    def __len__(self):
+        return len(self._videos)
+
+    def summary(self) -> str:
+        s = self.stats
+        total = s['hits'] + s['misses']
+        rate = s['hits'] / total * 100 if total else 0.0
+        return (f"🔤 Texto normalizado: {len(self)} videos en memoria | "
+                f"{s['hits']}/{total} reutilizados ({rate:.0f}%)")
+
+
+_text_cache = None
+_text_cache_lock = threading.Lock()
+
+
+def get_text_cache() -> VideoTextCache:
+    """Caché única del proceso."""
+    global _text_cache
+    if _text_cache is None:
+        with _text_cache_lock:
+            if _text_cache is None:
+                _text_cache = VideoTextCache()
+    return _text_cache
+
+
+def normalize_video(video: Dict) -> NormalizedVideo:
+    """Título, descripción y tags normalizados de un video (memoizado por videoId)."""
+    return get_text_cache().get(video)
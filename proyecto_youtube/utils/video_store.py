@@ -0,0 +1,228 @@
+"""
+Almacén de videos deduplicado entre keywords
+Keywords relacionadas ("mejores auriculares", "auriculares baratos") devuelven
+muchos de los mismos videos. Sus items de videos.list se guardan por videoId
+en memoria (toda la ejecución) y en la BD (tabla `videos` + un snapshot de
+estadísticas en `video_stats_snapshots`). Mientras el snapshot sea reciente
+se sirve en local; sólo los IDs nuevos o caducados salen a videos.list.
+También lleva la cuenta de qué videos comparte cada par de keywords.
+Proyecto 201 digital
+"""
+
+import math
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from api_usage_tracker import tracker
+from field_masks import field_mask
+from youtube_batch import MAX_IDS_PER_CALL, BatchLookup
+
+# Ventana de frescura de las estadísticas de un video (horas)
+DEFAULT_MAX_AGE_HOURS = float(os.environ.get('VIDEO_STATS_MAX_AGE_HOURS', 12))
+
+# Persistencia opcional en la BD del proyecto (tablas videos y video_stats_snapshots)
+try:
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from proyecto_youtube.db.session import SessionLocal
+    from proyecto_youtube.db.utils import init_db, load_videos, upsert_videos
+except Exception:
+    SessionLocal = None
+
+
+def keyword_overlap(ids_by_keyword: Dict[str, Iterable[str]]) -> Dict:
+    """Solapamiento de videos entre keywords.
+
+    Devuelve el total de apariciones, los videos únicos, los que salen en más
+    de una keyword y los pares de keywords ordenados por videos compartidos
+    [(kw_a, kw_b, compartidos, jaccard)].
+    """
+    sets = {kw: set(ids) for kw, ids in ids_by_keyword.items() if ids}
+    appearances = sum(len(ids) for ids in sets.values())
+    counts: Dict[str, int] = {}
+    for ids in sets.values():
+        for vid in ids:
+            counts[vid] = counts.get(vid, 0) + 1
+    pairs = []
+    for (kw_a, ids_a), (kw_b, ids_b) in combinations(sets.items(), 2):
+        shared = len(ids_a & ids_b)
+        if shared:
+            pairs.append((kw_a, kw_b, shared, shared / len(ids_a | ids_b)))
+    pairs.sort(key=lambda pair: (pair[2], pair[3]), reverse=True)
+    return {
+        'appearances': appearances,
+        'unique': len(counts),
+        'shared': sum(1 for n in counts.values() if n > 1),
+        'pairs': pairs,
+    }
+
+
+class VideoStatsStore:
+    """Memoria de la ejecución -> BD (snapshot vigente) -> videos.list (agrupado)."""
+
+    def __init__(self, max_age_hours: float = DEFAULT_MAX_AGE_HOURS, use_db: bool = True):
+        self.max_age = timedelta(hours=max_age_hours)
+        self.use_db = use_db and SessionLocal is not None
+        self._memory: Dict[str, tuple] = {}  # videoId -> (item de videos.list, fetched_at UTC)
+        self._ids_by_keyword: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db_ready = False
+        self.stats = {'requested': 0, 'memory_hits': 0, 'db_hits': 0, 'fetched': 0,
+                      'calls': 0, 'calls_per_keyword': 0, 'units_saved': 0}
+
+    def _is_fresh(self, fetched_at: Optional[datetime], fresh_since: Optional[datetime] = None) -> bool:
+        if fetched_at is None or (fresh_since is not None and fetched_at < fresh_since):
+            return False
+        return datetime.utcnow() - fetched_at <= self.max_age
+
+    def _load_from_db(self, video_ids) -> Dict[str, tuple]:
+        if not self.use_db or not video_ids:
+            return {}
+        with self._db_lock:
+            session = SessionLocal()
+            try:
+                if not self._db_ready:
+                    init_db()
+                    self._db_ready = True
+                return load_videos(session, video_ids)
+            except Exception as e:
+                print(f"⚠️  Almacén de videos: no se pudo leer la BD ({e})")
+                return {}
+            finally:
+                session.close()
+
+    def _save_to_db(self, items, fetched_at: datetime):
+        if not self.use_db or not items:
+            return
+        with self._db_lock:
+            session = SessionLocal()
+            try:
+                upsert_videos(session, items, fetched_at=fetched_at)
+            except Exception as e:
+                session.rollback()
+                print(f"⚠️  Almacén de videos: no se pudo guardar en la BD ({e})")
+            finally:
+                session.close()
+
+    def get_many(self, youtube, video_ids: Iterable[str], keyword: Optional[str] = None,
+                 fresh_since: Optional[datetime] = None) -> Dict[str, Dict]:
+        """{videoId: item de videos.list} pidiendo a la API sólo los IDs nuevos o caducados."""
+        ids = list(dict.fromkeys(vid for vid in video_ids if vid))
+        return self.get_for_keywords(youtube, {keyword: ids} if keyword else {None: ids}, fresh_since)
+
+    def get_for_keywords(self, youtube, ids_by_keyword: Dict[Optional[str], List[str]],
+                         fresh_since: Optional[datetime] = None) -> Dict[str, Dict]:
+        """Como get_many para los IDs de varias keywords a la vez (un solo lote).
+
+        Las unidades ahorradas se cuentan frente a lo que pagaría cada keyword
+        pidiendo sus propios IDs a videos.list (1 unidad por cada 50 IDs).
+        Con `fresh_since` (UTC) las estadísticas anteriores a ese momento cuentan
+        como caducadas aunque estén dentro de max_age (modo --refresh). Si la
+        API no devuelve algún ID (sub-request fallida), se sirve su snapshot
+        caducado si lo hay.
+        """
+        ids = list(dict.fromkeys(vid for vids in ids_by_keyword.values() for vid in vids if vid))
+        result: Dict[str, Dict] = {}
+        stale: Dict[str, Dict] = {}
+
+        with self._lock:
+            for keyword, vids in ids_by_keyword.items():
+                if keyword:
+                    self._ids_by_keyword[keyword] = list(vids)
+            self.stats['requested'] += len(ids)
+            pending = []
+            for vid in ids:
+                entry = self._memory.get(vid)
+                if entry and self._is_fresh(entry[1], fresh_since):
+                    result[vid] = entry[0]
+                    self.stats['memory_hits'] += 1
+                else:
+                    if entry:
+                        stale[vid] = entry[0]
+                    pending.append(vid)
+
+        stored = self._load_from_db(pending)
+        to_fetch = []
+        for vid in pending:
+            entry = stored.get(vid)
+            if entry and self._is_fresh(entry[1], fresh_since):
+                result[vid] = entry[0]
+                with self._lock:
+                    self._memory[vid] = entry
+                    self.stats['db_hits'] += 1
+            else:
+                if entry:
+                    stale[vid] = entry[0]
+                to_fetch.append(vid)
+
+        lookup = BatchLookup(youtube)
+        if to_fetch:
+            try:
+                items = lookup.fetch_videos(to_fetch, fields=field_mask('videos.analysis'))
+            except Exception as e:
+                if not stale:
+                    raise
+                print(f"⚠️  videos.list falló ({e}); usando {len(stale)} videos caducados del almacén")
+                items = stale
+            else:
+                fetched_at = datetime.utcnow()
+                with self._lock:
+                    for vid, item in items.items():
+                        self._memory[vid] = (item, fetched_at)
+                    self.stats['fetched'] += len(items)
+                self._save_to_db(list(items.values()), fetched_at)
+                missing = [vid for vid in to_fetch if vid not in items and vid in stale]
+                if missing:
+                    print(f"⚠️  videos.list no devolvió {len(missing)} videos; usando su snapshot caducado del almacén")
+                    result.update((vid, stale[vid]) for vid in missing)
+            result.update(items)
+
+        per_keyword = sum(math.ceil(len(set(vids)) / MAX_IDS_PER_CALL) for vids in ids_by_keyword.values())
+        saved = max(0, per_keyword - lookup.stats['calls'])
+        with self._lock:
+            self.stats['calls'] += lookup.stats['calls']
+            self.stats['calls_per_keyword'] += per_keyword
+            self.stats['units_saved'] += saved
+        tracker.log_units_saved('video_store', saved)
+        return result
+
+    def avoided(self) -> int:
+        """Lookups de video servidos sin llamar a la API."""
+        return self.stats['memory_hits'] + self.stats['db_hits']
+
+    def overlap(self) -> Dict:
+        with self._lock:
+            return keyword_overlap(self._ids_by_keyword)
+
+    def summary(self, top_pairs: int = 3) -> str:
+        s = self.stats
+        lines = [f"🎬 Almacén de videos: {s['requested']} lookups | {self.avoided()} servidos en local "
+                 f"({s['memory_hits']} memoria, {s['db_hits']} BD) | {s['fetched']} traídos de videos.list | "
+                 f"{s['calls']} llamadas vs {s['calls_per_keyword']} por keyword ({s['units_saved']} unidades ahorradas)"]
+        overlap = self.overlap()
+        if overlap['appearances']:
+            lines.append(f"   Solapamiento: {overlap['appearances']} apariciones, {overlap['unique']} videos únicos, "
+                         f"{overlap['shared']} en más de una keyword")
+            for kw_a, kw_b, shared, jaccard in overlap['pairs'][:top_pairs]:
+                lines.append(f"   • '{kw_a}' ∩ '{kw_b}': {shared} videos ({jaccard:.0%})")
+        return '\n'.join(lines)
+
+
+_video_store = None
+_video_store_lock = threading.Lock()
+
+
+def get_video_store() -> VideoStatsStore:
+    """Almacén único del proceso."""
+    global _video_store
+    if _video_store is None:
+        with _video_store_lock:
+            if _video_store is None:
+                _video_store = VideoStatsStore()
+    return _video_store
@@ -0,0 +1,163 @@
+"""
+Métricas de views de todas las keywords de una ejecución en una pasada
+Las views de la ejecución se guardan en un único array (values) con los
+límites de cada keyword (offsets: la keyword i ocupa values[offsets[i]:offsets[i+1]]).
+Con NumPy se ordena todo el array una vez por (keyword, views) y media,
+mediana, P75, máximo, mínimo, ratio de saturación y videos monetizables de
+cada keyword salen de índices y sumas acumuladas, sin bucles por keyword.
+Sin NumPy se calcula lo mismo keyword a keyword, con resultados idénticos.
+
+Percentil: interpolación lineal entre los dos valores ordenados más cercanos
+(k = (n - 1) * p / 100), el método por defecto de numpy.percentile; la
+mediana es el percentil 50 (con n par, la media de los dos centrales).
+Proyecto 201 digital
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+# NumPy opcional (viene con pandas)
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Percentil de referencia de los umbrales de decisión (P75)
+DEFAULT_PERCENTILE = 75
+
+# Un video cuenta como monetizable con más de estas views
+MONETIZABLE_MIN_VIEWS = 10000
+
+# Columnas de métricas por keyword
+METRICS = ('count', 'total', 'mean', 'median', 'pct', 'max', 'min', 'saturation_ratio', 'monetizable_count')
+
+
+def pack(groups: Iterable[Sequence[int]]) -> Tuple[List[int], List[int]]:
+    """Une las views (enteros, ver videos_views) de cada keyword en (values, offsets)."""
+    values: List[int] = []
+    offsets = [0]
+    for views in groups:
+        values.extend(views)
+        offsets.append(len(values))
+    return values, offsets
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """Percentil p (0-100) de una lista ya ordenada, con interpolación lineal."""
+    if not sorted_values:
+        return 0
+    k = (len(sorted_values) - 1) * (p / 100.0)
+    f = int(k)
+    c = min(f + 1, len(sorted_values) - 1)
+    if f == c:
+        return sorted_values[f]
+    return sorted_values[f] * (c - k) + sorted_values[c] * (k - f)
+
+
+def _empty_row() -> Dict[str, float]:
+    return {name: 0 for name in METRICS}
+
+
+def _segment_metrics(views: Sequence[int], p: float, monetizable_min: int) -> Dict[str, float]:
+    if not views:
+        return _empty_row()
+    ordered = sorted(views)
+    total = sum(ordered)
+    mean = total / len(ordered)
+    maximum = ordered[-1]
+    return {
+        'count': len(ordered),
+        'total': total,
+        'mean': mean,
+        'median': percentile(ordered, 50),
+        'pct': percentile(ordered, p),
+        'max': maximum,
+        'min': ordered[0],
+        'saturation_ratio': mean / maximum if maximum > 0 else 0.0,
+        'monetizable_count': sum(1 for v in ordered if v > monetizable_min),
+    }
+
+
+def segment_percentile(ordered, starts, counts, p: float):
+    """Percentil p de cada segmento no vacío del array ya ordenado por segmento."""
+    k = (counts - 1) * (p / 100.0)
+    f = k.astype(np.int64)
+    c = np.minimum(f + 1, counts - 1)
+    low, high = ordered[starts + f], ordered[starts + c]
+    return np.where(f == c, low, low * (c - k) + high * (k - f))
+
+
+def compute(values: Sequence[int], offsets: Sequence[int], p: float = DEFAULT_PERCENTILE,
+            monetizable_min: int = MONETIZABLE_MIN_VIEWS) -> Dict[str, list]:
+    """Métricas de cada keyword como columnas (una lista por métrica, una posición por keyword).
+
+    Las keywords sin videos tienen todas sus métricas a 0.
+    """
+    keywords = max(0, len(offsets) - 1)
+    if np is None:
+        rows = [_segment_metrics(values[offsets[i]:offsets[i + 1]], p, monetizable_min)
+                for i in range(keywords)]
+        return {name: [row[name] for row in rows] for name in METRICS}
+
+    values = np.asarray(values, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    starts = offsets[:-1]
+    # Ordenar por (keyword, views) de una vez: cada segmento queda ordenado en su sitio.
+    # Si caben en 63 bits, keyword y views van en una sola clave entera (un sort,
+    # mucho más rápido que lexsort)
+    segment = np.repeat(np.arange(keywords, dtype=np.int64), counts)
+    shift = int(values.max()).bit_length() if len(values) and values.min() >= 0 else 64
+    if shift + max(1, keywords).bit_length() < 63:
+        ordered = (np.sort((segment << shift) | values) & ((1 << shift) - 1)).astype(np.float64)
+    else:
+        ordered = values[np.lexsort((values, segment))].astype(np.float64)
+    # Sumas por segmento con acumulados enteros (exactas y sin reduceat, que falla con vacíos)
+    cumulative = np.concatenate(([0], np.cumsum(values)))
+    monetizable = np.concatenate(([0], np.cumsum(values > monetizable_min)))
+    totals = cumulative[offsets[1:]] - cumulative[starts]
+
+    columns = {name: np.zeros(keywords) for name in METRICS}
+    filled = counts > 0
+    if filled.any():
+        n, first = counts[filled], starts[filled]
+        mean = totals[filled] / n
+        maximum = ordered[first + n - 1]
+        columns['mean'][filled] = mean
+        columns['median'][filled] = segment_percentile(ordered, first, n, 50)
+        columns['pct'][filled] = segment_percentile(ordered, first, n, p)
+        columns['max'][filled] = maximum
+        columns['min'][filled] = ordered[first]
+        columns['saturation_ratio'][filled] = np.divide(mean, maximum, out=np.zeros_like(mean),
+                                                        where=maximum > 0)
+    columns['count'] = counts
+    columns['total'] = totals
+    columns['monetizable_count'] = monetizable[offsets[1:]] - monetizable[starts]
+    # Tipos de Python: las columnas acaban en dicts, CSV y JSON
+    return {name: column.tolist() for name, column in columns.items()}
+
+
+def _as_ints(row: Dict[str, float]) -> Dict[str, float]:
+    for name in ('count', 'total', 'max', 'min', 'monetizable_count'):
+        row[name] = int(row[name])
+    return row
+
+
+def metrics_by_keyword(views_by_keyword: Dict[Hashable, Sequence[int]], p: float = DEFAULT_PERCENTILE,
+                       monetizable_min: int = MONETIZABLE_MIN_VIEWS) -> Dict[Hashable, Dict[str, float]]:
+    """{keyword: métricas} de todas las keywords en una pasada."""
+    keywords = list(views_by_keyword)
+    values, offsets = pack(views_by_keyword[k] for k in keywords)
+    columns = compute(values, offsets, p, monetizable_min)
+    return {keyword: _as_ints({name: columns[name][i] for name in METRICS})
+            for i, keyword in enumerate(keywords)}
+
+
+def view_metrics(views: Sequence[int], p: float = DEFAULT_PERCENTILE,
+                 monetizable_min: int = MONETIZABLE_MIN_VIEWS) -> Dict[str, float]:
+    """Métricas de una sola lista de views (mismo cálculo que para un lote)."""
+    return _as_ints(_segment_metrics([int(v or 0) for v in views], p, monetizable_min))
+
+
+def videos_views(videos: Optional[Sequence[Dict]]) -> List[int]:
+    """viewCount de cada video (0 si falta)."""
+    return [int(video.get('viewCount') or 0) for video in videos or []]
@@ -0,0 +1,138 @@
+"""
+Distribuciones de views por keyword guardadas como sketches de cuantiles
+Cada ejecución deja en memoria el sketch KLL (utils/quantile_sketch.py) de
+las views de cada keyword y al final lo guarda en la BD como el sketch del
+día (niche_view_sketches). La distribución semanal o mensual de una keyword
+es la fusión de sus sketches diarios: no hace falta volver a leer videos ni
+snapshots. Las semanas y meses ya cerrados se guardan fusionados y se leen
+directamente la siguiente vez.
+Proyecto 201 digital
+"""
+
+import datetime
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from quota_scheduler import quota_day
+from quantile_sketch import KLLSketch, merge_all
+
+# Persistencia opcional en la BD del proyecto (tabla niche_view_sketches)
+try:
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from proyecto_youtube.db.session import SessionLocal
+    from proyecto_youtube.db.utils import init_db, load_view_sketches, save_view_sketches
+except Exception:
+    SessionLocal = None
+
+PERIODS = ('day', 'week', 'month')
+
+
+def period_bounds(period: str, day: Optional[str] = None) -> Tuple[str, str]:
+    """(primer día, primer día del siguiente periodo) del periodo que contiene `day` (YYYY-MM-DD)."""
+    if period not in PERIODS:
+        raise ValueError(f"Periodo desconocido: {period} (opciones: {', '.join(PERIODS)})")
+    date = datetime.date.fromisoformat(day or quota_day())
+    if period == 'day':
+        start, end = date, date + datetime.timedelta(days=1)
+    elif period == 'week':
+        start = date - datetime.timedelta(days=date.weekday())
+        end = start + datetime.timedelta(days=7)
+    else:
+        start = date.replace(day=1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start.isoformat(), end.isoformat()
+
+
+class ViewSketchStore:
+    """Sketches de la ejecución (memoria) y sus agregados por periodo (BD)."""
+
+    def __init__(self, use_db: bool = True):
+        self.use_db = use_db and SessionLocal is not None
+        self._sketches: Dict[str, KLLSketch] = {}  # keyword -> sketch de esta ejecución
+        self._lock = threading.Lock()
+        self._db_ready = False
+
+    def add(self, keyword: str, views: Iterable[int]) -> KLLSketch:
+        """Sketch de las views de `keyword` en esta ejecución (sustituye al anterior)."""
+        sketch = KLLSketch.of(views)
+        with self._lock:
+            self._sketches[keyword] = sketch
+        return sketch
+
+    def sketches(self) -> Dict[str, KLLSketch]:
+        with self._lock:
+            return dict(self._sketches)
+
+    def _session(self):
+        session = SessionLocal()
+        if not self._db_ready:
+            init_db()
+            self._db_ready = True
+        return session
+
+    def save(self, region: Optional[str], day: Optional[str] = None) -> int:
+        """Guarda los sketches de la ejecución como los del día; devuelve cuántos."""
+        sketches = self.sketches()
+        if not self.use_db or not sketches:
+            return 0
+        start, _ = period_bounds('day', day)
+        session = self._session()
+        try:
+            save_view_sketches(session, {kw: (s.n, s.to_json()) for kw, s in sketches.items()},
+                               region, 'day', start)
+            return len(sketches)
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️  Distribuciones de views: no se pudo guardar en la BD ({e})")
+            return 0
+        finally:
+            session.close()
+
+    def distribution(self, keywords: List[str], region: Optional[str], period: str = 'week',
+                     day: Optional[str] = None) -> Dict[str, KLLSketch]:
+        """{keyword: sketch} del periodo que contiene `day` (por defecto hoy).
+
+        Sin BD, sólo los sketches de esta ejecución.
+        """
+        start, end = period_bounds(period, day)
+        if not self.use_db:
+            current = self.sketches()
+            return {kw: current[kw] for kw in keywords if kw in current}
+        session = self._session()
+        try:
+            closed = end <= quota_day()
+            stored = load_view_sketches(session, keywords, region, period, start) if period != 'day' and closed else {}
+            result = {kw: KLLSketch.from_json(by_start[start]) for kw, by_start in stored.items()}
+            pending = [kw for kw in keywords if kw not in result]
+            days = load_view_sketches(session, pending, region, 'day', start, end)
+            merged = {kw: merge_all(KLLSketch.from_json(text) for text in by_day.values())
+                      for kw, by_day in days.items()}
+            # Sólo un periodo cerrado se guarda fusionado: uno abierto aún recibe días
+            if period != 'day' and closed and merged:
+                save_view_sketches(session, {kw: (s.n, s.to_json()) for kw, s in merged.items()},
+                                   region, period, start)
+            result.update(merged)
+            return result
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️  Distribuciones de views: no se pudo leer la BD ({e})")
+            return {}
+        finally:
+            session.close()
+
+
+_sketch_store = None
+_sketch_store_lock = threading.Lock()
+
+
+def get_view_sketch_store() -> ViewSketchStore:
+    """Almacén único del proceso."""
+    global _sketch_store
+    if _sketch_store is None:
+        with _sketch_store_lock:
+            if _sketch_store is None:
+                _sketch_store = ViewSketchStore()
+    return _sketch_store
@@ -0,0 +1,231 @@
+"""
+Velocidad de views por keyword: views/día, likes/view y medianas por recencia
+viewCount a secas trata igual un video de hace 5 años que uno de hace 2
+semanas. Aquí publishedAt y contentDetails.duration de todos los videos de
+la ejecución se parsean una sola vez (fechas con datetime64 de NumPy) y, con
+el mismo reparto por keyword que view_metrics (values + offsets), salen en
+una pasada para cada keyword:
+- median_views_per_day / avg_views_per_day   views / días desde la publicación (mínimo 1 día)
+- likes_per_view                             likes totales / views totales
+- recency_weighted_median_views              mediana de views ponderada por 0.5^(edad / vida media)
+- median_age_days, median_duration_seconds
+Los campos ya vienen en videos.list (máscaras videos.analysis y videos.potential): no cuesta
+cuota. Videos sin fecha (o sin duración) no cuentan en esas métricas.
+Proyecto 201 digital
+"""
+
+import datetime
+import functools
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Sequence
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from view_metrics import pack, percentile, segment_percentile
+
+# NumPy opcional (viene con pandas)
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Vida media (días) del peso por recencia: un video de esta edad pesa la mitad que uno nuevo
+DEFAULT_HALF_LIFE_DAYS = float(os.environ.get('VELOCITY_HALF_LIFE_DAYS', 90))
+
+# Edad mínima: un video de horas no dispara las views/día
+MIN_AGE_DAYS = 1.0
+
+# Columnas de velocidad por keyword
+VELOCITY_METRICS = ('median_views_per_day', 'avg_views_per_day', 'likes_per_view',
+                    'recency_weighted_median_views', 'median_age_days', 'median_duration_seconds')
+
+_DURATION_RE = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_duration(value: Optional[str]) -> Optional[int]:
+    """'PT1H2M3S' (ISO 8601 de contentDetails.duration) -> 3723 segundos (None si no se entiende).
+
+    Las duraciones se repiten mucho entre videos: cada texto distinto se parsea una vez.
+    """
+    match = _DURATION_RE.match(value or '')
+    if not match or not value or value in ('P', 'PT'):
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def _parse_published(value: Optional[str]) -> Optional[datetime.datetime]:
+    try:
+        return datetime.datetime.strptime((value or '')[:19], '%Y-%m-%dT%H:%M:%S')
+    except ValueError:
+        return None
+
+
+def _ages_array(published: Sequence[Optional[str]], now: datetime.datetime):
+    """Edades en días como array (NaN sin fecha): un solo parseo datetime64 para todo el lote."""
+    try:
+        stamps = np.array([(value or '')[:19] or 'NaT' for value in published], dtype='datetime64[s]')
+    except ValueError:
+        stamps = np.array([_parse_published(value) or 'NaT' for value in published], dtype='datetime64[s]')
+    ages = (np.datetime64(now.replace(microsecond=0), 's') - stamps).astype(np.float64) / 86400
+    return np.where(np.isnat(stamps), np.nan, np.maximum(ages, MIN_AGE_DAYS))
+
+
+def ages_days(published: Sequence[Optional[str]], now: Optional[datetime.datetime] = None) -> List[Optional[float]]:
+    """Días desde cada publishedAt hasta `now` (UTC, por defecto ahora), mínimo MIN_AGE_DAYS; None si falta."""
+    now = now or datetime.datetime.utcnow()
+    if np is not None:
+        return [None if np.isnan(age) else float(age) for age in _ages_array(published, now)]
+    ages = []
+    for value in published:
+        stamp = _parse_published(value)
+        ages.append(None if stamp is None else max(MIN_AGE_DAYS, (now - stamp).total_seconds() / 86400))
+    return ages
+
+
+def _empty_row() -> Dict[str, float]:
+    return {name: 0 for name in VELOCITY_METRICS}
+
+
+def _weighted_median(values: Sequence[float], weights: Sequence[float]) -> float:
+    """Primer valor (ordenado) en el que el peso acumulado llega a la mitad del total."""
+    pairs = sorted(zip(values, weights))
+    half = sum(weights) / 2
+    cumulative = 0.0
+    for value, weight in pairs:
+        cumulative += weight
+        if cumulative >= half:
+            return value
+    return pairs[-1][0] if pairs else 0
+
+
+def _segment_velocity(views, likes, ages, durations, half_life: float) -> Dict[str, float]:
+    row = _empty_row()
+    total_views = sum(views)
+    row['likes_per_view'] = sum(likes) / total_views if total_views > 0 else 0.0
+    dated = [(v, a) for v, a in zip(views, ages) if a is not None]
+    if dated:
+        per_day = sorted(v / a for v, a in dated)
+        row['median_views_per_day'] = percentile(per_day, 50)
+        row['avg_views_per_day'] = sum(per_day) / len(per_day)
+        row['recency_weighted_median_views'] = _weighted_median(
+            [v for v, _ in dated], [0.5 ** (a / half_life) for _, a in dated])
+        row['median_age_days'] = percentile(sorted(a for _, a in dated), 50)
+    timed = sorted(d for d in durations if d is not None)
+    if timed:
+        row['median_duration_seconds'] = percentile(timed, 50)
+    return row
+
+
+def _float_array(values):
+    """Array float con NaN donde no hay valor (acepta listas con None o arrays ya hechos)."""
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64, copy=False)
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def _segment_median_mean(values, segment, keywords: int):
+    """(mediana, media) de `values` por segmento; 0 en segmentos sin valores."""
+    counts = np.bincount(segment, minlength=keywords)
+    ordered = values[np.lexsort((values, segment))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    median, mean = np.zeros(keywords), np.zeros(keywords)
+    filled = counts > 0
+    if filled.any():
+        median[filled] = segment_percentile(ordered, starts[filled], counts[filled], 50)
+        mean[filled] = np.bincount(segment, weights=values, minlength=keywords)[filled] / counts[filled]
+    return median, mean
+
+
+def _segment_weighted_median(values, weights, segment, keywords: int):
+    """Mediana ponderada por segmento: búsqueda binaria sobre el peso acumulado global."""
+    result = np.zeros(keywords)
+    counts = np.bincount(segment, minlength=keywords)
+    filled = counts > 0
+    if not filled.any():
+        return result
+    order = np.lexsort((values, segment))
+    ordered, cumulative = values[order], np.cumsum(weights[order])
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    base = np.where(starts > 0, cumulative[np.maximum(starts - 1, 0)], 0.0)
+    target = base + (cumulative[np.maximum(ends - 1, 0)] - base) / 2
+    index = np.clip(np.searchsorted(cumulative, target, side='left'), starts, np.maximum(ends - 1, 0))
+    result[filled] = ordered[index[filled]]
+    return result
+
+
+def compute(values: Sequence[int], offsets: Sequence[int], likes: Sequence[int],
+            ages: Sequence[Optional[float]], durations: Sequence[Optional[int]],
+            half_life: float = DEFAULT_HALF_LIFE_DAYS) -> Dict[str, list]:
+    """Métricas de velocidad de cada keyword como columnas (mismo reparto values/offsets que view_metrics).
+
+    `ages` (días) y `durations` (segundos) tienen None (o NaN) donde falta el dato.
+    """
+    keywords = max(0, len(offsets) - 1)
+    if np is None:
+        rows = [_segment_velocity(values[a:b], likes[a:b], ages[a:b], durations[a:b], half_life)
+                for a, b in zip(offsets[:-1], offsets[1:])]
+        return {name: [row[name] for row in rows] for name in VELOCITY_METRICS}
+
+    views = np.asarray(values, dtype=np.float64)
+    counts = np.diff(np.asarray(offsets, dtype=np.int64))
+    segment = np.repeat(np.arange(keywords, dtype=np.int64), counts)
+    columns = {name: np.zeros(keywords) for name in VELOCITY_METRICS}
+
+    total_views = np.bincount(segment, weights=views, minlength=keywords)
+    total_likes = np.bincount(segment, weights=np.asarray(likes, dtype=np.float64), minlength=keywords)
+    columns['likes_per_view'] = np.divide(total_likes, total_views, out=np.zeros(keywords), where=total_views > 0)
+
+    age = _float_array(ages)
+    dated = ~np.isnan(age)
+    if dated.any():
+        seg, v, a = segment[dated], views[dated], age[dated]
+        columns['median_views_per_day'], columns['avg_views_per_day'] = _segment_median_mean(v / a, seg, keywords)
+        columns['median_age_days'], _ = _segment_median_mean(a, seg, keywords)
+        columns['recency_weighted_median_views'] = _segment_weighted_median(v, 0.5 ** (a / half_life), seg, keywords)
+
+    duration = _float_array(durations)
+    timed = ~np.isnan(duration)
+    if timed.any():
+        columns['median_duration_seconds'], _ = _segment_median_mean(duration[timed], segment[timed], keywords)
+    return {name: column.tolist() for name, column in columns.items()}
+
+
+def _round(row: Dict[str, float]) -> Dict[str, float]:
+    for name in ('median_views_per_day', 'avg_views_per_day', 'median_age_days'):
+        row[name] = round(row[name], 1)
+    row['likes_per_view'] = round(row['likes_per_view'], 5)
+    row['recency_weighted_median_views'] = int(row['recency_weighted_median_views'])
+    row['median_duration_seconds'] = int(row['median_duration_seconds'])
+    return row
+
+
+def velocity_by_keyword(videos_by_keyword: Dict[Hashable, Sequence[Dict]], now: Optional[datetime.datetime] = None,
+                        half_life: float = DEFAULT_HALF_LIFE_DAYS) -> Dict[Hashable, Dict[str, float]]:
+    """{keyword: métricas de velocidad} de todas las keywords en una pasada.
+
+    Los videos son los dicts de los analizadores (viewCount, likeCount,
+    publishedAt y, si la hay, duration).
+    """
+    keywords = list(videos_by_keyword)
+    groups = [videos_by_keyword[k] or [] for k in keywords]
+    values, offsets = pack([int(v.get('viewCount') or 0) for v in videos] for videos in groups)
+    videos = [video for videos in groups for video in videos]
+    likes = [int(video.get('likeCount') or 0) for video in videos]
+    published = [video.get('publishedAt') for video in videos]
+    now = now or datetime.datetime.utcnow()
+    ages = _ages_array(published, now) if np is not None else ages_days(published, now)
+    durations = [parse_duration(video.get('duration')) for video in videos]
+    columns = compute(values, offsets, likes, ages, durations, half_life)
+    return {keyword: _round({name: columns[name][i] for name in VELOCITY_METRICS})
+            for i, keyword in enumerate(keywords)}
+
+
+def video_velocity(videos: Sequence[Dict], now: Optional[datetime.datetime] = None,
+                   half_life: float = DEFAULT_HALF_LIFE_DAYS) -> Dict[str, float]:
+    """Métricas de velocidad de los videos de una sola keyword (mismo cálculo que para un lote)."""
+    return velocity_by_keyword({0: videos}, now, half_life)[0]
@@ -0,0 +1,179 @@
+"""
+Agrupador de lookups por ID para YouTube Data API v3
+videos.list y channels.list cuestan 1 unidad por llamada tanto si piden 1 ID
+como 50. En lugar de una llamada por keyword, se juntan los IDs de todas las
+keywords, se deduplican, se trocean en llamadas llenas de 50 IDs y esas
+llamadas viajan juntas en un único POST batch (BatchHttpRequest).
+Proyecto 201 digital
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from googleapiclient.errors import HttpError
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from api_usage_tracker import tracker
+from quota_scheduler import QuotaExceeded, endpoint_cost, get_quota_scheduler, mask_key
+from retry_engine import RETRYABLE_KINDS, CircuitOpen, classify_error
+from youtube_client import cached_response, revalidated, revalidation_entry, store_response
+
+MAX_IDS_PER_CALL = 50      # límite de la API para el parámetro id
+MAX_CALLS_PER_BATCH = 50   # sub-requests por POST batch (conservador; la librería admite 1000)
+
+
+def chunk_ids(ids: Iterable[str], size: int = MAX_IDS_PER_CALL) -> List[List[str]]:
+    """Deduplica conservando el orden y trocea en grupos de `size`."""
+    unique = list(dict.fromkeys(i for i in ids if i))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+
+class BatchLookup:
+    """Resuelve IDs de videos/canales con el mínimo de llamadas y de round-trips.
+
+    Cada sub-request se consulta antes en la caché de respuestas. Las que no
+    están se envían en lotes; como el POST batch no pasa por QuotaHttp, las
+    unidades de sus sub-requests se reservan aquí en el planificador de cuota.
+    """
+
+    def __init__(self, youtube, scheduler=None):
+        self.youtube = youtube
+        self.scheduler = scheduler or get_quota_scheduler()
+        self.stats = {'ids': 0, 'calls': 0, 'cached_calls': 0, 'round_trips': 0, 'errors': 0}
+
+    def execute_all(self, endpoint: str, requests: List) -> List[Optional[Dict]]:
+        """Ejecuta varias requests de `endpoint` agrupadas en lotes.
+
+        Devuelve las respuestas en el mismo orden; None en las sub-requests que
+        fallaron (el error se informa y no tumba al resto del lote).
+        """
+        responses: List[Optional[Dict]] = [None] * len(requests)
+        pending = []
+        for n, request in enumerate(requests):
+            cached = cached_response(request.uri)
+            if cached is not None:
+                self.stats['cached_calls'] += 1
+                responses[n] = json.loads(cached)
+                continue
+            pending.append((n, request))
+
+        for i in range(0, len(pending), MAX_CALLS_PER_BATCH):
+            self._execute(endpoint, pending[i:i + MAX_CALLS_PER_BATCH], responses)
+        return responses
+
+    def fetch(self, endpoint: str, ids: Iterable[str], part: str, fields: Optional[str] = None) -> Dict[str, Dict]:
+        """Devuelve {id: item} para `endpoint` ('videos' | 'channels').
+
+        `fields` es la máscara de respuesta parcial (ver field_masks); debe incluir items/id.
+        """
+        params = {'part': part}
+        if fields:
+            params['fields'] = fields
+        requests = []
+        for chunk in chunk_ids(ids):
+            self.stats['ids'] += len(chunk)
+            requests.append(getattr(self.youtube, endpoint)().list(id=','.join(chunk), **params))
+
+        items: Dict[str, Dict] = {}
+        for response in self.execute_all(endpoint, requests):
+            for item in (response or {}).get('items', []):
+                items[item['id']] = item
+        return items
+
+    def fetch_videos(self, video_ids: Iterable[str], part: str = 'statistics,snippet,contentDetails',
+                     fields: Optional[str] = None) -> Dict[str, Dict]:
+        return self.fetch('videos', video_ids, part, fields)
+
+    def fetch_channels(self, channel_ids: Iterable[str], part: str = 'statistics,snippet',
+                       fields: Optional[str] = None) -> Dict[str, Dict]:
+        return self.fetch('channels', channel_ids, part, fields)
+
+    def _sub_request_failed(self, endpoint: str, exception: Exception):
+        self.stats['errors'] += 1
+        if classify_error(exception).kind == 'quota':
+            self.scheduler.mark_exhausted()
+        print(f"⚠️  Error en sub-request {endpoint}.list() del lote: {exception}")
+
+    def _execute_single(self, endpoint: str, n: int, request, responses: List[Optional[Dict]]):
+        # Va por el transporte normal (caché, reintentos, cuota y limitador)
+        self.stats['calls'] += 1
+        self.stats['round_trips'] += 1
+        try:
+            responses[n] = request.execute()
+        except (QuotaExceeded, CircuitOpen):
+            # Sin cuota o con la API caída no tiene sentido seguir con el resto
+            raise
+        except Exception as e:
+            # Cualquier otro fallo (HTTP, red, caché offline...) sólo pierde esta sub-request
+            self._sub_request_failed(endpoint, e)
+
+    def _execute(self, endpoint: str, indexed_requests: List, responses: List[Optional[Dict]]):
+        if len(indexed_requests) == 1:
+            self._execute_single(endpoint, *indexed_requests[0], responses)
+            return
+
+        # Una sola reserva para todo el lote: con un pool de keys, todas sus
+        # sub-requests salen con la misma key (QuotaHttp la pone en el POST)
+        reserved = self.scheduler.reserve(endpoint, units=len(indexed_requests) * endpoint_cost(endpoint))
+        key = self.scheduler.current_key()
+
+        # Sub-requests con error transitorio (429, rateLimitExceeded, 5xx) o con
+        # quotaExceeded mientras otra key del pool tenga presupuesto: se repiten
+        # sueltas por el transporte, que las pasa por el motor de reintentos
+        retry = []
+
+        def _callback(request_id, response, exception):
+            entry = conditional.get(request_id)
+            not_modified = isinstance(exception, HttpError) and exception.resp.status == 304
+            if entry is not None and (exception is None or not_modified):
+                revalidated(uris[request_id], entry, not_modified)
+                if not_modified:
+                    responses[int(request_id)] = json.loads(entry[0])
+                    return
+            if exception is not None:
+                kind = classify_error(exception).kind
+                if kind == 'quota':
+                    self.scheduler.mark_exhausted()
+                    if self.scheduler.remaining() > 0:
+                        retry.append(int(request_id))
+                        return
+                if kind in RETRYABLE_KINDS:
+                    retry.append(int(request_id))
+                else:
+                    self._sub_request_failed(endpoint, exception)
+                return
+            responses[int(request_id)] = response
+            store_response(uris[request_id], json.dumps(response).encode('utf-8'))
+
+        batch = self.youtube.new_batch_http_request(callback=_callback)
+        uris = {}
+        # Sub-requests con respuesta caducada y ETag: van con If-None-Match (304 = sin cambios)
+        conditional = {}
+        for n, request in indexed_requests:
+            request_id = str(n)
+            uris[request_id] = request.uri
+            entry = revalidation_entry(request.uri)
+            if entry is not None:
+                request.headers['If-None-Match'] = entry[2]
+                conditional[request_id] = entry
+            batch.add(request, request_id=request_id)
+
+        try:
+            batch.execute()
+        except HttpError:
+            # El lote llegó a la API: las unidades se consideran consumidas
+            raise
+        except Exception:
+            self.scheduler.refund(reserved)
+            raise
+        self.stats['calls'] += len(indexed_requests)
+        self.stats['round_trips'] += 1
+        tracker.log_youtube_request(endpoint, reserved, '',
+                                    f"YouTube {endpoint}.list() x{len(indexed_requests)} (batch)",
+                                    api_key=mask_key(key) if key else '')
+
+        requests_by_n = dict(indexed_requests)
+        for n in sorted(retry):
+            self._execute_single(endpoint, n, requests_by_n[n], responses)
@@ -0,0 +1,462 @@
+"""
+Cliente compartido de YouTube Data API v3
+Un único cliente por proceso (y por API key) con transporte HTTP keep-alive,
+documento de discovery cacheado en memoria y caché persistente de respuestas.
+La red puede sustituirse por fixtures grabados (configure_transport).
+Proyecto 201 digital
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httplib2
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from api_usage_tracker import tracker
+from quota_scheduler import QuotaExceeded, get_quota_scheduler, mask_key
+from rate_limiter import get_rate_limiter
+from replay_transport import (
+    DEFAULT_FIXTURES_DIR, DEFAULT_REPLAY_LATENCY_MS, DEFAULT_TRANSPORT_MODE, TRANSPORT_MODES,
+    FixtureStore, RecordingHttp, ReplayHttp,
+)
+from response_cache import (
+    CACHE_MODES, DEFAULT_CACHE_MODE, OfflineCacheMiss, ResponseCache,
+    endpoint_from_uri, normalize_params,
+)
+from retry_engine import ResponseFailure, classify_error, get_retry_engine
+
+API_SERVICE_NAME = 'youtube'
+API_VERSION = 'v3'
+DEFAULT_TIMEOUT = 30  # segundos por request HTTP
+
+_lock = threading.Lock()
+_clients: Dict[str, object] = {}
+_discovery_doc: Optional[str] = None
+_cache_mode: str = DEFAULT_CACHE_MODE
+_response_cache: Optional[ResponseCache] = None
+_transport_mode: str = DEFAULT_TRANSPORT_MODE
+_transport_options: Dict[str, object] = {
+    'fixtures_dir': DEFAULT_FIXTURES_DIR, 'latency_ms': DEFAULT_REPLAY_LATENCY_MS, 'jitter_ms': 0.0,
+}
+_replay_http: Optional[ReplayHttp] = None
+# Endpoints cuyas respuestas se revalidan por ETag (If-None-Match -> 304)
+ETAG_ENDPOINTS = ('channels', 'videos')
+_etag_lock = threading.Lock()
+_etag_stats = {'conditional': 0, 'not_modified': 0, 'bytes_saved': 0, 'parse_ms_saved': 0.0}
+_BATCH_REQUEST_LINE = re.compile(r'^((?:GET|POST|PUT|PATCH|DELETE) )(\S+)( HTTP/1\.1)(?=\r?$)', re.MULTILINE)
+
+
+class PooledHttp:
+    """Transporte HTTP compartido con conexiones keep-alive.
+
+    httplib2.Http no es thread-safe, así que se mantiene una instancia por hilo:
+    cada hilo reutiliza su propia conexión persistente y todos los hilos
+    comparten el mismo objeto de transporte (y por tanto el mismo cliente).
+    """
+
+    def __init__(self, timeout: int = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _http(self) -> httplib2.Http:
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = httplib2.Http(timeout=self.timeout)
+            # Igual que googleapiclient.http.build_http: 308 no es redirect en la API
+            try:
+                http.redirect_codes = http.redirect_codes - {308}
+            except AttributeError:
+                pass
+            self._local.http = http
+        return http
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        return self._http().request(uri, method=method, body=body, headers=headers,
+                                    redirections=redirections, connection_type=connection_type)
+
+    def close(self):
+        http = getattr(self._local, 'http', None)
+        if http is not None:
+            http.close()
+            self._local.http = None
+
+
+class ThrottledHttp:
+    """Pasa cada request real por el limitador de ritmo compartido del proceso."""
+
+    def __init__(self, inner, limiter=None):
+        self.inner = inner
+        self.limiter = limiter or get_rate_limiter()
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        self.limiter.acquire()
+        return self.inner.request(uri, method=method, body=body, headers=headers,
+                                  redirections=redirections, connection_type=connection_type)
+
+    def close(self):
+        self.inner.close()
+
+
+def with_api_key(uri: str, key: str) -> str:
+    """Sustituye (o añade) el parámetro key= de una URI de la API."""
+    parts = urlsplit(uri)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name != 'key']
+    query.append(('key', key))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _batch_with_api_key(body, key: str):
+    """Pone `key` en la línea de petición de cada sub-request de un POST batch."""
+    text = body.decode('utf-8') if isinstance(body, bytes) else body
+    text = _BATCH_REQUEST_LINE.sub(lambda m: f"{m.group(1)}{with_api_key(m.group(2), key)}{m.group(3)}", text)
+    return text.encode('utf-8') if isinstance(body, bytes) else text
+
+
+class QuotaHttp:
+    """Reserva en el planificador de cuota las unidades de cada llamada real.
+
+    Si no queda presupuesto lanza QuotaExceeded antes de tocar la red. Las
+    llamadas que fallan sin respuesta (timeout, conexión) devuelven su reserva.
+    Con un pool de varias keys, la request sale con la key en la que se ha
+    reservado (en los POST batch, la que reservó BatchLookup para el lote).
+    """
+
+    def __init__(self, inner, scheduler=None):
+        self.inner = inner
+        self.scheduler = scheduler or get_quota_scheduler()
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        endpoint = endpoint_from_uri(uri)
+        if endpoint is None:
+            key = self.scheduler.current_key()
+            if key and body and method == 'POST' and '/batch' in uri:
+                body = _batch_with_api_key(body, key)
+            return self.inner.request(uri, method=method, body=body, headers=headers,
+                                      redirections=redirections, connection_type=connection_type)
+
+        units = self.scheduler.reserve(endpoint)
+        key = self.scheduler.current_key()
+        if key:
+            uri = with_api_key(uri, key)
+        try:
+            resp, content = self.inner.request(uri, method=method, body=body, headers=headers,
+                                               redirections=redirections, connection_type=connection_type)
+        except Exception:
+            self.scheduler.refund(units)
+            raise
+        keyword = normalize_params(uri).get('q', '')
+        tracker.log_youtube_request(endpoint, units, keyword, f"YouTube {endpoint}.list()",
+                                    api_key=mask_key(key) if key else '')
+        return resp, content
+
+    def close(self):
+        self.inner.close()
+
+
+class RetryingHttp:
+    """Pasa cada llamada por el motor de reintentos compartido (retry_engine).
+
+    Las respuestas >= 400 se clasifican por su `reason`: rate limits, 5xx y
+    errores de red se reintentan (cada intento vuelve a reservar cuota y a
+    pedir turno al limitador); quotaExceeded marca agotada la key usada y, si
+    el pool aún tiene otra con presupuesto, repite la llamada con ella; si no,
+    lanza QuotaExceeded. El resto se devuelve tal cual para que googleapiclient
+    lo convierta en HttpError.
+    """
+
+    def __init__(self, inner, engine=None, scheduler=None):
+        self.inner = inner
+        self.engine = engine or get_retry_engine('youtube')
+        self.scheduler = scheduler or get_quota_scheduler()
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        endpoint = endpoint_from_uri(uri) or 'batch'
+
+        def attempt():
+            resp, content = self.inner.request(uri, method=method, body=body, headers=headers,
+                                               redirections=redirections, connection_type=connection_type)
+            if resp.status >= 400:
+                raise ResponseFailure(resp.status, resp, content, result=(resp, content))
+            return resp, content
+
+        while True:
+            try:
+                return self.engine.call(f"youtube.{endpoint}", attempt)
+            except ResponseFailure as failure:
+                info = classify_error(failure)
+                if info.kind != 'quota':
+                    return failure.result
+                # Cada vuelta agota una key, así que el bucle termina como mucho en N keys
+                self.scheduler.mark_exhausted()
+                if self.scheduler.remaining() <= 0:
+                    raise QuotaExceeded(f"La API devolvió {info.reason} en {endpoint}: cuota diaria agotada")
+                print(f"🔑 {info.reason} en {endpoint}: key agotada, se repite con otra del pool")
+
+    def close(self):
+        self.inner.close()
+
+
+def response_etag(content: bytes) -> Tuple[Optional[str], float]:
+    """ETag de una respuesta de la API y lo que cuesta parsearla (ms).
+
+    El etag viaja en el cuerpo (las máscaras de videos/channels lo piden); el
+    tiempo de parseo medido aquí es el que se ahorra cada 304 posterior.
+    """
+    start = time.perf_counter()
+    try:
+        etag = json.loads(content).get('etag')
+    except (ValueError, AttributeError):
+        return None, 0.0
+    return etag, (time.perf_counter() - start) * 1000
+
+
+def _record_not_modified(endpoint: str, size: int, parse_ms: float):
+    with _etag_lock:
+        _etag_stats['not_modified'] += 1
+        _etag_stats['bytes_saved'] += size
+        _etag_stats['parse_ms_saved'] += parse_ms
+    tracker.log_cache_event(endpoint, hit=True, revalidated=True, bytes_saved=size)
+
+
+class CachingHttp:
+    """Transporte que sirve GETs de la API desde ResponseCache.
+
+    mode='read-write': lee de la caché si la entrada está vigente y guarda las
+    respuestas 200 nuevas. mode='offline': nunca sale a la red; sirve entradas
+    aunque hayan caducado y lanza OfflineCacheMiss si no existen. En
+    channels.list y videos.list una entrada caducada con ETag se revalida con
+    If-None-Match: un 304 cuenta como acierto y sirve el contenido guardado.
+    """
+
+    def __init__(self, inner, cache: ResponseCache, mode: str = 'read-write'):
+        self.inner = inner
+        self.cache = cache
+        self.mode = mode
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        endpoint = endpoint_from_uri(uri) if method == 'GET' else None
+        if endpoint is None:
+            return self.inner.request(uri, method=method, body=body, headers=headers,
+                                      redirections=redirections, connection_type=connection_type)
+
+        params = normalize_params(uri)
+        cached = self.cache.get(endpoint, params, ignore_ttl=(self.mode == 'offline'))
+        if cached is not None:
+            self.stats['hits'] += 1
+            tracker.log_cache_event(endpoint, hit=True)
+            content, content_type = cached
+            return httplib2.Response({'status': '200', 'content-type': content_type}), content
+
+        if self.mode == 'offline':
+            self.stats['misses'] += 1
+            tracker.log_cache_event(endpoint, hit=False)
+            raise OfflineCacheMiss(f"Sin respuesta cacheada para {endpoint} {params}")
+
+        stale = self.cache.get_revalidatable(endpoint, params) if endpoint in ETAG_ENDPOINTS else None
+        if stale is not None:
+            headers = dict(headers or {})
+            headers['If-None-Match'] = stale[2]
+            with _etag_lock:
+                _etag_stats['conditional'] += 1
+
+        resp, content = self.inner.request(uri, method=method, body=body, headers=headers,
+                                           redirections=redirections, connection_type=connection_type)
+        if stale is not None and resp.status == 304:
+            content, content_type, _, parse_ms = stale
+            self.stats['hits'] += 1
+            self.stats['not_modified'] += 1
+            self.cache.touch(endpoint, params)
+            _record_not_modified(endpoint, len(content), parse_ms)
+            return httplib2.Response({'status': '200', 'content-type': content_type}), content
+
+        self.stats['misses'] += 1
+        tracker.log_cache_event(endpoint, hit=False)
+        if resp.status == 200:
+            etag, parse_ms = response_etag(content) if endpoint in ETAG_ENDPOINTS else (None, None)
+            self.cache.put(endpoint, params, content, resp.get('content-type', 'application/json'),
+                           etag=etag, parse_ms=parse_ms)
+        return resp, content
+
+    def close(self):
+        self.inner.close()
+
+
+def configure_cache(mode: str):
+    """Selecciona el modo de caché (off | read-write | offline) para los clientes nuevos."""
+    global _cache_mode
+    if mode not in CACHE_MODES:
+        raise ValueError(f"cache_mode inválido: {mode} (opciones: {', '.join(CACHE_MODES)})")
+    _cache_mode = mode
+    reset_clients()
+
+
+def configure_transport(mode: str, fixtures_dir: Optional[str] = None,
+                        latency_ms: Optional[float] = None, jitter_ms: Optional[float] = None):
+    """Selecciona el transporte de red: live | record (graba fixtures) | replay (sin red).
+
+    En 'record' la caché de respuestas no se consulta, para que todas las
+    respuestas lleguen a la red y queden grabadas.
+    """
+    global _transport_mode, _replay_http
+    if mode not in TRANSPORT_MODES:
+        raise ValueError(f"transporte inválido: {mode} (opciones: {', '.join(TRANSPORT_MODES)})")
+    _transport_mode = mode
+    if fixtures_dir is not None:
+        _transport_options['fixtures_dir'] = fixtures_dir
+    if latency_ms is not None:
+        _transport_options['latency_ms'] = latency_ms
+    if jitter_ms is not None:
+        _transport_options['jitter_ms'] = jitter_ms
+    _replay_http = None
+    reset_clients()
+
+
+def get_replay_http() -> Optional[ReplayHttp]:
+    """Transporte de replay activo (para leer sus round-trips en benchmarks)."""
+    return _replay_http
+
+
+def _cache_enabled() -> bool:
+    return _cache_mode != 'off' and _transport_mode != 'record'
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def cached_response(uri: str) -> Optional[bytes]:
+    """Consulta la caché para una URI de la API fuera del transporte (lotes).
+
+    Las requests agrupadas en un batch viajan dentro de un POST multipart que
+    CachingHttp no puede inspeccionar, así que el agrupador pregunta aquí por
+    cada sub-request antes de meterla en el lote. Respeta el modo de caché.
+    Si la entrada está caducada pero se puede revalidar (revalidation_entry)
+    el fallo no se anota aquí sino al conocer la respuesta (revalidated).
+    """
+    endpoint = endpoint_from_uri(uri)
+    if not _cache_enabled() or endpoint is None:
+        return None
+    params = normalize_params(uri)
+    cached = get_response_cache().get(endpoint, params, ignore_ttl=(_cache_mode == 'offline'))
+    if cached is not None:
+        tracker.log_cache_event(endpoint, hit=True)
+        return cached[0]
+    if _cache_mode == 'offline':
+        tracker.log_cache_event(endpoint, hit=False)
+        raise OfflineCacheMiss(f"Sin respuesta cacheada para {endpoint} {params}")
+    if revalidation_entry(uri) is None:
+        tracker.log_cache_event(endpoint, hit=False)
+    return None
+
+
+def revalidation_entry(uri: str) -> Optional[Tuple[bytes, str, str, float]]:
+    """Entrada caducada con ETag para enviar la sub-request con If-None-Match."""
+    endpoint = endpoint_from_uri(uri)
+    if _cache_mode != 'read-write' or _transport_mode == 'record' or endpoint not in ETAG_ENDPOINTS:
+        return None
+    return get_response_cache().get_revalidatable(endpoint, normalize_params(uri))
+
+
+def revalidated(uri: str, entry: Tuple[bytes, str, str, float], not_modified: bool):
+    """Resultado de una sub-request condicional: 304 -> acierto (renueva la entrada); 200 -> fallo."""
+    endpoint = endpoint_from_uri(uri)
+    with _etag_lock:
+        _etag_stats['conditional'] += 1
+    if not_modified:
+        get_response_cache().touch(endpoint, normalize_params(uri))
+        _record_not_modified(endpoint, len(entry[0]), entry[3])
+    else:
+        tracker.log_cache_event(endpoint, hit=False)
+
+
+def store_response(uri: str, content: bytes):
+    """Guarda en la caché la respuesta de una sub-request de un lote."""
+    endpoint = endpoint_from_uri(uri)
+    if _cache_mode == 'read-write' and endpoint is not None:
+        etag, parse_ms = response_etag(content) if endpoint in ETAG_ENDPOINTS else (None, None)
+        get_response_cache().put(endpoint, normalize_params(uri), content, etag=etag, parse_ms=parse_ms)
+
+
+def etag_summary() -> str:
+    s = _etag_stats
+    return (f"🏷️  ETag: {s['conditional']} requests condicionales | {s['not_modified']} sin cambios (304) | "
+            f"{s['bytes_saved'] / 1024:.1f} KB y {s['parse_ms_saved']:.1f} ms de parseo ahorrados")
+
+
+def _build_network():
+    global _replay_http
+    store = FixtureStore(_transport_options['fixtures_dir'])
+    if _transport_mode == 'replay':
+        # Uno por configuración: todos los clientes comparten latencia simulada y contador
+        if _replay_http is None:
+            _replay_http = ReplayHttp(store, latency_ms=_transport_options['latency_ms'],
+                                      jitter_ms=_transport_options['jitter_ms'])
+        return _replay_http
+    if _transport_mode == 'record':
+        return RecordingHttp(PooledHttp(), store)
+    return PooledHttp()
+
+
+def _build_transport():
+    # Orden: caché -> reintentos -> cuota -> limitador -> red (real, grabando o replay)
+    # (los aciertos de caché no gastan cuota ni esperan turno; cada reintento sí)
+    http = RetryingHttp(QuotaHttp(ThrottledHttp(_build_network())))
+    if _cache_enabled():
+        http = CachingHttp(http, get_response_cache(), _cache_mode)
+    return http
+
+
+def _get_discovery_doc() -> Optional[str]:
+    """Documento de discovery de youtube v3 (se lee una sola vez por proceso)."""
+    global _discovery_doc
+    if _discovery_doc is None:
+        _discovery_doc = get_static_doc(API_SERVICE_NAME, API_VERSION)
+    return _discovery_doc
+
+
+def get_youtube_client(api_key: str):
+    """Devuelve el cliente de YouTube compartido para `api_key`.
+
+    La primera llamada construye el recurso; las siguientes lo reutilizan sin
+    volver a parsear el discovery ni abrir un transporte nuevo.
+    """
+    client = _clients.get(api_key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(api_key)
+        if client is None:
+            http = _build_transport()
+            doc = _get_discovery_doc()
+            if doc:
+                client = build_from_document(doc, developerKey=api_key, http=http)
+            else:
+                # Sin documento estático en el paquete: descargarlo una vez
+                client = build(API_SERVICE_NAME, API_VERSION, developerKey=api_key,
+                               http=http, cache_discovery=False)
+            _clients[api_key] = client
+    return client
+
+
+def reset_clients():
+    """Descarta los clientes cacheados (útil en tests y benchmarks)."""
+    with _lock:
+        _clients.clear()
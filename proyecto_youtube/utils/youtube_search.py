@@ -5,46 +5,26 @@ Fecha: 28/08/2025
 """
 
 import sys
-import json
 from datetime import datetime
-import statistics
 # --- CONFIGURACIÓN DE CUOTA Y USO ---
-API_DAILY_LIMIT = 10000  # Cambia este valor si tu cuota diaria es diferente
-USAGE_FILE = "youtube_api_usage.json"
-
+# La cuota diaria la lleva el planificador compartido (utils/quota_scheduler.py):
+# el transporte del cliente reserva las unidades de cada llamada real y el
+# contador es común a todos los CLIs y a la web.
 def load_api_usage():
-    today = datetime.now().strftime("%Y-%m-%d")
-    try:
-        with open(USAGE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if data.get("date") == today:
-            return data["units"]
-        else:
-            return 0
-    except Exception:
-        return 0
-
-def save_api_usage(units):
-    today = datetime.now().strftime("%Y-%m-%d")
-    with open(USAGE_FILE, "w", encoding="utf-8") as f:
-        json.dump({"date": today, "units": units}, f)
-
-def print_api_usage(units):
-    print(f"\n🔢 Unidades gastadas hoy: {units:,} / {API_DAILY_LIMIT:,}  |  Quedan: {API_DAILY_LIMIT-units:,}")
-    if units > API_DAILY_LIMIT * 0.9:
-        print("⚠️  ¡Cuidado! Estás cerca del límite diario de la API de YouTube.")
-    elif units > API_DAILY_LIMIT:
+    return get_quota_scheduler().used()
+
+def print_api_usage(units=None):
+    scheduler = get_quota_scheduler()
+    units = scheduler.used() if units is None else units
+    limit = scheduler.daily_quota
+    print(f"\n🔢 Unidades gastadas hoy: {units:,} / {limit:,}  |  Quedan: {max(0, limit-units):,}")
+    print_key_summary()
+    if units > limit:
         print("❌ Has superado el límite diario de la API de YouTube. Detén el script para evitar bloqueos.")
+    elif units > limit * 0.9:
+        print("⚠️  ¡Cuidado! Estás cerca del límite diario de la API de YouTube.")
 
-# Inicializar contador global de unidades usadas (persistente por día)
-api_units_used = load_api_usage()
-import os
 import csv
-from datetime import datetime
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import time
-import random
 import argparse
 from pathlib import Path
 import shutil
@@ -54,18 +34,30 @@ except Exception:
     pd = None
 
 
-from pathlib import Path
 # Añadir la carpeta credentials local al path para importar config
 sys.path.append(str(Path(__file__).resolve().parents[1] / 'credentials'))
 from config import YOUTUBE_API_KEY
 
-# Asegurar que USAGE_FILE esté dentro del proyecto (no en root)
-USAGE_FILE = str(Path(__file__).resolve().parents[1] / 'utils' / 'youtube_api_usage.json')
+# Cliente de YouTube compartido (un build() por proceso, transporte keep-alive)
+sys.path.append(str(Path(__file__).resolve().parent))
+from youtube_client import get_youtube_client, configure_cache
+from field_masks import field_mask
+from quota_scheduler import get_quota_scheduler, print_key_summary
+from video_store import get_video_store
+from response_cache import CACHE_MODES, DEFAULT_CACHE_MODE
+from retry_engine import call_with_retries, print_retry_summary
+from lexicon import LEXICON_API_VERSION, get_lexicon
+from text_normalizer import get_text_cache, normalize_video
+from view_metrics import percentile as view_percentile, view_metrics
+from view_velocity import VELOCITY_METRICS, video_velocity
+from scoring_config import get_scoring_config, points_at_least
 
 
 # ---------------- CONFIGURABLE THRESHOLDS ----------------
-MEDIAN_VIEWS_THRESHOLD = int(os.environ.get('MEDIAN_VIEWS_THRESHOLD', 5000))
-P75_VIEWS_THRESHOLD = int(os.environ.get('P75_VIEWS_THRESHOLD', 20000))
+# Pesos y umbrales en config/scoring (MEDIAN_VIEWS_THRESHOLD / P75_VIEWS_THRESHOLD del entorno mandan)
+SCORING = get_scoring_config()
+MEDIAN_VIEWS_THRESHOLD = SCORING.median_min
+P75_VIEWS_THRESHOLD = SCORING.p75_min
 
 # Backwards-friendly names requested
 MEDIAN_MIN = MEDIAN_VIEWS_THRESHOLD
@@ -82,7 +74,9 @@ def decide_niche_soft(median_views: float, pct75_views: float,
       - EVALUAR si cumple al menos uno de los dos o ambos >= 60% del umbral
       - DESCARTAR si ambos por debajo del 60% del umbral
     Score (0-100): media de dos ratios recortados a 1, ponderada 50/50.
+    El 60% es soft_decision.partial_ratio de config/scoring.
     """
+    partial = SCORING.soft_decision['partial_ratio']
     # ratios recortados [0,1]
     r_med = max(0.0, min(1.0, median_views / float(median_min if median_min else 1)))
     r_p75 = max(0.0, min(1.0, pct75_views / float(p75_min if p75_min else 1)))
@@ -93,14 +87,14 @@ def decide_niche_soft(median_views: float, pct75_views: float,
         reason = (f"Mediana {median_views:,.0f} ≥ {median_min} y "
                   f"P75 {pct75_views:,.0f} ≥ {p75_min}")
     elif (median_views >= median_min or pct75_views >= p75_min) or \
-         (median_views >= 0.6*median_min and pct75_views >= 0.6*p75_min):
+         (median_views >= partial*median_min and pct75_views >= partial*p75_min):
         decision = "EVALUAR"
         reason = (f"Parcial: Mediana {median_views:,.0f} vs {median_min}, "
                   f"P75 {pct75_views:,.0f} vs {p75_min}")
     else:
         decision = "DESCARTAR"
-        reason = (f"Por debajo: Mediana {median_views:,.0f} < {int(0.6*median_min)}* "
-                  f"y P75 {pct75_views:,.0f} < {int(0.6*p75_min)}* (zona baja)")
+        reason = (f"Por debajo: Mediana {median_views:,.0f} < {int(partial*median_min)}* "
+                  f"y P75 {pct75_views:,.0f} < {int(partial*p75_min)}* (zona baja)")
     return decision, reason, score
 
 
@@ -124,59 +118,24 @@ def decide_niche(median_views: float, pct75_views: float) -> tuple[str, str]:
 
 
 
+# ---------------- DICCIONARIOS DE SEÑALES ----------------
+# Léxico compartido (config/lexicon/*.json), compilado una sola vez por proceso.
+# Palabras completas sin acentos: "top" no coincide con "laptop" ni "vs" con "canvas"
+LEXICON = get_lexicon(LEXICON_API_VERSION)
+MONETIZACION_MATCHER = LEXICON.phrase_matcher('keyword_monetization')
+AUTOMATIZABLE_MATCHER = LEXICON.phrase_matcher('title_automatizable')
+NO_AUTOMATIZABLE_MATCHER = LEXICON.phrase_matcher('title_manual')
+TITULOS_MATCHER = LEXICON.phrase_matcher('title_monetization')
+
+
 def clasificar_monetizacion(keyword):
     """
     Clasifica el potencial de monetización de un nicho (versión bilingüe mejorada)
     """
-    # Diccionario bilingüe para afiliación (ES/EN)
-    afiliacion_es = [
-        "pienso", "mejores productos", "review", "comparativa", "mejor cámara", 
-        "gadgets", "amazon", "descuento", "producto", "comprar", "precio",
-        "recomendación", "análisis", "unboxing", "test", "vs", "opinión",
-        "cual comprar", "marca", "calidad", "barato", "oferta", "promoción",
-        "top 10", "ranking", "equipamiento", "herramientas", "accesorios",
-        "comprar", "oferta", "precio", "cupón", "descuento", "amazon", 
-        "link en la descripción"
-    ]
-    
-    afiliacion_en = [
-        "buy", "deal", "price", "coupon", "discount", "amazon", 
-        "link in description", "referral", "affiliate", "sponsored",
-        "best", "review", "comparison", "better", "gadgets", "product",
-        "recommendation", "analysis", "unboxing", "test", "vs", "opinion",
-        "which to buy", "brand", "quality", "cheap", "offer", "promotion",
-        "top 10", "ranking", "equipment", "tools", "accessories"
-    ]
-    
-    # Diccionario bilingüe para anuncios de alto CPM (ES/EN)
-    anuncios_es = [
-        "finanzas", "criptomonedas", "bitcoin", "invertir", "banca", "seguros", 
-        "psicología", "coaching", "salud", "educación", "tecnología", "marketing", 
-        "negocio", "inversión", "curso", "formación", "desarrollo personal", 
-        "dinero", "emprendimiento", "startup", "forex", "trading", "bolsa",
-        "hipoteca", "prestamo", "ahorro", "jubilación", "terapia", "medicina"
-    ]
-    
-    anuncios_en = [
-        "finance", "cryptocurrency", "crypto", "bitcoin", "invest", "banking", "insurance",
-        "psychology", "coaching", "health", "education", "technology", "marketing",
-        "business", "investment", "course", "training", "personal development",
-        "money", "entrepreneurship", "startup", "forex", "trading", "stock",
-        "mortgage", "loan", "savings", "retirement", "therapy", "medicine",
-        "credit card", "real estate", "side hustle", "passive income"
-    ]
-    
-    keyword_lower = keyword.lower()
-    
-    # Combinar palabras de ambos idiomas
-    afiliacion_all = afiliacion_es + afiliacion_en
-    anuncios_all = anuncios_es + anuncios_en
-    
-    # Verificar si contiene palabras de afiliación
-    afiliable = any(palabra in keyword_lower for palabra in afiliacion_all)
-    
-    # Verificar si contiene palabras de anuncios de alto CPM
-    anunciable = any(palabra in keyword_lower for palabra in anuncios_all)
+    # Una pasada sobre la keyword con ambos idiomas y ambas categorías
+    categorias = MONETIZACION_MATCHER.categories_in(keyword)
+    afiliable = 'afiliacion' in categorias
+    anunciable = 'anuncios' in categorias
     
     if afiliable and anunciable:
         return "Afiliación + Anuncios"
@@ -191,33 +150,14 @@ def clasificar_monetizacion(keyword):
 def is_automatizable(title):
     """
     Determina si un video es automatizable con IA (versión refinada)
+    `title` puede ser el texto o el título ya normalizado (normalize_video(v).title)
     """
-    keywords_automatizables = [
-        "review", "top", "mejores", "comparativa", "guía", "tutorial", 
-        "introducción", "opinión", "análisis", "explicación", "cómo funciona", 
-        "historia de", "beneficios", "desventajas", "pros y contras",
-        "qué es", "tipos de", "características", "ventajas", "lista",
-        "ranking", "selección", "recomendaciones", "consejos", "curso",
-        "aprende", "enseñar", "método", "estrategia", "técnica", "proceso"
-    ]
-    
-    # Penalizar contenido manual/personal (expandido)
-    keywords_no_automatizables = [
-        "vlog", "mi experiencia", "reacción", "gameplay", "en vivo",
-        "mi historia", "testimonio", "día en mi vida", "rutina",
-        "behind the scenes", "challenge", "tag", "q&a", "manualidades",
-        "diy", "craft", "mi caso", "personal", "conmigo", "yo hago",
-        "mi método", "así lo hago", "mi forma", "unboxing", "haul"
-    ]
-    
-    title_lower = title.lower()
-    
     # Si contiene palabras no automatizables, es false
-    if any(kw in title_lower for kw in keywords_no_automatizables):
+    if NO_AUTOMATIZABLE_MATCHER.any(title):
         return False
     
     # Si contiene palabras automatizables, es true
-    return any(kw in title_lower for kw in keywords_automatizables)
+    return AUTOMATIZABLE_MATCHER.any(title)
 
 
 def analizar_titulos_monetizacion(videos):
@@ -227,25 +167,15 @@ def analizar_titulos_monetizacion(videos):
     afiliacion_count = 0
     anuncios_count = 0
     
-    # Palabras de afiliación bilingües
-    afiliacion_words_es = ["review", "mejor", "comparativa", "recomiendo", "análisis", "opinión", "top", "ranking", "producto", "comprar"]
-    afiliacion_words_en = ["review", "best", "comparison", "recommend", "analysis", "opinion", "top", "ranking", "product", "buy", "deal", "affiliate"]
-    afiliacion_words = afiliacion_words_es + afiliacion_words_en
-    
-    # Palabras de anuncios altos bilingües
-    anuncios_words_es = ["finanzas", "dinero", "inversión", "negocio", "curso", "coaching", "bitcoin", "crypto", "trading", "emprender"]
-    anuncios_words_en = ["finance", "money", "investment", "business", "course", "coaching", "bitcoin", "crypto", "trading", "entrepreneur", "credit", "loan", "insurance"]
-    anuncios_words = anuncios_words_es + anuncios_words_en
-    
     for video in videos:
-        title = video['title'].lower()
+        categorias = TITULOS_MATCHER.categories_in(normalize_video(video).title)
         
         # Contar videos con potencial de afiliación
-        if any(word in title for word in afiliacion_words):
+        if 'afiliacion' in categorias:
             afiliacion_count += 1
         
         # Contar videos con potencial de anuncios altos
-        if any(word in title for word in anuncios_words):
+        if 'anuncios' in categorias:
             anuncios_count += 1
     
     # TODO: Arreglar ratio monetizable para no superar 100%
@@ -293,51 +223,31 @@ def calcular_potencial_total_refinado(avg_views, monetizacion, automatizable, vi
     - Tipo monetización: 35% (0-35 puntos) - reducido pero aún importante
     - Automatización: 25% (0-25 puntos)
     - % videos monetizables: 10% (0-10 puntos) + modificadores
+    Tramos y puntos: sección 'refined_potential' de config/scoring.
     """
-    
-    # 1. VIEWS PROMEDIO (30% = 30 puntos máximo)
-    if avg_views >= 1000000:
-        views_score = 30
-    elif avg_views >= 500000:
-        views_score = 26
-    elif avg_views >= 100000:
-        views_score = 22
-    elif avg_views >= 50000:
-        views_score = 18
-    elif avg_views >= 10000:
-        views_score = 12
-    elif avg_views >= 1000:
-        views_score = 8
-    else:
-        views_score = 3
-    
-    # 2. TIPO DE MONETIZACIÓN (35% = 35 puntos máximo) - más tolerante
-    monetizacion_scores = {
-        "Afiliación + Anuncios": 35,
-        "Solo Anuncios": 28,
-        "Solo Afiliación": 24,
-        "Difícil Monetizar": 15  # Aumentado de 5 a 15 para ser menos penalizante
-    }
-    monetizacion_score = monetizacion_scores.get(monetizacion, 15)
-    
-    # 3. AUTOMATIZACIÓN (25% = 25 puntos máximo)
-    automatizacion_score = 25 if automatizable else 8
-    
-    # 4. % VIDEOS MONETIZABLES con sistema de modificadores relajado
-    base_monetizables = 5  # Puntuación base
-    
-    if videos_monetizables_pct < 10:
-        # Penalizar pero no eliminar (-10 puntos)
-        monetizables_modifier = -10
-    elif 10 <= videos_monetizables_pct <= 30:
-        # Neutro (0 modificador)
-        monetizables_modifier = 0
+    cfg = SCORING.refined_potential
+
+    # 1. VIEWS PROMEDIO (tramos de 30 a 3 puntos)
+    views_score = points_at_least(avg_views, cfg['views_tiers'], cfg['views_floor'])
+
+    # 2. TIPO DE MONETIZACIÓN ("Difícil Monetizar" sube a 15 para ser menos penalizante)
+    monetizacion_score = cfg['monetization_scores'].get(monetizacion, cfg['monetization_default'])
+
+    # 3. AUTOMATIZACIÓN
+    automatizacion_score = cfg['automation_yes'] if automatizable else cfg['automation_no']
+
+    # 4. % VIDEOS MONETIZABLES con sistema de modificadores relajado:
+    # por debajo del mínimo penaliza (sin eliminar), en el rango neutro, por encima bonifica
+    low_modifier, neutral_modifier, high_modifier = cfg['monetizables_modifiers']
+    if videos_monetizables_pct < cfg['monetizables_low_pct']:
+        monetizables_modifier = low_modifier
+    elif videos_monetizables_pct <= cfg['monetizables_high_pct']:
+        monetizables_modifier = neutral_modifier
     else:
-        # Bonificar (+10 puntos)
-        monetizables_modifier = 10
-    
-    monetizables_score = max(0, base_monetizables + monetizables_modifier)
-    
+        monetizables_modifier = high_modifier
+
+    monetizables_score = max(0, cfg['monetizables_base'] + monetizables_modifier)
+
     total = views_score + monetizacion_score + automatizacion_score + monetizables_score
     return min(100, max(0, total))
 
@@ -362,6 +272,7 @@ def exportar_resultados_completos_csv(results, descartados_list, filename=None,
             'keyword', 'status', 'avg_views', 'median_views', 'pct75_views', 'max_views', 'video_count', 
             'monetizacion', 'automatizable', 'automatizable_count', 
             'score_refinado', 'riesgo_saturacion', 'porcentaje_monetizables',
+            'median_views_per_day', 'recency_weighted_median_views',
             'decision', 'reason', 'motivo_descarte'
         ]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
@@ -387,6 +298,8 @@ def exportar_resultados_completos_csv(results, descartados_list, filename=None,
                 'score_refinado': result['potencial_total_refinado'],
                 'riesgo_saturacion': result['riesgo_saturacion'],
                 'porcentaje_monetizables': round(result['analisis_titulos']['porcentaje_monetizables'], 1),
+                'median_views_per_day': result.get('median_views_per_day', ''),
+                'recency_weighted_median_views': result.get('recency_weighted_median_views', ''),
                 'decision': result.get('decision', ''),
                 'reason': result.get('reason', ''),
                 'motivo_descarte': ''
@@ -456,7 +369,7 @@ def search_videos(query, max_results=10, region_code=None, relevance_language=No
     """
     Busca videos en YouTube por palabra clave
     """
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    youtube = get_youtube_client(YOUTUBE_API_KEY)
 
     # Buscar videos
     search_params = dict(
@@ -464,7 +377,8 @@ def search_videos(query, max_results=10, region_code=None, relevance_language=No
         part="snippet",
         type="video",
         maxResults=max_results,
-        order="relevance"
+        order="relevance",
+        fields=field_mask('search.video_snippets')
     )
     if region_code:
         search_params['regionCode'] = region_code
@@ -473,9 +387,9 @@ def search_videos(query, max_results=10, region_code=None, relevance_language=No
 
     search_request = youtube.search().list(**search_params)
 
-    # Ejecutar con reintentos
+    # Los reintentos (rate limit, 5xx, red) los hace el transporte compartido (retry_engine)
     try:
-        search_response = execute_with_retries(lambda: search_request.execute())
+        search_response = search_request.execute()
     except Exception as e:
         print(f"Error de API de YouTube al buscar: {e}")
         return []
@@ -486,29 +400,19 @@ def search_videos(query, max_results=10, region_code=None, relevance_language=No
     if not video_ids:
         return []
 
-    # Obtener estadísticas de los videos
-    stats_request = youtube.videos().list(
-        part="statistics,contentDetails",
-        id=",".join(video_ids)
-    )
-
+    # Estadísticas de los videos (los ya vistos con otra keyword se sirven del almacén)
     try:
-        stats_response = execute_with_retries(lambda: stats_request.execute())
+        stats_items = get_video_store().get_many(youtube, video_ids, keyword=query)
     except Exception as e:
         print(f"Error de API de YouTube al obtener stats: {e}")
         return []
 
-    # Combinar datos
+    # Combinar datos (las unidades las reserva el planificador de cuota del cliente)
     results = []
-    global api_units_used
-    # Cada llamada a search().list cuesta 100 unidades
-    api_units_used += 100
-    # Cada llamada a videos().list cuesta 1 unidad por video consultado
-    api_units_used += len(video_ids)
-    for i, item in enumerate(search_response.get('items', [])):
+    for item in search_response.get('items', []):
         video_id = item.get('id', {}).get('videoId', '')
         snippet = item.get('snippet', {})
-        stats_item = stats_response.get('items', [])[i] if i < len(stats_response.get('items', [])) else {}
+        stats_item = stats_items.get(video_id, {})
         statistics = stats_item.get('statistics', {})
         content_details = stats_item.get('contentDetails', {})
         video_data = {
@@ -527,71 +431,15 @@ def search_videos(query, max_results=10, region_code=None, relevance_language=No
     return results
 
 
-def execute_with_retries(callable_func, max_retries=5, initial_backoff=1.0, backoff_factor=2.0):
-    """Ejecuta una función que realiza una llamada de red y reintenta en errores transitorios.
-
-    callable_func: función sin argumentos que realiza la llamada (p. ej. lambda: request.execute())
-    max_retries: número máximo de intentos
-    initial_backoff: segundos iniciales de espera
-    backoff_factor: multiplicador exponencial
-    """
-    backoff = float(initial_backoff)
-    for attempt in range(1, max_retries + 1):
-        try:
-            return callable_func()
-        except HttpError as he:
-            # Intentar extraer el código de estado
-            status = None
-            try:
-                status = int(he.resp.status)
-            except Exception:
-                pass
-
-            # Reintentar para 403, 429 y 5xx
-            if status in (403, 429) or (status and 500 <= status < 600):
-                if attempt == max_retries:
-                    raise
-                sleep_time = backoff + random.uniform(0, 0.5 * backoff)
-                print(f"⚠️ HttpError {status} — reintento {attempt}/{max_retries} en {sleep_time:.1f}s...")
-                time.sleep(sleep_time)
-                backoff *= backoff_factor
-                continue
-            # Otros HttpError: re-lanzar
-            raise
-        except Exception as e:
-            # Para errores genéricos (p. ej. timeouts) también reintentamos
-            if attempt == max_retries:
-                raise
-            sleep_time = backoff + random.uniform(0, 0.5 * backoff)
-            print(f"⚠️ Error de red ({e}) — reintento {attempt}/{max_retries} en {sleep_time:.1f}s...")
-            time.sleep(sleep_time)
-            backoff *= backoff_factor
-    # Si llega aquí, todos los reintentos fallaron
-    raise RuntimeError("Máximo de reintentos alcanzado")
-
-
 def compute_median_and_percentile(values, percentile=75):
     """Devuelve la mediana y el percentil indicado (ej. 75) de una lista de valores.
 
-    Usa interpolación lineal cuando sea necesario.
+    Usa interpolación lineal cuando sea necesario (view_metrics.percentile).
     """
     if not values:
         return 0, 0
     vals = sorted(values)
-    median = statistics.median(vals)
-
-    # Cálculo de percentil con interpolación similar a numpy.percentile(method='linear')
-    k = (len(vals) - 1) * (percentile / 100.0)
-    f = int(k)
-    c = min(f + 1, len(vals) - 1)
-    if f == c:
-        pct_val = vals[int(k)]
-    else:
-        d0 = vals[f] * (c - k)
-        d1 = vals[c] * (k - f)
-        pct_val = d0 + d1
-
-    return median, pct_val
+    return view_percentile(vals, 50), view_percentile(vals, percentile)
 
 
 def analyze_niche_with_tracking(keyword, descartados_list, region_code=None, relevance_language=None, median_min=None, p75_min=None):
@@ -620,18 +468,20 @@ def analyze_niche_with_tracking(keyword, descartados_list, region_code=None, rel
             'automatizable': False,
             'automatizable_count': 0,
             'monetizable_ratio_pct': 0.0,
-            'riesgo_saturacion': 'N/A'
+            'riesgo_saturacion': 'N/A',
+            **{name: 0 for name in VELOCITY_METRICS}
         }
         descartados_list.append(result.copy())
         return result
     
     # TODO: Mostrar siempre métricas y luego la decisión (sin early return por descarte)
-    count = len(videos)
-    total_views = sum(v['viewCount'] for v in videos)
-    avg_views = total_views / count
-    views_list = [v['viewCount'] for v in videos]
-    median_views, pct75_views = compute_median_and_percentile(views_list, 75)
-    max_views = max(v['viewCount'] for v in videos)
+    stats = view_metrics([v['viewCount'] for v in videos])
+    velocity = video_velocity(videos)  # publishedAt/duration ya vienen con los videos
+    count = stats['count']
+    total_views = stats['total']
+    avg_views = stats['mean']
+    median_views, pct75_views = stats['median'], stats['pct']
+    max_views = stats['max']
     
     # Usar umbrales pasados o defaults globales
     actual_median_min = median_min if median_min is not None else MEDIAN_MIN
@@ -644,6 +494,8 @@ def analyze_niche_with_tracking(keyword, descartados_list, region_code=None, rel
     print(f"   Mediana views: {median_views:,.0f}")
     print(f"   Percentil 75 views: {pct75_views:,.0f}")
     print(f"   Views máximas: {max_views:,.0f}")
+    print(f"   Views/día (mediana): {velocity['median_views_per_day']:,.1f} | "
+          f"Mediana por recencia: {velocity['recency_weighted_median_views']:,}")
     
     # decisión suave
     decision, reason, base_score = decide_niche_soft(median_views, pct75_views, actual_median_min, actual_p75_min)
@@ -654,7 +506,7 @@ def analyze_niche_with_tracking(keyword, descartados_list, region_code=None, rel
     analisis_titulos = analizar_titulos_monetizacion(videos)
     
     # Automatización
-    automatizable_count = sum([is_automatizable(v['title']) for v in sorted_videos])
+    automatizable_count = sum([is_automatizable(normalize_video(v).title) for v in sorted_videos])
     automatizable = automatizable_count >= 3
     
     # monetización/automatización ajustan SOLO el score, no la 'decision' base
@@ -689,7 +541,7 @@ def analyze_niche_with_tracking(keyword, descartados_list, region_code=None, rel
     score_refinado = max(0.0, min(100.0, score_refinado))
     
     # Semáforo de saturación (riesgo visual)
-    saturacion_ratio = avg_views / max_views
+    saturacion_ratio = stats['saturation_ratio']
     if saturacion_ratio >= 0.8:
         riesgo_saturacion_visual = "🟢 Bajo"
     elif 0.4 <= saturacion_ratio < 0.8:
@@ -707,7 +559,7 @@ def analyze_niche_with_tracking(keyword, descartados_list, region_code=None, rel
     # Mostrar top 5 videos con clasificación
     print(f"\n🏆 Top 5 videos más populares:")
     for i, video in enumerate(sorted_videos, 1):
-        auto_icon = "🤖" if is_automatizable(video['title']) else "👤"
+        auto_icon = "🤖" if is_automatizable(normalize_video(video).title) else "👤"
         print(f"   {i}. {auto_icon} {video['title'][:60]}... - {video['viewCount']:,} views")
     
     print("----------------------------------------------------------------------")
@@ -730,6 +582,7 @@ def analyze_niche_with_tracking(keyword, descartados_list, region_code=None, rel
         "automatizable_count": automatizable_count,
         "monetizable_ratio_pct": monetizable_ratio_pct,
         "riesgo_saturacion": riesgo_saturacion_visual,
+        **velocity,
         # Legacy fields for compatibility
         'video_count': count,
         'total_views': total_views,
@@ -758,14 +611,13 @@ def analyze_niche(keyword, region_code=None, relevance_language=None):
         print("❌ No se encontraron videos")
     return None
     
-    # Calcular métricas básicas
-    total_views = sum(v['viewCount'] for v in videos)
-    avg_views = total_views / len(videos)
-    # Mediana y percentil 75
-    views_list = [v['viewCount'] for v in videos]
-    median_views, pct75_views = compute_median_and_percentile(views_list, 75)
-    max_views = max(v['viewCount'] for v in videos)
-    
+    # Calcular métricas básicas (una pasada, incluida la saturación)
+    stats = view_metrics([v['viewCount'] for v in videos])
+    total_views = stats['total']
+    avg_views = stats['mean']
+    median_views, pct75_views = stats['median'], stats['pct']
+    max_views = stats['max']
+
     # ✅ 1. Filtro por views promedio bajos
     # Ignorar nichos con menos de 10.000 views promedio
     if avg_views < 10000:
@@ -781,7 +633,7 @@ def analyze_niche(keyword, region_code=None, relevance_language=None):
     analisis_titulos = analizar_titulos_monetizacion(videos)
     
     # Automatización
-    automatizable_count = sum([is_automatizable(v['title']) for v in sorted_videos])
+    automatizable_count = sum([is_automatizable(normalize_video(v).title) for v in sorted_videos])
     automatizable = automatizable_count >= 3  # Al menos 3 de 5 videos automatizables
     
     # Score refinado con nueva fórmula (la monetización ahora es solo un modificador)
@@ -800,7 +652,7 @@ def analyze_niche(keyword, region_code=None, relevance_language=None):
     
     # ✅ 4. Semáforo de saturación (riesgo visual)
     # Calcular riesgo de saturación con semáforo
-    saturacion_ratio = avg_views / max_views
+    saturacion_ratio = stats['saturation_ratio']
     if saturacion_ratio >= 0.8:
         riesgo_saturacion_visual = "🟢 Bajo"
     elif 0.4 <= saturacion_ratio < 0.8:
@@ -824,7 +676,7 @@ def analyze_niche(keyword, region_code=None, relevance_language=None):
     # Mostrar top 5 videos con clasificación
     print(f"\n🏆 Top 5 videos más populares:")
     for i, video in enumerate(sorted_videos, 1):
-        auto_icon = "🤖" if is_automatizable(video['title']) else "👤"
+        auto_icon = "🤖" if is_automatizable(normalize_video(video).title) else "👤"
     print(f"   {i}. {auto_icon} {video['title'][:60]}... - {video['viewCount']:,} views")
     
     # --- Decidir usando decide_niche ---
@@ -893,7 +745,8 @@ def get_keywords_from_pytrends(pn='spain', geo='ES', hl='es-ES'):
         print("🔥 Obteniendo tendencias de Google Trends...")
         # Build payload with a sensible timeframe for related queries
         try:
-            pytrends.build_payload(kw_list=[""], geo=geo, timeframe="today 3-m", hl=hl)
+            call_with_retries('trends.build_payload', pytrends.build_payload,
+                              kw_list=[""], geo=geo, timeframe="today 3-m", hl=hl, engine='trends')
         except Exception:
             # Si falla con lista vacía, no detener -- construiremos después
             pass
@@ -901,15 +754,18 @@ def get_keywords_from_pytrends(pn='spain', geo='ES', hl='es-ES'):
         # Intentar trending_searches con el pn pedido; si falla, hacer fallback
         try:
             print(f"🌍 Intentando trending_searches(pn={pn})")
-            trending_searches = pytrends.trending_searches(pn=pn)
+            trending_searches = call_with_retries('trends.trending_searches', pytrends.trending_searches,
+                                                  pn=pn, engine='trends')
         except Exception as e:
             print(f"⚠️ pn='{pn}' no válido o error: {e}. Haciendo fallback a 'spain'.")
             try:
-                trending_searches = pytrends.trending_searches(pn='spain')
+                trending_searches = call_with_retries('trends.trending_searches', pytrends.trending_searches,
+                                                      pn='spain', engine='trends')
             except Exception as e2:
                 print(f"⚠️ Fallback a 'spain' falló: {e2}. Intentando 'united_states'.")
                 try:
-                    trending_searches = pytrends.trending_searches(pn='united_states')
+                    trending_searches = call_with_retries('trends.trending_searches', pytrends.trending_searches,
+                                                          pn='united_states', engine='trends')
                 except Exception as e3:
                     print(f"❌ No se pudo obtener trending_searches: {e3}")
                     return []
@@ -1222,7 +1078,9 @@ def main():
     parser.add_argument('--interactive', action='store_true', help='Usar menú interactivo para seleccionar keywords')
     parser.add_argument('--publish-desktop', action='store_true', help='Copiar resultados y generar MD en el Escritorio (Script Youtube)')
     parser.add_argument('--publish-dir', default=None, help='Copiar resultados y generar MD en la carpeta indicada')
+    parser.add_argument('--cache-mode', choices=CACHE_MODES, default=DEFAULT_CACHE_MODE, help='Caché de respuestas de la API: off | read-write | offline')
     args = parser.parse_args()
+    configure_cache(args.cache_mode)
 
     # TODO: Ajustar defaults por región:
     # ES: MEDIAN_MIN=5000, P75_MIN=20000 (igual)
@@ -1412,6 +1270,11 @@ def main():
         print("   - Busca nichos con mayor potencial de monetización")
         print("   - Considera nichos con mejor volumen de búsqueda")
 
+    print_api_usage()
+    print(get_video_store().summary())
+    print(get_text_cache().summary())
+    print_retry_summary()
+
     # Si el usuario pidió publicar en el Escritorio o en una carpeta personalizada, copiar los archivos
     try:
         if out_path and (args.publish_desktop or args.publish_dir):